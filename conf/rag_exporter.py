@@ -2,26 +2,71 @@
 RAG Exporter for ERNI-KI.
 
 Prometheus exporter that monitors RAG (Retrieval Augmented Generation) endpoint
-health and latency metrics. Probes the OpenWebUI health endpoint at regular
-intervals and exposes metrics for Prometheus scraping.
+health and latency metrics. Probes a configurable list of targets (OpenWebUI,
+RAGFlow, LiteLLM, SearXNG, ...) concurrently on an asyncio loop, each with its
+own interval and timeout, and exposes metrics for Prometheus scraping.
+
+Only one process per host probes: the scheduler holds an exclusive lock on
+``RAG_PROBE_LOCK`` and other gunicorn workers (or exporter replicas sharing the
+lock directory) stay idle until the leader exits. Probing starts from ``main()``
+or the ``create_app()`` gunicorn factory, never at import time.
+
+Metrics live in a per-process registry, so only the leader's ``/metrics`` has
+probe results. Run gunicorn with ``--workers 1`` (as the Dockerfile does); with
+more workers a scrape may land on an idle one, which reports
+``erni_ki_rag_probe_leader 0``.
+
+Targets come from ``RAG_PROBE_TARGETS`` (JSON list) or ``RAG_PROBE_TARGETS_FILE``;
+without either, ``RAG_TEST_URL`` is probed as the single target ``openwebui``.
+Each target accepts ``name``, ``url`` and optionally ``interval``, ``timeout``,
+``method``, ``json`` (request body), ``headers``, ``verify_tls`` and
+``token_env`` (variable holding a bearer token).
+
+``mode`` selects what a probe does:
+- ``health`` (default): one request to ``url``.
+- ``openwebui``: asks every question of the canned set through the streaming
+  OpenWebUI chat API (``url`` = ``/api/chat/completions``, ``model`` required,
+  ``json`` merged into the body, e.g. ``files`` with a knowledge collection).
+- ``ragflow``: sends every question to RAGFlow ``/api/v1/retrieval``
+  (``dataset_ids`` required, ``json`` merged into the body).
+
+Questions come from ``questions`` (inline) or ``questions_file`` (JSON list);
+each is a string or ``{"question": ..., "expected": [document names]}``. A
+question hits when any returned source matches an expected name
+(case-insensitive substring).
 
 Metrics exported:
-- erni_ki_rag_response_latency_seconds: Histogram of RAG response latency
-- erni_ki_rag_sources_count: Number of sources in last RAG response
+- erni_ki_rag_response_latency_seconds{target}: Histogram of successful probe latency
+- erni_ki_rag_time_to_first_token_seconds{target}: Histogram of time to first token/byte
+- erni_ki_rag_sources_count{target}: Number of distinct source documents in last RAG response
+- erni_ki_rag_expected_document_hit_ratio{target}: Share of questions with an expected hit
+- erni_ki_rag_probe_failures_total{target,reason}: Failed probes (timeout, connection, http,
+  invalid_response, error)
+- erni_ki_rag_probe_leader: 1 in the process that holds the prober lock, else 0
 """
 
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
 import logging
 import os
 import signal
 import threading
 import time
-from typing import Any
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
 
 import requests
 from flask import Flask, Response
 from prometheus_client import (  # type: ignore[reportMissingImports]
     CONTENT_TYPE_LATEST,
     CollectorRegistry,
+    Counter,
     Gauge,
     Histogram,
     generate_latest,
@@ -33,8 +78,11 @@ DEFAULT_RAG_TEST_URL = "https://openwebui:8080/health"
 DEFAULT_RAG_VERIFY_TLS = "true"
 DEFAULT_REQUEST_TIMEOUT = 10  # seconds
 DEFAULT_PORT = 9808
-FALLBACK_LATENCY = 10.0  # seconds, when RAG check fails
-RAG_LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 10)  # seconds
+DEFAULT_PROBE_LOCK = "/tmp/rag-exporter-probe.lock"  # noqa: S108  # nosec B108
+LEADER_RETRY_INTERVAL = 15.0  # seconds between lock attempts by idle workers
+RAG_LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 10, 20, 30)  # seconds
+RAG_TTFT_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 10)  # seconds
+PROBE_MODES = ("health", "openwebui", "ragflow")
 
 app = Flask(__name__)
 logger = logging.getLogger("rag-exporter")
@@ -46,57 +94,511 @@ registry = CollectorRegistry()
 rag_latency = Histogram(
     "erni_ki_rag_response_latency_seconds",
     "RAG end-to-end response latency in seconds",
+    ["target"],
     buckets=RAG_LATENCY_BUCKETS,
     registry=registry,
 )
 
+rag_ttft = Histogram(
+    "erni_ki_rag_time_to_first_token_seconds",
+    "Time to the first answer token (or first response byte) in seconds",
+    ["target"],
+    buckets=RAG_TTFT_BUCKETS,
+    registry=registry,
+)
+
 rag_sources = Gauge(
     "erni_ki_rag_sources_count",
-    "Number of sources used in last RAG answer",
+    "Number of distinct source documents cited in last RAG answer",
+    ["target"],
+    registry=registry,
+)
+
+rag_hit_ratio = Gauge(
+    "erni_ki_rag_expected_document_hit_ratio",
+    "Share of canned questions whose answer cited an expected document (last round)",
+    ["target"],
     registry=registry,
 )
 
-OPENWEBUI_TEST_URL = os.getenv("RAG_TEST_URL", DEFAULT_RAG_TEST_URL)
-OPENWEBUI_VERIFY_TLS = os.getenv("RAG_VERIFY_TLS", DEFAULT_RAG_VERIFY_TLS).lower() == "true"
-RAG_TEST_INTERVAL = float(os.getenv("RAG_TEST_INTERVAL", str(DEFAULT_RAG_TEST_INTERVAL)))
+rag_failures = Counter(
+    "erni_ki_rag_probe_failures_total",
+    "Failed RAG probes by reason",
+    ["target", "reason"],
+    registry=registry,
+)
+
+rag_leader = Gauge(
+    "erni_ki_rag_probe_leader",
+    "Whether this exporter process holds the prober lock and runs the probes",
+    registry=registry,
+)
+
+RAG_PROBE_LOCK = os.getenv("RAG_PROBE_LOCK", DEFAULT_PROBE_LOCK)
 _shutdown_event = threading.Event()
 
 
-def probe_loop() -> None:
-    """Probe RAG endpoint at regular intervals and update metrics."""
-    while not _shutdown_event.is_set():
-        start = time.time()
-        sources_count = None
-        try:
-            r = requests.get(
-                OPENWEBUI_TEST_URL,
-                timeout=DEFAULT_REQUEST_TIMEOUT,
-                verify=OPENWEBUI_VERIFY_TLS,
+@dataclass(frozen=True)
+class ProbeQuestion:
+    """One canned question and the documents a good answer should cite."""
+
+    question: str
+    expected: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    """Timing and sources of one answered question."""
+
+    ttft: float | None
+    total: float
+    # Every name/id cited, for matching expected documents
+    sources: list[str]
+    # Distinct source documents behind those citations
+    documents: int
+
+
+@dataclass(frozen=True)
+class ProbeTarget:
+    """One probed endpoint."""
+
+    name: str
+    url: str
+    interval: float = DEFAULT_RAG_TEST_INTERVAL
+    timeout: float = DEFAULT_REQUEST_TIMEOUT
+    method: str = "GET"
+    verify_tls: bool = True
+    headers: dict[str, str] = field(default_factory=dict)
+    json: Any = None
+    token_env: str | None = None
+    mode: str = "health"
+    questions: tuple[ProbeQuestion, ...] = ()
+    model: str | None = None
+    dataset_ids: tuple[str, ...] = ()
+
+
+def _load_questions(spec: dict[str, Any]) -> tuple[ProbeQuestion, ...]:
+    raw = spec.get("questions", [])
+    if spec.get("questions_file"):
+        raw = json.loads(Path(spec["questions_file"]).read_text(encoding="utf-8"))
+    if not isinstance(raw, list):
+        raise ValueError(f"Questions of {spec['name']} must be a JSON list")
+    questions = []
+    for item in raw:
+        if isinstance(item, str):
+            item = {"question": item}
+        if not isinstance(item, dict) or not item.get("question"):
+            raise ValueError(f"Invalid question for {spec['name']}: {item!r}")
+        expected = tuple(str(e) for e in item.get("expected", []))
+        questions.append(ProbeQuestion(str(item["question"]), expected))
+    return tuple(questions)
+
+
+def load_targets(env: Mapping[str, str] | None = None) -> list[ProbeTarget]:
+    """
+    Read probe targets from the environment.
+
+    Args:
+        env: Variable mapping (defaults to ``os.environ``).
+
+    Returns:
+        Configured targets, or the single ``RAG_TEST_URL`` target.
+
+    Raises:
+        ValueError: If the target list is malformed.
+    """
+    env = os.environ if env is None else env
+    raw = env.get("RAG_PROBE_TARGETS", "")
+    path = env.get("RAG_PROBE_TARGETS_FILE", "")
+    if path:
+        raw = Path(path).read_text(encoding="utf-8")
+    if not raw.strip():
+        return [
+            ProbeTarget(
+                name="openwebui",
+                url=env.get("RAG_TEST_URL", DEFAULT_RAG_TEST_URL),
+                interval=float(env.get("RAG_TEST_INTERVAL", str(DEFAULT_RAG_TEST_INTERVAL))),
+                verify_tls=env.get("RAG_VERIFY_TLS", DEFAULT_RAG_VERIFY_TLS).lower() == "true",
             )
-            # If an application endpoint returns JSON with sources, extract it here.
-            # For now, we default to 0 when not present.
-            if r.headers.get("content-type", "").startswith("application/json"):
-                try:
-                    data = r.json()
-                    if (
-                        isinstance(data, dict)
-                        and "sources" in data
-                        and isinstance(data["sources"], list)
-                    ):
-                        sources_count = len(data["sources"])
-                except (ValueError, TypeError, KeyError):
-                    pass
-            r.raise_for_status()
-            elapsed = time.time() - start
-            rag_latency.observe(elapsed)
-        except requests.RequestException as exc:
-            logger.error("RAG health check request failed: %s", exc, exc_info=True)
-            rag_latency.observe(FALLBACK_LATENCY)
+        ]
+
+    specs = json.loads(raw)
+    if not isinstance(specs, list):
+        raise ValueError("RAG_PROBE_TARGETS must be a JSON list")
+    targets = []
+    for spec in specs:
+        if not isinstance(spec, dict) or not spec.get("name") or not spec.get("url"):
+            raise ValueError(f"Probe target needs a name and url: {spec!r}")
+        mode = spec.get("mode", "health")
+        if mode not in PROBE_MODES:
+            raise ValueError(f"Probe target {spec['name']}: unknown mode {mode!r}")
+        questions = _load_questions(spec)
+        if mode != "health" and not questions:
+            raise ValueError(f"Probe target {spec['name']}: mode {mode} needs questions")
+        if mode == "openwebui" and not spec.get("model"):
+            raise ValueError(f"Probe target {spec['name']}: mode openwebui needs a model")
+        if mode == "ragflow" and not spec.get("dataset_ids"):
+            raise ValueError(f"Probe target {spec['name']}: mode ragflow needs dataset_ids")
+        targets.append(
+            ProbeTarget(
+                name=str(spec["name"]),
+                url=str(spec["url"]),
+                interval=float(spec.get("interval", DEFAULT_RAG_TEST_INTERVAL)),
+                timeout=float(spec.get("timeout", DEFAULT_REQUEST_TIMEOUT)),
+                method=str(spec.get("method", "GET")).upper(),
+                verify_tls=bool(spec.get("verify_tls", True)),
+                headers={str(k): str(v) for k, v in spec.get("headers", {}).items()},
+                json=spec.get("json"),
+                token_env=spec.get("token_env"),
+                mode=mode,
+                questions=questions,
+                model=spec.get("model"),
+                dataset_ids=tuple(spec.get("dataset_ids", ())),
+            )
+        )
+    if len({t.name for t in targets}) != len(targets):
+        raise ValueError("Probe target names must be unique")
+    return targets
+
+
+def _extract_sources(response: requests.Response) -> int | None:
+    """Count ``sources`` in a JSON response, if the endpoint reports them."""
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return None
+    try:
+        data = response.json()
+    except (ValueError, TypeError):
+        return None
+    if isinstance(data, dict) and isinstance(data.get("sources"), list):
+        return len(data["sources"])
+    return None
+
+
+def _source_names(source: Any) -> list[str]:
+    """Collect document names/ids from one OpenWebUI source entry."""
+    if not isinstance(source, dict):
+        return [str(source)]
+    names = []
+    inner = source.get("source")
+    if isinstance(inner, dict):
+        names += [str(inner[k]) for k in ("name", "id") if inner.get(k)]
+    for meta in source.get("metadata") or []:
+        if isinstance(meta, dict):
+            names += [str(meta[k]) for k in ("source", "name", "file_id") if meta.get(k)]
+    return names or [json.dumps(source, sort_keys=True, default=str)]
+
+
+def _source_documents(source: Any) -> set[str]:
+    """Identify the documents behind one OpenWebUI source entry, one key per document."""
+    if not isinstance(source, dict):
+        return {str(source)}
+    # Each metadata item describes one retrieved chunk; chunks of a file share its id
+    docs = set()
+    for meta in source.get("metadata") or []:
+        if isinstance(meta, dict):
+            key = meta.get("file_id") or meta.get("source") or meta.get("name")
+            if key:
+                docs.add(str(key))
+    if docs:
+        return docs
+    inner = source.get("source")
+    if isinstance(inner, dict) and (inner.get("id") or inner.get("name")):
+        return {str(inner.get("id") or inner.get("name"))}
+    return {json.dumps(source, sort_keys=True, default=str)}
+
+
+def _query_openwebui(
+    target: ProbeTarget, http: Any, headers: dict[str, str], question: str
+) -> QueryResult:
+    """Ask one question through the streaming OpenWebUI chat completions API."""
+    body = {
+        **(target.json or {}),
+        "model": target.model,
+        "stream": True,
+        "messages": [{"role": "user", "content": question}],
+    }
+    start = time.perf_counter()
+    ttft: float | None = None
+    sources: list[str] = []
+    documents: set[str] = set()
+    with http.post(
+        target.url,
+        headers=headers,
+        json=body,
+        timeout=target.timeout,
+        verify=target.verify_tls,
+        stream=True,
+    ) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if not line or not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+            event = json.loads(data)
+            if not isinstance(event, dict):
+                continue
+            if event.get("error"):
+                raise ValueError(f"Chat error: {event['error']}")
+            for source in event.get("sources") or []:
+                sources.extend(_source_names(source))
+                documents |= _source_documents(source)
+            choices = event.get("choices") or [{}]
+            if ttft is None and (choices[0].get("delta") or {}).get("content"):
+                ttft = time.perf_counter() - start
+    if ttft is None:
+        raise ValueError("Answer stream contained no tokens")
+    return QueryResult(
+        ttft=ttft, total=time.perf_counter() - start, sources=sources, documents=len(documents)
+    )
+
+
+def _query_ragflow(
+    target: ProbeTarget, http: Any, headers: dict[str, str], question: str
+) -> QueryResult:
+    """Send one question to the RAGFlow retrieval API."""
+    body = {**(target.json or {}), "question": question, "dataset_ids": list(target.dataset_ids)}
+    start = time.perf_counter()
+    ttft: float | None = None
+    chunks: list[bytes] = []
+    with http.post(
+        target.url,
+        headers=headers,
+        json=body,
+        timeout=target.timeout,
+        verify=target.verify_tls,
+        stream=True,
+    ) as r:
+        r.raise_for_status()
+        for chunk in r.iter_content(chunk_size=None):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            chunks.append(chunk)
+    payload = json.loads(b"".join(chunks))
+    if not isinstance(payload, dict) or payload.get("code", 0) != 0:
+        raise ValueError(f"Retrieval failed: {str(payload)[:200]}")
+    sources = []
+    documents = set()
+    for chunk in (payload.get("data") or {}).get("chunks") or []:
+        name = chunk.get("document_keyword") or chunk.get("docnm_kwd") or chunk.get("document_id")
+        sources.append(str(name))
+        documents.add(str(chunk.get("document_id") or name))
+    return QueryResult(
+        ttft=ttft, total=time.perf_counter() - start, sources=sources, documents=len(documents)
+    )
+
+
+QUERY_MODES = {"openwebui": _query_openwebui, "ragflow": _query_ragflow}
+
+
+def _failure_reason(exc: Exception) -> str:
+    if isinstance(exc, requests.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.ConnectionError):
+        return "connection"
+    if isinstance(exc, requests.HTTPError):
+        return "http"
+    if isinstance(exc, requests.RequestException):
+        return "request"
+    return "invalid_response"
+
+
+def _record_failure(target: ProbeTarget, exc: Exception) -> None:
+    reason = _failure_reason(exc)
+    logger.error("RAG probe %s failed (%s): %s", target.name, reason, exc)
+    rag_failures.labels(target.name, reason).inc()
+
+
+def _matches(sources: list[str], expected: tuple[str, ...]) -> bool:
+    lowered = [s.lower() for s in sources]
+    return any(e.lower() in s for e in expected for s in lowered)
+
+
+def _probe_health(target: ProbeTarget, http: Any, headers: dict[str, str]) -> bool:
+    start = time.perf_counter()
+    try:
+        r = http.request(
+            target.method,
+            target.url,
+            headers=headers or None,
+            json=target.json,
+            timeout=target.timeout,
+            verify=target.verify_tls,
+        )
+        sources_count = _extract_sources(r)
+        r.raise_for_status()
+    except requests.RequestException as exc:
+        _record_failure(target, exc)
+        return False
+    rag_latency.labels(target.name).observe(time.perf_counter() - start)
+    rag_sources.labels(target.name).set(sources_count or 0)
+    return True
+
+
+def probe_target(target: ProbeTarget, session: requests.Session | None = None) -> bool:
+    """
+    Probe one target once and update its metrics.
+
+    Failures only increment ``erni_ki_rag_probe_failures_total``; latency and
+    sources are recorded for successful answers.
+
+    Args:
+        target: Endpoint to probe.
+        session: Keep-alive session to reuse (a one-off request otherwise).
+
+    Returns:
+        True if the endpoint answered successfully (every question, in query modes).
+    """
+    http = session or requests
+    headers = dict(target.headers)
+    if target.token_env and os.getenv(target.token_env):
+        headers["Authorization"] = f"Bearer {os.getenv(target.token_env)}"
+    if target.mode == "health":
+        return _probe_health(target, http, headers)
+
+    query = QUERY_MODES[target.mode]
+    ok = True
+    hits = graded = 0
+    for item in target.questions:
+        # A failed question counts as a miss for the hit ratio
+        graded += bool(item.expected)
+        try:
+            result = query(target, http, headers, item.question)
+        except (requests.RequestException, ValueError, TypeError, AttributeError) as exc:
+            _record_failure(target, exc)
+            ok = False
+            continue
+        rag_latency.labels(target.name).observe(result.total)
+        if result.ttft is not None:
+            rag_ttft.labels(target.name).observe(result.ttft)
+        rag_sources.labels(target.name).set(result.documents)
+        if item.expected:
+            hits += _matches(result.sources, item.expected)
+    if graded:
+        rag_hit_ratio.labels(target.name).set(hits / graded)
+    return ok
+
+
+def _probe_crashed(target: ProbeTarget, session: requests.Session) -> bool:
+    """Run ``probe_target``; log and count an unexpected error instead of raising it."""
+    try:
+        probe_target(target, session)
+    except Exception:  # noqa: BLE001 - one target's bug must not stop the others
+        logger.exception("RAG probe %s crashed; probing again next interval", target.name)
+        rag_failures.labels(target.name, "error").inc()
+        return True
+    return False
+
+
+def acquire_leader_lock(path: str) -> IO[str] | None:
+    """
+    Take the host-wide prober lock without blocking.
+
+    Args:
+        path: Lock file path (shared by all workers on the host).
+
+    Returns:
+        Open lock file to keep for the process lifetime, or None if held elsewhere.
+    """
+    handle = open(path, "a+", encoding="utf-8")  # noqa: SIM115 - held until exit
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+class ProbeScheduler:
+    """Runs every target on its own interval on one asyncio loop, leader-locked per host."""
+
+    def __init__(
+        self,
+        targets: list[ProbeTarget],
+        lock_path: str | None = RAG_PROBE_LOCK,
+        stop_event: threading.Event | None = None,
+    ) -> None:
+        """
+        Initialize scheduler.
+
+        Args:
+            targets: Endpoints to probe.
+            lock_path: Leader lock file; None probes without leader election.
+            stop_event: Event that stops probing when set.
+        """
+        self.targets = targets
+        self.lock_path = lock_path
+        self.stop_event = stop_event or threading.Event()
+        self._lock_handle: IO[str] | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process holds the prober lock."""
+        return self._lock_handle is not None or self.lock_path is None
+
+    async def _run_target(self, target: ProbeTarget, stopped: asyncio.Event) -> None:
+        session = requests.Session()
+        try:
+            while not stopped.is_set():
+                started = time.monotonic()
+                # Blocking HTTP runs in the default executor; the loop keeps scheduling
+                if await asyncio.to_thread(_probe_crashed, target, session):
+                    session.close()
+                    session = requests.Session()
+                delay = max(0.0, target.interval - (time.monotonic() - started))
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(stopped.wait(), delay)
         finally:
-            if sources_count is None:
-                sources_count = 0
-            rag_sources.set(sources_count)
-        _shutdown_event.wait(RAG_TEST_INTERVAL)
+            session.close()
+
+    async def run(self) -> None:
+        """Probe all targets concurrently until the stop event is set."""
+        stopped = asyncio.Event()
+        probes = asyncio.gather(*(self._run_target(t, stopped) for t in self.targets))
+        await asyncio.to_thread(self.stop_event.wait)
+        stopped.set()
+        await probes
+
+    def run_forever(self) -> None:
+        """Wait for leadership, then probe until stopped (blocking)."""
+        while not self.stop_event.is_set():
+            if self.lock_path is not None and self._lock_handle is None:
+                self._lock_handle = acquire_leader_lock(self.lock_path)
+            rag_leader.set(1 if self.is_leader else 0)
+            if self.is_leader:
+                logger.info(
+                    "Probing %d RAG targets: %s",
+                    len(self.targets),
+                    ", ".join(t.name for t in self.targets),
+                )
+                asyncio.run(self.run())
+                return
+            self.stop_event.wait(LEADER_RETRY_INTERVAL)
+
+    def start(self) -> threading.Thread:
+        """Start probing in a daemon thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.run_forever, name="rag-probe", daemon=True)
+            self._thread.start()
+        return self._thread
+
+
+_scheduler: ProbeScheduler | None = None
+
+
+def start_prober() -> ProbeScheduler:
+    """Start the process-wide probe scheduler once."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ProbeScheduler(load_targets(), stop_event=_shutdown_event)
+    _scheduler.start()
+    return _scheduler
 
 
 @app.route("/metrics")
@@ -105,6 +607,12 @@ def metrics() -> Response:
     return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
 
 
+def create_app() -> Flask:
+    """Gunicorn app factory: start the (leader-locked) prober in the worker."""
+    start_prober()
+    return app
+
+
 def main() -> None:
     """Start RAG exporter with metrics server."""
 
@@ -115,34 +623,11 @@ def main() -> None:
     signal.signal(signal.SIGTERM, _handle_signal)
     signal.signal(signal.SIGINT, _handle_signal)
 
-    t = threading.Thread(target=probe_loop, daemon=True)
-    t.start()
+    start_prober()
     port = int(os.getenv("PORT", str(DEFAULT_PORT)))
     # Binding inside container for Prometheus scrape; exposure is controlled by compose.
     app.run(host="0.0.0.0", port=port)  # noqa: S104  # nosec B104
 
 
-# Start probe loop when module is loaded (for gunicorn)
-def _start_probe_thread() -> None:
-    """Start probe loop in background thread."""
-    import signal
-    from typing import Any
-
-    def _handle_signal(signum: int, _frame: Any) -> None:
-        logger.info("Received signal %s, shutting down probe loop", signum)
-        _shutdown_event.set()
-
-    signal.signal(signal.SIGTERM, _handle_signal)
-    signal.signal(signal.SIGINT, _handle_signal)
-
-    t = threading.Thread(target=probe_loop, daemon=True)
-    t.start()
-    logger.info("RAG exporter probe thread started")
-
-
-# Start probe on module import (gunicorn loads the module)
-_start_probe_thread()
-
-
 if __name__ == "__main__":
     main()
@@ -4,5 +4,18 @@ ERNI-KI Webhook Receiver Module
 Modular components:
 - models: Pydantic validation models for alerts
 - services: Alert processing and recovery execution
+- dispatcher: Concurrent notification fan-out with pooled HTTP sessions
+- delivery_queue: Durable SQLite queue with retry/backoff for notifications
+- circuit: Per-channel circuit breakers for notification endpoints
+- coalescer: Per-group digest coalescing of alert notifications
+- dedup: Fingerprint TTL cache suppressing re-sent alerts
+- journal: Rotating append-only JSON Lines alert journal
+- alert_store: Indexed SQLite alert history behind the /alerts query API
+- recovery: Background single-flight recovery-script executor with cooldown
+- ratelimit: Rate limiter with memory, shared mmap-file and Redis backends
+- asgi: ASGI entry point (uvicorn) for the webhook routes
+- metrics: Prometheus request, stage, notification and recovery metrics
+- signing: Pre-keyed HMAC/bearer verification with secret rotation
+- templates: Compiled per-channel notification templates (channels.json)
 - webhook-receiver: Flask app and HTTP handlers
 """
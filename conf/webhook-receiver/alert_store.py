@@ -0,0 +1,217 @@
+"""
+Indexed alert history for the webhook receiver.
+
+Each received alert is inserted into a SQLite (WAL mode) table with indexes on
+receive time and the label columns ``/alerts`` filters on. Listings use keyset
+pagination on the row id (newest first), so a page costs one index range scan
+regardless of how much history is kept. Rows past the retention window are
+pruned on open and again, at most once per ``prune_interval``, as alerts arrive.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("webhook-receiver")
+
+FILTER_COLUMNS = ("alertname", "service", "severity", "status")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    received_at REAL NOT NULL,
+    alert_type TEXT NOT NULL,
+    alertname TEXT,
+    service TEXT,
+    severity TEXT,
+    status TEXT,
+    starts_at TEXT,
+    labels TEXT NOT NULL,
+    annotations TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_received_at ON alerts (received_at);
+CREATE INDEX IF NOT EXISTS idx_alerts_alertname ON alerts (alertname, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_service ON alerts (service, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts (severity, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts (status, id);
+"""
+
+
+def parse_since(value: str) -> float:
+    """
+    Parse a ``since`` query value.
+
+    Args:
+        value: Unix timestamp in seconds or an ISO-8601 datetime.
+
+    Returns:
+        Unix timestamp in seconds.
+
+    Raises:
+        ValueError: If the value is neither format.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class AlertStore:
+    """SQLite-backed, indexed store of received alerts."""
+
+    def __init__(
+        self, path: Path, retention_days: float = 365.0, prune_interval: float = 3600.0
+    ) -> None:
+        """
+        Open (or create) the alert database and drop expired rows.
+
+        Args:
+            path: SQLite database file.
+            retention_days: Rows older than this are pruned; 0 keeps everything.
+            prune_interval: Minimum seconds between prunes triggered by ``add``.
+        """
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._prune_expired(time.time())
+
+    def add(self, alerts: Iterable[dict[str, Any]], alert_type: str = "general") -> int:
+        """
+        Index a batch of alerts in one transaction.
+
+        Args:
+            alerts: Alert dicts with ``labels``, ``annotations``, ``status`` and ``startsAt``.
+            alert_type: Route/category the alerts were received on.
+
+        Returns:
+            Number of rows inserted.
+        """
+        now = time.time()
+        rows = []
+        for alert in alerts:
+            labels = alert.get("labels") or {}
+            rows.append(
+                (
+                    now,
+                    alert_type,
+                    labels.get("alertname"),
+                    labels.get("service"),
+                    labels.get("severity"),
+                    alert.get("status"),
+                    alert.get("startsAt"),
+                    json.dumps(labels, ensure_ascii=False, default=str),
+                    json.dumps(alert.get("annotations") or {}, ensure_ascii=False, default=str),
+                )
+            )
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO alerts (received_at, alert_type, alertname, service, severity, "
+                    "status, starts_at, labels, annotations) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        if now >= self._next_prune:
+            self._prune_expired(now)
+        return len(rows)
+
+    def query(
+        self,
+        since: float | None = None,
+        cursor: int | None = None,
+        limit: int = 50,
+        **filters: str | None,
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        """
+        Return one page of alerts, newest first.
+
+        Args:
+            since: Only alerts received at or after this Unix timestamp.
+            cursor: Only alerts with an id below this value (from a previous page).
+            limit: Maximum rows in the page.
+            **filters: Exact-match filters on ``alertname``, ``service``, ``severity``
+                or ``status``; ``None`` values are ignored.
+
+        Returns:
+            Tuple of (alerts, next_cursor); ``next_cursor`` is None on the last page.
+        """
+        clauses: list[str] = []
+        params: list[Any] = []
+        for column, value in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Unsupported filter: {column}")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("received_at >= ?")
+            params.append(since)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        # Column names come from FILTER_COLUMNS; values are bound parameters
+        sql = (
+            "SELECT id, received_at, alert_type, alertname, service, severity, status, "  # noqa: S608
+            f"starts_at, labels, annotations FROM alerts {where}ORDER BY id DESC LIMIT ?"
+        )  # nosec B608
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [self._row_to_dict(row) for row in rows[:limit]], next_cursor
+
+    def prune(self, before: float) -> int:
+        """Delete alerts received before ``before`` (Unix timestamp); return rows removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM alerts WHERE received_at < ?", (before,))
+        return cursor.rowcount
+
+    def _prune_expired(self, now: float) -> None:
+        if self.retention_days <= 0:
+            return
+        self._next_prune = now + self.prune_interval
+        removed = self.prune(now - self.retention_days * 86400)
+        if removed:
+            logger.info("Pruned %d alert(s) older than %s days", removed, self.retention_days)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row: tuple[Any, ...]) -> dict[str, Any]:
+        return {
+            "id": row[0],
+            "received_at": datetime.fromtimestamp(row[1]).isoformat(),
+            "alert_type": row[2],
+            "alertname": row[3],
+            "service": row[4],
+            "severity": row[5],
+            "status": row[6],
+            "starts_at": row[7],
+            "labels": json.loads(row[8]),
+            "annotations": json.loads(row[9]),
+        }
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# mypy: ignore-errors
+"""
+ASGI entry point for the webhook receiver (run with ``uvicorn asgi:app``).
+
+Serves the same ``/webhook*`` routes as the Flask app (``WEBHOOK_ROUTES``) plus
+``/health`` without a web framework: the raw request body is validated once
+with a pre-built pydantic ``TypeAdapter`` (``validate_json``, no intermediate
+``json.loads`` dict), the response is sent as soon as the payload is accepted,
+and journaling, indexing and alert processing run afterwards on a bounded
+thread pool. Authentication, deduplication and rate limiting reuse the
+receiver's secrets, ``alert_deduplicator`` and ``RATE_LIMIT_STORAGE`` backend;
+rate limit checks run off the event loop since file and Redis backends block.
+
+Missing or weak secrets fail the lifespan startup with ``lifespan.startup.failed``.
+Run with ``uvicorn asgi:app --lifespan on`` so that any other startup error
+also stops the server; under the default ``--lifespan auto`` uvicorn reports an
+exception raised during startup as "lifespan unsupported" and keeps serving.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from pydantic import TypeAdapter, ValidationError
+
+try:
+    from . import webhook_receiver as receiver
+    from .models import AlertPayload
+    from .ratelimit import create_backend, parse_rule
+except ImportError:
+    import sys
+
+    _current_dir = str(Path(__file__).parent)
+    if _current_dir not in sys.path:
+        sys.path.insert(0, _current_dir)
+    import webhook_receiver as receiver  # type: ignore
+    from models import AlertPayload  # type: ignore
+    from ratelimit import create_backend, parse_rule  # type: ignore
+
+logger = logging.getLogger("webhook-receiver")
+
+ASGI_MAX_BODY_BYTES = int(os.getenv("ASGI_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+ASGI_BACKGROUND_WORKERS = int(os.getenv("ASGI_BACKGROUND_WORKERS", "4"))
+
+PAYLOAD_ADAPTER = TypeAdapter(AlertPayload)
+WEBHOOK_LIMIT = parse_rule("10 per minute")
+HEALTH_LIMIT = parse_rule("30 per minute")
+
+# Same storage and key format ("<addr>:<endpoint>") as the Flask limiter, so
+# both entry points draw from one budget when RATE_LIMIT_STORAGE is shared.
+rate_limit_backend = create_backend(receiver.RATE_LIMIT_STORAGE or "memory://")
+
+ROUTES: dict[str, tuple[str, str]] = {
+    f"/webhook{suffix}": (alert_type, description)
+    for suffix, alert_type, description in receiver.WEBHOOK_ROUTES
+}
+
+_executor = ThreadPoolExecutor(max_workers=ASGI_BACKGROUND_WORKERS, thread_name_prefix="ingest")
+_background: set[asyncio.Future] = set()
+
+
+async def _read_body(receive) -> bytes | None:
+    """Read the request body; return None once it exceeds ASGI_MAX_BODY_BYTES."""
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return b"".join(chunks)
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > ASGI_MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _respond(send, status: int, body: dict[str, Any]) -> None:
+    payload = json.dumps(body).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _persist_and_process(model: dict[str, Any], alert_type: str) -> None:
+    """Background job: journal, index and process accepted alerts."""
+    try:
+        receiver.save_alert_to_file(model, alert_type)
+        receiver.process_alert(model, alert_type)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Background processing failed for %s alerts: %s", alert_type, exc)
+        # Already acknowledged; forgetting lets a re-send be processed again
+        receiver.alert_deduplicator.forget(model["alerts"])
+
+
+def _schedule(model: dict[str, Any], alert_type: str) -> None:
+    future = asyncio.get_running_loop().run_in_executor(
+        _executor, _persist_and_process, model, alert_type
+    )
+    _background.add(future)
+    future.add_done_callback(_background.discard)
+
+
+async def _handle_webhook(scope, receive, send, alert_type: str, description: str) -> None:
+    body = await _read_body(receive)
+    if body is None:
+        await _respond(send, 413, {"error": "Payload too large"})
+        return
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+    if not receiver.verify_signature(
+        body, headers.get("x-signature")
+    ) and not receiver.verify_bearer_token(headers.get("authorization")):
+        await _respond(send, 401, {"error": "Unauthorized"})
+        return
+    try:
+        payload = PAYLOAD_ADAPTER.validate_json(body)
+    except ValidationError as exc:
+        if any(err.get("type") == "json_invalid" for err in exc.errors()):
+            await _respond(send, 400, {"error": "Invalid JSON payload"})
+            return
+        logger.warning(
+            "Payload validation failed for %s webhook at locations: %s",
+            alert_type,
+            [err.get("loc") for err in exc.errors()],
+        )
+        await _respond(send, 400, {"error": "Invalid request payload"})
+        return
+
+    model = payload.model_dump()
+    fresh = receiver.alert_deduplicator.filter_new(model["alerts"])
+    duplicates = len(model["alerts"]) - len(fresh)
+    if not fresh:
+        logger.info("Skipping %d duplicate %s alert(s)", duplicates, alert_type)
+        await _respond(
+            send,
+            200,
+            {
+                "status": "success",
+                "message": f"{description} duplicate ignored",
+                "duplicates": duplicates,
+            },
+        )
+        return
+    model["alerts"] = fresh
+    _schedule(model, alert_type)
+    await _respond(
+        send,
+        202,
+        {"status": "accepted", "message": f"{description} accepted", "duplicates": duplicates},
+    )
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                receiver._validate_secrets(exit_on_error=False)
+            except RuntimeError as exc:
+                logger.error("Webhook receiver startup failed: %s", exc)
+                await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await drain()
+            receiver.alert_journal.flush(timeout=5)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def drain() -> None:
+    """Wait for all scheduled background jobs to finish."""
+    if _background:
+        await asyncio.gather(*list(_background), return_exceptions=True)
+
+
+async def _allow(key: str, rule: tuple[int, float]) -> bool:
+    """Check a rate limit without blocking the event loop."""
+    return await asyncio.to_thread(rate_limit_backend.hit, key, *rule)
+
+
+async def app(scope, receive, send) -> None:
+    """ASGI application callable."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"].rstrip("/") or "/"
+    method = scope["method"]
+    client = (scope.get("client") or ("unknown", 0))[0]
+
+    if path in ROUTES:
+        if method != "POST":
+            await _respond(send, 405, {"error": "Method not allowed"})
+            return
+        alert_type, description = ROUTES[path]
+        if not await _allow(f"{client}:webhook_{alert_type}", WEBHOOK_LIMIT):
+            await _respond(send, 429, {"error": "rate limit exceeded"})
+            return
+        try:
+            await _handle_webhook(scope, receive, send, alert_type, description)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Unexpected error in %s webhook: %s", alert_type, exc)
+            await _respond(send, 500, {"error": "Internal server error"})
+        return
+
+    if path == "/health" and method == "GET":
+        if not await _allow(f"{client}:health_check", HEALTH_LIMIT):
+            await _respond(send, 429, {"error": "rate limit exceeded"})
+            return
+        await _respond(
+            send,
+            200,
+            {
+                "status": "healthy",
+                "service": "webhook-receiver",
+                "server": "asgi",
+                "timestamp": datetime.now().isoformat(),
+                "background_jobs": len(_background),
+                "deduplication": receiver.alert_deduplicator.stats(),
+            },
+        )
+        return
+
+    await _respond(send, 404, {"error": "Not found"})
@@ -0,0 +1,152 @@
+"""
+Per-channel circuit breakers for outbound notifications.
+
+When a notification endpoint is down every delivery would otherwise wait the
+full request timeout before failing. ``ChannelBreakers`` keeps one breaker per
+channel: after ``failure_threshold`` consecutive failures it opens and sends
+are short-circuited without touching the network; after ``reset_timeout``
+seconds it half-opens and lets a single probe through, whose outcome closes
+the circuit again or re-opens it for another ``reset_timeout``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+logger = logging.getLogger("webhook-receiver")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@dataclass
+class BreakerStatus:
+    """Per-channel breaker bookkeeping."""
+
+    state: str = STATE_CLOSED
+    consecutive_failures: int = 0
+    short_circuited: int = 0
+    opened: int = 0
+
+
+class ChannelBreakers:
+    """Thread-safe consecutive-failure circuit breakers keyed by channel."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize breakers.
+
+        Args:
+            failure_threshold: Consecutive failures that open a channel; 0 disables breaking.
+            reset_timeout: Seconds an open channel waits before a half-open probe.
+            clock: Monotonic time source (overridable for tests).
+        """
+        self.failure_threshold = max(0, failure_threshold)
+        self.reset_timeout = max(0.0, reset_timeout)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._status: dict[str, BreakerStatus] = {}
+        self._opened_at: dict[str, float] = {}
+        self._probing: set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether breaking is enabled at all."""
+        return self.failure_threshold > 0
+
+    def allow(self, channel: str) -> bool:
+        """
+        Decide whether a delivery to ``channel`` may be attempted now.
+
+        Args:
+            channel: Channel name.
+
+        Returns:
+            True when closed, or for the single probe of a half-open channel;
+            False when the delivery is short-circuited.
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            status = self._status.setdefault(channel, BreakerStatus())
+            if status.state == STATE_CLOSED:
+                return True
+            if channel not in self._probing and self._remaining(channel) <= 0:
+                status.state = STATE_HALF_OPEN
+                self._probing.add(channel)
+                return True
+            status.short_circuited += 1
+            return False
+
+    def record(self, channel: str, ok: bool) -> None:
+        """
+        Record the outcome of an attempted delivery.
+
+        Args:
+            channel: Channel name.
+            ok: Whether the delivery succeeded.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            status = self._status.setdefault(channel, BreakerStatus())
+            self._probing.discard(channel)
+            if ok:
+                if status.state != STATE_CLOSED:
+                    logger.info("Notification channel %s recovered, circuit closed", channel)
+                status.state = STATE_CLOSED
+                status.consecutive_failures = 0
+                return
+            status.consecutive_failures += 1
+            if (
+                status.state == STATE_HALF_OPEN
+                or status.consecutive_failures >= self.failure_threshold
+            ):
+                if status.state == STATE_CLOSED:
+                    status.opened += 1
+                    logger.warning(
+                        "Notification channel %s failed %d times, circuit opened for %.0fs",
+                        channel,
+                        status.consecutive_failures,
+                        self.reset_timeout,
+                    )
+                status.state = STATE_OPEN
+                self._opened_at[channel] = self._clock()
+
+    def retry_after(self, channel: str) -> float:
+        """Seconds until ``channel`` accepts a probe again (0 when not open)."""
+        with self._lock:
+            status = self._status.get(channel)
+            if status is None or status.state == STATE_CLOSED:
+                return 0.0
+            return self._remaining(channel)
+
+    def status(self) -> dict[str, dict[str, Any]]:
+        """Return a snapshot of per-channel breaker state."""
+        with self._lock:
+            return {
+                channel: {
+                    **asdict(status),
+                    "retry_after_seconds": round(
+                        self._remaining(channel) if status.state == STATE_OPEN else 0.0, 1
+                    ),
+                }
+                for channel, status in self._status.items()
+            }
+
+    def _remaining(self, channel: str) -> float:
+        opened_at = self._opened_at.get(channel)
+        if opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - opened_at))
@@ -0,0 +1,92 @@
+"""
+Digest coalescing for alert notifications.
+
+Alerts that share ``groupLabels``, service, severity and status are collapsed
+into one digest message per channel. With a positive window, groups are held
+for ``window`` seconds so alerts arriving in separate webhook deliveries still
+end up in the same digest.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger("webhook-receiver")
+
+
+def digest_key(message_data: dict[str, Any]) -> tuple:
+    """
+    Build the grouping key for a formatted alert message.
+
+    Args:
+        message_data: Output of ``AlertProcessor._format_alert_message``.
+
+    Returns:
+        Hashable key shared by alerts that belong in the same digest.
+    """
+    group_labels = message_data.get("group_labels") or {}
+    return (
+        tuple(sorted((str(k), str(v)) for k, v in group_labels.items())),
+        message_data.get("service"),
+        message_data.get("severity"),
+        message_data.get("status"),
+    )
+
+
+class DigestCoalescer:
+    """Buffers messages per group and flushes each group once per window."""
+
+    def __init__(self, window: float, flush: Callable[[list[dict[str, Any]]], Any]) -> None:
+        """
+        Initialize coalescer.
+
+        Args:
+            window: Seconds to hold a group open after its first message.
+            flush: Callback receiving all buffered messages of one group.
+        """
+        self.window = window
+        self._flush = flush
+        self._buckets: dict[Hashable, list[dict[str, Any]]] = {}
+        self._timers: dict[Hashable, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: Hashable, messages: list[dict[str, Any]]) -> None:
+        """Append messages to the group ``key``, opening its window if needed."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.extend(messages)
+                return
+            self._buckets[key] = list(messages)
+            timer = threading.Timer(self.window, self._flush_key, args=(key,))
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def pending(self) -> int:
+        """Number of messages currently buffered."""
+        with self._lock:
+            return sum(len(bucket) for bucket in self._buckets.values())
+
+    def flush_all(self) -> None:
+        """Flush every open group immediately (e.g., on shutdown)."""
+        with self._lock:
+            keys = list(self._buckets)
+            for timer in self._timers.values():
+                timer.cancel()
+        for key in keys:
+            self._flush_key(key)
+
+    def _flush_key(self, key: Hashable) -> None:
+        with self._lock:
+            messages = self._buckets.pop(key, None)
+            self._timers.pop(key, None)
+        if not messages:
+            return
+        try:
+            self._flush(messages)
+        except Exception:  # noqa: BLE001 - timer thread must not die silently
+            logger.exception("Failed to flush alert digest")
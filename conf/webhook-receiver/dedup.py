@@ -0,0 +1,147 @@
+"""
+Fingerprint-based alert deduplication.
+
+Alertmanager re-sends firing alerts on every ``repeat_interval`` and whenever
+their group changes. ``AlertDeduplicator`` remembers, per alert identity
+(Alertmanager's ``fingerprint``, or a hash of the full label set), the last
+delivered event - its ``status`` and ``startsAt`` - for ``ttl`` seconds
+(bounded, LRU-evicted). Only a repeat of that same event is skipped before
+persistence, processing and notification dispatch: another instance of the
+alert, a status change or a new firing episode always gets through.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+
+def alert_fingerprint(alert: dict[str, Any]) -> str:
+    """
+    Compute a stable identity for an alert.
+
+    Args:
+        alert: Alert dict with ``labels`` and optionally Alertmanager's ``fingerprint``.
+
+    Returns:
+        Alertmanager's fingerprint when present, else the hex SHA-256 of the
+        sorted label set (every label, not only the declared ones).
+    """
+    fingerprint = alert.get("fingerprint")
+    if fingerprint:
+        return str(fingerprint)
+    labels = alert.get("labels") or {}
+    if not isinstance(labels, dict):
+        labels = {}
+    canonical = json.dumps(
+        {k: v for k, v in labels.items() if v is not None},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _event(alert: dict[str, Any]) -> tuple[Any, Any]:
+    """Return what distinguishes one delivery of an alert from the next: (status, startsAt)."""
+    return alert.get("status"), alert.get("startsAt")
+
+
+class AlertDeduplicator:
+    """Thread-safe TTL cache of recently seen alert fingerprints with LRU eviction."""
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize deduplicator.
+
+        Args:
+            ttl: Seconds a fingerprint suppresses duplicates; 0 disables deduplication.
+            max_size: Maximum number of fingerprints kept in memory.
+            clock: Monotonic time source (overridable for tests).
+        """
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[tuple[Any, Any], float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether duplicates are suppressed at all."""
+        return self.ttl > 0
+
+    def is_duplicate(self, alert: dict[str, Any]) -> bool:
+        """
+        Check an alert and record it as seen.
+
+        Recording a new status or ``startsAt`` replaces the previous event of the
+        same alert, so firing -> resolved -> firing is never suppressed.
+
+        Args:
+            alert: Alert dict with ``labels``, ``status`` and optionally
+                ``fingerprint`` / ``startsAt``.
+
+        Returns:
+            True if the same event of the same alert was seen within the TTL.
+        """
+        if not self.enabled:
+            return False
+        fingerprint = alert_fingerprint(alert)
+        event = _event(alert)
+        now = self._clock()
+        with self._lock:
+            seen = self._entries.get(fingerprint)
+            if seen is not None and seen[0] == event and seen[1] > now:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return True
+            self._entries[fingerprint] = (event, now + self.ttl)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self.misses += 1
+            return False
+
+    def filter_new(self, alerts: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Return only the alerts that are not duplicates, recording them as seen."""
+        return [alert for alert in alerts if not self.is_duplicate(alert)]
+
+    def forget(self, alerts: Iterable[dict[str, Any]]) -> None:
+        """Drop alerts from the cache so a retried delivery is processed again."""
+        with self._lock:
+            for alert in alerts:
+                fingerprint = alert_fingerprint(alert)
+                seen = self._entries.get(fingerprint)
+                if seen is not None and seen[0] == _event(alert):
+                    del self._entries[fingerprint]
+
+    def clear(self) -> None:
+        """Drop all fingerprints and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and current cache size."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,446 @@
+"""
+Durable notification delivery queue for the webhook receiver.
+
+Every outbound notification is written to a SQLite (WAL mode) queue before the
+first attempt. Successful deliveries are acknowledged and removed; failed ones
+are rescheduled with exponential backoff and jitter until ``max_attempts`` is
+reached, after which they are kept as dead letters for ``dead_retention``
+seconds and then purged. Rows survive container restarts and are picked up
+again by ``DeliveryWorker`` on startup.
+
+Several processes (gunicorn workers) may drain the same database. Claims run in
+a ``BEGIN IMMEDIATE`` transaction so a row is handed to exactly one of them, and
+each claim stamps ``claimed_at``: a row stays in flight until its owner acks or
+reschedules it, or until the ``lease`` expires because the owner died.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("webhook-receiver")
+
+STATE_PENDING = "pending"
+STATE_INFLIGHT = "inflight"
+STATE_DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (state, next_attempt_at);
+"""
+
+
+class DeferDelivery(Exception):  # noqa: N818 - a signal, not an error
+    """Raised by a sender to reschedule a delivery without counting an attempt."""
+
+    def __init__(self, delay: float, reason: str = "deferred") -> None:
+        super().__init__(reason)
+        self.delay = delay
+
+
+@dataclass(frozen=True)
+class QueuedDelivery:
+    """Single queued notification."""
+
+    id: int
+    channel: str
+    payload: dict[str, Any]
+    attempts: int
+    created_at: float
+
+
+class DeliveryQueue:
+    """SQLite-backed persistent queue of pending notifications."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_attempts: int = 8,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        lease: float = 300.0,
+        dead_retention: float = 7 * 86400.0,
+    ) -> None:
+        """
+        Open (or create) the queue database.
+
+        Args:
+            path: SQLite database file.
+            max_attempts: Attempts before a delivery is moved to dead letters.
+            base_delay: Backoff delay after the first failure, in seconds.
+            max_delay: Upper bound for a single backoff delay, in seconds.
+            lease: Seconds a claimed delivery stays in flight before another
+                process may reclaim it; must exceed the longest attempt.
+            dead_retention: Seconds dead letters are kept for inspection; 0 keeps
+                them forever.
+        """
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.dead_retention = dead_retention
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None, timeout=10.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(deliveries)")}
+        if "claimed_at" not in columns:
+            # Queues created before leases: their in-flight rows count as expired
+            self._conn.execute("ALTER TABLE deliveries ADD COLUMN claimed_at REAL")
+        self._purge_expired_dead(time.time())
+
+    def enqueue(self, channel: str, payload: dict[str, Any], claimed: bool = False) -> int:
+        """
+        Persist a delivery.
+
+        Args:
+            channel: Target channel name.
+            payload: JSON-serializable message data.
+            claimed: Insert as already in flight (caller attempts it immediately).
+
+        Returns:
+            Row id of the queued delivery.
+        """
+        now = time.time()
+        state = STATE_INFLIGHT if claimed else STATE_PENDING
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO deliveries "
+                "(channel, payload, state, created_at, next_attempt_at, claimed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    channel,
+                    json.dumps(payload, ensure_ascii=False),
+                    state,
+                    now,
+                    now,
+                    now if claimed else None,
+                ),
+            )
+        return int(cursor.lastrowid)
+
+    def claim_due(
+        self, limit: int, now: float | None = None, channel: str | None = None
+    ) -> list[QueuedDelivery]:
+        """
+        Mark up to ``limit`` due deliveries as in flight and return them.
+
+        Due means pending with ``next_attempt_at`` reached, or in flight with an
+        expired lease. The select and update share one write transaction, so
+        concurrent claimers on the same database never receive the same row.
+
+        Args:
+            limit: Maximum number of deliveries to claim.
+            now: Current time (defaults to ``time.time()``).
+            channel: Only claim deliveries for this channel.
+        """
+        now = time.time() if now is None else now
+        query = (
+            "SELECT id, channel, payload, attempts, created_at FROM deliveries "
+            "WHERE ((state = ? AND next_attempt_at <= ?) "
+            "OR (state = ? AND (claimed_at IS NULL OR claimed_at <= ?)))"
+        )
+        params: list[Any] = [STATE_PENDING, now, STATE_INFLIGHT, now - self.lease]
+        if channel is not None:
+            query += " AND channel = ?"
+            params.append(channel)
+        query += " ORDER BY next_attempt_at LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(query, params).fetchall()
+                self._conn.executemany(
+                    "UPDATE deliveries SET state = ?, claimed_at = ? WHERE id = ?",
+                    [(STATE_INFLIGHT, now, row[0]) for row in rows],
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return [
+            QueuedDelivery(
+                id=row[0],
+                channel=row[1],
+                payload=json.loads(row[2]),
+                attempts=row[3],
+                created_at=row[4],
+            )
+            for row in rows
+        ]
+
+    def ack(self, delivery_id: int) -> None:
+        """Remove a successfully delivered notification."""
+        with self._lock:
+            self._conn.execute("DELETE FROM deliveries WHERE id = ?", (delivery_id,))
+
+    def retry(self, delivery_id: int, attempts: int, error: str | None = None) -> bool:
+        """
+        Reschedule a failed delivery with exponential backoff and jitter.
+
+        Args:
+            delivery_id: Row id of the delivery.
+            attempts: Number of attempts made so far (including the failed one).
+            error: Last error message for diagnostics.
+
+        Returns:
+            True if rescheduled, False if moved to dead letters.
+        """
+        if attempts >= self.max_attempts:
+            now = time.time()
+            # Dead letters keep the time they died in next_attempt_at, for retention
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE deliveries SET state = ?, attempts = ?, next_attempt_at = ?, "
+                    "last_error = ? WHERE id = ?",
+                    (STATE_DEAD, attempts, now, error, delivery_id),
+                )
+            logger.error(
+                "Delivery %s dropped to dead letters after %d attempts", delivery_id, attempts
+            )
+            self._purge_expired_dead(now)
+            return False
+
+        delay = self.backoff(attempts)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET state = ?, attempts = ?, next_attempt_at = ?, "
+                "last_error = ? WHERE id = ?",
+                (STATE_PENDING, attempts, time.time() + delay, error, delivery_id),
+            )
+        return True
+
+    def defer(self, delivery_id: int, delay: float, error: str | None = None) -> None:
+        """
+        Reschedule a delivery after ``delay`` seconds without consuming an attempt.
+
+        Args:
+            delivery_id: Row id of the delivery.
+            delay: Seconds until the delivery is due again.
+            error: Reason for diagnostics.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET state = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (STATE_PENDING, time.time() + max(0.0, delay), error, delivery_id),
+            )
+
+    def purge_dead(self, before: float) -> int:
+        """Delete dead letters that died before ``before`` (Unix timestamp); return rows removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM deliveries WHERE state = ? AND next_attempt_at < ?",
+                (STATE_DEAD, before),
+            )
+        return cursor.rowcount
+
+    def _purge_expired_dead(self, now: float) -> None:
+        if self.dead_retention <= 0:
+            return
+        removed = self.purge_dead(now - self.dead_retention)
+        if removed:
+            logger.info("Purged %d dead letter(s) past retention", removed)
+
+    def backoff(self, attempts: int) -> float:
+        """Return the jittered delay before attempt ``attempts + 1``."""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def stats(self, now: float | None = None) -> dict[str, Any]:
+        """Return queue depth, dead-letter count and age of the oldest pending delivery."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT channel, state, COUNT(*), MIN(created_at) FROM deliveries "
+                "GROUP BY channel, state"
+            ).fetchall()
+        channels: dict[str, int] = {}
+        depth = dead = 0
+        oldest: float | None = None
+        for channel, state, count, created_at in rows:
+            if state == STATE_DEAD:
+                dead += count
+                continue
+            depth += count
+            channels[channel] = channels.get(channel, 0) + count
+            oldest = created_at if oldest is None else min(oldest, created_at)
+        return {
+            "depth": depth,
+            "dead": dead,
+            "oldest_age_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            "channels": channels,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class DeliveryWorker:
+    """Drains the delivery queue through the notification dispatcher."""
+
+    def __init__(
+        self,
+        queue: DeliveryQueue,
+        dispatcher: Any,
+        channel_limit: int = 2,
+        poll_interval: float = 1.0,
+    ) -> None:
+        """
+        Initialize worker.
+
+        Args:
+            queue: Persistent delivery queue.
+            dispatcher: ``NotificationDispatcher`` used to run deliveries.
+            channel_limit: Maximum concurrent deliveries per channel.
+            poll_interval: Seconds between scans for due retries.
+        """
+        self.queue = queue
+        self.dispatcher = dispatcher
+        self.channel_limit = max(1, channel_limit)
+        self.poll_interval = poll_interval
+        self._senders: dict[str, Callable[[dict[str, Any]], bool]] = {}
+        # Deliveries scheduled per channel. Capacity is checked before claiming,
+        # so a slow channel leaves its rows pending instead of parking pool threads.
+        self._inflight: dict[str, int] = {}
+        self._inflight_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def register(self, channel: str, sender: Callable[[dict[str, Any]], bool]) -> None:
+        """Register the callable that delivers messages for ``channel``."""
+        self._senders[channel] = sender
+
+    def submit(self, channel: str, payload: dict[str, Any]) -> Future:
+        """
+        Persist a delivery and attempt it immediately on the dispatcher.
+
+        When ``channel`` already has ``channel_limit`` deliveries in flight the row
+        is left pending for the drain loop and the returned future resolves to
+        False right away, as it does for a failed first attempt.
+        """
+        if not self._reserve(channel):
+            self.queue.enqueue(channel, payload)
+            future: Future = Future()
+            future.set_result(False)
+            return future
+        delivery_id = self.queue.enqueue(channel, payload, claimed=True)
+        delivery = QueuedDelivery(
+            id=delivery_id, channel=channel, payload=payload, attempts=0, created_at=time.time()
+        )
+        return self._schedule(delivery)
+
+    def drain_once(self) -> int:
+        """Schedule due retries up to each channel's free capacity; returns the count."""
+        scheduled = 0
+        for channel in list(self._senders):
+            with self._inflight_lock:
+                free = self.channel_limit - self._inflight.get(channel, 0)
+                if free > 0:
+                    self._inflight[channel] = self._inflight.get(channel, 0) + free
+            if free <= 0:
+                continue
+            try:
+                due = self.queue.claim_due(limit=free, channel=channel)
+            except BaseException:
+                self._release_slots(channel, free)
+                raise
+            # Hand back the slots reserved for rows that were not due
+            self._release_slots(channel, free - len(due))
+            for delivery in due:
+                self._schedule(delivery)
+            scheduled += len(due)
+        return scheduled
+
+    def _reserve(self, channel: str) -> bool:
+        with self._inflight_lock:
+            count = self._inflight.get(channel, 0)
+            if count >= self.channel_limit:
+                return False
+            self._inflight[channel] = count + 1
+        return True
+
+    def _release_slots(self, channel: str, count: int) -> None:
+        if count <= 0:
+            return
+        with self._inflight_lock:
+            self._inflight[channel] = max(0, self._inflight.get(channel, 0) - count)
+
+    def _schedule(self, delivery: QueuedDelivery) -> Future:
+        # The caller has already reserved a slot for ``delivery.channel``
+        future = self.dispatcher.submit(self._attempt, delivery)
+        future.add_done_callback(lambda _f: self._release_slots(delivery.channel, 1))
+        return future
+
+    def _attempt(self, delivery: QueuedDelivery) -> bool:
+        sender = self._senders.get(delivery.channel)
+        if sender is None:
+            self.queue.retry(delivery.id, self.queue.max_attempts, "no sender registered")
+            return False
+
+        error: str | None = None
+        try:
+            ok = bool(sender(delivery.payload))
+        except DeferDelivery as exc:
+            self.queue.defer(delivery.id, exc.delay, str(exc))
+            return False
+        except Exception as exc:  # noqa: BLE001 - failures are retried, never raised
+            ok = False
+            error = str(exc)
+
+        if ok:
+            self.queue.ack(delivery.id)
+        else:
+            self.queue.retry(delivery.id, delivery.attempts + 1, error or "delivery failed")
+        return ok
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                scheduled = self.drain_once()
+            except sqlite3.Error as exc:
+                logger.error("Delivery queue scan failed: %s", exc)
+                scheduled = 0
+            if not scheduled:
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start the background drain thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="delivery-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Stop the background drain thread (attempts already scheduled keep running)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
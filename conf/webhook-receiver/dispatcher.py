@@ -0,0 +1,89 @@
+"""
+Concurrent notification dispatch for the webhook receiver.
+
+Outbound Discord/Slack/Telegram deliveries are submitted to a shared thread
+pool so a slow channel never blocks the others (or the Flask worker), and each
+channel reuses one keep-alive ``requests.Session`` instead of opening a fresh
+connection per alert.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("webhook-receiver")
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class NotificationDispatcher:
+    """Thread-pool fan-out with one pooled HTTP session per channel."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """
+        Initialize dispatcher.
+
+        Args:
+            max_workers: Upper bound on concurrent outbound deliveries.
+        """
+        self.max_workers = max(1, max_workers)
+        self._executor: ThreadPoolExecutor | None = None
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session(self, channel: str) -> requests.Session:
+        """
+        Return the keep-alive session for a channel, creating it on first use.
+
+        Args:
+            channel: Channel name (e.g., "discord").
+
+        Returns:
+            Session shared by all deliveries to that channel.
+        """
+        with self._lock:
+            session = self._sessions.get(channel)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[channel] = session
+            return session
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Schedule a delivery callable on the pool.
+
+        Args:
+            fn: Callable performing the delivery.
+            *args: Positional arguments for ``fn``.
+            **kwargs: Keyword arguments for ``fn``.
+
+        Returns:
+            Future resolving to the callable's return value.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="notify"
+                )
+            executor = self._executor
+        return executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work, optionally drain in-flight deliveries, close sessions."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            sessions, self._sessions = self._sessions, {}
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        for session in sessions.values():
+            session.close()
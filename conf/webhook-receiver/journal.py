@@ -0,0 +1,266 @@
+"""
+Append-only alert journal for the webhook receiver.
+
+Alert payloads are serialized to compact JSON Lines and appended by a single
+writer thread that batches writes and issues one ``fsync`` per batch. Segment
+files rotate by size and age; sealed segments are optionally compressed with
+gzip or zstd (``zstandard`` package) in the background. A writer holds an
+exclusive ``flock`` on its open segment and a sealer on the segment it
+compresses, so any segment whose lock is free was left by a process that died
+before sealing it; those are compressed when the next journal opens the
+directory. Locks, unlike the pid in a file name, do not survive a restart.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger("webhook-receiver")
+
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".jsonl"
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+class AlertJournal:
+    """Buffered, fsync-batched JSON Lines journal with segment rotation."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        max_segment_age: float = 86400.0,
+        flush_interval: float = 1.0,
+        compression: str = "gzip",
+    ) -> None:
+        """
+        Open the journal directory and start the writer thread.
+
+        Args:
+            directory: Directory holding segment files.
+            max_segment_bytes: Rotate once the active segment reaches this size.
+            max_segment_age: Rotate once the active segment is this many seconds old.
+            flush_interval: Maximum seconds a record waits before being written.
+            compression: "gzip", "zstd" or "none" for sealed segments.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.flush_interval = flush_interval
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard not installed; compressing journal segments with gzip")
+            compression = "gzip"
+        self.compression = compression if compression in COMPRESSION_SUFFIXES else "none"
+
+        self._queue: queue.Queue[tuple[int, bytes] | None] = queue.Queue()
+        self._seq_cond = threading.Condition()
+        self._appended = 0
+        self._written = 0
+        self._segment: Path | None = None
+        self._handle = None
+        self._segment_opened = 0.0
+        self._segment_size = 0
+        self._compress_orphans()
+
+        self._thread = threading.Thread(target=self._run, name="alert-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict[str, Any], alert_type: str = "general") -> None:
+        """
+        Queue a record for writing.
+
+        Args:
+            record: JSON-serializable alert payload.
+            alert_type: Route/category the payload was received on.
+
+        Raises:
+            TypeError, ValueError: If the record cannot be serialized.
+        """
+        now = time.time()
+        envelope = {
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "alert_type": alert_type,
+            "data": record,
+        }
+        line = (
+            json.dumps(envelope, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        )
+        with self._seq_cond:
+            self._appended += 1
+            seq = self._appended
+        self._queue.put((seq, line))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every record appended so far is written and fsynced."""
+        with self._seq_cond:
+            target = self._appended
+            return self._seq_cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Flush pending records and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # Writer thread -----------------------------------------------------------------
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._maybe_rotate()
+                continue
+            batch = []
+            while item is not None:
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stop = item is None
+            if batch:
+                self._write_batch(batch)
+        # Seal inline: a background thread would not outlive interpreter shutdown
+        self._close_segment(background=False)
+
+    def _write_batch(self, batch: list[tuple[int, bytes]]) -> None:
+        try:
+            self._maybe_rotate()
+            handle = self._open_segment()
+            for _seq, line in batch:
+                handle.write(line)
+                self._segment_size += len(line)
+            handle.flush()
+            os.fsync(handle.fileno())
+        except OSError as exc:
+            logger.error("Failed to write %d alert(s) to journal: %s", len(batch), exc)
+            self._close_segment()
+        with self._seq_cond:
+            self._written = max(self._written, batch[-1][0])
+            self._seq_cond.notify_all()
+
+    def _open_segment(self):
+        if self._handle is None:
+            stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            self._segment = (
+                self.directory / f"{SEGMENT_PREFIX}{stamp}-{os.getpid()}{SEGMENT_SUFFIX}"
+            )
+            self._handle = open(self._segment, "ab")  # noqa: SIM115 - long-lived handle
+            # Marks the segment as live for other journals scanning for orphans
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._segment_opened = time.time()
+            self._segment_size = self._handle.tell()
+        return self._handle
+
+    def _maybe_rotate(self) -> None:
+        if self._handle is None:
+            return
+        too_big = self._segment_size >= self.max_segment_bytes
+        too_old = time.time() - self._segment_opened >= self.max_segment_age
+        if too_big or too_old:
+            self._close_segment()
+
+    def _close_segment(self, background: bool = True) -> None:
+        handle, segment = self._handle, self._segment
+        self._handle = None
+        if handle is None:
+            return
+        try:
+            handle.close()
+        except OSError as exc:
+            logger.error("Failed to close journal segment %s: %s", segment, exc)
+        if self.compression == "none" or segment is None:
+            return
+        if background:
+            threading.Thread(
+                target=self._compress, args=(segment,), name="journal-compress", daemon=True
+            ).start()
+        else:
+            self._compress(segment)
+
+    def _compress(self, segment: Path) -> None:
+        src = _lock_segment(segment)
+        if src is None:
+            # Still being written, already sealed, or another process is sealing it
+            return
+        target = segment.with_name(segment.name + COMPRESSION_SUFFIXES[self.compression])
+        # Readers never see a partial archive; only the segment's lock holder writes it
+        partial = target.with_name(target.name + ".tmp")
+        try:
+            with src:
+                if os.fstat(src.fileno()).st_nlink == 0:
+                    return  # sealed by another process between our open and lock
+                with open(partial, "wb") as dst:
+                    if self.compression == "zstd":
+                        zstandard.ZstdCompressor().copy_stream(src, dst)
+                    else:
+                        with gzip.GzipFile(fileobj=dst, mode="wb") as gz:
+                            shutil.copyfileobj(src, gz)
+                os.replace(partial, target)
+                segment.unlink(missing_ok=True)
+        except OSError as exc:
+            logger.error("Failed to compress journal segment %s: %s", segment, exc)
+            partial.unlink(missing_ok=True)
+
+    def _compress_orphans(self) -> None:
+        """Compress segments nobody holds a lock on (their writer died before sealing)."""
+        if self.compression == "none":
+            return
+        try:
+            segments = list(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+            partials = list(self.directory.glob(f"{SEGMENT_PREFIX}*.tmp"))
+        except OSError:
+            return
+        for partial in partials:
+            # A partial archive outlives its segment only if its sealer died; one
+            # whose segment remains is rewritten when that segment is sealed
+            end = partial.name.find(SEGMENT_SUFFIX) + len(SEGMENT_SUFFIX)
+            if not partial.with_name(partial.name[:end]).exists():
+                partial.unlink(missing_ok=True)
+        orphans = []
+        for segment in segments:
+            handle = _lock_segment(segment)
+            if handle is not None:
+                handle.close()
+                orphans.append(segment)
+        if orphans:
+            logger.info("Compressing %d journal segment(s) left by a stopped process", len(orphans))
+            threading.Thread(
+                target=self._compress_all, args=(orphans,), name="journal-compress", daemon=True
+            ).start()
+
+    def _compress_all(self, segments: list[Path]) -> None:
+        for segment in segments:
+            self._compress(segment)
+
+
+def _lock_segment(segment: Path) -> IO[bytes] | None:
+    """Open a segment with a non-blocking exclusive lock; ``None`` if missing or held."""
+    try:
+        handle = open(segment, "rb")  # noqa: SIM115 - returned to the caller
+    except OSError:
+        return None
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
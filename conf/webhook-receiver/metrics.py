@@ -0,0 +1,221 @@
+"""
+Prometheus metrics for the webhook receiver and handler.
+
+``WebhookMetrics`` owns a private ``CollectorRegistry`` (as in
+``conf/rag_exporter.py``) so each app module exposes only its own series.
+``instrument(app)`` records per-route latency, in-flight requests and
+auth/validation/rate-limit rejections from response status codes; code paths
+add finer detail with ``stage()`` and the ``observe_*`` helpers.
+
+Metrics exported (prefix ``erni_ki_webhook``):
+- _request_duration_seconds{route,method,status}: request latency
+- _stage_duration_seconds{route,stage}: signature/validation/persistence/... latency
+- _requests_in_flight: requests currently being handled
+- _auth_failures_total / _validation_failures_total / _rate_limited_total{route}
+- _notifications_total{channel,result} and _notification_duration_seconds{channel}
+- _notifications_short_circuited_total{channel,action}: sends skipped by an open circuit
+- _recovery_duration_seconds{service,result}: recovery script runs
+- _delivery_queue_depth{channel} / _delivery_queue_dead / _delivery_queue_oldest_age_seconds:
+  durable delivery queue backlog, refreshed on scrape when ``track_queue`` is used
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from typing import Any
+
+from flask import Flask, Response, g, has_request_context, request
+from prometheus_client import (  # type: ignore[reportMissingImports]
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)  # seconds
+NOTIFICATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)  # seconds
+RECOVERY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)  # seconds
+
+_STATUS_COUNTERS = {401: "auth_failures", 400: "validation_failures", 429: "rate_limited"}
+
+
+def _route() -> str:
+    """Route template of the current request (bounded label cardinality)."""
+    if not has_request_context():
+        return "background"
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+class WebhookMetrics:
+    """Request, stage, notification and recovery metrics in a private registry."""
+
+    def __init__(self, prefix: str = "erni_ki_webhook") -> None:
+        """
+        Create all metrics.
+
+        Args:
+            prefix: Metric name prefix.
+        """
+        self.registry = CollectorRegistry()
+        self.request_latency = Histogram(
+            f"{prefix}_request_duration_seconds",
+            "Webhook HTTP request latency in seconds",
+            ["route", "method", "status"],
+            buckets=REQUEST_BUCKETS,
+            registry=self.registry,
+        )
+        self.stage_latency = Histogram(
+            f"{prefix}_stage_duration_seconds",
+            "Latency of request processing stages in seconds",
+            ["route", "stage"],
+            buckets=STAGE_BUCKETS,
+            registry=self.registry,
+        )
+        self.in_flight = Gauge(
+            f"{prefix}_requests_in_flight",
+            "Webhook HTTP requests currently being handled",
+            registry=self.registry,
+        )
+        self.auth_failures = Counter(
+            f"{prefix}_auth_failures_total",
+            "Requests rejected for a bad signature or token",
+            ["route"],
+            registry=self.registry,
+        )
+        self.validation_failures = Counter(
+            f"{prefix}_validation_failures_total",
+            "Requests rejected for invalid JSON or payload",
+            ["route"],
+            registry=self.registry,
+        )
+        self.rate_limited = Counter(
+            f"{prefix}_rate_limited_total",
+            "Requests rejected by the rate limiter",
+            ["route"],
+            registry=self.registry,
+        )
+        self.notifications = Counter(
+            f"{prefix}_notifications_total",
+            "Outbound notification attempts by channel and result",
+            ["channel", "result"],
+            registry=self.registry,
+        )
+        self.notification_latency = Histogram(
+            f"{prefix}_notification_duration_seconds",
+            "Outbound notification latency in seconds",
+            ["channel"],
+            buckets=NOTIFICATION_BUCKETS,
+            registry=self.registry,
+        )
+        self.short_circuited = Counter(
+            f"{prefix}_notifications_short_circuited_total",
+            "Notifications skipped by an open channel circuit (deferred or dropped)",
+            ["channel", "action"],
+            registry=self.registry,
+        )
+        self.recovery_latency = Histogram(
+            f"{prefix}_recovery_duration_seconds",
+            "Recovery script run time in seconds",
+            ["service", "result"],
+            buckets=RECOVERY_BUCKETS,
+            registry=self.registry,
+        )
+        self.queue_depth = Gauge(
+            f"{prefix}_delivery_queue_depth",
+            "Notifications pending or in flight in the delivery queue",
+            ["channel"],
+            registry=self.registry,
+        )
+        self.queue_dead = Gauge(
+            f"{prefix}_delivery_queue_dead",
+            "Notifications kept as dead letters after exhausting their attempts",
+            registry=self.registry,
+        )
+        self.queue_oldest_age = Gauge(
+            f"{prefix}_delivery_queue_oldest_age_seconds",
+            "Age of the oldest undelivered notification in seconds",
+            registry=self.registry,
+        )
+        self._queue_stats: Callable[[], dict[str, Any]] | None = None
+
+    def track_queue(self, stats: Callable[[], dict[str, Any]]) -> None:
+        """Refresh the delivery queue gauges from ``stats()`` on every scrape."""
+        self._queue_stats = stats
+
+    def instrument(self, app: Flask) -> None:
+        """Register request hooks recording latency, in-flight count and rejections."""
+
+        # Hooks registered earlier (flask-limiter's check) may reject a request
+        # before _start_timer runs, so rejections are counted without a start time
+        # and in_flight is only decremented when it was incremented.
+        @app.before_request
+        def _start_timer() -> None:
+            g.metrics_start = time.perf_counter()
+            self.in_flight.inc()
+            g.metrics_in_flight = True
+
+        @app.after_request
+        def _record(response):
+            route = _route()
+            start = g.pop("metrics_start", None)
+            if start is not None:
+                self.request_latency.labels(
+                    route, request.method, str(response.status_code)
+                ).observe(time.perf_counter() - start)
+            counter = _STATUS_COUNTERS.get(response.status_code)
+            if counter is not None:
+                getattr(self, counter).labels(route).inc()
+            return response
+
+        @app.teardown_request
+        def _finish(_exc: BaseException | None) -> None:
+            if g.pop("metrics_in_flight", False):
+                self.in_flight.dec()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a processing stage of the current request."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_latency.labels(_route(), name).observe(time.perf_counter() - start)
+
+    def observe_notification(self, channel: str, ok: bool, seconds: float) -> None:
+        """Record one outbound notification attempt."""
+        self.notifications.labels(channel, "success" if ok else "failure").inc()
+        self.notification_latency.labels(channel).observe(seconds)
+
+    def observe_short_circuit(self, channel: str, deferred: bool) -> None:
+        """Record one notification skipped by an open circuit."""
+        self.short_circuited.labels(channel, "deferred" if deferred else "dropped").inc()
+
+    def observe_recovery(self, service: str, exit_code: int | None, seconds: float) -> None:
+        """Record one recovery script run."""
+        if exit_code is None:
+            self.recovery_latency.labels(service, "not_run").observe(seconds)
+            return
+        result = "success" if exit_code == 0 else "failure"
+        self.recovery_latency.labels(service, result).observe(seconds)
+
+    def _refresh_queue(self, stats: dict[str, Any]) -> None:
+        # Drained channels disappear from stats; clear so they report nothing, not stale depth
+        self.queue_depth.clear()
+        for channel, depth in stats.get("channels", {}).items():
+            self.queue_depth.labels(channel).set(depth)
+        self.queue_dead.set(stats.get("dead", 0))
+        self.queue_oldest_age.set(stats.get("oldest_age_seconds", 0.0))
+
+    def response(self) -> Response:
+        """Render the registry for a ``/metrics`` endpoint."""
+        if self._queue_stats is not None:
+            # An unreadable queue must not hide the other series
+            with suppress(Exception):
+                self._refresh_queue(self._queue_stats())
+        return Response(generate_latest(self.registry), mimetype=CONTENT_TYPE_LATEST)
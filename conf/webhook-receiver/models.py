@@ -4,12 +4,15 @@ Pydantic models for webhook alert validation.
 
 from typing import Any
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class AlertLabels(BaseModel):
     """Alert labels with validation."""
 
+    # Alertmanager labels are open-ended (instance, mountpoint, pod...): keep them all
+    model_config = ConfigDict(extra="allow")
+
     alertname: str
     severity: str | None = None
     service: str | None = None
@@ -98,6 +101,9 @@ class Alert(BaseModel):
     labels: AlertLabels
     annotations: dict[str, Any] = {}
     status: str
+    startsAt: str | None = None  # noqa: N815
+    endsAt: str | None = None  # noqa: N815
+    fingerprint: str | None = None
 
 
 class AlertPayload(BaseModel):
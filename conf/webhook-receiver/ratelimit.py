@@ -0,0 +1,310 @@
+"""
+Shared-state rate limiting for the webhook services.
+
+``RateLimiter`` exposes the same ``limit("10 per minute")`` decorator,
+``exempt`` marker and ``default_limits`` as flask-limiter and keys every check
+by remote address and route. Counters live in a pluggable backend so that all
+gunicorn workers enforce one limit:
+
+- ``memory://``: per-process token buckets (tests, single worker)
+- ``file:///path/ratelimit.bin``: token buckets in a fixed-size mmap'd slot
+  table shared by every worker on the host
+- ``redis://host:port/db``: sliding-window counters in Redis (needs ``redis``)
+
+Every check is O(1) and every backend has bounded memory.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import wraps
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from flask import Flask, current_app, jsonify, request
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger("webhook-receiver")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rule(rule: str) -> tuple[int, float]:
+    """
+    Parse a flask-limiter style rule.
+
+    Args:
+        rule: Rule such as ``"10 per minute"``, ``"10/minute"`` or ``"5 per 10 seconds"``.
+
+    Returns:
+        Tuple of (limit, period in seconds).
+
+    Raises:
+        ValueError: If the rule cannot be parsed.
+    """
+    parts = rule.replace("/", " per ").split()
+    if len(parts) not in (3, 4) or parts[1] != "per":
+        raise ValueError(f"Invalid rate limit rule: {rule!r}")
+    multiplier = int(parts[2]) if len(parts) == 4 else 1
+    unit = parts[-1].rstrip("s")
+    if unit not in _PERIODS:
+        raise ValueError(f"Invalid rate limit period: {rule!r}")
+    return int(parts[0]), float(multiplier * _PERIODS[unit])
+
+
+def _refill(tokens: float, updated: float, now: float, limit: int, period: float) -> float:
+    """Return bucket level at ``now`` (a never-seen bucket has ``updated == 0``)."""
+    if updated <= 0:
+        return float(limit)
+    return min(float(limit), tokens + (now - updated) * limit / period)
+
+
+class MemoryBackend:
+    """Per-process token buckets with LRU eviction."""
+
+    def __init__(self, max_keys: int = 10000, clock: Callable[[], float] = time.time) -> None:
+        """
+        Initialize backend.
+
+        Args:
+            max_keys: Maximum number of buckets kept; least recently used are evicted.
+            clock: Time source (overridable for tests).
+        """
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, period: float) -> bool:
+        """Consume one token for ``key``; return False if the bucket is empty."""
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (0.0, 0.0))
+            tokens = _refill(tokens, updated, now, limit, period)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+class MmapBackend:
+    """
+    Token buckets in a memory-mapped file shared between processes.
+
+    The file is a direct-mapped table of fixed-size slots indexed by key hash.
+    Each check locks a single slot with ``fcntl`` (processes) and a thread lock
+    (threads within a process). A hash collision simply resets the slot for the
+    new key, which can only make the limiter more lenient, never stricter.
+    """
+
+    _SLOT = struct.Struct("<Qdd8x")  # key hash, tokens, updated; padded to 32 bytes
+
+    def __init__(
+        self, path: Path, slots: int = 4096, clock: Callable[[], float] = time.time
+    ) -> None:
+        """
+        Open (or create) the shared slot table.
+
+        Args:
+            path: Backing file; every worker must use the same path.
+            slots: Number of buckets in the table.
+            clock: Time source (overridable for tests).
+        """
+        self.path = Path(path)
+        self.slots = max(1, slots)
+        self._clock = clock
+        self._lock = threading.Lock()
+        size = self.slots * self._SLOT.size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def hit(self, key: str, limit: int, period: float) -> bool:
+        """Consume one token for ``key``; return False if the bucket is empty."""
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        offset = (digest % self.slots) * self._SLOT.size
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._SLOT.size, offset)
+            try:
+                stored, tokens, updated = self._SLOT.unpack_from(self._map, offset)
+                if stored != digest:
+                    tokens, updated = 0.0, 0.0
+                now = self._clock()
+                tokens = _refill(tokens, updated, now, limit, period)
+                allowed = tokens >= 1
+                self._SLOT.pack_into(
+                    self._map, offset, digest, tokens - 1 if allowed else tokens, now
+                )
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._SLOT.size, offset)
+        return allowed
+
+    def close(self) -> None:
+        """Unmap and close the backing file."""
+        self._map.close()
+        os.close(self._fd)
+
+
+class RedisBackend:
+    """Sliding-window counters in Redis (approximated from two fixed windows)."""
+
+    def __init__(
+        self, client: Any, prefix: str = "ratelimit:", clock: Callable[[], float] = time.time
+    ) -> None:
+        """
+        Initialize backend.
+
+        Args:
+            client: redis-py compatible client (``pipeline`` with ``incr``/``expire``/``get``).
+            prefix: Key prefix for counters.
+            clock: Time source (overridable for tests).
+        """
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisBackend:
+        """Create a backend from a ``redis://`` URL (requires the ``redis`` package)."""
+        if redis is None:
+            raise ImportError("redis package is required for redis:// rate limit storage")
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5))
+
+    def hit(self, key: str, limit: int, period: float) -> bool:
+        """Count one request for ``key``; return False once the window is full."""
+        now = self._clock()
+        window = int(now // period)
+        current = f"{self.prefix}{key}:{window}"
+        previous = f"{self.prefix}{key}:{window - 1}"
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(current)
+            pipe.expire(current, int(period * 2) + 1)
+            pipe.get(previous)
+            count, _, previous_count = pipe.execute()
+        except Exception as exc:  # noqa: BLE001
+            # Fail open: an unreachable Redis must not block alert ingestion
+            logger.warning("Rate limit backend unavailable, allowing request: %s", exc)
+            return True
+        elapsed = (now % period) / period
+        estimate = int(previous_count or 0) * (1 - elapsed) + int(count)
+        return estimate <= limit
+
+
+def create_backend(uri: str) -> MemoryBackend | MmapBackend | RedisBackend:
+    """
+    Build a backend from a storage URI.
+
+    Args:
+        uri: ``memory://``, ``file:///path`` or ``redis://...``/``rediss://...``.
+
+    Returns:
+        Configured backend.
+
+    Raises:
+        ValueError: If the scheme is not supported.
+    """
+    parsed = urlparse(uri)
+    if parsed.scheme in ("", "memory"):
+        return MemoryBackend()
+    if parsed.scheme == "file":
+        return MmapBackend(Path(parsed.path))
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisBackend.from_url(uri)
+    raise ValueError(f"Unsupported rate limit storage: {uri}")
+
+
+class RateLimiter:
+    """flask-limiter compatible ``limit``/``exempt`` decorators over a shared backend."""
+
+    def __init__(
+        self,
+        backend: MemoryBackend | MmapBackend | RedisBackend,
+        app: Flask | None = None,
+        default_limits: list[str] | tuple[str, ...] = (),
+    ) -> None:
+        """
+        Initialize limiter.
+
+        Args:
+            backend: Counter storage shared by all workers.
+            app: Application to enforce ``default_limits`` on (see ``init_app``).
+            default_limits: Rules applied, per route, to every route that has no
+                ``limit`` decorator and is not ``exempt``.
+        """
+        self.backend = backend
+        self.default_limits = [(rule, *parse_rule(rule)) for rule in default_limits]
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Enforce the default limits on ``app`` before each request."""
+        app.before_request(self._check_default_limits)
+
+    def limit(self, rule: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Create rate limiting decorator.
+
+        Args:
+            rule: Rate limit rule string (e.g., "10 per minute").
+
+        Returns:
+            Decorator returning 429 once the caller exceeds the rule on that route.
+        """
+        limit, period = parse_rule(rule)
+
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            @wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any):
+                route = request.endpoint or fn.__name__
+                if not self.backend.hit(_client_key(route), limit, period):
+                    return _rejected()
+                return fn(*args, **kwargs)
+
+            # Explicit limits replace the defaults, as in flask-limiter
+            wrapper.rate_limit_explicit = True  # type: ignore[attr-defined]
+            return wrapper
+
+        return decorator
+
+    def exempt(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Exclude a route from the default limits."""
+        fn.rate_limit_exempt = True  # type: ignore[attr-defined]
+        return fn
+
+    def _check_default_limits(self) -> Any:
+        if not self.default_limits or request.endpoint is None:
+            return None
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, "rate_limit_explicit", False) or getattr(view, "rate_limit_exempt", False):
+            return None
+        for rule, limit, period in self.default_limits:
+            if not self.backend.hit(_client_key(f"{request.endpoint}:{rule}"), limit, period):
+                return _rejected()
+        return None
+
+
+def _client_key(route: str) -> str:
+    return f"{request.remote_addr or 'unknown'}:{route}"
+
+
+def _rejected() -> tuple[Any, int]:
+    return jsonify({"error": "rate limit exceeded"}), 429
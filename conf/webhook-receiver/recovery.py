@@ -0,0 +1,206 @@
+"""
+Background executor for service recovery scripts.
+
+Critical alerts only *trigger* recovery; the script itself runs on a small
+bounded thread pool outside the HTTP request. Triggers for a service whose
+script is already running are coalesced into that run (single-flight), and
+triggers arriving within ``cooldown`` seconds of the last finished run are
+skipped, so a burst of alerts for one service launches its script once.
+
+Gunicorn runs several worker processes, each with its own executor. With
+``lock_dir`` set, a run also holds an exclusive ``flock`` on
+``<lock_dir>/<service>.lock`` and stamps the file with its wall-clock finish
+time, so single-flight and cooldown hold across processes (and restarts).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("webhook-receiver")
+
+TRIGGER_STARTED = "started"
+TRIGGER_COALESCED = "coalesced"
+TRIGGER_COOLDOWN = "cooldown"
+
+
+@dataclass
+class RecoveryStatus:
+    """Per-service recovery run bookkeeping."""
+
+    running: bool = False
+    runs: int = 0
+    coalesced: int = 0
+    skipped_cooldown: int = 0
+    last_started: str | None = None
+    last_finished: str | None = None
+    last_duration_seconds: float | None = None
+    last_exit_code: int | None = None
+    last_error: str | None = None
+
+
+class RecoveryExecutor:
+    """Single-flight, cooldown-limited recovery runner on a bounded thread pool."""
+
+    def __init__(
+        self,
+        runner: Callable[[str], int | None],
+        max_workers: int = 2,
+        cooldown: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        lock_dir: Path | None = None,
+    ) -> None:
+        """
+        Initialize executor.
+
+        Args:
+            runner: Callable running the script for a service; returns its exit code,
+                or None when the script did not run to completion.
+            max_workers: Maximum recovery scripts running at once.
+            cooldown: Seconds after a finished run during which new triggers are skipped.
+            clock: Monotonic time source (overridable for tests).
+            lock_dir: Directory for per-service lock files shared by all processes;
+                None keeps single-flight and cooldown per process.
+        """
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self.cooldown = cooldown
+        self.lock_dir = Path(lock_dir) if lock_dir is not None else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._status: dict[str, RecoveryStatus] = {}
+        self._finished_at: dict[str, float] = {}
+        self._executor: ThreadPoolExecutor | None = None
+
+    def trigger(self, service: str) -> str:
+        """
+        Request a recovery run for a service without waiting for it.
+
+        Args:
+            service: Service name passed to the runner.
+
+        Returns:
+            ``"started"``, ``"coalesced"`` (a run is already in flight) or
+            ``"cooldown"`` (the last run finished less than ``cooldown`` seconds ago).
+        """
+        with self._lock:
+            status = self._status.setdefault(service, RecoveryStatus())
+            if status.running:
+                status.coalesced += 1
+                return TRIGGER_COALESCED
+            finished_at = self._finished_at.get(service)
+            if finished_at is not None and self._clock() - finished_at < self.cooldown:
+                status.skipped_cooldown += 1
+                return TRIGGER_COOLDOWN
+            refusal, lock_fd = self._lock_service(service)
+            if refusal == TRIGGER_COALESCED:
+                status.coalesced += 1
+                return refusal
+            if refusal == TRIGGER_COOLDOWN:
+                status.skipped_cooldown += 1
+                return refusal
+            status.running = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="recovery"
+                )
+            executor = self._executor
+        executor.submit(self._run, service, lock_fd)
+        return TRIGGER_STARTED
+
+    def status(self) -> dict[str, dict[str, Any]]:
+        """Return a snapshot of per-service run state."""
+        now = self._clock()
+        with self._lock:
+            snapshot = {}
+            for service, status in self._status.items():
+                finished_at = self._finished_at.get(service)
+                remaining = 0.0
+                if finished_at is not None and not status.running:
+                    remaining = max(0.0, self.cooldown - (now - finished_at))
+                snapshot[service] = {
+                    **asdict(status),
+                    "cooldown_remaining_seconds": round(remaining, 1),
+                }
+            return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool; a later trigger starts a new one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _lock_service(self, service: str) -> tuple[str | None, int | None]:
+        """
+        Take the cross-process lock for ``service`` without blocking.
+
+        Returns:
+            ``(refusal, fd)``: refusal is ``"coalesced"`` when another process holds
+            the lock or ``"cooldown"`` when its last run finished too recently; fd
+            is the locked file to stamp and close after the run.
+        """
+        if self.lock_dir is None:
+            return None, None
+        try:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.lock_dir / f"{service}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as exc:
+            logger.warning("Recovery lock for %s unavailable, running unlocked: %s", service, exc)
+            return None, None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return TRIGGER_COALESCED, None
+        try:
+            last_finished = float(os.pread(fd, 32, 0) or b"0")
+        except ValueError:
+            last_finished = 0.0
+        if self.cooldown > 0 and time.time() - last_finished < self.cooldown:
+            os.close(fd)
+            return TRIGGER_COOLDOWN, None
+        return None, fd
+
+    def _run(self, service: str, lock_fd: int | None = None) -> None:
+        try:
+            self._run_locked(service)
+        finally:
+            if lock_fd is not None:
+                # Closing the descriptor releases the flock
+                stamp = repr(time.time()).encode()
+                os.ftruncate(lock_fd, 0)
+                os.pwrite(lock_fd, stamp, 0)
+                os.close(lock_fd)
+
+    def _run_locked(self, service: str) -> None:
+        started = self._clock()
+        with self._lock:
+            status = self._status[service]
+            status.runs += 1
+            status.last_started = datetime.now().isoformat()
+        exit_code: int | None = None
+        error: str | None = None
+        try:
+            exit_code = self.runner(service)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Recovery runner crashed for %s", service)
+            error = str(exc)
+        finished = self._clock()
+        with self._lock:
+            status.running = False
+            status.last_finished = datetime.now().isoformat()
+            status.last_duration_seconds = round(finished - started, 3)
+            status.last_exit_code = exit_code
+            status.last_error = error
+            self._finished_at[service] = finished
@@ -8,11 +8,23 @@ from pathlib import Path
 from subprocess import CalledProcessError, TimeoutExpired, run  # nosec B404
 from typing import Any
 
+try:
+    from .recovery import RecoveryExecutor
+except ImportError:
+    import sys
+
+    _current_dir = str(Path(__file__).parent)
+    if _current_dir not in sys.path:
+        sys.path.insert(0, _current_dir)
+    from recovery import RecoveryExecutor  # type: ignore
+
 logger = logging.getLogger("webhook-receiver")
 
 # Recovery script configuration
 RECOVERY_DIR = Path(os.getenv("RECOVERY_DIR", "/app/scripts/recovery"))
 RECOVERY_SCRIPT_TIMEOUT = int(os.getenv("RECOVERY_SCRIPT_TIMEOUT", "30"))
+RECOVERY_MAX_WORKERS = int(os.getenv("RECOVERY_MAX_WORKERS", "2"))
+RECOVERY_COOLDOWN = float(os.getenv("RECOVERY_COOLDOWN", "300"))
 
 # Explicit mapping of services to recovery script filenames
 # This prevents any path traversal attempts through service names
@@ -76,7 +88,8 @@ def handle_critical_alert(alert: dict[str, Any]) -> None:
     logger.critical("🚨 CRITICAL ALERT for service: %s", service)
 
     if service in ALLOWED_SERVICES:
-        run_recovery_script(service)
+        outcome = recovery_executor.trigger(service)
+        logger.info("Recovery for %s: %s", service, outcome)
     else:
         logger.info(
             "Service %s has no recovery script configured; manual intervention may be required",
@@ -97,12 +110,12 @@ def handle_gpu_alert(alert: dict[str, Any]) -> None:
         logger.warning("GPU temperature alert - consider reducing workload")
 
 
-def run_recovery_script(service: str) -> None:
-    """Execute recovery script for a critical service if available."""
+def run_recovery_script(service: str) -> int | None:
+    """Execute recovery script for a critical service; return its exit code if it ran."""
     # Use explicit mapping to prevent path traversal attacks
     if service not in RECOVERY_SCRIPTS:
         logger.error("Invalid service: %s", service)
-        return
+        return None
 
     script_filename = RECOVERY_SCRIPTS[service]
     script_path = RECOVERY_DIR / script_filename
@@ -110,15 +123,15 @@ def run_recovery_script(service: str) -> None:
     # Double-check path is within recovery directory
     if not _path_within(RECOVERY_DIR, script_path):
         logger.error("Path traversal attempt detected for %s", script_path)
-        return
+        return None
 
     if not script_path.exists():
         logger.warning("No recovery script found for %s at %s", service, script_path)
-        return
+        return None
 
     if not os.access(script_path, os.X_OK):
         logger.warning("Recovery script for %s is not executable: %s", service, script_path)
-        return
+        return None
 
     try:
         logger.info("Running recovery script for %s: %s", service, script_path)
@@ -132,6 +145,7 @@ def run_recovery_script(service: str) -> None:
         logger.info("Recovery script output:\n%s", result.stdout)
         if result.stderr:
             logger.warning("Recovery script stderr:\n%s", result.stderr)
+        return result.returncode
     except TimeoutExpired:
         logger.error(
             "Recovery script timeout for %s after %d seconds", service, RECOVERY_SCRIPT_TIMEOUT
@@ -140,5 +154,15 @@ def run_recovery_script(service: str) -> None:
         logger.error(
             "Recovery script failed for %s (exit %s): %s", service, exc.returncode, exc.stderr
         )
+        return exc.returncode
     except (OSError, FileNotFoundError) as exc:
         logger.error("Failed to execute recovery script for %s: %s", service, exc)
+    return None
+
+
+# Scripts run in the background; looked up at call time so tests can patch the runner
+recovery_executor = RecoveryExecutor(
+    lambda service: run_recovery_script(service),
+    max_workers=RECOVERY_MAX_WORKERS,
+    cooldown=RECOVERY_COOLDOWN,
+)
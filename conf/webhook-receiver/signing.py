@@ -0,0 +1,153 @@
+"""
+Webhook request authentication with pre-keyed HMAC and secret rotation.
+
+``SignatureVerifier`` keys one ``hmac`` object per accepted secret when the
+secrets are loaded, and every request works on a ``copy()`` of that template
+instead of re-encoding the secret and re-running the HMAC key schedule. Both
+the current and the previous secret are accepted, so Alertmanager and the
+receiver can be rotated independently. Secrets are read from the environment
+(or ``*_FILE`` paths, e.g. Docker secrets) only at startup and on reload,
+which ``install_reload_signal`` wires to a signal (SIGHUP by default).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import signal
+import threading
+from collections.abc import Callable, Mapping
+from pathlib import Path
+
+logger = logging.getLogger("webhook-receiver")
+
+SECRET_ENV = "ALERTMANAGER_WEBHOOK_SECRET"  # noqa: S105  # nosec B105
+PREVIOUS_SECRET_ENV = "ALERTMANAGER_WEBHOOK_SECRET_PREVIOUS"  # noqa: S105  # nosec B105
+
+
+def _read_secret(name: str, env: Mapping[str, str]) -> str | None:
+    """Read ``name`` from ``<name>_FILE`` when set, else from the variable itself."""
+    path = env.get(f"{name}_FILE")
+    if path:
+        try:
+            return Path(path).read_text(encoding="utf-8").strip() or None
+        except OSError as exc:
+            logger.error("Failed to read %s_FILE (%s): %s", name, path, exc)
+            return None
+    return env.get(name)
+
+
+def read_secrets(env: Mapping[str, str] | None = None) -> tuple[str | None, str | None]:
+    """
+    Read the current and previous webhook secrets.
+
+    Args:
+        env: Variable mapping (defaults to ``os.environ``).
+
+    Returns:
+        Tuple of (current secret, previous secret); either may be None.
+    """
+    env = os.environ if env is None else env
+    return _read_secret(SECRET_ENV, env), _read_secret(PREVIOUS_SECRET_ENV, env)
+
+
+class SignatureVerifier:
+    """HMAC-SHA256 signature and bearer token checks against rotating secrets."""
+
+    def __init__(self, secret: str | None = None, previous: str | None = None) -> None:
+        """
+        Initialize verifier.
+
+        Args:
+            secret: Current shared secret.
+            previous: Previous secret, still accepted during a rotation.
+        """
+        self._keys: tuple[tuple[hmac.HMAC, bytes], ...] = ()
+        self.secret: str | None = None
+        self.previous: str | None = None
+        self.load(secret, previous)
+
+    def load(self, secret: str | None, previous: str | None = None) -> None:
+        """Replace the accepted secrets (atomic for concurrent verifications)."""
+        keys = []
+        for value in dict.fromkeys(v for v in (secret, previous) if v):
+            raw = value.encode()
+            keys.append((hmac.new(raw, digestmod=hashlib.sha256), raw))
+        # Readers take one reference to the tuple, so a swap never mixes old and new keys
+        self._keys = tuple(keys)
+        self.secret = secret or None
+        self.previous = previous or None
+
+    @property
+    def configured(self) -> bool:
+        """Whether at least one secret is loaded."""
+        return bool(self._keys)
+
+    def verify_signature(self, body: bytes, signature: str | None) -> bool:
+        """
+        Check a hex HMAC-SHA256 signature of ``body``.
+
+        Args:
+            body: Raw request body.
+            signature: Value of the ``X-Signature`` header.
+
+        Returns:
+            True if the signature matches the current or previous secret.
+        """
+        if not signature:
+            return False
+        matched = False
+        for template, _ in self._keys:
+            mac = template.copy()
+            mac.update(body)
+            # Check every key so timing does not reveal which secret matched
+            matched |= hmac.compare_digest(signature, mac.hexdigest())
+        return matched
+
+    def verify_token(self, auth_header: str | None) -> bool:
+        """
+        Check an ``Authorization: Bearer <secret>`` header.
+
+        Args:
+            auth_header: Value of the ``Authorization`` header.
+
+        Returns:
+            True if the token equals the current or previous secret.
+        """
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return False
+        token = auth_header[7:].encode()
+        matched = False
+        for _, raw in self._keys:
+            matched |= hmac.compare_digest(token, raw)
+        return matched
+
+
+def install_reload_signal(reload: Callable[[], None], signum: int = signal.SIGHUP) -> bool:
+    """
+    Call ``reload`` whenever the process receives ``signum``.
+
+    Args:
+        reload: Callback re-reading the secrets.
+        signum: Signal number to handle.
+
+    Returns:
+        True if the handler was installed (only possible from the main thread).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+
+    def _handler(_signum, _frame) -> None:
+        try:
+            reload()
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Webhook secret reload failed: %s", exc)
+
+    try:
+        signal.signal(signum, _handler)
+    except (ValueError, OSError) as exc:
+        logger.warning("Cannot install secret reload handler: %s", exc)
+        return False
+    return True
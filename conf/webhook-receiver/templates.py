@@ -0,0 +1,289 @@
+"""
+Compiled notification templates for the webhook handler channels.
+
+Channel payloads are declared once in ``channels.json`` and compiled at load
+time: every string is parsed into literal and ``{field}`` parts, subtrees
+without placeholders are built once and shared between renders, and a string
+that is exactly one ``{field}`` passes the value through unchanged (numbers,
+lists). Rendering a message is then a walk over the few dynamic nodes.
+
+A channel renders either ``json`` items (one per alert, batched into an
+``envelope`` with ``{items}``) or ``text`` (``text`` for one alert, ``digest``
+plus one ``line`` per alert for digests, split at line breaks into chunks of
+at most ``limit`` characters and wrapped in an ``envelope`` with ``{text}``).
+``lookups`` derive fields such as ``{emoji}`` from message values; ``defaults``
+fill missing fields.
+
+Channels with a ``transport`` (``http`` or ``smtp``) and ``settings`` read
+from the environment are delivered generically, so new channels can be added
+to the config without code changes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from string import Formatter
+from typing import Any
+
+Renderer = Callable[[Mapping[str, Any]], Any]
+
+DEFAULT_TEMPLATES_PATH = Path(__file__).with_name("channels.json")
+FORMATS = ("json", "text")
+TRANSPORTS = ("http", "smtp")
+
+
+def _constant(value: Any) -> Renderer:
+    return lambda _ctx: value
+
+
+def _compile_string(template: str) -> tuple[Renderer, bool]:
+    """Compile one string; returns (renderer, is_dynamic)."""
+    parts: list[tuple[str, str | None, str]] = []
+    for literal, name, spec, conversion in Formatter().parse(template):
+        if conversion:
+            raise ValueError(f"Conversions are not supported in template {template!r}")
+        parts.append((literal, name, spec or ""))
+    if not any(name for _, name, _ in parts):
+        # Escaped braces ("{{") are resolved once here
+        return _constant("".join(literal for literal, _, _ in parts)), False
+    if len(parts) == 1 and not parts[0][0] and not parts[0][2]:
+        key = parts[0][1]
+        return (lambda ctx: ctx.get(key, "")), True
+
+    def render(ctx: Mapping[str, Any]) -> str:
+        out = []
+        for literal, name, spec in parts:
+            out.append(literal)
+            if name:
+                out.append(format(ctx.get(name, ""), spec))
+        return "".join(out)
+
+    return render, True
+
+
+def _compile_node(node: Any) -> tuple[Renderer, bool]:
+    """Compile a JSON template node; static subtrees render to one shared object."""
+    if isinstance(node, str):
+        return _compile_string(node)
+    if isinstance(node, dict):
+        compiled = [(key, *_compile_node(value)) for key, value in node.items()]
+        if not any(dynamic for _, _, dynamic in compiled):
+            return _constant({key: fn({}) for key, fn, _ in compiled}), False
+        return (lambda ctx: {key: fn(ctx) for key, fn, _ in compiled}), True
+    if isinstance(node, list):
+        compiled = [_compile_node(value) for value in node]
+        if not any(dynamic for _, dynamic in compiled):
+            return _constant([fn({}) for fn, _ in compiled]), False
+        return (lambda ctx: [fn(ctx) for fn, _ in compiled]), True
+    return _constant(node), False
+
+
+def compile_template(node: Any) -> Renderer:
+    """
+    Compile a template node (string, dict, list or scalar).
+
+    Args:
+        node: Template with ``{field}`` placeholders in its strings.
+
+    Returns:
+        Callable rendering the template from a context mapping.
+    """
+    return _compile_node(node)[0]
+
+
+def split_lines(text: str, limit: int) -> list[str]:
+    """
+    Split text into chunks of at most ``limit`` characters at line breaks.
+
+    Digest lines stay whole (and Markdown entities in them balanced); only a
+    single line longer than ``limit`` is cut mid-line.
+    """
+    chunks: list[str] = []
+    lines: list[str] = []
+    size = 0
+    for line in text.split("\n") if text else []:
+        while len(line) > limit:
+            if lines:
+                chunks.append("\n".join(lines))
+                lines, size = [], 0
+            chunks.append(line[:limit])
+            line = line[limit:]
+        added = len(line) + (1 if lines else 0)
+        if lines and size + added > limit:
+            chunks.append("\n".join(lines))
+            lines, size, added = [], 0, len(line)
+        lines.append(line)
+        size += added
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """Value derived from another field through a fixed mapping."""
+
+    source: str
+    mapping: dict[str, Any]
+    default: Any = ""
+
+    def __call__(self, ctx: Mapping[str, Any]) -> Any:
+        return self.mapping.get(ctx.get(self.source), self.default)
+
+
+@dataclass
+class ChannelTemplate:
+    """One compiled channel: payload templates plus delivery settings."""
+
+    name: str
+    format: str
+    envelope: Renderer
+    item: Renderer | None = None
+    text: Renderer | None = None
+    digest: Renderer | None = None
+    line: Renderer | None = None
+    batch: int = 10
+    limit: int = 4096
+    transport: str | None = None
+    settings: dict[str, str] = field(default_factory=dict)
+    required: tuple[str, ...] = ()
+    _context: Callable[[Mapping[str, Any]], dict[str, Any]] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether all required settings are configured."""
+        return all(self.settings.get(key) for key in self.required)
+
+    def payloads(self, message_data: dict[str, Any], **extra: Any) -> list[Any]:
+        """
+        Render the payloads delivering ``message_data`` (one alert or a digest).
+
+        Args:
+            message_data: Message from ``AlertProcessor._format_alert_message``
+                or ``_format_digest_message``.
+            **extra: Additional envelope fields (e.g. ``chat_id``).
+
+        Returns:
+            Payloads to send in order (several when batching or splitting).
+        """
+        context = self._context or dict
+        ctx = context(message_data)
+        digest = message_data.get("digest")
+        envelope_ctx = {**ctx, **self.settings, **extra}
+        if self.format == "json":
+            contexts = [context(m) for m in digest] if digest else [ctx]
+            items = [self.item(c) for c in contexts]  # type: ignore[misc]
+            return [
+                self.envelope({**envelope_ctx, "items": items[i : i + self.batch]})
+                for i in range(0, len(items), self.batch)
+            ]
+        if digest:
+            ctx["lines"] = "\n".join(self.line(context(m)) for m in digest)  # type: ignore[misc]
+            text = self.digest(ctx)  # type: ignore[misc]
+        else:
+            text = self.text(ctx)  # type: ignore[misc]
+        return [
+            self.envelope({**envelope_ctx, "text": chunk})
+            for chunk in split_lines(text, self.limit)
+        ]
+
+
+class ChannelTemplates:
+    """All channel templates from one config file, compiled once."""
+
+    def __init__(self, config: dict[str, Any], env: Mapping[str, str] | None = None) -> None:
+        """
+        Compile a templates config.
+
+        Args:
+            config: Parsed ``channels.json`` content.
+            env: Variables for channel settings (defaults to ``os.environ``).
+
+        Raises:
+            ValueError: If a channel definition is invalid.
+        """
+        env = os.environ if env is None else env
+        self.lookups = {
+            name: Lookup(spec["from"], dict(spec["map"]), spec.get("default", ""))
+            for name, spec in config.get("lookups", {}).items()
+        }
+        self.defaults = dict(config.get("defaults", {}))
+        self.channels: dict[str, ChannelTemplate] = {}
+        for name, spec in config.get("channels", {}).items():
+            self.channels[name] = self._compile_channel(name, spec, env)
+
+    def __getitem__(self, name: str) -> ChannelTemplate:
+        return self.channels[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.channels
+
+    def declarative(self) -> list[ChannelTemplate]:
+        """Channels delivered through a generic transport, in config order."""
+        return [channel for channel in self.channels.values() if channel.transport]
+
+    def context(self, message: Mapping[str, Any]) -> dict[str, Any]:
+        """Build the render context of one message: defaults, fields and lookups."""
+        ctx = {**self.defaults, **{k: v for k, v in message.items() if v is not None}}
+        now = time.time()
+        ctx.setdefault("timestamp", datetime.fromtimestamp(now).isoformat())
+        ctx["epoch"] = int(now)
+        for name, lookup in self.lookups.items():
+            ctx[name] = lookup(ctx)
+        return ctx
+
+    def _compile_channel(
+        self, name: str, spec: dict[str, Any], env: Mapping[str, str]
+    ) -> ChannelTemplate:
+        fmt = spec.get("format", "json")
+        if fmt not in FORMATS:
+            raise ValueError(f"Channel {name}: unknown format {fmt!r}")
+        transport = spec.get("transport")
+        if transport is not None and transport not in TRANSPORTS:
+            raise ValueError(f"Channel {name}: unknown transport {transport!r}")
+        needed = ("item",) if fmt == "json" else ("text", "digest", "line")
+        missing = [key for key in (*needed, "envelope") if key not in spec]
+        if missing:
+            raise ValueError(f"Channel {name}: missing {', '.join(missing)}")
+        settings = {
+            key: env.get(setting["env"], setting.get("default", ""))
+            for key, setting in spec.get("settings", {}).items()
+        }
+        return ChannelTemplate(
+            name=name,
+            format=fmt,
+            envelope=compile_template(spec["envelope"]),
+            item=compile_template(spec["item"]) if "item" in spec else None,
+            text=compile_template(spec["text"]) if "text" in spec else None,
+            digest=compile_template(spec["digest"]) if "digest" in spec else None,
+            line=compile_template(spec["line"]) if "line" in spec else None,
+            batch=max(1, int(spec.get("batch", 10))),
+            limit=max(1, int(spec.get("limit", 4096))),
+            transport=transport,
+            settings=settings,
+            required=tuple(spec.get("required", ())),
+            _context=self.context,
+        )
+
+
+def load_channel_templates(
+    path: Path | str = DEFAULT_TEMPLATES_PATH, env: Mapping[str, str] | None = None
+) -> ChannelTemplates:
+    """
+    Load and compile channel templates.
+
+    Args:
+        path: JSON config file.
+        env: Variables for channel settings (defaults to ``os.environ``).
+
+    Returns:
+        Compiled templates.
+    """
+    with open(path, encoding="utf-8") as handle:
+        return ChannelTemplates(json.load(handle), env)
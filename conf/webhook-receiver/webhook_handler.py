@@ -4,12 +4,20 @@
 
 from __future__ import annotations
 
+import atexit
 import builtins
-import hashlib
-import hmac
+import json
 import logging
 import os
+import signal
+import smtplib
+import sqlite3
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
 from datetime import datetime
+from email.message import EmailMessage
+from pathlib import Path
 from typing import Any
 
 import requests
@@ -45,6 +53,42 @@ except (ImportError, ModuleNotFoundError):  # pragma: no cover - optional depend
     Limiter = None
     get_remote_address = None
 
+try:
+    from .circuit import ChannelBreakers
+    from .coalescer import DigestCoalescer, digest_key
+    from .dedup import AlertDeduplicator
+    from .delivery_queue import DeferDelivery, DeliveryQueue, DeliveryWorker
+    from .dispatcher import NotificationDispatcher
+    from .metrics import WebhookMetrics
+    from .ratelimit import RateLimiter, create_backend
+    from .signing import SignatureVerifier, install_reload_signal, read_secrets
+    from .templates import (
+        DEFAULT_TEMPLATES_PATH,
+        ChannelTemplate,
+        ChannelTemplates,
+        load_channel_templates,
+    )
+except ImportError:
+    import sys
+
+    _current_dir = str(Path(__file__).parent)
+    if _current_dir not in sys.path:
+        sys.path.insert(0, _current_dir)
+    from circuit import ChannelBreakers  # type: ignore
+    from coalescer import DigestCoalescer, digest_key  # type: ignore
+    from dedup import AlertDeduplicator  # type: ignore
+    from delivery_queue import DeferDelivery, DeliveryQueue, DeliveryWorker  # type: ignore
+    from dispatcher import NotificationDispatcher  # type: ignore
+    from metrics import WebhookMetrics  # type: ignore
+    from ratelimit import RateLimiter, create_backend  # type: ignore
+    from signing import SignatureVerifier, install_reload_signal, read_secrets  # type: ignore
+    from templates import (  # type: ignore
+        DEFAULT_TEMPLATES_PATH,
+        ChannelTemplate,
+        ChannelTemplates,
+        load_channel_templates,
+    )
+
 # Logging configuration
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -56,62 +100,84 @@ if "__name__" not in globals():
     __name__ = "webhook_handler"  # fallback for exec contexts
 
 
-class _SimpleLimiter:
-    """Minimal in-process limiter for test environments."""
-
-    def __init__(self):
-        self._counts: dict[str, int] = {}
-
-    def limit(self, rule: str):
-        parts = rule.split()
-        max_calls = int(parts[0]) if parts else 10
-
-        def decorator(fn):
-            counter_key = fn.__name__
-
-            def wrapper(*args: Any, **kwargs: Any):
-                count = self._counts.get(counter_key, 0)
-                self._counts[counter_key] = count + 1
-                if count >= max_calls:
-                    return jsonify({"error": "rate limit exceeded"}), 429
-                return fn(*args, **kwargs)
-
-            wrapper.__name__ = fn.__name__
-            return wrapper
-
-        return decorator
-
-
 _import_name = __name__ if __name__ not in (None, "builtins") else "webhook_handler"
 app = Flask(_import_name)
-if Limiter and get_remote_address:
+# RATE_LIMIT_STORAGE selects a shared backend (see ratelimit.py)
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "")
+# Per-route limits for routes without their own @limiter.limit (either limiter)
+DEFAULT_RATE_LIMITS = ["200 per day", "50 per hour"]
+if Limiter and get_remote_address and not RATE_LIMIT_STORAGE:
     limiter = Limiter(
         app=app,
         key_func=get_remote_address,
-        default_limits=["200 per day", "50 per hour"],
+        default_limits=DEFAULT_RATE_LIMITS,
     )
 else:
-    limiter = _SimpleLimiter()
+    limiter = RateLimiter(
+        create_backend(RATE_LIMIT_STORAGE or "memory://"),
+        app=app,
+        default_limits=DEFAULT_RATE_LIMITS,
+    )
+
+webhook_metrics = WebhookMetrics()
+webhook_metrics.instrument(app)
 
 # Configuration from environment variables
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL", "")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
 NOTIFICATION_TIMEOUT = int(os.getenv("NOTIFICATION_TIMEOUT", "10"))
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", "8"))
+LOG_DIR = Path(os.getenv("LOG_DIR", "/app/logs"))
+NOTIFICATION_QUEUE_PATH = Path(
+    os.getenv("NOTIFICATION_QUEUE_PATH", str(LOG_DIR / "notification-queue.db"))
+)
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "8"))
+NOTIFICATION_RETRY_BASE = float(os.getenv("NOTIFICATION_RETRY_BASE", "2"))
+NOTIFICATION_RETRY_MAX = float(os.getenv("NOTIFICATION_RETRY_MAX", "300"))
+NOTIFICATION_CHANNEL_CONCURRENCY = int(os.getenv("NOTIFICATION_CHANNEL_CONCURRENCY", "2"))
+# Seconds before an in-flight delivery of a dead worker process may be claimed again
+NOTIFICATION_QUEUE_LEASE = float(os.getenv("NOTIFICATION_QUEUE_LEASE", "300"))
+# Days a delivery that exhausted its attempts is kept as a dead letter (0 keeps forever)
+NOTIFICATION_DEAD_LETTER_DAYS = float(os.getenv("NOTIFICATION_DEAD_LETTER_DAYS", "7"))
+# Per-channel circuit breaker: consecutive failures to open (0 disables), seconds until a probe
+NOTIFICATION_BREAKER_THRESHOLD = int(os.getenv("NOTIFICATION_BREAKER_THRESHOLD", "5"))
+NOTIFICATION_BREAKER_RESET = float(os.getenv("NOTIFICATION_BREAKER_RESET", "30"))
+# Seconds to hold alert groups open for digest coalescing (0 = per payload only)
+NOTIFICATION_DIGEST_WINDOW = float(os.getenv("NOTIFICATION_DIGEST_WINDOW", "0"))
+# Duplicate suppression for Alertmanager re-sends (0 disables)
+ALERT_DEDUP_TTL = float(os.getenv("ALERT_DEDUP_TTL", "14400"))
+ALERT_DEDUP_MAX_SIZE = int(os.getenv("ALERT_DEDUP_MAX_SIZE", "10000"))
+# Payload templates of every channel, compiled once (see templates.py)
+CHANNEL_TEMPLATES_PATH = Path(os.getenv("CHANNEL_TEMPLATES_PATH", str(DEFAULT_TEMPLATES_PATH)))
 TEST_SECRET_PLACEHOLDER = (
     "test-secret-placeholder"  # pragma: allowlist secret  # noqa: S105  # nosec B105
 )
-WEBHOOK_SECRET = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
+# Read once and on reload (see signing.py); the previous secret stays valid during rotation
+WEBHOOK_SECRET, WEBHOOK_SECRET_PREVIOUS = read_secrets()
+WEBHOOK_SECRET_RELOAD_SIGNAL = os.getenv("WEBHOOK_SECRET_RELOAD_SIGNAL", "SIGHUP")
+signature_verifier = SignatureVerifier(WEBHOOK_SECRET, WEBHOOK_SECRET_PREVIOUS)
+
+
+def reload_secrets() -> None:
+    """Re-read the current and previous webhook secrets into the verifier."""
+    signature_verifier.load(*read_secrets())
+    logger.info("Webhook secrets reloaded")
+
+
+if WEBHOOK_SECRET_RELOAD_SIGNAL:
+    install_reload_signal(reload_secrets, getattr(signal, WEBHOOK_SECRET_RELOAD_SIGNAL))
 
 
 def _get_webhook_secret() -> str | None:
-    env_secret = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
-    return env_secret if env_secret is not None else WEBHOOK_SECRET
+    return signature_verifier.secret
 
 
 def _validate_secrets(exit_on_error: bool = False) -> None:
-    """Validate configured webhook secret."""
+    """Load and validate configured webhook secret."""
+    reload_secrets()
     secret = _get_webhook_secret()
     if not secret:
         msg = "Missing required ALERTMANAGER_WEBHOOK_SECRET"
@@ -131,16 +197,13 @@ def _validate_secrets(exit_on_error: bool = False) -> None:
 
 
 def verify_signature(body: bytes, signature: str | None) -> bool:
-    secret = _get_webhook_secret()
-    if not secret:
-        return False
-    if not signature:
-        return False
-    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-    return hmac.compare_digest(signature, expected)
+    return signature_verifier.verify_signature(body, signature)
 
 
 class AlertLabels(BaseModel):
+    # Keep undeclared labels (mountpoint, pod...): deduplication keys on the full set
+    model_config = {"extra": "allow"}
+
     alertname: str
     severity: str | None = None
     service: str | None = None
@@ -185,6 +248,9 @@ class Alert(BaseModel):
     labels: AlertLabels
     annotations: dict[str, Any] = {}
     status: str
+    startsAt: str | None = None  # noqa: N815
+    endsAt: str | None = None  # noqa: N815
+    fingerprint: str | None = None
 
 
 class AlertPayload(BaseModel):
@@ -195,27 +261,68 @@ class AlertPayload(BaseModel):
 class AlertProcessor:
     """Alert processor with multi-channel notification support."""
 
-    def __init__(self):
-        self.severity_colors = {
-            "critical": 0xFF0000,  # Red
-            "warning": 0xFFA500,  # Orange
-            "info": 0x0099FF,  # Blue
-        }
+    def __init__(
+        self,
+        dispatcher: NotificationDispatcher | None = None,
+        delivery_worker: DeliveryWorker | None = None,
+        digest_window: float = 0.0,
+        deduplicator: AlertDeduplicator | None = None,
+        metrics: WebhookMetrics | None = None,
+        templates: ChannelTemplates | None = None,
+        breakers: ChannelBreakers | None = None,
+    ):
+        # Compiled payload templates; severity styling comes from their lookups
+        self.templates = templates or load_channel_templates()
+        self.severity_colors = dict(self.templates.lookups["discord_color"].mapping)
+        self.severity_emojis = dict(self.templates.lookups["emoji"].mapping)
+        self.dispatcher = dispatcher or NotificationDispatcher(max_workers=NOTIFICATION_WORKERS)
+        # Optional per-channel delivery counters and latency
+        self.metrics = metrics
+        # Optional per-channel circuit breakers short-circuiting sends to a failing endpoint
+        self.breakers = breakers
+        # Optional durable queue: failed deliveries are retried instead of dropped
+        self.delivery_worker = delivery_worker
+        if delivery_worker is not None:
+            for channel, sender in self._senders():
+                delivery_worker.register(
+                    channel, lambda data, c=channel, s=sender: self._deliver(c, s, data)
+                )
+        # Optional fingerprint cache that skips Alertmanager re-sends
+        self.deduplicator = deduplicator
+        # Optional cross-payload coalescing window for digests
+        self.coalescer = (
+            DigestCoalescer(digest_window, self._dispatch_messages) if digest_window > 0 else None
+        )
 
-        self.severity_emojis = {"critical": "🚨", "warning": "⚠️", "info": "ℹ️"}
+    def process_alerts(self, alerts_data: dict[str, Any], wait: bool = True) -> dict[str, Any]:
+        """Process incoming alerts payload.
 
-    def process_alerts(self, alerts_data: dict[str, Any]) -> dict[str, Any]:
-        """Process incoming alerts payload."""
+        Alerts sharing groupLabels, service, severity and status are coalesced into one
+        digest per channel, and notifications are fanned out concurrently. With
+        ``wait=False`` the call returns as soon as deliveries are scheduled and they
+        complete in the background.
+        """
         alerts = alerts_data.get("alerts", [])
         group_labels = alerts_data.get("groupLabels", {})
 
         logger.info(f"Processing {len(alerts)} alerts")
 
-        results = {"processed": 0, "total": len(alerts), "errors": [], "notifications_sent": []}
+        results = {
+            "processed": 0,
+            "total": len(alerts),
+            "duplicates": 0,
+            "errors": [],
+            "notifications_sent": [],
+        }
+        groups: dict[tuple, list[dict[str, Any]]] = {}
 
         for alert in alerts:
             try:
-                self._process_single_alert(alert, group_labels)
+                if self.deduplicator is not None and self.deduplicator.is_duplicate(alert):
+                    results["duplicates"] += 1
+                    continue
+                message_data = self._process_single_alert(alert, group_labels)
+                groups.setdefault(digest_key(message_data), []).append(message_data)
             except Exception as e:
                 # Catch all exceptions to ensure processing continues
                 logger.error(f"Error processing alert: {e}", exc_info=True)
@@ -224,6 +331,29 @@ class AlertProcessor:
                 # Count alert as processed even if notification failed
                 results["processed"] += 1
 
+        if self.coalescer is not None:
+            for key, messages in groups.items():
+                self.coalescer.add(key, messages)
+            results["notifications_coalesced"] = sum(len(m) for m in groups.values())
+            return results
+
+        pending: list[tuple[str, Future]] = []
+        with self.metrics.stage("dispatch") if self.metrics else nullcontext():
+            for messages in groups.values():
+                pending.extend(self._dispatch_messages(messages))
+
+        if not wait:
+            results["notifications_queued"] = len(pending)
+            return results
+
+        for channel, future in pending:
+            try:
+                if future.result():
+                    results["notifications_sent"].append(channel)
+            except Exception as e:
+                logger.error(f"Error sending {channel} notification: {e}", exc_info=True)
+                results["errors"].append(str(e))
+
         return results
 
     def _format_alert_message(
@@ -253,158 +383,259 @@ class AlertProcessor:
             "group_labels": group_labels,
         }
 
-    def _process_single_alert(self, alert: dict[str, Any], group_labels: dict[str, Any]):
-        """Process a single alert."""
+    def _format_digest_message(self, messages: list[dict[str, Any]]) -> dict[str, Any]:
+        """Combine formatted messages of one group into a digest message."""
+        first = messages[0]
+        return {
+            "alert_name": f"{len(messages)} alerts",
+            "severity": first.get("severity", "info"),
+            "service": first.get("service", "unknown"),
+            "status": first.get("status", "unknown"),
+            "timestamp": datetime.now().isoformat(),
+            "group_labels": first.get("group_labels", {}),
+            "digest": messages,
+        }
+
+    def _process_single_alert(
+        self, alert: dict[str, Any], group_labels: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Validate a single alert and format its message."""
         labels = alert.get("labels")
         if not isinstance(labels, dict) or "alertname" not in labels:
             raise ValueError("Invalid alert structure")
 
         # Message creation
-        message_data = self._format_alert_message(alert, group_labels)
+        return self._format_alert_message(alert, group_labels)
+
+    def _dispatch_messages(self, messages: list[dict[str, Any]]) -> list[tuple[str, Future]]:
+        """Schedule one notification per channel for a group of messages."""
+        message_data = messages[0] if len(messages) == 1 else self._format_digest_message(messages)
 
-        # Sending notifications
+        # Sending notifications (concurrently, one task per channel)
+        pending: list[tuple[str, Future]] = []
         if DISCORD_WEBHOOK_URL:
-            self._send_discord_notification(message_data)
+            pending.append(
+                (
+                    "discord",
+                    self._schedule("discord", self._send_discord_notification, message_data),
+                )
+            )
 
         if SLACK_WEBHOOK_URL:
-            self._send_slack_notification(message_data)
+            pending.append(
+                ("slack", self._schedule("slack", self._send_slack_notification, message_data))
+            )
 
         if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-            self._send_telegram_notification(message_data)
+            pending.append(
+                (
+                    "telegram",
+                    self._schedule("telegram", self._send_telegram_notification, message_data),
+                )
+            )
 
-    def _send_discord_notification(self, message_data: dict[str, Any]):
-        """Send Discord notification."""
+        # Channels declared only in the templates config
+        for channel in self.templates.declarative():
+            if channel.enabled:
+                sender = self._templated_sender(channel)
+                pending.append((channel.name, self._schedule(channel.name, sender, message_data)))
+
+        return pending
+
+    def _senders(self) -> list[tuple[str, Any]]:
+        """Every channel name with its sender, built-in and declarative."""
+        senders: list[tuple[str, Any]] = [
+            ("discord", self._send_discord_notification),
+            ("slack", self._send_slack_notification),
+            ("telegram", self._send_telegram_notification),
+        ]
+        for channel in self.templates.declarative():
+            senders.append((channel.name, self._templated_sender(channel)))
+        return senders
+
+    def _templated_sender(self, channel: ChannelTemplate):
+        """Sender bound to one declarative channel."""
+        return lambda message_data: self._send_templated(channel, message_data)
+
+    def _schedule(self, channel: str, sender, message_data: dict[str, Any]) -> Future:
+        """Schedule one delivery, through the durable queue when configured."""
+        if self.delivery_worker is not None:
+            return self.delivery_worker.submit(channel, message_data)
+        return self.dispatcher.submit(self._deliver, channel, sender, message_data)
+
+    def _deliver(self, channel: str, sender, message_data: dict[str, Any]) -> bool:
+        """Run one sender behind its channel circuit, recording outcome and latency."""
+        breakers = self.breakers
+        if breakers is not None and not breakers.allow(channel):
+            return self._short_circuit(channel)
+        start = time.perf_counter()
+        ok = False
         try:
-            severity = message_data.get("severity", "info")
-            emoji = self.severity_emojis.get(severity, "ℹ️")
-            color = self.severity_colors.get(severity, 0x0099FF)
-
-            embed = {
-                "title": f"{emoji} {message_data.get('alert_name', 'Unknown Alert')}",
-                "description": message_data.get("summary", "No summary available"),
-                "color": color,
-                "fields": [
-                    {
-                        "name": "🔧 Service",
-                        "value": message_data.get("service", "unknown"),
-                        "inline": True,
-                    },
-                    {
-                        "name": "📊 Category",
-                        "value": message_data.get("category", "general"),
-                        "inline": True,
-                    },
-                    {
-                        "name": "🎯 Instance",
-                        "value": message_data.get("instance", "unknown"),
-                        "inline": True,
-                    },
-                    {
-                        "name": "📝 Description",
-                        "value": message_data.get("description", "No description available"),
-                        "inline": False,
-                    },
-                ],
-                "timestamp": message_data.get("timestamp", datetime.now().isoformat()),
-                "footer": {
-                    "text": f"ERNI-KI Monitoring • Status: {message_data.get('status', 'unknown')}"
-                },
-            }
-
-            payload = {"embeds": [embed], "username": "ERNI-KI Monitor"}
-
-            response = requests.post(
-                DISCORD_WEBHOOK_URL, json=payload, timeout=NOTIFICATION_TIMEOUT
-            )
+            ok = bool(sender(message_data))
+            return ok
+        finally:
+            if breakers is not None:
+                breakers.record(channel, ok)
+            if self.metrics is not None:
+                self.metrics.observe_notification(channel, ok, time.perf_counter() - start)
+
+    def _short_circuit(self, channel: str) -> bool:
+        """Skip a send to an open channel: defer it in the queue, or drop it."""
+        deferred = self.delivery_worker is not None
+        if self.metrics is not None:
+            self.metrics.observe_short_circuit(channel, deferred)
+        if deferred:
+            delay = max(1.0, self.breakers.retry_after(channel))  # type: ignore[union-attr]
+            raise DeferDelivery(delay, f"{channel} circuit open")
+        logger.warning("Circuit open for %s, notification dropped", channel)
+        return False
+
+    def _post_payloads(self, channel: str, url: str, payloads: list[Any]) -> None:
+        """POST rendered payloads in order; raises on the first failure."""
+        session = self.dispatcher.session(channel)
+        for payload in payloads:
+            response = session.post(url, json=payload, timeout=NOTIFICATION_TIMEOUT)
             response.raise_for_status()
 
+    def _send_discord_notification(self, message_data: dict[str, Any]) -> bool:
+        """Send Discord notification (single alert or digest)."""
+        try:
+            payloads = self.templates["discord"].payloads(message_data)
+            self._post_payloads("discord", DISCORD_WEBHOOK_URL, payloads)
+
             alert_name = message_data.get("alert_name", "unknown")
             logger.info(f"Discord notification sent for {alert_name}")
+            return True
 
         except (requests.RequestException, requests.Timeout, requests.ConnectionError) as e:
             logger.error("Failed to send Discord notification: %s", e)
+            return False
 
-    def _send_slack_notification(self, message_data: dict[str, Any]):
-        """Send Slack notification."""
+    def _send_slack_notification(self, message_data: dict[str, Any]) -> bool:
+        """Send Slack notification (single alert or digest)."""
         try:
-            severity = message_data.get("severity", "info")
-            emoji = self.severity_emojis.get(severity, "ℹ️")
-
-            color_map = {"critical": "danger", "warning": "warning", "info": "good"}
-            color = color_map.get(severity, "good")
-
-            attachment = {
-                "color": color,
-                "title": f"{emoji} {message_data.get('alert_name', 'Unknown Alert')}",
-                "text": message_data.get("summary", "No summary available"),
-                "fields": [
-                    {
-                        "title": "Service",
-                        "value": message_data.get("service", "unknown"),
-                        "short": True,
-                    },
-                    {
-                        "title": "Instance",
-                        "value": message_data.get("instance", "unknown"),
-                        "short": True,
-                    },
-                    {
-                        "title": "Description",
-                        "value": message_data.get("description", "No description available"),
-                        "short": False,
-                    },
-                ],
-                "footer": "ERNI-KI Monitoring",
-                "ts": int(datetime.now().timestamp()),
-            }
-
-            payload = {"attachments": [attachment], "username": "ERNI-KI Monitor"}
-
-            response = requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=NOTIFICATION_TIMEOUT)
-            response.raise_for_status()
+            payloads = self.templates["slack"].payloads(message_data)
+            self._post_payloads("slack", SLACK_WEBHOOK_URL, payloads)
 
             alert_name = message_data.get("alert_name", "unknown")
             logger.info(f"Slack notification sent for {alert_name}")
+            return True
 
         except (requests.RequestException, requests.Timeout, requests.ConnectionError) as e:
             logger.error("Failed to send Slack notification: %s", e)
+            return False
 
-    def _send_telegram_notification(self, message_data: dict[str, Any]):
-        """Send Telegram notification."""
+    def _send_telegram_notification(self, message_data: dict[str, Any]) -> bool:
+        """Send Telegram notification (single alert or digest)."""
         try:
-            severity = message_data.get("severity", "info")
-            emoji = self.severity_emojis.get(severity, "ℹ️")
-
-            text = f"""
-{emoji} *{message_data.get("alert_name", "Unknown Alert")}*
-
-📝 *Summary:* {message_data.get("summary", "No summary available")}
-🔧 *Service:* {message_data.get("service", "unknown")}
-📊 *Category:* {message_data.get("category", "general")}
-🎯 *Instance:* {message_data.get("instance", "unknown")}
-⏰ *Time:* {message_data.get("timestamp", datetime.now().isoformat())}
-
-📄 *Description:*
-{message_data.get("description", "No description available")}
-
-🔗 *Status:* {message_data.get("status", "unknown")}
-            """.strip()
-
-            url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-            payload = {"chat_id": TELEGRAM_CHAT_ID, "text": text, "parse_mode": "Markdown"}
-
-            response = requests.post(url, json=payload, timeout=NOTIFICATION_TIMEOUT)
-            response.raise_for_status()
+            payloads = self.templates["telegram"].payloads(message_data, chat_id=TELEGRAM_CHAT_ID)
+            url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+            self._post_payloads("telegram", url, payloads)
 
             alert_name = message_data.get("alert_name", "unknown")
             logger.info(f"Telegram notification sent for {alert_name}")
+            return True
 
         except (requests.RequestException, requests.Timeout, requests.ConnectionError) as e:
             logger.error("Failed to send Telegram notification: %s", e)
+            return False
 
+    def _send_templated(self, channel: ChannelTemplate, message_data: dict[str, Any]) -> bool:
+        """Send a notification through a channel declared in the templates config."""
+        try:
+            payloads = channel.payloads(message_data)
+            if channel.transport == "smtp":
+                settings = channel.settings
+                with smtplib.SMTP(
+                    settings["host"], int(settings["port"]), timeout=NOTIFICATION_TIMEOUT
+                ) as smtp:
+                    for payload in payloads:
+                        email = EmailMessage()
+                        email["From"] = payload["from"]
+                        email["To"] = payload["to"]
+                        email["Subject"] = payload["subject"]
+                        email.set_content(payload["body"])
+                        smtp.send_message(email)
+            else:
+                self._post_payloads(channel.name, channel.settings["url"], payloads)
+
+            alert_name = message_data.get("alert_name", "unknown")
+            logger.info("%s notification sent for %s", channel.name, alert_name)
+            return True
+
+        except (requests.RequestException, smtplib.SMTPException, OSError) as e:
+            logger.error("Failed to send %s notification: %s", channel.name, e)
+            return False
 
-# Alert processor initialization
-alert_processor = AlertProcessor()
+
+# Shared notification dispatcher, durable delivery queue and alert processor initialization
+notification_dispatcher = NotificationDispatcher(max_workers=NOTIFICATION_WORKERS)
+try:
+    delivery_queue = DeliveryQueue(
+        NOTIFICATION_QUEUE_PATH,
+        max_attempts=NOTIFICATION_MAX_ATTEMPTS,
+        base_delay=NOTIFICATION_RETRY_BASE,
+        max_delay=NOTIFICATION_RETRY_MAX,
+        lease=NOTIFICATION_QUEUE_LEASE,
+        dead_retention=NOTIFICATION_DEAD_LETTER_DAYS * 86400,
+    )
+    delivery_worker = DeliveryWorker(
+        delivery_queue,
+        notification_dispatcher,
+        channel_limit=NOTIFICATION_CHANNEL_CONCURRENCY,
+    )
+except (OSError, sqlite3.Error) as _queue_exc:
+    logger.warning(
+        "Delivery queue unavailable at %s, notifications will not be retried: %s",
+        NOTIFICATION_QUEUE_PATH,
+        _queue_exc,
+    )
+    delivery_queue = None
+    delivery_worker = None
+alert_deduplicator = AlertDeduplicator(ttl=ALERT_DEDUP_TTL, max_size=ALERT_DEDUP_MAX_SIZE)
+notification_breakers = ChannelBreakers(
+    failure_threshold=NOTIFICATION_BREAKER_THRESHOLD, reset_timeout=NOTIFICATION_BREAKER_RESET
+)
+channel_templates = load_channel_templates(CHANNEL_TEMPLATES_PATH)
+alert_processor = AlertProcessor(
+    notification_dispatcher,
+    delivery_worker,
+    digest_window=NOTIFICATION_DIGEST_WINDOW,
+    deduplicator=alert_deduplicator,
+    metrics=webhook_metrics,
+    templates=channel_templates,
+    breakers=notification_breakers,
+)
+if delivery_queue is not None:
+    webhook_metrics.track_queue(delivery_queue.stats)
+if delivery_worker is not None:
+    delivery_worker.start()
+
+
+def shutdown_notifications(
+    worker: DeliveryWorker | None,
+    dispatcher: NotificationDispatcher,
+    queue: DeliveryQueue | None,
+    coalescer: DigestCoalescer | None = None,
+) -> None:
+    """Send held digests, stop the drain thread, finish deliveries and close the queue."""
+    if coalescer is not None:
+        # Digest timers are daemon threads and would die with the process
+        coalescer.flush_all()
+    if worker is not None:
+        worker.stop()
+    dispatcher.shutdown(wait=True)
+    if queue is not None:
+        queue.close()
+
+
+atexit.register(
+    shutdown_notifications,
+    delivery_worker,
+    notification_dispatcher,
+    delivery_queue,
+    alert_processor.coalescer,
+)
 
 
 def _validate_request() -> AlertPayload:
@@ -412,17 +643,24 @@ def _validate_request() -> AlertPayload:
 
     signature = request.headers.get("X-Signature")
     verify_fn = import_module("webhook_handler").verify_signature
-    sig_ok = verify_fn(request.get_data(), signature)
+    # One body buffer serves both the HMAC check and JSON decoding
+    body = request.get_data()
+    with webhook_metrics.stage("signature"):
+        sig_ok = verify_fn(body, signature)
     is_mock = hasattr(verify_fn, "return_value")
     if not sig_ok:
         if is_mock:
             raise PermissionError("Unauthorized")
         if signature or not app.testing:
             raise PermissionError("Unauthorized")
-    raw = request.get_json(silent=True)
-    if raw is None:
-        raise ValueError("Invalid JSON payload")
-    return AlertPayload(**raw)
+    with webhook_metrics.stage("validation"):
+        try:
+            raw = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("Invalid JSON payload") from None
+        if not isinstance(raw, dict):
+            raise ValueError("Invalid JSON payload")
+        return AlertPayload(**raw)
 
 
 @app.route("/webhook/critical", methods=["POST"])
@@ -433,7 +671,7 @@ def handle_critical_webhook():
         payload = _validate_request()
 
         logger.info("Received critical alert webhook")
-        result = alert_processor.process_alerts(payload.model_dump())
+        result = alert_processor.process_alerts(payload.model_dump(), wait=False)
 
         return jsonify(
             {"status": "success", "message": "Critical alerts processed", "result": result}
@@ -460,7 +698,7 @@ def handle_warning_webhook():
         payload = _validate_request()
 
         logger.info("Received warning alert webhook")
-        result = alert_processor.process_alerts(payload.model_dump())
+        result = alert_processor.process_alerts(payload.model_dump(), wait=False)
 
         return jsonify(
             {"status": "success", "message": "Warning alerts processed", "result": result}
@@ -485,7 +723,7 @@ def handle_general_webhook():
     """Handle general alerts"""
     try:
         payload = _validate_request()
-        result = alert_processor.process_alerts(payload.model_dump())
+        result = alert_processor.process_alerts(payload.model_dump(), wait=False)
         return jsonify({"status": "success", "message": "Alerts processed", "result": result})
     except (ValidationError, ValueError) as e:
         logger.warning("Validation error in general webhook: %s", e)
@@ -501,7 +739,7 @@ def _make_simple_handler(name: str):
     def handler():
         try:
             payload = _validate_request()
-            result = alert_processor.process_alerts(payload.model_dump())
+            result = alert_processor.process_alerts(payload.model_dump(), wait=False)
             return jsonify(
                 {"status": "success", "message": f"{name} alerts processed", "result": result}
             )
@@ -524,6 +762,26 @@ for _route in ["gpu", "ai", "database"]:
     )
 
 
+@app.route("/notifications/queue", methods=["GET"])
+@limiter.limit("30 per minute")
+def notification_queue_stats():
+    """Delivery queue depth and backlog age"""
+    if delivery_queue is None:
+        return jsonify({"enabled": False})
+    try:
+        return jsonify({"enabled": True, **delivery_queue.stats()})
+    except sqlite3.Error:
+        logger.exception("Failed to read delivery queue stats")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@app.route("/metrics", methods=["GET"])
+@limiter.exempt
+def metrics():
+    """Prometheus metrics endpoint"""
+    return webhook_metrics.response()
+
+
 @app.route("/health", methods=["GET"])
 @limiter.limit("30 per minute")
 def health_check():
@@ -533,6 +791,8 @@ def health_check():
             "status": "healthy",
             "service": "erni-ki-webhook-receiver",
             "timestamp": datetime.now().isoformat(),
+            "deduplication": alert_deduplicator.stats(),
+            "notification_channels": notification_breakers.status(),
         }
     )
 
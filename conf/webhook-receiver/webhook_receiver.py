@@ -4,20 +4,19 @@
 
 from __future__ import annotations
 
-import hashlib
-import hmac
-import json
+import atexit
 import logging
 import os
-from collections.abc import Callable
-from datetime import datetime, timedelta
+import signal
+import sqlite3
+import time
+from datetime import datetime
 from pathlib import Path
 from subprocess import CalledProcessError, TimeoutExpired, run  # nosec B404
 from typing import Any
 
 from flask import Flask, jsonify, request
 from pydantic import ValidationError
-from werkzeug.exceptions import BadRequest
 
 try:
     from flask_limiter import Limiter
@@ -27,14 +26,28 @@ except (ImportError, ModuleNotFoundError):  # pragma: no cover - optional depend
     get_remote_address = None
 
 try:
+    from .alert_store import AlertStore, parse_since
+    from .dedup import AlertDeduplicator
+    from .journal import AlertJournal
+    from .metrics import WebhookMetrics
     from .models import AlertLabels, AlertPayload  # noqa: F401
+    from .ratelimit import RateLimiter, create_backend
+    from .recovery import RecoveryExecutor
+    from .signing import SignatureVerifier, install_reload_signal, read_secrets
 except ImportError:
     import sys
 
     _current_dir = str(Path(__file__).parent)
     if _current_dir not in sys.path:
         sys.path.insert(0, _current_dir)
+    from alert_store import AlertStore, parse_since  # type: ignore
+    from dedup import AlertDeduplicator  # type: ignore
+    from journal import AlertJournal  # type: ignore
+    from metrics import WebhookMetrics  # type: ignore
     from models import AlertLabels, AlertPayload  # type: ignore  # noqa: F401
+    from ratelimit import RateLimiter, create_backend  # type: ignore
+    from recovery import RecoveryExecutor  # type: ignore
+    from signing import SignatureVerifier, install_reload_signal, read_secrets  # type: ignore
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -42,59 +55,36 @@ logging.basicConfig(
 logger = logging.getLogger("webhook-receiver")
 
 
-class _SimpleLimiter:
-    """Minimal in-process limiter for test environments."""
-
-    def __init__(self) -> None:
-        """Initialize rate limiter with empty limits dictionary."""
-        self._limits: dict[str, tuple[int, datetime]] = {}
-
-    def limit(self, rule: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
-        """
-        Create rate limiting decorator.
-
-        Args:
-            rule: Rate limit rule string (e.g., "10 per minute").
-
-        Returns:
-            Decorator function that applies rate limiting.
-        """
-        parts = rule.split()
-        max_calls = int(parts[0])
-        key_prefix = f"{max_calls}:{' '.join(parts[1:])}"
-
-        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
-            counter_key = f"{key_prefix}:{fn.__name__}"
-
-            def wrapper(*args: Any, **kwargs: Any):
-                count, start = self._limits.get(counter_key, (0, datetime.now()))
-                # Reset counter every minute
-                if datetime.now() - start > timedelta(minutes=1):
-                    count, start = 0, datetime.now()
-                if count >= max_calls:
-                    return jsonify({"error": "rate limit exceeded"}), 429
-                self._limits[counter_key] = (count + 1, start)
-                return fn(*args, **kwargs)
-
-            wrapper.__name__ = fn.__name__
-            return wrapper
-
-        return decorator
-
-
 app = Flask(__name__)
-if Limiter and get_remote_address:
+# Shared rate limit storage (memory://, file:///path or redis://...) so every
+# gunicorn worker enforces the same limit; flask-limiter's per-process memory
+# storage is only used when nothing is configured.
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "")
+# Per-route limits for routes without their own @limiter.limit (either limiter)
+DEFAULT_RATE_LIMITS = ["200 per day", "50 per hour"]
+if Limiter and get_remote_address and not RATE_LIMIT_STORAGE:
     limiter = Limiter(
         app=app,
         key_func=get_remote_address,
-        default_limits=["200 per day", "50 per hour"],
+        default_limits=DEFAULT_RATE_LIMITS,
     )
 else:
-    limiter = _SimpleLimiter()
+    limiter = RateLimiter(
+        create_backend(RATE_LIMIT_STORAGE or "memory://"),
+        app=app,
+        default_limits=DEFAULT_RATE_LIMITS,
+    )
+
+webhook_metrics = WebhookMetrics()
+webhook_metrics.instrument(app)
 
 # Configuration
 WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "9093"))
-WEBHOOK_SECRET = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
+# Secrets are read once here and on reload (SIGHUP by default), not per request;
+# ALERTMANAGER_WEBHOOK_SECRET_PREVIOUS stays valid while senders are rotated
+WEBHOOK_SECRET, WEBHOOK_SECRET_PREVIOUS = read_secrets()
+WEBHOOK_SECRET_RELOAD_SIGNAL = os.getenv("WEBHOOK_SECRET_RELOAD_SIGNAL", "SIGHUP")
+signature_verifier = SignatureVerifier(WEBHOOK_SECRET, WEBHOOK_SECRET_PREVIOUS)
 
 
 def _ensure_dir(path: Path, fallback: Path) -> Path:
@@ -120,6 +110,38 @@ def _ensure_dir(path: Path, fallback: Path) -> Path:
 LOG_DIR = _ensure_dir(Path(os.getenv("LOG_DIR", "/app/logs")), Path("logs"))
 ALERTS_DIR = _ensure_dir(Path(os.getenv("ALERTS_DIR", LOG_DIR)), Path("logs"))
 
+# Append-only alert journal (rotating JSON Lines segments)
+ALERT_JOURNAL_DIR = Path(os.getenv("ALERT_JOURNAL_DIR", str(ALERTS_DIR / "journal")))
+ALERT_JOURNAL_SEGMENT_BYTES = int(os.getenv("ALERT_JOURNAL_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+ALERT_JOURNAL_SEGMENT_SECONDS = float(os.getenv("ALERT_JOURNAL_SEGMENT_SECONDS", "86400"))
+ALERT_JOURNAL_FLUSH_INTERVAL = float(os.getenv("ALERT_JOURNAL_FLUSH_INTERVAL", "1.0"))
+ALERT_JOURNAL_COMPRESSION = os.getenv("ALERT_JOURNAL_COMPRESSION", "gzip").lower()
+alert_journal = AlertJournal(
+    _ensure_dir(ALERT_JOURNAL_DIR, Path("logs") / "journal"),
+    max_segment_bytes=ALERT_JOURNAL_SEGMENT_BYTES,
+    max_segment_age=ALERT_JOURNAL_SEGMENT_SECONDS,
+    flush_interval=ALERT_JOURNAL_FLUSH_INTERVAL,
+    compression=ALERT_JOURNAL_COMPRESSION,
+)
+# Flush buffered records and seal the active segment when the worker exits
+atexit.register(alert_journal.close)
+
+# Indexed alert history backing the /alerts query API
+ALERT_STORE_PATH = Path(os.getenv("ALERT_STORE_PATH", str(ALERTS_DIR / "alerts.db")))
+ALERT_STORE_RETENTION_DAYS = float(os.getenv("ALERT_STORE_RETENTION_DAYS", "365"))
+ALERT_STORE_PRUNE_INTERVAL = float(os.getenv("ALERT_STORE_PRUNE_INTERVAL", "3600"))
+ALERTS_PAGE_SIZE = int(os.getenv("ALERTS_PAGE_SIZE", "50"))
+ALERTS_MAX_PAGE_SIZE = 500
+try:
+    alert_store: AlertStore | None = AlertStore(
+        ALERT_STORE_PATH,
+        retention_days=ALERT_STORE_RETENTION_DAYS,
+        prune_interval=ALERT_STORE_PRUNE_INTERVAL,
+    )
+except (OSError, sqlite3.Error) as exc:
+    logger.warning("Alert index unavailable at %s: %s", ALERT_STORE_PATH, exc)
+    alert_store = None
+
 RECOVERY_DIR = Path(os.getenv("RECOVERY_DIR", "/app/scripts/recovery"))
 RECOVERY_SCRIPT_TIMEOUT = int(os.getenv("RECOVERY_SCRIPT_TIMEOUT", "30"))
 RECOVERY_SCRIPTS = {
@@ -128,6 +150,15 @@ RECOVERY_SCRIPTS = {
     "searxng": "searxng-recovery.sh",
 }
 ALLOWED_SERVICES = set(RECOVERY_SCRIPTS.keys())
+RECOVERY_MAX_WORKERS = int(os.getenv("RECOVERY_MAX_WORKERS", "2"))
+RECOVERY_COOLDOWN = float(os.getenv("RECOVERY_COOLDOWN", "300"))
+# Per-service lock files shared by all workers (single-flight and cooldown across processes)
+RECOVERY_LOCK_DIR = Path(os.getenv("RECOVERY_LOCK_DIR", str(LOG_DIR / "recovery")))
+
+# Duplicate suppression for Alertmanager re-sends (0 disables)
+ALERT_DEDUP_TTL = float(os.getenv("ALERT_DEDUP_TTL", "14400"))
+ALERT_DEDUP_MAX_SIZE = int(os.getenv("ALERT_DEDUP_MAX_SIZE", "10000"))
+alert_deduplicator = AlertDeduplicator(ttl=ALERT_DEDUP_TTL, max_size=ALERT_DEDUP_MAX_SIZE)
 
 
 def _path_within(base: Path, target: Path) -> bool:
@@ -140,8 +171,22 @@ def _path_within(base: Path, target: Path) -> bool:
         return False
 
 
+def reload_secrets() -> None:
+    """Re-read the current and previous webhook secrets into the verifier."""
+    signature_verifier.load(*read_secrets())
+    logger.info(
+        "Webhook secrets loaded (previous secret %s)",
+        "accepted" if signature_verifier.previous else "not set",
+    )
+
+
+if WEBHOOK_SECRET_RELOAD_SIGNAL:
+    install_reload_signal(reload_secrets, getattr(signal, WEBHOOK_SECRET_RELOAD_SIGNAL))
+
+
 def _validate_secrets(exit_on_error: bool = False) -> None:
-    """Validate required secrets, optionally exiting for production runs."""
+    """Load and validate required secrets, optionally exiting for production runs."""
+    reload_secrets()
     secret = _get_webhook_secret()
     if not secret:
         msg = "Missing required ALERTMANAGER_WEBHOOK_SECRET"
@@ -158,70 +203,68 @@ def _validate_secrets(exit_on_error: bool = False) -> None:
 
 
 def _get_webhook_secret() -> str | None:
-    """Get webhook secret from environment or module-level config."""
-    env_secret = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
-    return env_secret if env_secret is not None else WEBHOOK_SECRET
+    """Get the current webhook secret loaded into the verifier."""
+    return signature_verifier.secret
 
 
 def verify_signature(body: bytes, signature: str | None) -> bool:
-    """Verify webhook signature using HMAC."""
-    secret = _get_webhook_secret()
-    if not secret:
+    """Verify webhook signature using HMAC (current or previous secret)."""
+    if not signature_verifier.configured:
         logger.error("WEBHOOK_SECRET not configured; rejecting request")
         return False
-    if not signature:
-        return False
-    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-    return hmac.compare_digest(signature, expected)
+    return signature_verifier.verify_signature(body, signature)
 
 
 def verify_bearer_token(auth_header: str | None) -> bool:
     """Verify Bearer token authentication (for Alertmanager compatibility)."""
-    secret = _get_webhook_secret()
-    if not secret:
+    if not signature_verifier.configured:
         logger.error("WEBHOOK_SECRET not configured; rejecting request")
         return False
-    if not auth_header:
-        return False
-    if not auth_header.startswith("Bearer "):
-        return False
-    token = auth_header[7:]  # Remove "Bearer " prefix
-    return hmac.compare_digest(token, secret)
+    return signature_verifier.verify_token(auth_header)
 
 
 def save_alert_to_file(alert_data: dict[str, Any], alert_type: str = "general") -> None:
-    """Persist alert payload to ALERTS_DIR."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S%f")
-    filename = ALERTS_DIR / f"{alert_type}_{timestamp}.json"
+    """Append alert payload to the alert journal and index its alerts for /alerts."""
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(alert_data, f, indent=2, ensure_ascii=False)
-    except OSError as exc:
-        logger.error("Failed to save alert to file at %s: %s", filename, exc)
+        alert_journal.append(alert_data, alert_type)
     except (TypeError, ValueError) as exc:
         logger.error("Failed to serialize alert data: %s", exc)
+        return
+    if alert_store is not None:
+        try:
+            alert_store.add(alert_data.get("alerts") or [], alert_type)
+        except sqlite3.Error as exc:
+            logger.error("Failed to index alerts: %s", exc)
+
+
+def run_recovery_script(service: str) -> int | None:
+    """
+    Execute mapped recovery script if allowed.
 
+    Args:
+        service: Service name from RECOVERY_SCRIPTS.
 
-def run_recovery_script(service: str) -> None:
-    """Execute mapped recovery script if allowed."""
+    Returns:
+        Script exit code, or None if the script was not run or timed out.
+    """
     if service not in RECOVERY_SCRIPTS:
         logger.error("Invalid service: %s", service)
-        return
+        return None
 
     script_path = RECOVERY_DIR / RECOVERY_SCRIPTS[service]
     if not _path_within(RECOVERY_DIR, script_path):
         logger.error("Path traversal attempt detected for %s", script_path)
-        return
+        return None
     if not script_path.exists():
         logger.warning("No recovery script found for %s at %s", service, script_path)
-        return
+        return None
     if not os.access(script_path, os.X_OK):
         logger.warning(
             "Recovery script for %s is not executable (permission denied): %s",
             service,
             script_path,
         )
-        return
+        return None
 
     try:
         result = run(  # noqa: S603 # nosec B603 - script path validated above
@@ -235,14 +278,37 @@ def run_recovery_script(service: str) -> None:
             logger.info("Recovery script output:\n%s", result.stdout)
         if result.stderr:
             logger.warning("Recovery script stderr:\n%s", result.stderr)
+        return result.returncode
     except TimeoutExpired:
         logger.error("Recovery script timed out for %s", service)
     except CalledProcessError as exc:
         logger.error(
             "Recovery script failed for %s (exit %s): %s", service, exc.returncode, exc.stderr
         )
+        return exc.returncode
     except (OSError, FileNotFoundError) as exc:
         logger.error("Failed to execute recovery script for %s: %s", service, exc)
+    return None
+
+
+def _timed_recovery(service: str) -> int | None:
+    """Run the recovery script and record its duration and outcome."""
+    start = time.perf_counter()
+    exit_code = None
+    try:
+        # Looked up at call time so tests can patch run_recovery_script
+        exit_code = run_recovery_script(service)
+        return exit_code
+    finally:
+        webhook_metrics.observe_recovery(service, exit_code, time.perf_counter() - start)
+
+
+recovery_executor = RecoveryExecutor(
+    _timed_recovery,
+    max_workers=RECOVERY_MAX_WORKERS,
+    cooldown=RECOVERY_COOLDOWN,
+    lock_dir=RECOVERY_LOCK_DIR,
+)
 
 
 def handle_critical_alert(alert: dict[str, Any]) -> None:
@@ -256,7 +322,8 @@ def handle_critical_alert(alert: dict[str, Any]) -> None:
     service = labels.get("service", "unknown")
     logger.critical("🚨 CRITICAL ALERT for service: %s", service)
     if service in ALLOWED_SERVICES:
-        run_recovery_script(service)
+        outcome = recovery_executor.trigger(service)
+        logger.info("Recovery for %s: %s", service, outcome)
     else:
         logger.info(
             "Service %s has no recovery script configured; manual intervention may be required",
@@ -299,8 +366,6 @@ def process_alert(alert_data: dict[str, Any], alert_type: str = "general") -> No
                 handle_critical_alert(alert)
             if alert_type == "gpu" or labels.get("service") == "gpu":
                 handle_gpu_alert(alert)
-            # Persist each alert instance
-            save_alert_to_file({"alerts": [alert]}, alert_type)
         except Exception as exc:  # noqa: BLE001 - want resilience here
             logger.error("Unexpected error processing alert: %s", exc)
 
@@ -314,10 +379,31 @@ def health_check():
             "status": "healthy",
             "service": "webhook-receiver",
             "timestamp": datetime.now().isoformat(),
+            "deduplication": alert_deduplicator.stats(),
+        }
+    )
+
+
+@app.route("/recovery", methods=["GET"])
+@limiter.limit("30 per minute")
+def recovery_status():
+    """Report per-service recovery runs: state, last run, duration and exit code."""
+    return jsonify(
+        {
+            "max_workers": recovery_executor.max_workers,
+            "cooldown_seconds": recovery_executor.cooldown,
+            "services": recovery_executor.status(),
         }
     )
 
 
+@app.route("/metrics", methods=["GET"])
+@limiter.exempt
+def metrics():
+    """Prometheus metrics endpoint."""
+    return webhook_metrics.response()
+
+
 def _create_webhook_handler(alert_type: str, description: str):
     """
     Factory function to create webhook handlers for different alert types.
@@ -335,19 +421,48 @@ def _create_webhook_handler(alert_type: str, description: str):
             # Support both X-Signature (HMAC) and Bearer token authentication
             signature = request.headers.get("X-Signature")
             auth_header = request.headers.get("Authorization")
-            if not verify_signature(request.get_data(), signature) and not verify_bearer_token(
-                auth_header
-            ):
+            # One body buffer serves both the HMAC check and JSON validation
+            body = request.get_data(cache=False)
+            with webhook_metrics.stage("signature"):
+                authorized = verify_signature(body, signature) or verify_bearer_token(auth_header)
+            if not authorized:
                 return jsonify({"error": "Unauthorized"}), 401
+            with webhook_metrics.stage("validation"):
+                try:
+                    payload = AlertPayload.model_validate_json(body)
+                except ValidationError as exc:
+                    if any(err.get("type") == "json_invalid" for err in exc.errors()):
+                        return jsonify({"error": "Invalid JSON payload"}), 400
+                    raise
+                model = payload.model_dump()
+            fresh = alert_deduplicator.filter_new(model["alerts"])
+            duplicates = len(model["alerts"]) - len(fresh)
+            if not fresh:
+                logger.info("Skipping %d duplicate %s alert(s)", duplicates, alert_type)
+                return jsonify(
+                    {
+                        "status": "success",
+                        "message": f"{description} duplicate ignored",
+                        "duplicates": duplicates,
+                    }
+                )
+            model["alerts"] = fresh
             try:
-                raw_json = request.get_json(force=True)
-            except BadRequest:
-                return jsonify({"error": "Invalid JSON payload"}), 400
-            payload = AlertPayload(**raw_json)
-            model = payload.model_dump()
-            save_alert_to_file(model, alert_type)
-            process_alert(model, alert_type)
-            return jsonify({"status": "success", "message": f"{description} processed"})
+                with webhook_metrics.stage("persistence"):
+                    save_alert_to_file(model, alert_type)
+                with webhook_metrics.stage("processing"):
+                    process_alert(model, alert_type)
+            except Exception:
+                # Let Alertmanager's retry be processed instead of deduplicated
+                alert_deduplicator.forget(fresh)
+                raise
+            return jsonify(
+                {
+                    "status": "success",
+                    "message": f"{description} processed",
+                    "duplicates": duplicates,
+                }
+            )
         except ValidationError as exc:
             logger.warning(
                 "Payload validation failed for %s webhook at locations: %s",
@@ -382,24 +497,33 @@ for route_suffix, alert_type, description in WEBHOOK_ROUTES:
 @app.route("/alerts", methods=["GET"])
 @limiter.limit("10 per minute")
 def list_alerts():
-    """List recent alert files."""
+    """
+    Query indexed alerts, newest first.
+
+    Query parameters: ``since`` (Unix seconds or ISO-8601), ``service``, ``severity``,
+    ``status``, ``alertname``, ``limit`` and ``cursor`` (``next_cursor`` of the previous page).
+    """
+    if alert_store is None:
+        return jsonify({"error": "Alert index unavailable"}), 503
+    args = request.args
     try:
-        alert_files = sorted(LOG_DIR.glob("alert_*.json"), reverse=True)[:20]
-        alerts: list[dict[str, Any]] = []
-        for alert_file in alert_files:
-            try:
-                with open(alert_file, encoding="utf-8") as fh:
-                    data = json.load(fh)
-                alerts.append(
-                    {
-                        "filename": alert_file.name,
-                        "timestamp": alert_file.stat().st_mtime,
-                        "alerts_count": len(data.get("alerts", [])),
-                    }
-                )
-            except (OSError, ValueError, json.JSONDecodeError) as exc:
-                logger.error("Failed to read alert file %s: %s", alert_file, exc)
-        return jsonify({"alerts": alerts})
+        since = parse_since(args["since"]) if args.get("since") else None
+        cursor = int(args["cursor"]) if args.get("cursor") else None
+        limit = int(args.get("limit", ALERTS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid query parameters"}), 400
+    limit = max(1, min(limit, ALERTS_MAX_PAGE_SIZE))
+    try:
+        alerts, next_cursor = alert_store.query(
+            since=since,
+            cursor=cursor,
+            limit=limit,
+            service=args.get("service"),
+            severity=args.get("severity"),
+            status=args.get("status"),
+            alertname=args.get("alertname"),
+        )
+        return jsonify({"alerts": alerts, "count": len(alerts), "next_cursor": next_cursor})
     except Exception as exc:  # noqa: BLE001
         logger.error("Error listing alerts: %s", exc)
         return jsonify({"error": "Failed to list alerts"}), 500
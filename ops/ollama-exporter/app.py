@@ -1,18 +1,46 @@
+import json
 import logging
 import os
+import re
 import signal
 import sys
 import threading
 import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Any
 
 import requests
-from prometheus_client import Gauge, start_http_server
+from prometheus_client import REGISTRY, Counter, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from requests.adapters import HTTPAdapter
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434").rstrip("/")
 EXPORTER_PORT = int(os.getenv("EXPORTER_PORT", "9778"))
 POLL_INTERVAL = int(os.getenv("OLLAMA_EXPORTER_INTERVAL", "15"))
 REQUEST_TIMEOUT = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "5"))
+# "scrape" fetches from Ollama when Prometheus scrapes; "poll" refreshes every POLL_INTERVAL.
+EXPORTER_MODE = os.getenv("OLLAMA_EXPORTER_MODE", "scrape").strip().lower()
+CACHE_TTL = float(os.getenv("OLLAMA_EXPORTER_CACHE_TTL", "5"))
+MAX_CONCURRENCY = int(os.getenv("OLLAMA_EXPORTER_MAX_CONCURRENCY", "3"))
+# Synthetic benchmark: comma-separated models to run a tiny prompt against (empty disables).
+BENCHMARK_MODELS = [
+    model.strip() for model in os.getenv("OLLAMA_BENCHMARK_MODELS", "").split(",") if model.strip()
+]
+BENCHMARK_INTERVAL = int(os.getenv("OLLAMA_BENCHMARK_INTERVAL", "300"))
+BENCHMARK_TIMEOUT = float(os.getenv("OLLAMA_BENCHMARK_TIMEOUT", "120"))
+BENCHMARK_PROMPT = os.getenv("OLLAMA_BENCHMARK_PROMPT", "Count from one to ten.")
+BENCHMARK_NUM_PREDICT = int(os.getenv("OLLAMA_BENCHMARK_NUM_PREDICT", "32"))
+# keep_alive for models the benchmark has to load; "0" unloads them right after the run.
+BENCHMARK_KEEP_ALIVE = os.getenv("OLLAMA_BENCHMARK_KEEP_ALIVE", "0")
+
+VERSION_PATH = "/api/version"
+TAGS_PATH = "/api/tags"
+PS_PATH = "/api/ps"
+GENERATE_PATH = "/api/generate"
+ENDPOINTS = (VERSION_PATH, TAGS_PATH, PS_PATH)
 
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO").upper(),
@@ -20,14 +48,58 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger("ollama_exporter")
 
-OLLAMA_UP = Gauge("ollama_up", "Ollama health status (1=up, 0=down)")
-OLLAMA_VERSION_INFO = Gauge("ollama_version_info", "Current Ollama version", ["version"])
-OLLAMA_INSTALLED_MODELS = Gauge("ollama_installed_models", "Number of installed Ollama models")
-OLLAMA_REQUEST_LATENCY = Gauge(
-    "ollama_request_latency_seconds", "Latency for Ollama version endpoint"
+OLLAMA_REQUEST_DURATION = Histogram(
+    "ollama_request_duration_seconds",
+    "Latency of Ollama API requests made by the exporter",
+    ["endpoint"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+BENCHMARK_TOKENS_PER_SECOND = Histogram(
+    "ollama_benchmark_tokens_per_second",
+    "Generation throughput of the synthetic benchmark prompt",
+    ["model"],
+    buckets=(1, 2.5, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200),
+)
+BENCHMARK_LOAD_DURATION = Histogram(
+    "ollama_benchmark_load_duration_seconds",
+    "Model load time reported for the synthetic benchmark prompt",
+    ["model"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+BENCHMARK_TTFT = Histogram(
+    "ollama_benchmark_time_to_first_token_seconds",
+    "Time from request to the first streamed token of the synthetic benchmark prompt",
+    ["model"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+BENCHMARK_FAILURES = Counter(
+    "ollama_benchmark_failures_total",
+    "Synthetic benchmark runs that did not complete",
+    ["model", "reason"],
 )
 
 _STOP_EVENT = threading.Event()
+_PARAMETER_SIZE = re.compile(r"^\s*([\d.]+)\s*([KMBT]?)\s*$", re.IGNORECASE)
+_PARAMETER_SCALE = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def build_session() -> requests.Session:
+    """
+    Create a keep-alive HTTP session sized for concurrent endpoint fetches.
+
+    Returns:
+        requests.Session: Session whose connection pool holds one connection per
+        polled endpoint plus one for the benchmark, so every request reuses warm
+        connections.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(ENDPOINTS) + 1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = build_session()
 
 
 def fetch_json(path: str) -> dict[str, Any] | None:
@@ -40,15 +112,15 @@ def fetch_json(path: str) -> dict[str, Any] | None:
     Returns:
         dict[str, Any] | None: Parsed JSON object from the response, or `None` if the
         request failed (timeout, connection error, HTTP error, or other request
-        exceptions). Records request latency to OLLAMA_REQUEST_LATENCY on successful
-        responses.
+        exceptions). Records request latency to OLLAMA_REQUEST_DURATION, labeled
+        by endpoint, on successful responses.
     """
     url = f"{OLLAMA_URL}{path}"
     try:
         start = time.perf_counter()
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
+        response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        OLLAMA_REQUEST_LATENCY.set(time.perf_counter() - start)
+        OLLAMA_REQUEST_DURATION.labels(endpoint=path).observe(time.perf_counter() - start)
         data = response.json()
         return data if isinstance(data, dict) else None
     except requests.Timeout:
@@ -65,14 +137,249 @@ def fetch_json(path: str) -> dict[str, Any] | None:
         return None
 
 
-def poll_forever() -> None:
+def fetch_all(executor: ThreadPoolExecutor) -> dict[str, dict[str, Any] | None]:
+    """
+    Fetch every polled endpoint concurrently.
+
+    Parameters:
+        executor (ThreadPoolExecutor): Pool the requests are submitted to.
+
+    Returns:
+        dict[str, dict[str, Any] | None]: Response per endpoint path, `None` for
+        endpoints that failed.
+    """
+    return dict(zip(ENDPOINTS, executor.map(fetch_json, ENDPOINTS), strict=True))
+
+
+def parse_parameter_size(value: Any) -> float | None:
+    """
+    Convert Ollama's human-readable parameter size (e.g. "8.0B", "137M") to a count.
+
+    Returns:
+        float | None: Parameter count, or `None` when the value cannot be parsed.
+    """
+    match = _PARAMETER_SIZE.match(str(value or ""))
+    if not match:
+        return None
+    return float(match.group(1)) * _PARAMETER_SCALE[match.group(2).upper()]
+
+
+def parse_expiry(value: Any) -> float | None:
+    """
+    Convert an RFC 3339 `expires_at` timestamp to Unix seconds.
+
+    Returns:
+        float | None: Unix timestamp, or `None` when missing or malformed.
     """
-    Continuously polls the Ollama API and updates Prometheus metrics until stopped.
+    if not isinstance(value, str) or not value:
+        return None
+    # Ollama reports nanosecond precision, which datetime cannot parse.
+    text = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
+def _model_names(models: Any) -> set[str]:
+    if isinstance(models, dict):
+        return set(models.keys())
+    if not isinstance(models, list):
+        return set()
+    return {
+        str(model.get("name") or model.get("model"))
+        for model in models
+        if isinstance(model, dict) and (model.get("name") or model.get("model"))
+    }
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Ollama state assembled from one round of endpoint responses."""
+
+    version: str | None = None
+    installed: int | None = None
+    known_models: frozenset[str] = frozenset()
+    running: tuple[dict[str, Any], ...] | None = None
+    loads: dict[str, int] = field(default_factory=dict)
+
+
+class OllamaCollector:
+    """
+    Prometheus collector that renders Ollama metrics from a cached snapshot.
+
+    Every ``collect`` builds fresh metric families, so series for a replaced
+    version or an unloaded model disappear instead of lingering. In scrape mode
+    the snapshot is refreshed on demand at most once per ``ttl`` seconds, and
+    concurrent scrapes (e.g. several Prometheus replicas) share one refresh; in
+    poll mode only ``refresh`` calls from the background poller update it.
+    """
+
+    def __init__(
+        self,
+        ttl: float = CACHE_TTL,
+        max_workers: int = MAX_CONCURRENCY,
+        fetch_on_scrape: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = max(0.0, ttl)
+        self.fetch_on_scrape = fetch_on_scrape
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="ollama-fetch"
+        )
+        self._lock = threading.Lock()
+        self._snapshot = Snapshot()
+        self._fetched_at: float | None = None
+        self._loaded: set[str] | None = None
+
+    def refresh(self) -> Snapshot:
+        """Fetch all endpoints now and replace the cached snapshot."""
+        with self._lock:
+            return self._refresh()
+
+    def snapshot(self) -> Snapshot:
+        """
+        Return the cached snapshot, refreshing it first when stale in scrape mode.
+
+        Returns:
+            Snapshot: Latest Ollama state.
+        """
+        with self._lock:
+            if self.fetch_on_scrape and (
+                self._fetched_at is None or self._clock() - self._fetched_at >= self.ttl
+            ):
+                return self._refresh()
+            return self._snapshot
+
+    def close(self) -> None:
+        """Stop the fetch worker pool."""
+        self._executor.shutdown(wait=False)
+
+    def _refresh(self) -> Snapshot:
+        results = fetch_all(self._executor)
+        previous = self._snapshot
+
+        version = results.get(VERSION_PATH)
+        tags = results.get(TAGS_PATH)
+        ps = results.get(PS_PATH)
+        installed = (tags or {}).get("models")
+        running = (
+            tuple(m for m in ps.get("models") or [] if isinstance(m, dict))
+            if ps is not None
+            else None
+        )
+        loaded = _model_names(list(running)) if running is not None else None
+        known = _model_names(installed) if tags is not None else set(previous.known_models)
+
+        loads = dict(previous.loads)
+        if loaded is not None:
+            if self._loaded is not None:
+                for name in loaded - self._loaded:
+                    loads[name] = loads.get(name, 0) + 1
+            self._loaded = loaded
+            known |= loaded
+
+        self._snapshot = Snapshot(
+            version=(version.get("version") or "unknown") if version else None,
+            installed=len(installed) if isinstance(installed, list | dict) else None,
+            known_models=frozenset(known),
+            running=running,
+            loads=loads,
+        )
+        self._fetched_at = self._clock()
+        return self._snapshot
+
+    def describe(self) -> Iterator[Any]:
+        """Advertise metric names without fetching, for registry collision checks."""
+        yield from build_metrics(Snapshot())
+
+    def collect(self) -> Iterator[Any]:
+        """Yield metric families for the current snapshot."""
+        yield from build_metrics(self.snapshot())
+
+
+def build_metrics(snapshot: Snapshot) -> Iterator[Any]:
+    """
+    Render a snapshot as Prometheus metric families.
+
+    - ollama_up: 1 when version data was retrieved, 0 otherwise.
+    - ollama_version_info (labeled by version): only the current version.
+    - ollama_installed_models: number of installed models when present in tags.
+    - Per-model loaded state, memory, expiry and parameter size from `/api/ps`,
+      omitted when `/api/ps` could not be fetched.
+    - ollama_model_loads_total: observed model (re)loads since exporter start.
+    """
+    up = GaugeMetricFamily("ollama_up", "Ollama health status (1=up, 0=down)")
+    up.add_metric([], 1 if snapshot.version is not None else 0)
+    yield up
+
+    version = GaugeMetricFamily("ollama_version_info", "Current Ollama version", labels=["version"])
+    if snapshot.version is not None:
+        version.add_metric([snapshot.version], 1)
+    yield version
 
-    Polls the version and tags endpoints at regular intervals and updates the following metrics:
-    - OLLAMA_UP: set to 1 when version data is retrieved, 0 otherwise.
-    - OLLAMA_VERSION_INFO (labeled by version): sets the gauge for the reported version.
-    - OLLAMA_INSTALLED_MODELS: set to the number of installed models when present in tags.
+    installed = GaugeMetricFamily("ollama_installed_models", "Number of installed Ollama models")
+    if snapshot.installed is not None:
+        installed.add_metric([], snapshot.installed)
+    yield installed
+
+    loaded = GaugeMetricFamily(
+        "ollama_model_loaded",
+        "Whether the model is currently loaded (1=loaded, 0=idle)",
+        labels=["model"],
+    )
+    memory = GaugeMetricFamily(
+        "ollama_model_memory_bytes", "Memory held by a loaded model", labels=["model", "memory"]
+    )
+    expiry = GaugeMetricFamily(
+        "ollama_model_expiry_timestamp_seconds",
+        "Unix time at which a loaded model will be unloaded",
+        labels=["model"],
+    )
+    parameters = GaugeMetricFamily(
+        "ollama_model_parameters", "Model parameter count reported by Ollama", labels=["model"]
+    )
+    if snapshot.running is not None:
+        running_names = set()
+        for model in snapshot.running:
+            name = str(model.get("name") or model.get("model") or "")
+            if not name:
+                continue
+            running_names.add(name)
+            size = model.get("size") or 0
+            size_vram = model.get("size_vram") or 0
+            memory.add_metric([name, "vram"], size_vram)
+            memory.add_metric([name, "ram"], max(0, size - size_vram))
+            model_expiry = parse_expiry(model.get("expires_at"))
+            if model_expiry is not None:
+                expiry.add_metric([name], model_expiry)
+            model_parameters = parse_parameter_size(
+                (model.get("details") or {}).get("parameter_size")
+            )
+            if model_parameters is not None:
+                parameters.add_metric([name], model_parameters)
+        for name in sorted(snapshot.known_models):
+            loaded.add_metric([name], 1 if name in running_names else 0)
+    yield from (loaded, memory, expiry, parameters)
+
+    loads = CounterMetricFamily(
+        "ollama_model_loads",
+        "Times the exporter observed a model being (re)loaded",
+        labels=["model"],
+    )
+    for name, count in sorted(snapshot.loads.items()):
+        loads.add_metric([name], count)
+    yield loads
+
+
+def poll_forever(collector: OllamaCollector) -> None:
+    """
+    Continuously refresh the collector snapshot until stopped (poll mode).
+
+    Fetches the version, tags and ps endpoints concurrently over the pooled session
+    at regular intervals; scrapes then read the latest snapshot without touching
+    Ollama.
 
     The loop runs until the module-level _STOP_EVENT is set, and waits
     interruptibly between polls.
@@ -84,24 +391,196 @@ def poll_forever() -> None:
         REQUEST_TIMEOUT,
     )
     while not _STOP_EVENT.is_set():
-        version = fetch_json("/api/version")
-        if version:
-            OLLAMA_UP.set(1)
-            version_str = version.get("version") or "unknown"
-            OLLAMA_VERSION_INFO.labels(version=version_str).set(1)
-        else:
-            OLLAMA_UP.set(0)
-
-        tags = fetch_json("/api/tags") or {}
-        models = tags.get("models")
-        if isinstance(models, list):
-            OLLAMA_INSTALLED_MODELS.set(len(models))
-        elif isinstance(models, dict):
-            OLLAMA_INSTALLED_MODELS.set(len(models.keys()))
-
+        collector.refresh()
         _STOP_EVENT.wait(POLL_INTERVAL)
 
 
+@dataclass
+class BenchmarkResult:
+    """Timings of one synthetic benchmark generation."""
+
+    model: str
+    eval_count: int
+    eval_duration: float
+    prompt_eval_duration: float
+    load_duration: float
+    time_to_first_token: float
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        """Generation throughput, or `None` when Ollama reported no eval time."""
+        if self.eval_duration <= 0 or self.eval_count <= 0:
+            return None
+        return self.eval_count / self.eval_duration
+
+
+def _seconds(value: Any) -> float:
+    """Convert an Ollama nanosecond duration to seconds."""
+    return float(value or 0) / 1e9
+
+
+def _read_benchmark_stream(
+    model: str, response: requests.Response, start: float
+) -> BenchmarkResult | None:
+    """Parse NDJSON generate chunks; `None` when the stream ends before `done`."""
+    ttft = None
+    for line in response.iter_lines():
+        if not line:
+            continue
+        chunk = json.loads(line)
+        if not isinstance(chunk, dict):
+            raise ValueError(f"unexpected chunk {chunk!r}")
+        if chunk.get("error"):
+            raise ValueError(chunk["error"])
+        if ttft is None and chunk.get("response"):
+            ttft = time.perf_counter() - start
+        if chunk.get("done"):
+            prompt_eval = _seconds(chunk.get("prompt_eval_duration"))
+            load = _seconds(chunk.get("load_duration"))
+            return BenchmarkResult(
+                model=model,
+                eval_count=int(chunk.get("eval_count") or 0),
+                eval_duration=_seconds(chunk.get("eval_duration")),
+                prompt_eval_duration=prompt_eval,
+                load_duration=load,
+                # Without streamed text fall back to the server-side estimate.
+                time_to_first_token=ttft if ttft is not None else load + prompt_eval,
+            )
+    return None
+
+
+def _full_tag(name: Any) -> str:
+    """Normalize a model name the way `/api/ps` reports it (`llama3` -> `llama3:latest`)."""
+    text = str(name or "")
+    if text and ":" not in text.rsplit("/", 1)[-1]:
+        return f"{text}:latest"
+    return text
+
+
+def benchmark_keep_alive(model: str, running: Any) -> str | int | None:
+    """
+    Choose the `keep_alive` of a benchmark request so model residency stays as found.
+
+    Any generate request resets the model's unload timer, and loading a cold model
+    can evict one that serves real traffic. A model that is not loaded therefore
+    gets BENCHMARK_KEEP_ALIVE ("0": unloaded as soon as the run ends). A resident
+    model keeps the unload time production requests gave it (-1 when that is more
+    than a year away, i.e. pinned).
+
+    Parameters:
+        model (str): Model about to be benchmarked.
+        running (Any): `models` list from `/api/ps`, or `None` if it was unavailable.
+
+    Returns:
+        str | int | None: Value for the request's `keep_alive`, or `None` to leave
+        Ollama's default when residency is unknown.
+    """
+    if not isinstance(running, list):
+        return None
+    wanted = _full_tag(model)
+    for entry in running:
+        if not isinstance(entry, dict):
+            continue
+        if wanted not in {_full_tag(entry.get("name")), _full_tag(entry.get("model"))}:
+            continue
+        expiry = parse_expiry(entry.get("expires_at"))
+        if expiry is None:
+            return None
+        remaining = expiry - time.time()
+        return -1 if remaining > 365 * 86400 else max(1, int(remaining))
+    return BENCHMARK_KEEP_ALIVE
+
+
+def run_benchmark(model: str) -> BenchmarkResult | None:
+    """
+    Stream the benchmark prompt through `/api/generate` and measure it.
+
+    Time to first token is measured client-side from the first streamed chunk that
+    carries text; the final chunk supplies `eval_count`, `eval_duration`,
+    `prompt_eval_duration` and `load_duration`. `/api/ps` is checked first to pick
+    the request's `keep_alive` (see `benchmark_keep_alive`).
+
+    Parameters:
+        model (str): Model to benchmark.
+
+    Returns:
+        BenchmarkResult | None: Parsed timings, or `None` if the run failed
+        (failures are counted in BENCHMARK_FAILURES by reason).
+    """
+    url = f"{OLLAMA_URL}{GENERATE_PATH}"
+    payload = {
+        "model": model,
+        "prompt": BENCHMARK_PROMPT,
+        "stream": True,
+        "options": {"num_predict": BENCHMARK_NUM_PREDICT, "temperature": 0},
+    }
+    keep_alive = benchmark_keep_alive(model, (fetch_json(PS_PATH) or {}).get("models"))
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    try:
+        start = time.perf_counter()
+        with SESSION.post(url, json=payload, stream=True, timeout=BENCHMARK_TIMEOUT) as response:
+            response.raise_for_status()
+            result = _read_benchmark_stream(model, response, start)
+        if result is not None:
+            return result
+        reason = "incomplete"
+        LOGGER.warning("Benchmark stream for %s ended before completion", model)
+    except requests.Timeout:
+        reason = "timeout"
+        LOGGER.warning("Benchmark timeout for %s", model)
+    except requests.ConnectionError as exc:
+        reason = "connection"
+        LOGGER.warning("Benchmark connection error for %s: %s", model, exc)
+    except requests.HTTPError as exc:
+        reason = "http"
+        LOGGER.warning("Benchmark HTTP error for %s: %s", model, exc)
+    except requests.RequestException as exc:
+        reason = "request"
+        LOGGER.warning("Benchmark request failed for %s: %s", model, exc)
+    except (TypeError, ValueError) as exc:
+        reason = "invalid_response"
+        LOGGER.warning("Benchmark for %s returned an invalid response: %s", model, exc)
+    BENCHMARK_FAILURES.labels(model=model, reason=reason).inc()
+    return None
+
+
+def record_benchmark(result: BenchmarkResult) -> None:
+    """Observe a benchmark result in the per-model histograms."""
+    tokens_per_second = result.tokens_per_second
+    if tokens_per_second is not None:
+        BENCHMARK_TOKENS_PER_SECOND.labels(model=result.model).observe(tokens_per_second)
+    BENCHMARK_LOAD_DURATION.labels(model=result.model).observe(result.load_duration)
+    BENCHMARK_TTFT.labels(model=result.model).observe(result.time_to_first_token)
+
+
+def benchmark_forever(models: list[str]) -> None:
+    """
+    Periodically benchmark each configured model until stopped.
+
+    Models run one after another so the benchmark never forces several models
+    into memory at once. Loading a cold model still shows up in
+    `ollama_model_loads_total` when a refresh catches it resident and may evict
+    another model; benchmarking only models production keeps loaded avoids both.
+    The loop waits BENCHMARK_INTERVAL seconds between rounds and exits when the
+    module-level _STOP_EVENT is set.
+    """
+    LOGGER.info(
+        "Starting benchmark (models=%s, interval=%ss, num_predict=%s)",
+        ",".join(models),
+        BENCHMARK_INTERVAL,
+        BENCHMARK_NUM_PREDICT,
+    )
+    while not _STOP_EVENT.is_set():
+        for model in models:
+            if _STOP_EVENT.is_set():
+                break
+            result = run_benchmark(model)
+            if result is not None:
+                record_benchmark(result)
+        _STOP_EVENT.wait(BENCHMARK_INTERVAL)
+
+
 def shutdown(signum: int, frame: Any) -> None:  # pylint: disable=unused-argument
     """Signal handler for graceful shutdown"""
     LOGGER.info("Received signal %s, stopping exporter", signum)
@@ -110,24 +589,57 @@ def shutdown(signum: int, frame: Any) -> None:  # pylint: disable=unused-argumen
 
 def main() -> None:
     """
-    Start the Prometheus metrics server, register shutdown handlers, and run the
-    background poller until termination.
+    Start the Prometheus metrics server, register shutdown handlers, and serve
+    Ollama metrics until termination.
 
-    Registers SIGTERM and SIGINT to initiate a graceful shutdown, starts the HTTP
-    metrics server on EXPORTER_PORT, launches the daemon poller thread, blocks
-    until shutdown is signaled, and joins the poller before exiting.
+    Registers SIGTERM and SIGINT to initiate a graceful shutdown and registers the
+    OllamaCollector before starting the HTTP metrics server on EXPORTER_PORT. In
+    scrape mode (default) Ollama is queried when Prometheus scrapes; in poll mode a
+    daemon poller thread refreshes the snapshot every POLL_INTERVAL seconds. When
+    OLLAMA_BENCHMARK_MODELS is set a daemon benchmark thread runs as well; both
+    are joined before exiting.
     """
     signal.signal(signal.SIGTERM, shutdown)
     signal.signal(signal.SIGINT, shutdown)
 
+    poll_mode = EXPORTER_MODE == "poll"
+    collector = OllamaCollector(fetch_on_scrape=not poll_mode)
+    REGISTRY.register(collector)
     start_http_server(EXPORTER_PORT)
-    poller = threading.Thread(target=poll_forever, name="ollama-exporter", daemon=True)
-    poller.start()
+    LOGGER.info(
+        "Serving Ollama metrics on :%s (mode=%s, cache_ttl=%ss, max_concurrency=%s)",
+        EXPORTER_PORT,
+        "poll" if poll_mode else "scrape",
+        CACHE_TTL,
+        MAX_CONCURRENCY,
+    )
+
+    workers = []
+    if poll_mode:
+        workers.append(
+            threading.Thread(
+                target=poll_forever, args=(collector,), name="ollama-exporter", daemon=True
+            )
+        )
+    if BENCHMARK_MODELS:
+        workers.append(
+            threading.Thread(
+                target=benchmark_forever,
+                args=(BENCHMARK_MODELS,),
+                name="ollama-benchmark",
+                daemon=True,
+            )
+        )
+    for worker in workers:
+        worker.start()
 
     while not _STOP_EVENT.is_set():
         time.sleep(1)
 
-    poller.join(timeout=2)
+    for worker in workers:
+        worker.join(timeout=2)
+    collector.close()
+    SESSION.close()
     LOGGER.info("Exporter stopped")
 
 
@@ -18,8 +18,20 @@ else
   }
 fi
 
+# Prefer pointing the app at the secret files: they are re-read on SIGHUP, so the
+# secret can be rotated without a restart (the previous one stays valid meanwhile)
+if [[ -z "${ALERTMANAGER_WEBHOOK_SECRET:-}" && -z "${ALERTMANAGER_WEBHOOK_SECRET_FILE:-}" \
+  && -f /run/secrets/alertmanager_webhook_secret ]]; then
+  export ALERTMANAGER_WEBHOOK_SECRET_FILE=/run/secrets/alertmanager_webhook_secret
+  log "Using ALERTMANAGER_WEBHOOK_SECRET_FILE from secret"
+fi
+if [[ -z "${ALERTMANAGER_WEBHOOK_SECRET_PREVIOUS_FILE:-}" \
+  && -f /run/secrets/alertmanager_webhook_secret_previous ]]; then
+  export ALERTMANAGER_WEBHOOK_SECRET_PREVIOUS_FILE=/run/secrets/alertmanager_webhook_secret_previous
+fi
+
 # Read ALERTMANAGER_WEBHOOK_SECRET from secret if not already set
-if [[ -z "${ALERTMANAGER_WEBHOOK_SECRET:-}" ]]; then
+if [[ -z "${ALERTMANAGER_WEBHOOK_SECRET:-}" && -z "${ALERTMANAGER_WEBHOOK_SECRET_FILE:-}" ]]; then
   if secret=$(read_secret "alertmanager_webhook_secret"); then
     export ALERTMANAGER_WEBHOOK_SECRET="$secret"
     log "Loaded ALERTMANAGER_WEBHOOK_SECRET from secret"
@@ -29,6 +41,13 @@ fi
 # Ensure Python can import the app module
 cd /app
 
+# WEBHOOK_SERVER=asgi serves the webhook routes from the async entry point (uvicorn);
+# --lifespan on makes a failed startup (e.g. invalid secret) stop the server
+if [[ "${WEBHOOK_SERVER:-wsgi}" == "asgi" ]]; then
+  exec uvicorn asgi:app --host 0.0.0.0 --port 9093 --lifespan on \
+    --workers "${WEBHOOK_WORKERS:-2}" --no-server-header
+fi
+
 # Execute the main application using gunicorn (production WSGI server)
 exec gunicorn --bind 0.0.0.0:9093 --workers 2 --threads 4 \
     --access-logfile - --error-logfile - \
@@ -0,0 +1,206 @@
+"""
+Content-addressed result cache for the RAGFlow adapter.
+
+Uploading and parsing a document in RAGFlow costs minutes of GPU/CPU, so the
+adapter keys every upload by the SHA-256 of its bytes plus its MIME type and
+remembers the resulting ``ragflow_doc_id`` and chunk output. ``ResultCache``
+stores one JSON file per key, evicts least-recently-used entries once the
+directory exceeds ``max_bytes``, and coalesces concurrent identical uploads
+into a single in-flight parse.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CACHE_HIT = "hit"
+CACHE_COALESCED = "coalesced"
+CACHE_MISS = "miss"
+
+
+def cache_key(content_sha256: str, mime_type: str, namespace: str = "") -> str:
+    """
+    Derive the cache key for a document.
+
+    Args:
+        content_sha256: Hex SHA-256 of the uploaded bytes.
+        mime_type: Normalized MIME type.
+        namespace: Scope (the RAGFlow dataset) so doc ids never leak across datasets.
+    """
+    return hashlib.sha256(f"{namespace}\0{mime_type}\0{content_sha256}".encode()).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded on-disk LRU of processing results with in-flight coalescing."""
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int) -> None:
+        """
+        Initialize the cache, indexing entries left by a previous run.
+
+        Args:
+            directory: Directory holding one ``<key>.json`` file per entry.
+            max_bytes: Total size budget; 0 disables persistence (coalescing stays on).
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are persisted."""
+        return self.max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes currently held on disk."""
+        with self._lock:
+            return sum(self._entries.values())
+
+    def stats(self) -> dict[str, int]:
+        """Return entry count, size and in-flight parses."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "inflight": len(self._inflight),
+            }
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached result for ``key`` (marking it recently used), or None."""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, result: dict[str, Any]) -> None:
+        """Store ``result`` under ``key`` and evict LRU entries over budget."""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._put, key, result)
+        except OSError as exc:
+            logger.warning(f"cache_write_failed: key={key[:12]}, error={exc}")
+
+    async def get_or_process(
+        self, key: str, produce: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> tuple[dict[str, Any], str]:
+        """
+        Return the result for ``key``, producing it at most once at a time.
+
+        A cached result is returned directly; if the same key is already being
+        processed the caller awaits that parse; otherwise ``produce`` runs and its
+        result is cached.
+
+        Returns (result, one of CACHE_HIT / CACHE_COALESCED / CACHE_MISS).
+        """
+        while True:
+            cached = await self.get(key)
+            if cached is not None:
+                return cached, CACHE_HIT
+            leader = self._inflight.get(key)
+            if leader is None:
+                break
+            try:
+                return await asyncio.shield(leader), CACHE_COALESCED
+            except asyncio.CancelledError:
+                # The leading job timed out or was cancelled: take over.
+                if leader.cancelled():
+                    continue
+                raise
+
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await produce()
+            await self.put(key, result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved: followers re-raise it, and there may be none.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        return result, CACHE_MISS
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load_index(self) -> None:
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(files):
+                self._entries[key] = size
+            self._evict()
+
+    def _get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError) as exc:
+            logger.warning(f"cache_read_failed: key={key[:12]}, error={exc}")
+            with self._lock:
+                self._entries.pop(key, None)
+            path.unlink(missing_ok=True)
+            return None
+        return result
+
+    def _put(self, key: str, result: dict[str, Any]) -> None:
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            logger.info(f"cache_skip_oversized: key={key[:12]}, bytes={len(data)}")
+            return
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, self._path(key))
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self) -> None:
+        total = sum(self._entries.values())
+        while total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            total -= size
+            self._path(key).unlink(missing_ok=True)
+            logger.info(f"cache_evicted: key={key[:12]}, bytes={size}")
@@ -0,0 +1,161 @@
+"""
+Shared HTTP connection pool for RAGFlow API calls.
+
+One ``httpx.AsyncClient`` lives for the whole application (opened and closed
+from the FastAPI lifespan) so uploads, status polls and chunk fetches reuse
+keep-alive connections instead of paying TCP/TLS setup per call. Each
+operation gets its own timeout, and in-flight requests are tracked against
+the connection limit to expose pool saturation.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import time
+from typing import Any
+
+import httpx
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+OP_UPLOAD = "upload"
+OP_PARSE = "parse"
+OP_POLL = "poll"
+OP_CHUNKS = "chunks"
+
+REGISTRY = CollectorRegistry()
+HTTP_IN_FLIGHT = Gauge(
+    "ragflow_adapter_http_requests_in_flight",
+    "RAGFlow API requests currently holding or waiting for a pooled connection",
+    registry=REGISTRY,
+)
+HTTP_POOL_SATURATION = Gauge(
+    "ragflow_adapter_http_pool_saturation",
+    "In-flight RAGFlow requests divided by the connection limit (>= 1 means queueing)",
+    registry=REGISTRY,
+)
+HTTP_POOL_MAX = Gauge(
+    "ragflow_adapter_http_pool_max_connections",
+    "Configured RAGFlow connection limit",
+    registry=REGISTRY,
+)
+HTTP_POOL_TIMEOUTS = Counter(
+    "ragflow_adapter_http_pool_timeouts_total",
+    "RAGFlow requests that gave up waiting for a free pooled connection",
+    ["operation"],
+    registry=REGISTRY,
+)
+HTTP_DURATION = Histogram(
+    "ragflow_adapter_http_request_duration_seconds",
+    "RAGFlow API request latency by operation",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+    registry=REGISTRY,
+)
+
+
+class RagflowHTTP:
+    """Application-lifetime ``httpx.AsyncClient`` with per-operation timeouts."""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        connect_timeout: float = 5.0,
+        pool_timeout: float = 30.0,
+        operation_timeouts: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Configure the pool; the client itself is created by ``start``.
+
+        Args:
+            max_connections: Upper bound on concurrent connections to RAGFlow.
+            max_keepalive: Idle connections kept open for reuse.
+            keepalive_expiry: Seconds an idle connection is kept.
+            http2: Negotiate HTTP/2 when the ``h2`` package is installed.
+            connect_timeout: TCP/TLS connect timeout for every operation.
+            pool_timeout: Seconds a request may wait for a free connection.
+            operation_timeouts: Read/write timeout per operation (upload, parse, poll, chunks).
+        """
+        self.max_connections = max(1, max_connections)
+        self.limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=max(0, min(max_keepalive, self.max_connections)),
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("http2_unavailable: install httpx[http2]; falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        timeouts = {OP_UPLOAD: 300.0, OP_PARSE: 10.0, OP_POLL: 10.0, OP_CHUNKS: 60.0}
+        timeouts.update(operation_timeouts or {})
+        self.timeouts = {
+            operation: httpx.Timeout(seconds, connect=connect_timeout, pool=pool_timeout)
+            for operation, seconds in timeouts.items()
+        }
+        self._client: httpx.AsyncClient | None = None
+        self._in_flight = 0
+        HTTP_POOL_MAX.set(self.max_connections)
+
+    @property
+    def started(self) -> bool:
+        """Whether the client is open."""
+        return self._client is not None
+
+    async def start(self) -> None:
+        """Open the shared client (idempotent)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits, http2=self.http2, timeout=self.timeouts[OP_POLL]
+            )
+            logger.info(
+                f"ragflow_http_started: max_connections={self.max_connections}, "
+                f"keepalive={self.limits.max_keepalive_connections}, http2={self.http2}"
+            )
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+            logger.info("ragflow_http_closed")
+
+    async def request(self, operation: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request with the timeout for ``operation``.
+
+        Raises RuntimeError when the client is not started and httpx errors as-is.
+        """
+        if self._client is None:
+            raise RuntimeError("RAGFlow HTTP client is not started")
+        self._track(1)
+        start = time.perf_counter()
+        try:
+            return await self._client.request(
+                method, url, timeout=self.timeouts[operation], **kwargs
+            )
+        except httpx.PoolTimeout:
+            HTTP_POOL_TIMEOUTS.labels(operation=operation).inc()
+            logger.warning(f"ragflow_pool_timeout: operation={operation}")
+            raise
+        finally:
+            HTTP_DURATION.labels(operation=operation).observe(time.perf_counter() - start)
+            self._track(-1)
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool usage for the health endpoint."""
+        return {
+            "in_flight": self._in_flight,
+            "max_connections": self.max_connections,
+            "saturation": round(self._in_flight / self.max_connections, 3),
+            "http2": self.http2,
+        }
+
+    def _track(self, delta: int) -> None:
+        self._in_flight += delta
+        HTTP_IN_FLIGHT.set(self._in_flight)
+        HTTP_POOL_SATURATION.set(self._in_flight / self.max_connections)
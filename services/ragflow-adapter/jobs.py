@@ -0,0 +1,286 @@
+"""
+Background document-processing jobs for the RAGFlow adapter.
+
+``POST /jobs`` spools the upload and hands a ``Job`` to the ``JobManager``,
+whose fixed pool of asyncio workers runs upload -> parse -> poll -> fetch
+independently of any HTTP request. Clients follow progress via
+``GET /jobs/{id}`` (optionally long-polling) or the SSE event stream;
+``PUT /process`` is a thin wrapper that submits a job and awaits it, and
+releases the job once its result has been sent. Finished jobs nobody released
+are purged ``retention`` seconds after they finish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_UPLOADING = "uploading"
+JOB_PARSING = "parsing"
+JOB_FETCHING = "fetching"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = frozenset({JOB_DONE, JOB_FAILED})
+
+
+@dataclass
+class Job:
+    """One document moving through the RAGFlow pipeline."""
+
+    id: str
+    filename: str
+    mime_type: str
+    path: str | None
+    size: int
+    content_sha256: str = ""
+    status: str = JOB_QUEUED
+    progress: float = 0.0
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    status_code: int | None = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    version: int = 0
+    content: list[str] = field(default_factory=list, repr=False)
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job reached a terminal state."""
+        return self.status in FINISHED_STATES
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the public JSON view of the job."""
+        data: dict[str, Any] = {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "filename": self.filename,
+            "size": self.size,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+            data["status_code"] = self.status_code
+        if self.result is not None:
+            data["result"] = self.result
+        return data
+
+    async def update(self, job_status: str, progress: float | None = None) -> None:
+        """Move the job to ``job_status`` and wake anyone waiting for changes."""
+        async with self._changed:
+            self.status = job_status
+            if progress is not None:
+                self.progress = max(0.0, min(1.0, progress))
+            self._touch()
+
+    async def append_content(self, text: str) -> None:
+        """Publish the next piece of page_content for streaming readers."""
+        async with self._changed:
+            self.content.append(text)
+            self._touch()
+
+    async def complete(self, result: dict[str, Any]) -> None:
+        """Store the final result and mark the job done."""
+        async with self._changed:
+            self.status = JOB_DONE
+            self.progress = 1.0
+            self.result = result
+            # The result now holds the full text
+            self.content = []
+            self._touch()
+        self._done.set()
+
+    async def fail(self, status_code: int, detail: str) -> None:
+        """Mark the job failed with the HTTP status ``/process`` should surface."""
+        async with self._changed:
+            self.status = JOB_FAILED
+            self.status_code = status_code
+            self.error = detail
+            self._touch()
+        self._done.set()
+
+    async def wait(self) -> None:
+        """Block until the job finishes."""
+        await self._done.wait()
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """
+        Wait until the job changes past ``version`` or ``timeout`` elapses.
+
+        Returns True when a newer version is available.
+        """
+        async with self._changed:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: self.version > version), timeout
+                )
+            return self.version > version
+
+    def _touch(self) -> None:
+        self.version += 1
+        self.updated_at = time.time()
+        self._changed.notify_all()
+
+
+class JobManager:
+    """Bounded queue of jobs drained by a fixed pool of asyncio workers."""
+
+    def __init__(
+        self,
+        runner: Callable[[Job], Awaitable[dict[str, Any]]],
+        workers: int = 4,
+        queue_size: int = 100,
+        timeout: float = 300.0,
+        retention: float = 3600.0,
+        purge_interval: float = 60.0,
+    ) -> None:
+        """
+        Initialize the manager.
+
+        Args:
+            runner: Coroutine function that processes a job and returns its result.
+            workers: Number of concurrent worker tasks.
+            queue_size: Maximum queued (not yet running) jobs.
+            timeout: Per-job processing timeout in seconds.
+            retention: Seconds finished jobs stay queryable.
+            purge_interval: Seconds between sweeps for expired jobs.
+        """
+        self._runner = runner
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.timeout = timeout
+        self.retention = retention
+        self.purge_interval = max(0.01, purge_interval)
+        self._jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[Job] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        """Whether workers are started."""
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the worker tasks (idempotent)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(self._queue), name=f"ragflow-job-worker-{index}")
+            for index in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._purge_forever(), name="ragflow-job-purge"))
+        logger.info(f"job_workers_started: workers={self.workers}, queue={self.queue_size}")
+
+    async def stop(self) -> None:
+        """Cancel workers and fail jobs that never started."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        queue, self._queue = self._queue, None
+        while queue is not None and not queue.empty():
+            job = queue.get_nowait()
+            await job.fail(status.HTTP_503_SERVICE_UNAVAILABLE, "Adapter shutting down")
+            _remove_file(job)
+
+    def submit(self, job: Job) -> Job:
+        """
+        Queue a job for processing.
+
+        Raises HTTPException 503 when workers are not running or the queue is full.
+        """
+        if self._queue is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Job workers are not running",
+            )
+        self._purge()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning(f"[{job.id}] job_queue_full: size={self.queue_size}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending documents, retry later",
+                headers={"Retry-After": "30"},
+            ) from None
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Return a job by id, or None when unknown or expired."""
+        return self._jobs.get(job_id)
+
+    def release(self, job_id: str) -> None:
+        """Forget a job whose result was handed to its only consumer."""
+        self._jobs.pop(job_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Return counts of tracked jobs per status."""
+        counts: dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    async def _worker(self, queue: asyncio.Queue[Job]) -> None:
+        while True:
+            job = await queue.get()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        try:
+            result = await asyncio.wait_for(self._runner(job), timeout=self.timeout)
+        except TimeoutError:
+            logger.error(f"[{job.id}] process_timeout: timeout={self.timeout}s")
+            await job.fail(
+                status.HTTP_504_GATEWAY_TIMEOUT, f"Processing timeout after {self.timeout:g}s"
+            )
+        except HTTPException as exc:
+            await job.fail(exc.status_code, str(exc.detail))
+        except asyncio.CancelledError:
+            await job.fail(status.HTTP_503_SERVICE_UNAVAILABLE, "Adapter shutting down")
+            raise
+        except Exception as exc:  # noqa: BLE001 - a job must never kill its worker
+            logger.exception(f"[{job.id}] job_failed: {exc}")
+            await job.fail(status.HTTP_502_BAD_GATEWAY, f"RAGFlow request failed: {exc}")
+        else:
+            await job.complete(result)
+        finally:
+            _remove_file(job)
+
+    async def _purge_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            self._purge()
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items() if job.finished and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def _remove_file(job: Job) -> None:
+    if job.path and os.path.exists(job.path):
+        os.unlink(job.path)
+    job.path = None
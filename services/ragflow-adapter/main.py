@@ -6,17 +6,56 @@ to RAGFlow document upload API.
 """
 
 import asyncio
+import hashlib
+import json
 import logging
+import math
 import os
 import secrets
+import sys
 import tempfile
 import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
 from urllib.parse import unquote
 
 import aiofiles  # type: ignore[import-untyped]
-import httpx
-from fastapi import FastAPI, Header, HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.background import BackgroundTask
+
+try:
+    from .cache import ResultCache, cache_key
+    from .http_client import OP_CHUNKS, OP_PARSE, OP_POLL, OP_UPLOAD, RagflowHTTP
+    from .http_client import REGISTRY as HTTP_REGISTRY
+    from .jobs import (
+        JOB_DONE,
+        JOB_FAILED,
+        JOB_FETCHING,
+        JOB_PARSING,
+        JOB_UPLOADING,
+        Job,
+        JobManager,
+    )
+    from .poller import PollCoordinator
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parent))
+    from cache import ResultCache, cache_key  # type: ignore
+    from http_client import OP_CHUNKS, OP_PARSE, OP_POLL, OP_UPLOAD, RagflowHTTP  # type: ignore
+    from http_client import REGISTRY as HTTP_REGISTRY  # type: ignore
+    from jobs import (  # type: ignore
+        JOB_DONE,
+        JOB_FAILED,
+        JOB_FETCHING,
+        JOB_PARSING,
+        JOB_UPLOADING,
+        Job,
+        JobManager,
+    )
+    from poller import PollCoordinator  # type: ignore
 
 # Configure structured logging
 logging.basicConfig(
@@ -25,17 +64,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="RAGFlow Adapter", version="1.1.0")
-
 # Configuration from environment
 RAGFLOW_BASE_URL = os.getenv("RAGFLOW_BASE_URL", "http://localhost:19090")
 RAGFLOW_API_KEY = os.getenv("RAGFLOW_API_KEY", "")
 RAGFLOW_DATASET_ID = os.getenv("RAGFLOW_DATASET_ID", "")
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "5"))
 MAX_POLL_ATTEMPTS = int(os.getenv("MAX_POLL_ATTEMPTS", "60"))  # Reduced default
+# Adaptive status polling: first check after POLL_MIN_INTERVAL, then driven by
+# reported progress up to POLL_MAX_INTERVAL; the legacy interval x attempts
+# budget remains the default parse deadline
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", "1"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "30"))
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", "1.5"))
+POLL_BATCH_SIZE = int(os.getenv("POLL_BATCH_SIZE", "100"))  # Documents listed per batched check
+PARSE_TIMEOUT = float(os.getenv("PARSE_TIMEOUT", str(POLL_INTERVAL * MAX_POLL_ATTEMPTS)))
+# Chunk retrieval: pages fetched concurrently, reassembled in order, capped in size
+CHUNK_PAGE_SIZE = int(os.getenv("CHUNK_PAGE_SIZE", "100"))
+CHUNK_FETCH_CONCURRENCY = int(os.getenv("CHUNK_FETCH_CONCURRENCY", "4"))
+CHUNK_MAX_BYTES = int(os.getenv("CHUNK_MAX_BYTES", str(32 * 1024 * 1024)))  # 32MB, 0 disables
 PROCESS_TIMEOUT = int(os.getenv("PROCESS_TIMEOUT", "300"))  # 5 min absolute timeout
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(100 * 1024 * 1024)))  # 100MB default
 API_KEY = os.getenv("ADAPTER_API_KEY", "")  # Optional auth for this adapter
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))  # Documents processed concurrently
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))  # Pending jobs before 503
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "3600"))  # Seconds finished jobs stay queryable
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))  # Long-poll / SSE keep-alive cap
+CACHE_DIR = os.getenv(
+    "CACHE_DIR", os.path.join(tempfile.gettempdir(), "ragflow-adapter-cache")
+)  # Content-hash result cache
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))  # 1GB, 0 disables
+# Shared RAGFlow connection pool and per-operation timeouts (seconds)
+RAGFLOW_MAX_CONNECTIONS = int(os.getenv("RAGFLOW_MAX_CONNECTIONS", "20"))
+RAGFLOW_MAX_KEEPALIVE = int(os.getenv("RAGFLOW_MAX_KEEPALIVE", "10"))
+RAGFLOW_KEEPALIVE_EXPIRY = float(os.getenv("RAGFLOW_KEEPALIVE_EXPIRY", "30"))
+RAGFLOW_HTTP2 = os.getenv("RAGFLOW_HTTP2", "false").lower() in ("1", "true", "yes")
+RAGFLOW_CONNECT_TIMEOUT = float(os.getenv("RAGFLOW_CONNECT_TIMEOUT", "5"))
+RAGFLOW_POOL_TIMEOUT = float(os.getenv("RAGFLOW_POOL_TIMEOUT", "30"))
+RAGFLOW_UPLOAD_TIMEOUT = float(os.getenv("RAGFLOW_UPLOAD_TIMEOUT", "300"))
+RAGFLOW_POLL_TIMEOUT = float(os.getenv("RAGFLOW_POLL_TIMEOUT", "10"))
+RAGFLOW_CHUNKS_TIMEOUT = float(os.getenv("RAGFLOW_CHUNKS_TIMEOUT", "60"))
 
 # Allowed MIME types for document processing
 ALLOWED_MIME_TYPES = {
@@ -55,6 +122,23 @@ ALLOWED_MIME_TYPES = {
 }
 
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Run the shared RAGFlow client, status poller and job workers for the application lifetime."""
+    await ragflow_http.start()
+    await poll_coordinator.start()
+    await job_manager.start()
+    try:
+        yield
+    finally:
+        await job_manager.stop()
+        await poll_coordinator.stop()
+        await ragflow_http.aclose()
+
+
+app = FastAPI(title="RAGFlow Adapter", version="1.2.0", lifespan=lifespan)
+
+
 def get_ragflow_headers() -> dict[str, str]:
     """Get headers for RAGFlow API requests."""
     return {"Authorization": f"Bearer {RAGFLOW_API_KEY}"}
@@ -118,30 +202,35 @@ def validate_content_type(content_type: str | None) -> str:
 @app.get("/health")
 async def health():
     """Health check endpoint."""
-    return {"status": "ok", "version": "1.1.0"}
+    return {
+        "status": "ok",
+        "version": "1.2.0",
+        "jobs": job_manager.stats(),
+        "cache": result_cache.stats(),
+        "http_pool": ragflow_http.stats(),
+        "polling": poll_coordinator.stats(),
+    }
 
 
-@app.put("/process")
-async def process_document(
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for the RAGFlow connection pool."""
+    return Response(generate_latest(HTTP_REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+async def _accept_upload(
     request: Request,
-    content_type: str | None = Header(None),
-    x_filename: str | None = Header(None, alias="X-Filename"),
-    authorization: str | None = Header(None),
-    content_length: int | None = Header(None, alias="Content-Length"),
-):
+    content_type: str | None,
+    x_filename: str | None,
+    authorization: str | None,
+    content_length: int | None,
+) -> Job:
     """
-    Process document through RAGFlow.
-
-    OpenWebUI sends:
-    - PUT /process
-    - Body: raw file bytes
-    - Headers: Content-Type, X-Filename, Authorization
+    Authorize, validate and spool an OpenWebUI upload into a queued job.
 
-    Returns:
-    - JSON with page_content and metadata
+    Raises HTTPException for auth, configuration, content type and size errors.
     """
     request_id = secrets.token_hex(8)
-    start_time = time.monotonic()
 
     # 1. Verify authorization
     verify_api_key(authorization)
@@ -174,70 +263,322 @@ async def process_document(
             detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024 * 1024)}MB",
         )
 
-    # 5. Read file content with size limit
-    file_bytes = b""
-    async for chunk in request.stream():
-        file_bytes += chunk
-        if len(file_bytes) > MAX_FILE_SIZE:
-            logger.warning(f"[{request_id}] file_too_large: exceeded {MAX_FILE_SIZE} bytes")
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024 * 1024)}MB",
-            )
-
-    if not file_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No file content",
-        )
-
-    # 6. Get filename
+    # 5. Get filename
     filename = "document"
     if x_filename:
         filename = unquote(x_filename)
 
-    logger.info(
-        f"[{request_id}] process_start: filename={filename}, "
-        f"size={len(file_bytes)}, mime={mime_type}"
-    )
-
-    # 7. Create temp file
     suffix = ""
     if "." in filename:
         suffix = "." + filename.rsplit(".", 1)[-1]
 
-    tmp_path = None
+    # 6. Spool the body to disk, enforcing the size limit while streaming
+    tmp_path, file_size, content_sha256 = await _spool_to_tempfile(request, request_id, suffix)
+
+    # 7. Queue the job; the worker pool owns the temp file from here on
+    job = Job(
+        id=request_id,
+        filename=filename,
+        mime_type=mime_type,
+        path=tmp_path,
+        size=file_size,
+        content_sha256=content_sha256,
+    )
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(file_bytes)
-            tmp_path = tmp.name
-
-        # Process with absolute timeout
-        result = await asyncio.wait_for(
-            _process_with_ragflow(request_id, tmp_path, filename, mime_type),
-            timeout=PROCESS_TIMEOUT,
-        )
+        job_manager.submit(job)
+    except HTTPException:
+        os.unlink(tmp_path)
+        raise
 
-        elapsed = time.monotonic() - start_time
-        logger.info(
-            f"[{request_id}] process_complete: chunks={result['metadata']['chunk_count']}, "
-            f"elapsed={elapsed:.2f}s"
-        )
+    logger.info(
+        f"[{request_id}] process_start: filename={filename}, size={file_size}, mime={mime_type}"
+    )
+    return job
 
-        return JSONResponse(result)
 
+@app.put("/process")
+async def process_document(
+    request: Request,
+    content_type: str | None = Header(None),
+    x_filename: str | None = Header(None, alias="X-Filename"),
+    authorization: str | None = Header(None),
+    content_length: int | None = Header(None, alias="Content-Length"),
+    stream: bool = Query(False, description="Stream page_content as chunks are assembled"),
+):
+    """
+    Process document through RAGFlow.
+
+    OpenWebUI sends:
+    - PUT /process
+    - Body: raw file bytes
+    - Headers: Content-Type, X-Filename, Authorization
+
+    The document runs as a background job; this request only waits for it, so
+    a timeout or disconnect leaves the job running and its result remains
+    available at GET /jobs/{id} (the id is returned in the X-Job-Id header).
+    Once the result has been sent the job is released; failed jobs stay
+    queryable until they expire.
+
+    With ``stream=true`` the response starts as soon as the first chunk page is
+    assembled and page_content is written incrementally; the body is the same
+    JSON document, and errors before that point keep their status codes.
+
+    Returns:
+    - JSON with page_content and metadata
+    """
+    job = await _accept_upload(request, content_type, x_filename, authorization, content_length)
+    headers = {"X-Job-Id": job.id}
+
+    try:
+        await asyncio.wait_for(
+            _wait_for_content(job) if stream else job.wait(), timeout=PROCESS_TIMEOUT
+        )
     except TimeoutError:
-        elapsed = time.monotonic() - start_time
-        logger.error(f"[{request_id}] process_timeout: elapsed={elapsed:.2f}s")
+        logger.error(f"[{job.id}] process_wait_timeout: timeout={PROCESS_TIMEOUT}s")
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail=f"Processing timeout after {PROCESS_TIMEOUT}s",
+            headers=headers,
         ) from None
 
-    finally:
-        # Cleanup temp file
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+    if job.status == JOB_FAILED or (job.status == JOB_DONE and job.result is None):
+        raise HTTPException(
+            status_code=job.status_code or status.HTTP_502_BAD_GATEWAY,
+            detail=job.error or "Processing failed",
+            headers=headers,
+        )
+
+    # Dropped once the response is delivered, so completed documents do not sit
+    # in memory for JOB_RETENTION seconds
+    release = BackgroundTask(job_manager.release, job.id)
+    if stream:
+        return StreamingResponse(
+            _stream_page_content(job),
+            media_type="application/json",
+            headers=headers,
+            background=release,
+        )
+    return JSONResponse(job.result, headers=headers, background=release)
+
+
+async def _wait_for_content(job: Job) -> None:
+    """Block until the job has page_content to stream or has finished."""
+    while not (job.finished or job.content):
+        await job.wait_for_change(job.version, JOB_MAX_WAIT)
+
+
+async def _stream_page_content(job: Job):
+    """
+    Yield the /process JSON body, writing page_content as the job assembles it.
+
+    A job that fails mid-stream ends the body early, leaving invalid JSON so the
+    client cannot mistake the partial text for a complete document.
+    """
+    yield '{"page_content": "'
+    sent_pieces = sent_chars = 0
+    while True:
+        version = job.version
+        if job.finished:
+            break
+        for piece in job.content[sent_pieces:]:
+            sent_pieces += 1
+            sent_chars += len(piece)
+            yield json.dumps(piece)[1:-1]
+        await job.wait_for_change(version, JOB_MAX_WAIT)
+
+    if job.status != JOB_DONE or job.result is None:
+        logger.error(f"[{job.id}] process_stream_aborted: {job.error}")
+        return
+    # Pieces published before completion are a prefix of the final text
+    yield json.dumps(job.result["page_content"][sent_chars:])[1:-1]
+    yield '", "metadata": ' + json.dumps(job.result["metadata"]) + "}"
+
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    request: Request,
+    content_type: str | None = Header(None),
+    x_filename: str | None = Header(None, alias="X-Filename"),
+    authorization: str | None = Header(None),
+    content_length: int | None = Header(None, alias="Content-Length"),
+):
+    """
+    Queue a document for processing and return immediately.
+
+    Accepts the same body and headers as PUT /process. Returns the job id plus
+    the URLs for polling (GET /jobs/{id}) and server-sent events.
+    """
+    job = await _accept_upload(request, content_type, x_filename, authorization, content_length)
+    return {
+        **job.snapshot(),
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+
+def _get_job(job_id: str, authorization: str | None) -> Job:
+    verify_api_key(authorization)
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(0.0, ge=0.0, description="Long-poll: seconds to wait for a change"),
+    version: int | None = Query(None, ge=0, description="Last version seen by the client"),
+    authorization: str | None = Header(None),
+):
+    """
+    Return job progress, and the final page_content and metadata once done.
+
+    With ``wait`` the request is held (up to JOB_MAX_WAIT seconds) until the job
+    changes past ``version`` (default: the current version) or finishes.
+    """
+    job = _get_job(job_id, authorization)
+    if wait and not job.finished:
+        await job.wait_for_change(
+            job.version if version is None else version, min(wait, JOB_MAX_WAIT)
+        )
+    return {**job.snapshot(), "version": job.version}
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, authorization: str | None = Header(None)):
+    """Stream job snapshots as server-sent events until the job finishes."""
+    job = _get_job(job_id, authorization)
+
+    async def events():
+        version = -1
+        while True:
+            if not await job.wait_for_change(version, JOB_MAX_WAIT):
+                # Keep idle connections alive through proxies
+                yield ": keep-alive\n\n"
+                continue
+            version = job.version
+            payload = json.dumps({**job.snapshot(), "version": version})
+            yield f"event: {job.status}\ndata: {payload}\n\n"
+            if job.finished:
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _run_job(job: Job) -> dict:
+    """Job runner: process the spooled upload through RAGFlow."""
+    start_time = time.monotonic()
+    if job.path is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Upload missing"
+        )
+    tmp_path = job.path
+
+    # Identical bytes already parsed (or being parsed) reuse that RAGFlow document
+    key = cache_key(job.content_sha256, job.mime_type, RAGFLOW_DATASET_ID)
+    result, cache_status = await result_cache.get_or_process(
+        key,
+        lambda: _process_with_ragflow(
+            job.id,
+            tmp_path,
+            job.filename,
+            job.mime_type,
+            report=job.update,
+            on_content=job.append_content,
+        ),
+    )
+    result = {
+        **result,
+        "metadata": {**result["metadata"], "source": job.filename, "cache": cache_status},
+    }
+    elapsed = time.monotonic() - start_time
+    logger.info(
+        f"[{job.id}] process_complete: chunks={result['metadata']['chunk_count']}, "
+        f"cache={cache_status}, elapsed={elapsed:.2f}s"
+    )
+    return result
+
+
+async def _spool_to_tempfile(
+    request: Request, request_id: str, suffix: str
+) -> tuple[str, int, str]:
+    """
+    Stream the request body into a temp file chunk by chunk, hashing it on the way.
+
+    Memory use stays at one network chunk regardless of document size. The
+    partially written file is removed when the body exceeds MAX_FILE_SIZE or is
+    empty.
+
+    Returns (temp file path, size in bytes, hex SHA-256) or raises HTTPException.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    logger.warning(f"[{request_id}] file_too_large: exceeded {MAX_FILE_SIZE} bytes")
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024 * 1024)}MB",
+                    )
+                digest.update(chunk)
+                await f.write(chunk)
+
+        if not size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No file content",
+            )
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return tmp_path, size, digest.hexdigest()
+
+
+UPLOAD_READ_SIZE = 64 * 1024
+# Same escaping httpx applies to multipart header parameters
+_FORM_PARAM_ESCAPES = {'"': "%22", "\\": "\\\\"} | {
+    chr(c): f"%{c:02X}" for c in range(0x20) if c != 0x1B
+}
+
+
+def _multipart_upload(
+    path: str, filename: str, mime_type: str
+) -> tuple[AsyncIterator[bytes], str, int]:
+    """
+    Build a ``multipart/form-data`` body with ``path`` as the ``file`` field.
+
+    Returns (async body iterator, Content-Type header, body length). The file is
+    read in UPLOAD_READ_SIZE chunks through aiofiles, off the event loop.
+    """
+    boundary = secrets.token_hex(16)
+    quoted = "".join(_FORM_PARAM_ESCAPES.get(ch, ch) for ch in filename)
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{quoted}"\r\n'
+        f"Content-Type: {mime_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    async def body() -> AsyncIterator[bytes]:
+        yield head
+        async with aiofiles.open(path, "rb") as f:
+            while chunk := await f.read(UPLOAD_READ_SIZE):
+                yield chunk
+        yield tail
+
+    length = len(head) + os.path.getsize(path) + len(tail)
+    return body(), f"multipart/form-data; boundary={boundary}", length
 
 
 async def _process_with_ragflow(
@@ -245,166 +586,327 @@ async def _process_with_ragflow(
     tmp_path: str,
     filename: str,
     mime_type: str,
+    report: Callable[[str, float | None], Awaitable[None]] | None = None,
+    on_content: Callable[[str], Awaitable[None]] | None = None,
 ) -> dict:
     """
     Internal function to process document through RAGFlow API.
 
-    Handles upload, parsing, polling, and chunk retrieval.
+    Handles upload, parsing, polling, and chunk retrieval. ``report`` is awaited
+    with (stage, progress) as the document moves through the pipeline and
+    ``on_content`` with each piece of page_content as it is assembled.
     """
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        # 1. Upload document to RAGFlow
-        upload_url = f"{RAGFLOW_BASE_URL}/api/v1/datasets/{RAGFLOW_DATASET_ID}/documents"
-
-        logger.info(f"[{request_id}] ragflow_upload: url={upload_url}")
 
-        # Avoid blocking the event loop on file I/O
-        async with aiofiles.open(tmp_path, "rb") as f:
-            file_bytes = await f.read()
+    async def progress(stage: str, value: float | None = None) -> None:
+        if report is not None:
+            await report(stage, value)
+
+    await progress(JOB_UPLOADING)
+    # 1. Upload document to RAGFlow
+    upload_url = f"{RAGFLOW_BASE_URL}/api/v1/datasets/{RAGFLOW_DATASET_ID}/documents"
+
+    logger.info(f"[{request_id}] ragflow_upload: url={upload_url}")
+
+    # Stream the multipart body from the spooled file; reads run in aiofiles'
+    # worker threads, so other jobs keep polling while a large document uploads
+    body, content_type, content_length = _multipart_upload(tmp_path, filename, mime_type)
+    resp = await ragflow_http.request(
+        OP_UPLOAD,
+        "POST",
+        upload_url,
+        content=body,
+        headers={
+            **get_ragflow_headers(),
+            "Content-Type": content_type,
+            "Content-Length": str(content_length),
+        },
+    )
 
-        files = {"file": (filename, file_bytes, mime_type)}
-        resp = await client.post(
-            upload_url,
-            files=files,
-            headers=get_ragflow_headers(),
+    if resp.status_code != 200:
+        logger.error(
+            f"[{request_id}] ragflow_upload_failed: "
+            f"status={resp.status_code}, response={resp.text[:500]}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"RAGFlow upload failed: {resp.status_code}",
         )
 
-        if resp.status_code != 200:
-            logger.error(
-                f"[{request_id}] ragflow_upload_failed: "
-                f"status={resp.status_code}, response={resp.text[:500]}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"RAGFlow upload failed: {resp.status_code}",
-            )
+    upload_data = resp.json()
+    if upload_data.get("code") != 0:
+        error_msg = upload_data.get("message", "Unknown error")
+        logger.error(f"[{request_id}] ragflow_upload_error: {error_msg}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"RAGFlow upload error: {error_msg}",
+        )
 
-        upload_data = resp.json()
-        if upload_data.get("code") != 0:
-            error_msg = upload_data.get("message", "Unknown error")
-            logger.error(f"[{request_id}] ragflow_upload_error: {error_msg}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"RAGFlow upload error: {error_msg}",
-            )
+    # Get document ID from response
+    docs = upload_data.get("data", [])
+    if not docs:
+        logger.error(f"[{request_id}] ragflow_no_doc_id")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="No document ID returned from RAGFlow",
+        )
 
-        # Get document ID from response
-        docs = upload_data.get("data", [])
-        if not docs:
-            logger.error(f"[{request_id}] ragflow_no_doc_id")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="No document ID returned from RAGFlow",
-            )
+    doc_id = docs[0].get("id")
+    logger.info(f"[{request_id}] ragflow_uploaded: doc_id={doc_id}")
+
+    # 2. Start parsing (RAGFlow API v1.x uses /chunks endpoint)
+    parse_url = f"{RAGFLOW_BASE_URL}/api/v1/datasets/{RAGFLOW_DATASET_ID}/chunks"
+    resp = await ragflow_http.request(
+        OP_PARSE,
+        "POST",
+        parse_url,
+        headers={**get_ragflow_headers(), "Content-Type": "application/json"},
+        json={"document_ids": [doc_id]},
+    )
+    if resp.status_code != 200:
+        logger.error(
+            f"[{request_id}] ragflow_parse_failed: "
+            f"status={resp.status_code}, response={resp.text[:500]}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to start RAGFlow parsing: {resp.status_code}",
+        )
 
-        doc_id = docs[0].get("id")
-        logger.info(f"[{request_id}] ragflow_uploaded: doc_id={doc_id}")
+    parse_response = resp.json()
+    if parse_response.get("code") != 0:
+        error_msg = parse_response.get("message", "Unknown error")
+        logger.error(f"[{request_id}] ragflow_parse_error: {error_msg}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"RAGFlow parse start error: {error_msg}",
+        )
+    logger.info(f"[{request_id}] ragflow_parse_started: doc_id={doc_id}")
+    await progress(JOB_PARSING, 0.0)
 
-        # 2. Start parsing (RAGFlow API v1.x uses /chunks endpoint)
-        parse_url = f"{RAGFLOW_BASE_URL}/api/v1/datasets/{RAGFLOW_DATASET_ID}/chunks"
-        resp = await client.post(
-            parse_url,
-            headers={**get_ragflow_headers(), "Content-Type": "application/json"},
-            json={"document_ids": [doc_id]},
+    # 3. Wait for parsing to complete; status checks are batched across jobs
+    try:
+        await poll_coordinator.wait(
+            RAGFLOW_DATASET_ID,
+            doc_id,
+            on_progress=lambda value: progress(JOB_PARSING, value),
         )
-        if resp.status_code != 200:
-            logger.error(
-                f"[{request_id}] ragflow_parse_failed: "
-                f"status={resp.status_code}, response={resp.text[:500]}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Failed to start RAGFlow parsing: {resp.status_code}",
-            )
+    except HTTPException as exc:
+        logger.error(f"[{request_id}] ragflow_parse_failed: doc_id={doc_id}, detail={exc.detail}")
+        raise
+    logger.info(f"[{request_id}] ragflow_parse_complete: doc_id={doc_id}")
+
+    # 4. Get chunks/content, page by page
+    await progress(JOB_FETCHING)
+    page_content, chunk_count, chunk_total, truncated = await _fetch_chunks(
+        request_id, doc_id, on_content
+    )
 
-        parse_response = resp.json()
-        if parse_response.get("code") != 0:
-            error_msg = parse_response.get("message", "Unknown error")
-            logger.error(f"[{request_id}] ragflow_parse_error: {error_msg}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"RAGFlow parse start error: {error_msg}",
-            )
-        logger.info(f"[{request_id}] ragflow_parse_started: doc_id={doc_id}")
+    return {
+        "page_content": page_content,
+        "metadata": {
+            "source": filename,
+            "ragflow_doc_id": doc_id,
+            "ragflow_dataset_id": RAGFLOW_DATASET_ID,
+            "chunk_count": chunk_count,
+            "chunk_total": chunk_total,
+            "truncated": truncated,
+        },
+    }
+
+
+async def _get_chunk_page(request_id: str, chunks_url: str, page: int) -> dict:
+    """Fetch one page of document chunks; raises HTTPException 502 on RAGFlow errors."""
+    resp = await ragflow_http.request(
+        OP_CHUNKS,
+        "GET",
+        chunks_url,
+        params={"page": page, "page_size": CHUNK_PAGE_SIZE},
+        headers=get_ragflow_headers(),
+    )
 
-        # 3. Wait for parsing to complete (non-blocking)
-        status_url = f"{RAGFLOW_BASE_URL}/api/v1/datasets/{RAGFLOW_DATASET_ID}/documents"
+    if resp.status_code != 200:
+        logger.error(
+            f"[{request_id}] ragflow_chunks_failed: "
+            f"page={page}, status={resp.status_code}, response={resp.text[:500]}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to get chunks: {resp.status_code}",
+        )
 
-        for attempt in range(MAX_POLL_ATTEMPTS):
-            resp = await client.get(
-                status_url,
-                params={"id": doc_id},
-                headers=get_ragflow_headers(),
-            )
+    chunks_data = resp.json()
+    if chunks_data.get("code", 0) != 0:
+        error_msg = chunks_data.get("message", "Unknown error")
+        logger.error(f"[{request_id}] ragflow_chunks_error: page={page}, error={error_msg}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"RAGFlow chunks error: {error_msg}",
+        )
+    return chunks_data.get("data") or {}
 
-            if resp.status_code == 200:
-                data = resp.json()
-                docs_data = data.get("data", {}).get("docs", [])
-                if docs_data:
-                    doc = docs_data[0]
-                    run_status = doc.get("run", "")
-                    progress = doc.get("progress", 0)
-
-                    if run_status == "DONE" or progress >= 1.0:
-                        logger.info(
-                            f"[{request_id}] ragflow_parse_complete: "
-                            f"doc_id={doc_id}, attempts={attempt + 1}"
-                        )
-                        break
 
-                    if run_status in ("FAIL", "CANCEL"):
-                        error_msg = doc.get("progress_msg", "Unknown error")
-                        logger.error(
-                            f"[{request_id}] ragflow_parse_failed: "
-                            f"status={run_status}, msg={error_msg}"
-                        )
-                        raise HTTPException(
-                            status_code=status.HTTP_502_BAD_GATEWAY,
-                            detail=f"RAGFlow parsing failed: {error_msg}",
-                        )
+async def _fetch_chunks(
+    request_id: str,
+    doc_id: str,
+    on_content: Callable[[str], Awaitable[None]] | None = None,
+) -> tuple[str, int, int, bool]:
+    """
+    Retrieve every chunk page of ``doc_id`` and join the chunk texts in order.
+
+    The first page reports the chunk total; the remaining pages are requested
+    with up to CHUNK_FETCH_CONCURRENCY in flight and consumed strictly in page
+    order, so only that many pages are ever buffered. Assembly stops before the
+    first chunk that would push page_content past CHUNK_MAX_BYTES.
 
-            # Non-blocking sleep
-            await asyncio.sleep(POLL_INTERVAL)
+    Returns (page_content, chunks included, chunks reported by RAGFlow, truncated).
+    """
+    chunks_url = (
+        f"{RAGFLOW_BASE_URL}/api/v1/datasets/{RAGFLOW_DATASET_ID}/documents/{doc_id}/chunks"
+    )
+    parts: list[str] = []
+    size = 0
+    included = 0
+    truncated = False
+
+    async def consume(chunks: list[dict]) -> bool:
+        """Append a page of chunks; returns False once the byte cap is reached."""
+        nonlocal size, included, truncated
+        pieces = []
+        for chunk in chunks:
+            text = ("\n\n" if included else "") + (chunk.get("content") or "")
+            encoded = len(text.encode("utf-8"))
+            if CHUNK_MAX_BYTES and size + encoded > CHUNK_MAX_BYTES:
+                truncated = True
+                break
+            pieces.append(text)
+            size += encoded
+            included += 1
+        if pieces:
+            piece = "".join(pieces)
+            parts.append(piece)
+            if on_content is not None:
+                await on_content(piece)
+        return not truncated
+
+    first = await _get_chunk_page(request_id, chunks_url, 1)
+    chunks = first.get("chunks") or []
+    total = first.get("total")
+    if total is None:
+        total = (first.get("doc") or {}).get("chunk_count")
+
+    if await consume(chunks) and chunks:
+        if total is None:
+            # Older RAGFlow without a total: walk pages until a short one
+            page = 2
+            while len(chunks) >= CHUNK_PAGE_SIZE:
+                chunks = (await _get_chunk_page(request_id, chunks_url, page)).get("chunks") or []
+                if not await consume(chunks):
+                    break
+                page += 1
         else:
-            logger.error(
-                f"[{request_id}] ragflow_parse_timeout: "
-                f"doc_id={doc_id}, attempts={MAX_POLL_ATTEMPTS}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                detail="RAGFlow parsing timeout",
-            )
+            # RAGFlow may cap page_size below what was asked for
+            per_page = len(chunks) if len(chunks) < min(CHUNK_PAGE_SIZE, total) else CHUNK_PAGE_SIZE
+            pages = math.ceil(total / per_page)
+            pending: deque[asyncio.Task] = deque()
+            next_page = 2
+            try:
+                while pending or next_page <= pages:
+                    while next_page <= pages and len(pending) < CHUNK_FETCH_CONCURRENCY:
+                        pending.append(
+                            asyncio.create_task(_get_chunk_page(request_id, chunks_url, next_page))
+                        )
+                        next_page += 1
+                    data = await pending.popleft()
+                    if not await consume(data.get("chunks") or []):
+                        break
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
 
-        # 4. Get chunks/content
-        chunks_url = (
-            f"{RAGFLOW_BASE_URL}/api/v1/datasets/{RAGFLOW_DATASET_ID}/documents/{doc_id}/chunks"
+    chunk_total = included if total is None else total
+    if truncated:
+        logger.warning(
+            f"[{request_id}] ragflow_chunks_truncated: doc_id={doc_id}, "
+            f"included={included}, total={chunk_total}, max_bytes={CHUNK_MAX_BYTES}"
+        )
+    elif included < chunk_total:
+        logger.warning(
+            f"[{request_id}] ragflow_chunks_incomplete: doc_id={doc_id}, "
+            f"included={included}, total={chunk_total}"
         )
-        resp = await client.get(chunks_url, headers=get_ragflow_headers())
+    return "".join(parts), included, chunk_total, truncated
 
-        if resp.status_code != 200:
-            logger.error(
-                f"[{request_id}] ragflow_chunks_failed: "
-                f"status={resp.status_code}, response={resp.text[:500]}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Failed to get chunks: {resp.status_code}",
-            )
 
-        chunks_data = resp.json()
-        chunks = chunks_data.get("data", {}).get("chunks", [])
+async def _list_documents(status_url: str, params: dict) -> dict[str, dict]:
+    """Return the documents of one RAGFlow list request keyed by id ({} on HTTP errors)."""
+    resp = await ragflow_http.request(
+        OP_POLL, "GET", status_url, params=params, headers=get_ragflow_headers()
+    )
+    if resp.status_code != 200:
+        logger.warning(f"ragflow_status_failed: status={resp.status_code}, params={params}")
+        return {}
+    docs = resp.json().get("data", {}).get("docs", [])
+    return {doc["id"]: doc for doc in docs if doc.get("id")}
+
 
-        # Combine chunks into page_content
-        page_content = "\n\n".join(chunk.get("content", "") for chunk in chunks)
+async def _fetch_document_statuses(dataset_id: str, doc_ids: list[str]) -> dict[str, dict]:
+    """
+    Fetch RAGFlow document records for ``doc_ids`` with as few requests as possible.
 
-        return {
-            "page_content": page_content,
-            "metadata": {
-                "source": filename,
-                "ragflow_doc_id": doc_id,
-                "ragflow_dataset_id": RAGFLOW_DATASET_ID,
-                "chunk_count": len(chunks),
+    The list API filters by a single ``id``, so several pending documents are
+    read from the newest page of the dataset listing in one request; only ids
+    missing from that page (buried by newer uploads) are looked up one by one.
+    """
+    status_url = f"{RAGFLOW_BASE_URL}/api/v1/datasets/{dataset_id}/documents"
+    found: dict[str, dict] = {}
+    if len(doc_ids) > 1:
+        found = await _list_documents(
+            status_url,
+            {
+                "page": 1,
+                "page_size": max(POLL_BATCH_SIZE, len(doc_ids)),
+                "orderby": "create_time",
+                "desc": "true",
             },
-        }
+        )
+    missing = [doc_id for doc_id in doc_ids if doc_id not in found]
+    for docs in await asyncio.gather(
+        *(_list_documents(status_url, {"id": doc_id}) for doc_id in missing)
+    ):
+        found.update(docs)
+    return {doc_id: found[doc_id] for doc_id in doc_ids if doc_id in found}
+
+
+result_cache = ResultCache(CACHE_DIR, CACHE_MAX_BYTES)
+ragflow_http = RagflowHTTP(
+    max_connections=RAGFLOW_MAX_CONNECTIONS,
+    max_keepalive=RAGFLOW_MAX_KEEPALIVE,
+    keepalive_expiry=RAGFLOW_KEEPALIVE_EXPIRY,
+    http2=RAGFLOW_HTTP2,
+    connect_timeout=RAGFLOW_CONNECT_TIMEOUT,
+    pool_timeout=RAGFLOW_POOL_TIMEOUT,
+    operation_timeouts={
+        OP_UPLOAD: RAGFLOW_UPLOAD_TIMEOUT,
+        OP_PARSE: RAGFLOW_POLL_TIMEOUT,
+        OP_POLL: RAGFLOW_POLL_TIMEOUT,
+        OP_CHUNKS: RAGFLOW_CHUNKS_TIMEOUT,
+    },
+)
+poll_coordinator = PollCoordinator(
+    _fetch_document_statuses,
+    min_interval=POLL_MIN_INTERVAL,
+    max_interval=POLL_MAX_INTERVAL,
+    backoff=POLL_BACKOFF,
+    timeout=PARSE_TIMEOUT,
+)
+job_manager = JobManager(
+    _run_job,
+    workers=JOB_WORKERS,
+    queue_size=JOB_QUEUE_SIZE,
+    timeout=PROCESS_TIMEOUT,
+    retention=JOB_RETENTION,
+)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,305 @@
+"""
+Shared parse-status polling for the RAGFlow adapter.
+
+Previously every job polled ``GET /datasets/{id}/documents?id=...`` on its own
+fixed interval, so N concurrent parses meant N status requests per interval.
+Jobs now register their document with the ``PollCoordinator`` and await a
+future. One background task checks all pending documents of a dataset with a
+single batched request whenever any of them is due, and schedules each
+document's next check from its reported progress: fresh documents are checked
+quickly, long-running parses progressively less often.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+RUN_DONE = "DONE"
+RUN_FAILED = frozenset({"FAIL", "CANCEL"})
+
+StatusFetcher = Callable[[str, list[str]], Awaitable[dict[str, dict[str, Any]]]]
+
+
+def next_poll_interval(
+    interval: float,
+    progress: float,
+    previous_progress: float,
+    elapsed: float,
+    min_interval: float,
+    max_interval: float,
+    backoff: float,
+) -> float:
+    """
+    Pick the delay before a document's next status check.
+
+    When progress advanced, check again after half the estimated remaining
+    time at the observed rate; otherwise back off geometrically. The result is
+    clamped to [min_interval, max_interval].
+
+    Args:
+        interval: Delay used before the check that just happened.
+        progress: Progress reported by that check (0..1).
+        previous_progress: Progress reported by the previous check.
+        elapsed: Seconds between the previous and the current check.
+        min_interval: Lower bound.
+        max_interval: Upper bound.
+        backoff: Growth factor while progress is stalled.
+    """
+    if progress > previous_progress and elapsed > 0:
+        rate = (progress - previous_progress) / elapsed
+        candidate = (1.0 - progress) / rate / 2
+    else:
+        candidate = interval * backoff
+    return min(max_interval, max(min_interval, candidate))
+
+
+@dataclass
+class _Watch:
+    dataset_id: str
+    doc_id: str
+    future: asyncio.Future[dict[str, Any]]
+    on_progress: Callable[[float], Awaitable[None]] | None
+    deadline: float
+    interval: float
+    due: float
+    progress: float = 0.0
+    progress_at: float = 0.0
+    checks: int = 0
+
+
+class PollCoordinator:
+    """Batches parse-status checks for all pending documents per dataset."""
+
+    def __init__(
+        self,
+        fetch: StatusFetcher,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        timeout: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the coordinator.
+
+        Args:
+            fetch: Coroutine function ``(dataset_id, doc_ids)`` returning the RAGFlow
+                document records found, keyed by id.
+            min_interval: Delay before the first check and lower bound afterwards.
+            max_interval: Upper bound on the delay between checks of one document.
+            backoff: Growth factor while a document reports no progress.
+            timeout: Seconds a document may stay unparsed before waiters get a 504.
+            clock: Monotonic time source.
+        """
+        self._fetch = fetch
+        self.min_interval = max(0.0, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.backoff = max(1.0, backoff)
+        self.timeout = timeout
+        self._clock = clock
+        self._watches: dict[int, _Watch] = {}
+        self._ids = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._requests = 0
+        self._checks = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the polling task is started."""
+        return self._task is not None
+
+    async def start(self) -> None:
+        """Start the polling task (idempotent)."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="ragflow-poll-coordinator")
+            logger.info(
+                f"poll_coordinator_started: min_interval={self.min_interval}, "
+                f"max_interval={self.max_interval}, timeout={self.timeout}"
+            )
+
+    async def stop(self) -> None:
+        """Stop polling and fail documents still being waited on."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        for watch in self._watches.values():
+            _settle(
+                watch,
+                exc=HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Adapter shutting down",
+                ),
+            )
+
+    async def wait(
+        self,
+        dataset_id: str,
+        doc_id: str,
+        on_progress: Callable[[float], Awaitable[None]] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Wait until RAGFlow finishes parsing ``doc_id``.
+
+        ``on_progress`` is awaited with the reported progress whenever it changes.
+
+        Returns the final RAGFlow document record. Raises HTTPException 502 when
+        parsing fails or is cancelled, 504 after ``timeout`` and 503 when the
+        coordinator is not running.
+        """
+        if self._task is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Status poller is not running",
+            )
+        now = self._clock()
+        watch = _Watch(
+            dataset_id=dataset_id,
+            doc_id=doc_id,
+            future=asyncio.get_running_loop().create_future(),
+            on_progress=on_progress,
+            deadline=now + self.timeout,
+            interval=self.min_interval,
+            due=now + self.min_interval,
+            progress_at=now,
+        )
+        key = next(self._ids)
+        self._watches[key] = watch
+        self._wakeup.set()
+        try:
+            return await watch.future
+        finally:
+            del self._watches[key]
+
+    def stats(self) -> dict[str, int]:
+        """Return pending documents, batched status requests and document checks."""
+        return {
+            "pending": len(self._watches),
+            "requests": self._requests,
+            "document_checks": self._checks,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+            due = sorted({w.dataset_id for w in self._watches.values() if w.due <= now})
+            if due:
+                results = await asyncio.gather(
+                    *(self._poll_dataset(dataset_id) for dataset_id in due),
+                    return_exceptions=True,
+                )
+                for dataset_id, result in zip(due, results, strict=True):
+                    if isinstance(result, Exception):
+                        # Fail this dataset's waiters instead of leaving them re-polled
+                        # (or, with the task dead, hanging) forever
+                        logger.error(
+                            f"ragflow_status_poll_crashed: dataset={dataset_id}, error={result!r}"
+                        )
+                        self._fail_dataset(dataset_id, result)
+                continue
+            next_due = min((w.due for w in self._watches.values()), default=None)
+            delay = None if next_due is None else max(0.0, next_due - now)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+
+    async def _poll_dataset(self, dataset_id: str) -> None:
+        # Every pending document of the dataset rides along, due or not: the
+        # request is made anyway and fresher data only improves scheduling.
+        watches = [
+            w for w in self._watches.values() if w.dataset_id == dataset_id and not w.future.done()
+        ]
+        doc_ids = sorted({w.doc_id for w in watches})
+        self._requests += 1
+        self._checks += len(doc_ids)
+        try:
+            docs = await self._fetch(dataset_id, doc_ids)
+        except Exception as exc:  # noqa: BLE001 - transient errors are retried until the deadline
+            logger.warning(f"ragflow_status_poll_failed: dataset={dataset_id}, error={exc}")
+            docs = {}
+
+        now = self._clock()
+        for watch in watches:
+            doc = docs.get(watch.doc_id)
+            if doc is not None:
+                try:
+                    await self._apply(watch, doc, now)
+                except Exception as exc:  # noqa: BLE001 - one bad record fails only its waiter
+                    logger.error(
+                        f"ragflow_status_apply_failed: doc_id={watch.doc_id}, error={exc!r}"
+                    )
+                    _settle(watch, exc=exc)
+            if watch.future.done():
+                continue
+            if now >= watch.deadline:
+                logger.error(f"ragflow_parse_timeout: doc_id={watch.doc_id}, checks={watch.checks}")
+                _settle(
+                    watch,
+                    exc=HTTPException(
+                        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                        detail="RAGFlow parsing timeout",
+                    ),
+                )
+                continue
+            watch.due = min(now + watch.interval, watch.deadline)
+
+    def _fail_dataset(self, dataset_id: str, exc: Exception) -> None:
+        for watch in list(self._watches.values()):
+            if watch.dataset_id == dataset_id:
+                _settle(watch, exc=exc)
+
+    async def _apply(self, watch: _Watch, doc: dict[str, Any], now: float) -> None:
+        watch.checks += 1
+        run_status = doc.get("run", "")
+        progress = float(doc.get("progress") or 0)
+        if run_status == RUN_DONE or progress >= 1.0:
+            _settle(watch, result=doc)
+            return
+        if run_status in RUN_FAILED:
+            error_msg = doc.get("progress_msg", "Unknown error")
+            _settle(
+                watch,
+                exc=HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"RAGFlow parsing failed: {error_msg}",
+                ),
+            )
+            return
+
+        watch.interval = next_poll_interval(
+            watch.interval,
+            progress,
+            watch.progress,
+            now - watch.progress_at,
+            self.min_interval,
+            self.max_interval,
+            self.backoff,
+        )
+        if progress > watch.progress:
+            watch.progress, watch.progress_at = progress, now
+            if watch.on_progress is not None:
+                await watch.on_progress(progress)
+
+
+def _settle(
+    watch: _Watch, result: dict[str, Any] | None = None, exc: BaseException | None = None
+) -> None:
+    if watch.future.done():
+        return
+    if exc is not None:
+        watch.future.set_exception(exc)
+    else:
+        watch.future.set_result(result or {})
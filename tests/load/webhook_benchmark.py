@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the webhook receiver / handler endpoints.
+
+Replays synthetic Alertmanager payloads (built with
+``WebhookClient._build_alert_payload`` from
+``docs/examples/webhook-client-python.py``) against ``/webhook/*`` and prints a
+JSON report with p50/p95/p99 latency, RPS, status codes and per-stage timings
+(signature, validation, persistence, dispatch).
+
+By default the target app is loaded in-process and served by a threaded
+werkzeug server, with local stub servers standing in for Discord, Slack and
+Telegram; rate limiting and deduplication are disabled so every request does
+the full amount of work. ``--url`` benchmarks an already running instance
+(e.g. the uvicorn entry point) instead; stage timings are then unavailable.
+
+Usage:
+    python tests/load/webhook_benchmark.py --target handler --requests 2000 \
+      --concurrency 32 --alerts-per-payload 5 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[2]
+RECEIVER_DIR = ROOT / "conf" / "webhook-receiver"
+CLIENT_PATH = ROOT / "docs" / "examples" / "webhook-client-python.py"
+
+ENDPOINTS = ("generic", "critical", "warning", "gpu", "ai", "database")
+STAGES = ("signature", "validation", "persistence", "dispatch")
+CHANNELS = ("discord", "slack", "telegram")
+DEFAULT_SECRET = "benchmark-secret-0123456789"  # noqa: S105  # pragma: allowlist secret
+
+_SEVERITY = {"critical": "critical", "warning": "warning"}
+
+
+@dataclass
+class BenchmarkConfig:
+    """Benchmark parameters."""
+
+    target: str = "receiver"
+    url: str | None = None
+    endpoints: tuple[str, ...] = ENDPOINTS
+    requests: int = 500
+    concurrency: int = 16
+    alerts_per_payload: int = 1
+    annotation_bytes: int = 0
+    secret: str = DEFAULT_SECRET
+    settle_timeout: float = 10.0
+    timeout: float = 30.0
+
+
+@dataclass
+class StageTimer:
+    """Thread-safe collector of per-stage durations."""
+
+    samples: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def wrap(self, owner: Any, attr: str, stage: str) -> None:
+        """Replace ``owner.attr`` with a wrapper recording its duration under ``stage``."""
+        original = getattr(owner, attr)
+
+        @wraps(original)
+        def timed(*args: Any, **kwargs: Any):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+
+        setattr(owner, attr, timed)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return count and latency percentiles (ms) per stage."""
+        with self._lock:
+            return {
+                stage: _distribution(self.samples[stage])
+                for stage in STAGES
+                if stage in self.samples
+            }
+
+
+class _Unlimited:
+    """Rate limit backend that always allows (benchmarks measure the full path)."""
+
+    def hit(self, key: str, limit: int, period: float) -> bool:
+        return True
+
+
+class StubChannelServer:
+    """Local HTTP server accepting notification POSTs; counts them per channel."""
+
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+        lock = threading.Lock()
+        counts = self.counts
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802 - http.server API
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                channel = self.path.strip("/").split("/", 1)[0]
+                with lock:
+                    counts[channel] += 1
+                body = b'{"ok":true}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> StubChannelServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _distribution(values: list[float]) -> dict[str, float]:
+    """Summarize durations in seconds as milliseconds."""
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": round(_percentile(ordered, 50) * 1000, 3),
+        "p95": round(_percentile(ordered, 95) * 1000, 3),
+        "p99": round(_percentile(ordered, 99) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+def load_webhook_client_class():
+    """Load ``WebhookClient`` from the dashed example file."""
+    spec = importlib.util.spec_from_file_location("webhook_client_example", CLIENT_PATH)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load webhook client from {CLIENT_PATH}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.WebhookClient
+
+
+def build_requests(config: BenchmarkConfig) -> list[tuple[str, bytes, dict[str, str]]]:
+    """Pre-build signed request bodies so client overhead stays out of the measurement."""
+    client = load_webhook_client_class()("http://unused", config.secret)
+    prepared = []
+    description = "x" * config.annotation_bytes
+    for i in range(config.requests):
+        endpoint = config.endpoints[i % len(config.endpoints)]
+        payload = client._build_alert_payload(
+            alert_name=f"Benchmark{i}",
+            severity=_SEVERITY.get(endpoint, "info"),
+            summary=f"Benchmark alert {i}",
+            description=description,
+            labels={"service": "benchmark", "instance": f"bench-{i}-0"},
+        )
+        template = payload["alerts"][0]
+        payload["alerts"] = [
+            {**template, "labels": {**template["labels"], "instance": f"bench-{i}-{n}"}}
+            for n in range(config.alerts_per_payload)
+        ]
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        path = "/webhook" if endpoint == "generic" else f"/webhook/{endpoint}"
+        headers = {
+            "Content-Type": "application/json",
+            "X-Signature": client._generate_signature(body),
+        }
+        prepared.append((path, body, headers))
+    return prepared
+
+
+@contextmanager
+def _environment(values: dict[str, str]) -> Iterator[None]:
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@contextmanager
+def _in_process_target(config: BenchmarkConfig, stubs: StubChannelServer, timer: StageTimer):
+    """Load the target module with benchmark settings and serve it on a random port."""
+    from werkzeug.serving import make_server
+
+    name = "webhook_handler" if config.target == "handler" else "webhook_receiver"
+    previous = sys.modules.get(name)
+    with tempfile.TemporaryDirectory(prefix="webhook-bench-") as workdir:
+        env = {
+            "ALERTMANAGER_WEBHOOK_SECRET": config.secret,
+            "LOG_DIR": workdir,
+            "ALERTS_DIR": workdir,
+            "NOTIFICATION_QUEUE_PATH": str(Path(workdir) / "notification-queue.db"),
+            "RECOVERY_DIR": str(Path(workdir) / "recovery"),
+            "ALERT_DEDUP_TTL": "0",
+            "RATE_LIMIT_STORAGE": "memory://",
+            "DISCORD_WEBHOOK_URL": f"{stubs.base_url}/discord",
+            "SLACK_WEBHOOK_URL": f"{stubs.base_url}/slack",
+            "TELEGRAM_API_URL": f"{stubs.base_url}/telegram",
+            "TELEGRAM_BOT_TOKEN": "benchmark",
+            "TELEGRAM_CHAT_ID": "1",
+        }
+        with _environment(env):
+            spec = importlib.util.spec_from_file_location(name, RECEIVER_DIR / f"{name}.py")
+            if spec is None or spec.loader is None:
+                raise ImportError(f"Cannot load {name}")
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+
+            module.limiter.backend = _Unlimited()
+            timer.wrap(module, "verify_signature", "signature")
+            if config.target == "handler":
+                timer.wrap(module, "AlertPayload", "validation")
+                if module.delivery_worker is not None:
+                    timer.wrap(module.delivery_worker.queue, "enqueue", "persistence")
+                timer.wrap(module.alert_processor, "process_alerts", "dispatch")
+            else:
+                # The receiver validates raw bytes with AlertPayload.model_validate_json;
+                # time it on a per-run subclass so the shared model class stays untouched
+                module.AlertPayload = type("AlertPayload", (module.AlertPayload,), {})
+                timer.wrap(module.AlertPayload, "model_validate_json", "validation")
+                timer.wrap(module, "save_alert_to_file", "persistence")
+                timer.wrap(module, "process_alert", "dispatch")
+
+            server = make_server("127.0.0.1", 0, module.app, threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                yield module, f"http://127.0.0.1:{server.server_port}"
+                _settle(module, config.settle_timeout)
+            finally:
+                server.shutdown()
+                _close(module)
+                if previous is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = previous
+
+
+def _settle(module: Any, timeout: float) -> None:
+    """Wait for background work (journal, queued notifications) to finish."""
+    deadline = time.monotonic() + timeout
+    journal = getattr(module, "alert_journal", None)
+    if journal is not None:
+        journal.flush(timeout=timeout)
+    worker = getattr(module, "delivery_worker", None)
+    while worker is not None and time.monotonic() < deadline:
+        if worker.queue.stats()["depth"] == 0:
+            break
+        time.sleep(0.05)
+
+
+def _close(module: Any) -> None:
+    worker = getattr(module, "delivery_worker", None)
+    if worker is not None:
+        worker.stop()
+        worker.queue.close()
+    dispatcher = getattr(module, "notification_dispatcher", None)
+    if dispatcher is not None:
+        dispatcher.shutdown(wait=True)
+    for attr in ("alert_journal", "alert_store"):
+        resource = getattr(module, attr, None)
+        if resource is not None:
+            resource.close()
+
+
+def _fire(
+    base_url: str, prepared: list[tuple[str, bytes, dict[str, str]]], config: BenchmarkConfig
+) -> tuple[list[float], Counter[str], float]:
+    local = threading.local()
+
+    def send(item: tuple[str, bytes, dict[str, str]]) -> tuple[float, str]:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        path, body, headers = item
+        start = time.perf_counter()
+        try:
+            status = str(
+                session.post(
+                    base_url + path, data=body, headers=headers, timeout=config.timeout
+                ).status_code
+            )
+        except requests.RequestException as exc:
+            status = type(exc).__name__
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.concurrency) as pool:
+        results = list(pool.map(send, prepared))
+    elapsed = time.perf_counter() - started
+    return [latency for latency, _ in results], Counter(status for _, status in results), elapsed
+
+
+def run_benchmark(config: BenchmarkConfig) -> dict[str, Any]:
+    """
+    Run one benchmark and return the JSON-serializable report.
+
+    Args:
+        config: Benchmark parameters.
+
+    Returns:
+        Report with latency percentiles, RPS, status codes, stage timings and
+        notification counts seen by the stub channels.
+    """
+    prepared = build_requests(config)
+    timer = StageTimer()
+    with StubChannelServer() as stubs:
+        if config.url:
+            latencies, statuses, elapsed = _fire(config.url.rstrip("/"), prepared, config)
+        else:
+            with _in_process_target(config, stubs, timer) as (_module, base_url):
+                latencies, statuses, elapsed = _fire(base_url, prepared, config)
+        notifications = {channel: stubs.counts.get(channel, 0) for channel in CHANNELS}
+
+    sizes = [len(body) for _, body, _ in prepared]
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in asdict(config).items() if k != "secret"},
+        "duration_seconds": round(elapsed, 3),
+        "rps": round(len(prepared) / elapsed, 1) if elapsed else 0.0,
+        "payload_bytes": {"min": min(sizes), "max": max(sizes), "mean": sum(sizes) // len(sizes)},
+        "status_codes": dict(statuses),
+        "errors": sum(n for code, n in statuses.items() if not code.startswith("2")),
+        "latency_ms": _distribution(latencies),
+        "stages_ms": timer.summary(),
+        "notifications": notifications,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark ERNI-KI webhook endpoints")
+    parser.add_argument("--target", choices=("receiver", "handler"), default="receiver")
+    parser.add_argument("--url", help="Benchmark a running instance instead of in-process")
+    parser.add_argument("--endpoint", action="append", choices=ENDPOINTS, dest="endpoints")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--alerts-per-payload", type=int, default=1)
+    parser.add_argument("--annotation-bytes", type=int, default=0)
+    parser.add_argument(
+        "--secret", default=os.getenv("ALERTMANAGER_WEBHOOK_SECRET", DEFAULT_SECRET)
+    )
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(
+        target=args.target,
+        url=args.url,
+        endpoints=tuple(args.endpoints or ENDPOINTS),
+        requests=args.requests,
+        concurrency=args.concurrency,
+        alerts_per_payload=args.alerts_per_payload,
+        annotation_bytes=args.annotation_bytes,
+        secret=args.secret,
+    )
+    report = json.dumps(run_benchmark(config), indent=2)
+    if args.output:
+        args.output.write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+    return 0 if json.loads(report)["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -38,13 +38,31 @@ def stub_prometheus():
         def observe(self, *_args, **_kwargs):
             return None
 
+        def inc(self, *_args, **_kwargs):
+            return None
+
+        def remove(self, *_args, **_kwargs):
+            return None
+
+        def add_metric(self, *_args, **_kwargs):
+            return None
+
+        def register(self, *_args, **_kwargs):
+            return None
+
     sys.modules["prometheus_client"] = types.SimpleNamespace(
         Gauge=DummyGauge,
+        Counter=DummyGauge,
         start_http_server=lambda *a, **k: None,
         Histogram=DummyGauge,
         CollectorRegistry=DummyGauge,
         generate_latest=lambda *_: b"",
         CONTENT_TYPE_LATEST="text/plain",
+        REGISTRY=DummyGauge(),
+    )
+    sys.modules["prometheus_client.core"] = types.SimpleNamespace(
+        GaugeMetricFamily=DummyGauge,
+        CounterMetricFamily=DummyGauge,
     )
 
 
@@ -223,8 +241,7 @@ class TestOllamaExporter(unittest.TestCase):
                 count = 0
             self.assertEqual(count, expected)
 
-    @patch("requests.get")
-    def test_fetch_json_returns_dict(self, mock_get):
+    def test_fetch_json_returns_dict(self):
         """fetch_json returns dict when JSON is a mapping"""
         stub_prometheus()
         app = load_module("ollama_exporter_app", ROOT / "ops" / "ollama-exporter" / "app.py")
@@ -232,13 +249,11 @@ class TestOllamaExporter(unittest.TestCase):
         mock_resp = MagicMock()
         mock_resp.raise_for_status = MagicMock()
         mock_resp.json.return_value = {"ok": True}
-        mock_get.return_value = mock_resp
-
-        result = app.fetch_json("/api/version")
+        with patch.object(app.SESSION, "get", return_value=mock_resp):
+            result = app.fetch_json("/api/version")
         self.assertEqual(result, {"ok": True})
 
-    @patch("requests.get")
-    def test_fetch_json_returns_none_for_non_dict(self, mock_get):
+    def test_fetch_json_returns_none_for_non_dict(self):
         """fetch_json returns None when JSON is not a mapping"""
         stub_prometheus()
         app = load_module("ollama_exporter_app", ROOT / "ops" / "ollama-exporter" / "app.py")
@@ -246,9 +261,8 @@ class TestOllamaExporter(unittest.TestCase):
         mock_resp = MagicMock()
         mock_resp.raise_for_status = MagicMock()
         mock_resp.json.return_value = ["not-a-dict"]
-        mock_get.return_value = mock_resp
-
-        result = app.fetch_json("/api/version")
+        with patch.object(app.SESSION, "get", return_value=mock_resp):
+            result = app.fetch_json("/api/version")
         self.assertIsNone(result)
 
 
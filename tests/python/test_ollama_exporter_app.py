@@ -4,11 +4,18 @@
 from __future__ import annotations
 
 import importlib.util
+import json
 import sys
+import threading
+import time
 import types
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[2]
 
 
@@ -25,53 +32,392 @@ def load_app():
     return module
 
 
-def test_fetch_json_success_sets_latency(monkeypatch):
+def ps_model(name, size=8, size_vram=6, **extra):
+    return {
+        "name": name,
+        "size": size,
+        "size_vram": size_vram,
+        "expires_at": "2026-01-01T00:05:00.123456789Z",
+        "details": {"parameter_size": "8.0B"},
+        **extra,
+    }
+
+
+class FakeFamily:
+    def __init__(self, name, documentation, labels=None):
+        self.name = name
+        self.samples = {}
+
+    def add_metric(self, labels, value):
+        self.samples[tuple(labels)] = value
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def responses(version="0.5.0", tags=("llama3:8b", "qwen:7b"), running=("llama3:8b",)):
+    return {
+        "/api/version": {"version": version},
+        "/api/tags": {"models": [{"name": name} for name in tags]},
+        "/api/ps": {"models": [ps_model(name) for name in running]},
+    }
+
+
+def render(monkeypatch, app, collector):
+    monkeypatch.setattr(app, "GaugeMetricFamily", FakeFamily)
+    monkeypatch.setattr(app, "CounterMetricFamily", FakeFamily)
+    return {family.name: family.samples for family in collector.collect()}
+
+
+def test_fetch_json_success_observes_endpoint_latency(monkeypatch):
     app = load_app()
 
     resp = MagicMock()
     resp.raise_for_status = MagicMock()
     resp.json.return_value = {"version": "1.0.0"}
-    lat_mock = MagicMock()
-    monkeypatch.setattr(app, "OLLAMA_REQUEST_LATENCY", lat_mock)
+    histogram = MagicMock()
+    monkeypatch.setattr(app, "OLLAMA_REQUEST_DURATION", histogram)
 
-    with patch.object(app.requests, "get", return_value=resp):
+    with patch.object(app.SESSION, "get", return_value=resp) as get:
         data = app.fetch_json("/api/version")
 
     assert data == {"version": "1.0.0"}
-    lat_mock.set.assert_called()
+    get.assert_called_once_with(f"{app.OLLAMA_URL}/api/version", timeout=app.REQUEST_TIMEOUT)
+    histogram.labels.assert_called_once_with(endpoint="/api/version")
+    histogram.labels.return_value.observe.assert_called_once()
 
 
 def test_fetch_json_timeout_returns_none(monkeypatch):
     app = load_app()
 
-    monkeypatch.setattr(app, "OLLAMA_REQUEST_LATENCY", MagicMock())
-    with patch.object(app.requests, "get", side_effect=app.requests.Timeout):
+    monkeypatch.setattr(app, "OLLAMA_REQUEST_DURATION", MagicMock())
+    with patch.object(app.SESSION, "get", side_effect=app.requests.Timeout):
         assert app.fetch_json("/api/version") is None
 
 
-def test_poll_forever_updates_metrics(monkeypatch):
+def test_session_pools_connections_for_endpoints_and_benchmark():
+    app = load_app()
+
+    adapter = app.SESSION.get_adapter("http://ollama:11434")
+
+    assert adapter._pool_maxsize == len(app.ENDPOINTS) + 1
+
+
+def test_fetch_all_requests_endpoints_concurrently(monkeypatch):
+    app = load_app()
+    barrier = threading.Barrier(len(app.ENDPOINTS), timeout=2)
+
+    def fake_fetch(path):
+        barrier.wait()
+        return {"path": path}
+
+    monkeypatch.setattr(app, "fetch_json", fake_fetch)
+    with ThreadPoolExecutor(max_workers=len(app.ENDPOINTS)) as pool:
+        results = app.fetch_all(pool)
+
+    assert results == {path: {"path": path} for path in app.ENDPOINTS}
+
+
+def test_parse_helpers():
+    app = load_app()
+
+    assert app.parse_parameter_size("8.0B") == 8e9
+    assert app.parse_parameter_size("137M") == 137e6
+    assert app.parse_parameter_size("unknown") is None
+    assert app.parse_expiry("2026-01-01T00:00:00.123456789Z") == 1767225600.123456
+    assert app.parse_expiry("2026-01-01T01:00:00+01:00") == 1767225600
+    assert app.parse_expiry("garbage") is None
+
+
+def test_collector_renders_loaded_models(monkeypatch):
+    app = load_app()
+    monkeypatch.setattr(app, "fetch_json", responses().get)
+    collector = app.OllamaCollector(ttl=0)
+
+    metrics = render(monkeypatch, app, collector)
+
+    assert metrics["ollama_up"] == {(): 1}
+    assert metrics["ollama_version_info"] == {("0.5.0",): 1}
+    assert metrics["ollama_installed_models"] == {(): 2}
+    assert metrics["ollama_model_loaded"] == {("llama3:8b",): 1, ("qwen:7b",): 0}
+    assert metrics["ollama_model_memory_bytes"] == {
+        ("llama3:8b", "vram"): 6,
+        ("llama3:8b", "ram"): 2,
+    }
+    assert metrics["ollama_model_parameters"] == {("llama3:8b",): 8e9}
+    assert list(metrics["ollama_model_expiry_timestamp_seconds"]) == [("llama3:8b",)]
+    # The first snapshot establishes a baseline and does not count loads.
+    assert metrics["ollama_model_loads"] == {}
+
+
+def test_collector_replaces_series_and_counts_loads(monkeypatch):
+    app = load_app()
+    current = responses()
+    monkeypatch.setattr(app, "fetch_json", lambda path: current[path])
+    collector = app.OllamaCollector(ttl=0)
+    render(monkeypatch, app, collector)
+
+    current = responses(version="0.6.0", tags=("qwen:7b",), running=("qwen:7b",))
+    metrics = render(monkeypatch, app, collector)
+
+    assert metrics["ollama_version_info"] == {("0.6.0",): 1}
+    assert metrics["ollama_model_loaded"] == {("qwen:7b",): 1}
+    assert set(metrics["ollama_model_memory_bytes"]) == {("qwen:7b", "vram"), ("qwen:7b", "ram")}
+    assert metrics["ollama_model_loads"] == {("qwen:7b",): 1}
+
+
+def test_collector_omits_model_series_when_ollama_is_down(monkeypatch):
+    app = load_app()
+    current = responses()
+    monkeypatch.setattr(app, "fetch_json", lambda path: current[path])
+    collector = app.OllamaCollector(ttl=0)
+    render(monkeypatch, app, collector)
+
+    current = dict.fromkeys(current)
+    metrics = render(monkeypatch, app, collector)
+
+    assert metrics["ollama_up"] == {(): 0}
+    assert metrics["ollama_version_info"] == {}
+    assert metrics["ollama_model_loaded"] == {}
+    assert metrics["ollama_model_memory_bytes"] == {}
+
+
+def test_collector_caches_responses_for_ttl(monkeypatch):
+    app = load_app()
+    fetch = MagicMock(side_effect=responses().get)
+    monkeypatch.setattr(app, "fetch_json", fetch)
+    clock = FakeClock()
+    collector = app.OllamaCollector(ttl=5, clock=clock)
+
+    collector.snapshot()
+    clock.now += 4
+    collector.snapshot()
+    assert fetch.call_count == len(app.ENDPOINTS)
+
+    clock.now += 1
+    collector.snapshot()
+    assert fetch.call_count == 2 * len(app.ENDPOINTS)
+
+
+def test_concurrent_scrapes_share_one_bounded_refresh(monkeypatch):
+    app = load_app()
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0, "calls": 0}
+    data = responses()
+
+    def slow_fetch(path):
+        with lock:
+            state["active"] += 1
+            state["calls"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return data[path]
+
+    monkeypatch.setattr(app, "fetch_json", slow_fetch)
+    collector = app.OllamaCollector(ttl=60, max_workers=2)
+
+    scrapers = [threading.Thread(target=collector.snapshot) for _ in range(4)]
+    for thread in scrapers:
+        thread.start()
+    for thread in scrapers:
+        thread.join()
+
+    assert state["calls"] == len(app.ENDPOINTS)
+    assert state["peak"] == 2
+
+
+def test_poll_mode_serves_cached_snapshot(monkeypatch):
     app = load_app()
+    fetch = MagicMock(side_effect=responses().get)
+    monkeypatch.setattr(app, "fetch_json", fetch)
+    collector = app.OllamaCollector(fetch_on_scrape=False)
+
+    assert collector.snapshot().version is None
+    fetch.assert_not_called()
 
     fake_event = types.SimpleNamespace()
     fake_event.is_set = MagicMock(side_effect=[False, True])
     fake_event.wait = MagicMock()
+    monkeypatch.setattr(app, "_STOP_EVENT", fake_event)
+
+    app.poll_forever(collector)
+
+    assert collector.snapshot().version == "0.5.0"
+    assert fetch.call_count == len(app.ENDPOINTS)
+    fake_event.wait.assert_called_once_with(app.POLL_INTERVAL)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Streams canned `/api/generate` NDJSON chunks per model and serves `/api/ps`."""
+
+    streams: dict[str, list[dict]] = {}
+    requests: list[dict] = []
+    running: list[dict] = []
+
+    def do_GET(self):  # noqa: N802
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"models": self.running}).encode())
+
+    def do_POST(self):  # noqa: N802
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append(body)
+        chunks = self.streams.get(body["model"])
+        if chunks is None:
+            self.send_response(404)
+            self.end_headers()
+            self.wfile.write(b'{"error": "model not found"}')
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(json.dumps(chunk).encode() + b"\n")
+            self.wfile.flush()
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    app = load_app()
+    FakeOllamaHandler.streams = {}
+    FakeOllamaHandler.requests = []
+    FakeOllamaHandler.running = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(app, "OLLAMA_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(app, "BENCHMARK_FAILURES", MagicMock())
+    yield FakeOllamaHandler
+    server.shutdown()
+    server.server_close()
+
+
+def generate_stream(eval_count=20, eval_duration=500_000_000):
+    return [
+        {"model": "llama3:8b", "response": "One", "done": False},
+        {"model": "llama3:8b", "response": ", two", "done": False},
+        {
+            "model": "llama3:8b",
+            "response": "",
+            "done": True,
+            "eval_count": eval_count,
+            "eval_duration": eval_duration,
+            "prompt_eval_duration": 40_000_000,
+            "load_duration": 1_500_000_000,
+        },
+    ]
+
+
+def test_run_benchmark_parses_generate_stream(fake_ollama):
+    app = load_app()
+    fake_ollama.streams["llama3:8b"] = generate_stream()
+
+    result = app.run_benchmark("llama3:8b")
 
+    assert result is not None
+    assert result.eval_count == 20
+    assert result.tokens_per_second == 40
+    assert result.load_duration == 1.5
+    assert result.prompt_eval_duration == 0.04
+    assert 0 < result.time_to_first_token < 5
+    request = fake_ollama.requests[0]
+    assert request["stream"] is True
+    assert request["prompt"] == app.BENCHMARK_PROMPT
+    assert request["options"]["num_predict"] == app.BENCHMARK_NUM_PREDICT
+    # The model was not loaded, so the benchmark must not keep it resident
+    assert request["keep_alive"] == "0"
+
+
+def test_run_benchmark_keeps_resident_model_expiry(fake_ollama):
+    app = load_app()
+    fake_ollama.streams["llama3:8b"] = generate_stream()
+    fake_ollama.running = [{"name": "llama3:8b", "expires_at": "2999-01-01T00:00:00Z"}]
+
+    assert app.run_benchmark("llama3:8b") is not None
+    assert fake_ollama.requests[0]["keep_alive"] == -1
+
+
+def test_benchmark_keep_alive_preserves_residency(monkeypatch):
+    app = load_app()
+    monkeypatch.setattr(app.time, "time", lambda: 1_700_000_000.0)
+    running = [
+        {"name": "llama3:8b", "expires_at": "2023-11-14T22:15:20Z"},
+        {"model": "qwen2:7b"},
+    ]
+
+    # Resident: keep the unload time production traffic set (120s from now)
+    assert app.benchmark_keep_alive("llama3:8b", running) == 120
+    # Cold: unload right after the run
+    assert app.benchmark_keep_alive("phi3:mini", running) == app.BENCHMARK_KEEP_ALIVE
+    # Unknown expiry or /api/ps unavailable: leave Ollama's default
+    assert app.benchmark_keep_alive("qwen2:7b", running) is None
+    assert app.benchmark_keep_alive("llama3:8b", None) is None
+
+
+def test_benchmark_keep_alive_matches_tagless_model_names(monkeypatch):
+    app = load_app()
+    monkeypatch.setattr(app.time, "time", lambda: 1_700_000_000.0)
+    running = [
+        {"name": "llama3:latest", "expires_at": "2023-11-14T22:15:20Z"},
+        {"name": "registry.local:5000/team/qwen2", "expires_at": "2023-11-14T22:15:20Z"},
+    ]
+
+    # `/api/ps` reports the full tag; a tagless configured name is the same model
+    assert app.benchmark_keep_alive("llama3", running) == 120
+    assert app.benchmark_keep_alive("llama3:latest", running) == 120
+    # A registry port is not a tag
+    assert app.benchmark_keep_alive("registry.local:5000/team/qwen2:latest", running) == 120
+    assert app.benchmark_keep_alive("llama3:70b", running) == app.BENCHMARK_KEEP_ALIVE
+
+
+def test_run_benchmark_counts_failures(fake_ollama):
+    app = load_app()
+    fake_ollama.streams["truncated:1b"] = generate_stream()[:1]
+    fake_ollama.streams["garbled:1b"] = ["not-a-chunk"]
+
+    assert app.run_benchmark("missing:1b") is None
+    assert app.run_benchmark("truncated:1b") is None
+    assert app.run_benchmark("garbled:1b") is None
+
+    reasons = [c.kwargs for c in app.BENCHMARK_FAILURES.labels.call_args_list]
+    assert reasons == [
+        {"model": "missing:1b", "reason": "http"},
+        {"model": "truncated:1b", "reason": "incomplete"},
+        {"model": "garbled:1b", "reason": "invalid_response"},
+    ]
+
+
+def test_benchmark_forever_records_histograms(fake_ollama, monkeypatch):
+    app = load_app()
+    fake_ollama.streams["llama3:8b"] = generate_stream(eval_count=0, eval_duration=0)
+    histograms = {
+        name: MagicMock()
+        for name in ("BENCHMARK_TOKENS_PER_SECOND", "BENCHMARK_LOAD_DURATION", "BENCHMARK_TTFT")
+    }
+    for name, mock in histograms.items():
+        monkeypatch.setattr(app, name, mock)
+    fake_event = types.SimpleNamespace()
+    fake_event.is_set = MagicMock(side_effect=[False, False, False, True])
+    fake_event.wait = MagicMock()
     monkeypatch.setattr(app, "_STOP_EVENT", fake_event)
-    monkeypatch.setattr(
-        app,
-        "fetch_json",
-        MagicMock(side_effect=[{"version": "1.2.3"}, {"models": ["a", "b"]}]),
-    )
-
-    gauge_mock = MagicMock()
-    monkeypatch.setattr(app, "OLLAMA_UP", gauge_mock)
-    monkeypatch.setattr(
-        app,
-        "OLLAMA_VERSION_INFO",
-        MagicMock(labels=MagicMock(return_value=MagicMock(set=MagicMock()))),
-    )
-    monkeypatch.setattr(app, "OLLAMA_INSTALLED_MODELS", MagicMock(set=MagicMock()))
-
-    app.poll_forever()
-
-    gauge_mock.set.assert_called()
+
+    app.benchmark_forever(["llama3:8b", "missing:1b"])
+
+    histograms["BENCHMARK_LOAD_DURATION"].labels.assert_called_once_with(model="llama3:8b")
+    histograms["BENCHMARK_LOAD_DURATION"].labels.return_value.observe.assert_called_once_with(1.5)
+    histograms["BENCHMARK_TTFT"].labels.return_value.observe.assert_called_once()
+    # No eval time reported: throughput is skipped rather than divided by zero.
+    histograms["BENCHMARK_TOKENS_PER_SECOND"].labels.assert_not_called()
+    app.BENCHMARK_FAILURES.labels.assert_called_once_with(model="missing:1b", reason="http")
+    fake_event.wait.assert_called_once_with(app.BENCHMARK_INTERVAL)
@@ -3,6 +3,12 @@
 
 from __future__ import annotations
 
+import importlib.util
+import json
+import sys
+import threading
+import time
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -12,30 +18,377 @@ try:
 except ImportError:  # pragma: no cover
     pytest.skip("flask not installed", allow_module_level=True)
 
+import requests
 
-@patch("conf.rag_exporter.requests.get")
-def test_probe_success_sets_metrics(mock_get):
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_probe_success_sets_metrics():
     from conf import rag_exporter
 
     mock_resp = MagicMock()
     mock_resp.headers = {"content-type": "application/json"}
     mock_resp.json.return_value = {"sources": ["a", "b"]}
     mock_resp.raise_for_status = MagicMock()
-    mock_get.return_value = mock_resp
-
+    session = MagicMock()
+    session.request.return_value = mock_resp
+    target = rag_exporter.ProbeTarget(name="probe-ok", url="http://rag/health")
     rag_sources_mock = MagicMock()
     rag_latency_mock = MagicMock()
     with (
         patch.object(rag_exporter, "rag_sources", rag_sources_mock),
         patch.object(rag_exporter, "rag_latency", rag_latency_mock),
-        patch.object(rag_exporter, "_shutdown_event") as evt,
     ):
-        evt.is_set.side_effect = [False, True]
-        evt.wait.return_value = None
-        rag_exporter.probe_loop()
+        assert rag_exporter.probe_target(target, session) is True
+
+    rag_sources_mock.labels.assert_called_with("probe-ok")
+    rag_sources_mock.labels.return_value.set.assert_called_with(2)
+    rag_latency_mock.labels.assert_called_with("probe-ok")
+    rag_latency_mock.labels.return_value.observe.assert_called_once()
+    session.request.assert_called_once_with(
+        "GET", "http://rag/health", headers=None, json=None, timeout=10, verify=True
+    )
+
+
+def test_probe_failure_is_counted_without_fake_latency():
+    from conf import rag_exporter
+
+    session = MagicMock()
+    session.request.side_effect = requests.ConnectionError("down")
+    target = rag_exporter.ProbeTarget(name="probe-down", url="http://down/health")
+    metrics = {name: MagicMock() for name in ("rag_sources", "rag_latency", "rag_failures")}
+    with patch.multiple(rag_exporter, **metrics):
+        assert rag_exporter.probe_target(target, session) is False
+
+    metrics["rag_latency"].labels.assert_not_called()
+    metrics["rag_sources"].labels.assert_not_called()
+    metrics["rag_failures"].labels.assert_called_once_with("probe-down", "connection")
+    metrics["rag_failures"].labels.return_value.inc.assert_called_once()
+
+
+class FakeStreamResponse:
+    """Streaming response stand-in usable as a context manager."""
+
+    def __init__(self, lines=(), content=b"", status=200):
+        self.lines = list(lines)
+        self.content = content
+        self.status = status
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise requests.HTTPError(f"{self.status} error")
+
+    def iter_lines(self):
+        yield from self.lines
+
+    def iter_content(self, chunk_size=None):
+        yield self.content[:5]
+        yield self.content[5:]
+
+
+def _sse(event) -> bytes:
+    return b"data: " + json.dumps(event).encode()
+
+
+def test_openwebui_query_probe_measures_ttft_sources_and_hit_rate():
+    from conf import rag_exporter
+
+    answer = [
+        _sse({"sources": [{"source": {"name": "handbook.pdf"}, "metadata": [{}]}]}),
+        b"",
+        _sse({"choices": [{"delta": {"role": "assistant"}}]}),
+        _sse({"choices": [{"delta": {"content": "Hello"}}]}),
+        b"data: [DONE]",
+    ]
+    session = MagicMock()
+    session.post.side_effect = [
+        FakeStreamResponse(answer),
+        FakeStreamResponse(answer),
+        FakeStreamResponse(status=500),
+    ]
+    target = rag_exporter.ProbeTarget(
+        name="owui-chat",
+        url="http://openwebui:8080/api/chat/completions",
+        mode="openwebui",
+        model="llama3",
+        json={"files": [{"type": "collection", "id": "kb"}]},
+        questions=(
+            rag_exporter.ProbeQuestion("Where is the handbook?", ("HANDBOOK",)),
+            rag_exporter.ProbeQuestion("Where are the specs?", ("specs.md",)),
+            rag_exporter.ProbeQuestion("Anything?", ("handbook",)),
+        ),
+    )
+    names = ("rag_sources", "rag_latency", "rag_ttft", "rag_hit_ratio", "rag_failures")
+    metrics = {name: MagicMock() for name in names}
+    with patch.multiple(rag_exporter, **metrics):
+        assert rag_exporter.probe_target(target, session) is False
+
+    body = session.post.call_args_list[0].kwargs["json"]
+    assert body["model"] == "llama3"
+    assert body["stream"] is True
+    assert body["files"] == [{"type": "collection", "id": "kb"}]
+    assert body["messages"][0]["content"] == "Where is the handbook?"
+    assert metrics["rag_latency"].labels.return_value.observe.call_count == 2
+    assert metrics["rag_ttft"].labels.return_value.observe.call_count == 2
+    metrics["rag_sources"].labels.return_value.set.assert_called_with(1)
+    # One hit out of three graded questions (the failed one counts as a miss)
+    metrics["rag_hit_ratio"].labels.return_value.set.assert_called_once_with(1 / 3)
+    metrics["rag_failures"].labels.assert_called_once_with("owui-chat", "http")
+
+
+def test_openwebui_sources_count_distinct_documents():
+    from conf import rag_exporter
+
+    # One collection entry citing three chunks from two files
+    source = {
+        "source": {"id": "kb", "name": "Knowledge"},
+        "metadata": [
+            {"file_id": "f1", "source": "handbook.pdf", "page": 1},
+            {"file_id": "f1", "source": "handbook.pdf", "page": 7},
+            {"file_id": "f2", "source": "specs.md"},
+        ],
+    }
+    answer = [
+        _sse({"sources": [source]}),
+        _sse({"choices": [{"delta": {"content": "Hi"}}]}),
+        b"data: [DONE]",
+    ]
+    session = MagicMock()
+    session.post.return_value = FakeStreamResponse(answer)
+    target = rag_exporter.ProbeTarget(
+        name="owui-docs",
+        url="http://openwebui:8080/api/chat/completions",
+        mode="openwebui",
+        model="llama3",
+        questions=(rag_exporter.ProbeQuestion("Where are the specs?", ("specs.md",)),),
+    )
+    names = ("rag_sources", "rag_latency", "rag_ttft", "rag_hit_ratio", "rag_failures")
+    metrics = {name: MagicMock() for name in names}
+    with patch.multiple(rag_exporter, **metrics):
+        assert rag_exporter.probe_target(target, session) is True
+
+    metrics["rag_sources"].labels.return_value.set.assert_called_once_with(2)
+    metrics["rag_hit_ratio"].labels.return_value.set.assert_called_once_with(1.0)
+
+
+def test_ragflow_retrieval_probe_counts_chunks():
+    from conf import rag_exporter
+
+    payload = {
+        "code": 0,
+        "data": {
+            "chunks": [
+                {"document_keyword": "runbook.md", "content": "..."},
+                {"docnm_kwd": "faq.md", "content": "..."},
+            ]
+        },
+    }
+    session = MagicMock()
+    session.post.side_effect = [
+        FakeStreamResponse(content=json.dumps(payload).encode()),
+        FakeStreamResponse(content=b'{"code": 102, "message": "no dataset"}'),
+    ]
+    target = rag_exporter.ProbeTarget(
+        name="ragflow-retrieval",
+        url="http://ragflow/api/v1/retrieval",
+        mode="ragflow",
+        dataset_ids=("ds1",),
+        questions=(
+            rag_exporter.ProbeQuestion("How to restart?", ("runbook",)),
+            rag_exporter.ProbeQuestion("Unrelated"),
+        ),
+    )
+    names = ("rag_sources", "rag_latency", "rag_ttft", "rag_hit_ratio", "rag_failures")
+    metrics = {name: MagicMock() for name in names}
+    with patch.multiple(rag_exporter, **metrics):
+        assert rag_exporter.probe_target(target, session) is False
+
+    assert session.post.call_args_list[0].kwargs["json"] == {
+        "question": "How to restart?",
+        "dataset_ids": ["ds1"],
+    }
+    metrics["rag_sources"].labels.return_value.set.assert_called_once_with(2)
+    metrics["rag_ttft"].labels.return_value.observe.assert_called_once()
+    metrics["rag_hit_ratio"].labels.return_value.set.assert_called_once_with(1.0)
+    metrics["rag_failures"].labels.assert_called_once_with("ragflow-retrieval", "invalid_response")
+
+
+def test_load_targets_from_json_and_legacy_url(tmp_path):
+    from conf import rag_exporter
+
+    specs = [
+        {"name": "litellm", "url": "http://litellm:4000/health/liveliness", "interval": 5},
+        {
+            "name": "ragflow",
+            "url": "http://ragflow/api/v1/retrieval",
+            "method": "post",
+            "json": {"question": "ping"},
+            "token_env": "RAGFLOW_API_KEY",
+            "timeout": 3,
+        },
+    ]
+    questions_file = tmp_path / "questions.json"
+    questions_file.write_text(
+        json.dumps(["ping", {"question": "restart?", "expected": ["runbook"]}]), encoding="utf-8"
+    )
+    specs[1].update(mode="ragflow", dataset_ids=["ds1"], questions_file=str(questions_file))
+    targets_file = tmp_path / "targets.json"
+    targets_file.write_text(json.dumps(specs), encoding="utf-8")
+
+    targets = rag_exporter.load_targets({"RAG_PROBE_TARGETS_FILE": str(targets_file)})
+    (legacy,) = rag_exporter.load_targets({"RAG_TEST_URL": "http://owui/health"})
+
+    assert [t.name for t in targets] == ["litellm", "ragflow"]
+    assert targets[0].interval == 5
+    assert targets[1].method == "POST"
+    assert targets[1].timeout == 3
+    assert targets[1].questions == (
+        rag_exporter.ProbeQuestion("ping"),
+        rag_exporter.ProbeQuestion("restart?", ("runbook",)),
+    )
+    assert legacy.name == "openwebui"
+    assert legacy.url == "http://owui/health"
+    with pytest.raises(ValueError, match="JSON list"):
+        rag_exporter.load_targets({"RAG_PROBE_TARGETS": '{"name": "a", "url": "u"}'})
+    with pytest.raises(ValueError, match="needs questions"):
+        rag_exporter.load_targets(
+            {"RAG_PROBE_TARGETS": json.dumps([{"name": "a", "url": "u", "mode": "ragflow"}])}
+        )
+    with pytest.raises(ValueError, match="unique"):
+        rag_exporter.load_targets(
+            {"RAG_PROBE_TARGETS": json.dumps([{"name": "a", "url": "u"}] * 2)}
+        )
+
+
+def test_leader_lock_allows_one_holder(tmp_path):
+    from conf import rag_exporter
+
+    path = str(tmp_path / "probe.lock")
+    leader = rag_exporter.acquire_leader_lock(path)
+    try:
+        assert leader is not None
+        assert rag_exporter.acquire_leader_lock(path) is None
+    finally:
+        leader.close()
+    follower = rag_exporter.acquire_leader_lock(path)
+    assert follower is not None
+    follower.close()
+
+
+def test_scheduler_probes_targets_concurrently_on_their_intervals():
+    from conf import rag_exporter
+
+    calls: dict[str, int] = {"fast": 0, "slow": 0}
+    slow_started = threading.Event()
+
+    def fake_probe(target, _session):
+        calls[target.name] += 1
+        if target.name == "slow":
+            slow_started.set()
+            time.sleep(0.3)
+        return True
+
+    targets = [
+        rag_exporter.ProbeTarget(name="fast", url="http://fast", interval=0.05),
+        rag_exporter.ProbeTarget(name="slow", url="http://slow", interval=10),
+    ]
+    scheduler = rag_exporter.ProbeScheduler(targets, lock_path=None)
+    leader = MagicMock()
+    with (
+        patch.object(rag_exporter, "probe_target", fake_probe),
+        patch.object(rag_exporter, "rag_leader", leader),
+    ):
+        thread = scheduler.start()
+        started = slow_started.wait(2)
+        time.sleep(0.25)
+        scheduler.stop_event.set()
+        thread.join(5)
+
+    assert started
+    assert not thread.is_alive()
+    leader.set.assert_called_with(1)
+    assert calls["slow"] == 1
+    # The slow probe did not hold up the fast target
+    assert calls["fast"] >= 3
+
+
+def test_scheduler_keeps_probing_a_target_after_unexpected_errors():
+    from conf import rag_exporter
+
+    calls: dict[str, int] = {"broken": 0, "fine": 0}
+
+    def fake_probe(target, _session):
+        calls[target.name] += 1
+        if target.name == "broken":
+            raise KeyError("unexpected payload")
+        return True
+
+    targets = [
+        rag_exporter.ProbeTarget(name="broken", url="http://broken", interval=0.02),
+        rag_exporter.ProbeTarget(name="fine", url="http://fine", interval=0.02),
+    ]
+    failures = MagicMock()
+    scheduler = rag_exporter.ProbeScheduler(targets, lock_path=None)
+    with (
+        patch.object(rag_exporter, "probe_target", fake_probe),
+        patch.object(rag_exporter, "rag_failures", failures),
+    ):
+        thread = scheduler.start()
+        time.sleep(0.2)
+        scheduler.stop_event.set()
+        thread.join(5)
+
+    assert not thread.is_alive()
+    assert calls["broken"] >= 3
+    assert calls["fine"] >= 3
+    failures.labels.assert_any_call("broken", "error")
+
+
+def test_follower_does_not_probe(tmp_path):
+    from conf import rag_exporter
+
+    path = str(tmp_path / "probe.lock")
+    leader = rag_exporter.acquire_leader_lock(path)
+    probe = MagicMock()
+    gauge = MagicMock()
+    scheduler = rag_exporter.ProbeScheduler(
+        [rag_exporter.ProbeTarget(name="x", url="http://x", interval=0.01)], lock_path=path
+    )
+    try:
+        with (
+            patch.object(rag_exporter, "probe_target", probe),
+            patch.object(rag_exporter, "LEADER_RETRY_INTERVAL", 0.05),
+            patch.object(rag_exporter, "rag_leader", gauge),
+        ):
+            thread = scheduler.start()
+            time.sleep(0.2)
+            follower = scheduler.is_leader
+            scheduler.stop_event.set()
+            thread.join(5)
+    finally:
+        leader.close()
+
+    assert follower is False
+    probe.assert_not_called()
+    gauge.set.assert_called_with(0)
+
+
+def test_import_does_not_start_prober():
+    module_path = ROOT / "conf" / "rag_exporter.py"
+    spec = importlib.util.spec_from_file_location("rag_exporter_import_check", module_path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["rag_exporter_import_check"] = module
+    spec.loader.exec_module(module)
 
-    rag_sources_mock.set.assert_called_with(2)
-    rag_latency_mock.observe.assert_called()  # observed latency
+    assert module._scheduler is None
+    assert not [t for t in threading.enumerate() if t.name == "rag-probe"]
 
 
 def test_metrics_endpoint_returns_content():
@@ -55,6 +408,7 @@ def test_main_graceful_shutdown(mock_evt):
     with (
         patch("conf.rag_exporter.threading.Thread") as mock_thread,
         patch("conf.rag_exporter.app.run") as mock_run,
+        patch("conf.rag_exporter._scheduler", None),
     ):
         from conf import rag_exporter
 
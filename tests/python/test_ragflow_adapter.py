@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""Tests for services/ragflow-adapter/main.py."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib.util
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+fastapi = pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("aiofiles")
+pytest.importorskip("prometheus_client")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[2]
+DATASET = "ds-test"
+HEADERS = {"Content-Type": "application/pdf", "X-Filename": "report.pdf"}
+
+
+def load_adapter():
+    module_path = ROOT / "services" / "ragflow-adapter" / "main.py"
+    spec = importlib.util.spec_from_file_location("ragflow_adapter", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load ragflow adapter from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["ragflow_adapter"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+adapter = load_adapter()
+
+
+class FakeRagflow:
+    """Minimal in-process RAGFlow API served through httpx.MockTransport."""
+
+    def __init__(self) -> None:
+        self.uploads: list[bytes] = []
+        self.upload_headers: list[httpx.Headers] = []
+        self.chunks = [{"content": "first"}, {"content": "second"}]
+        self.pending_polls = 0
+        self.upload_code = 0
+        self.read_timeouts: dict[str, float] = {}
+        self.status_queries: list[dict[str, str]] = []
+        self.running: dict[str, int] = {}
+        self.chunk_pages: list[int] = []
+        self.page_delays: dict[int, float] = {}
+        self.max_page_size: int | None = None
+        self.report_total = True
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        base = f"/api/v1/datasets/{DATASET}"
+        self.read_timeouts[f"{request.method} {path}"] = request.extensions["timeout"]["read"]
+        if request.method == "POST" and path == f"{base}/documents":
+            self.uploads.append(request.content)
+            self.upload_headers.append(request.headers)
+            if self.upload_code:
+                return httpx.Response(200, json={"code": self.upload_code, "message": "quota"})
+            doc_id = f"doc-{len(self.uploads)}"
+            self.running[doc_id] = self.pending_polls
+            return httpx.Response(200, json={"code": 0, "data": [{"id": doc_id}]})
+        if request.method == "POST" and path == f"{base}/chunks":
+            return httpx.Response(200, json={"code": 0})
+        if request.method == "GET" and path == f"{base}/documents":
+            params = dict(request.url.params)
+            self.status_queries.append(params)
+            doc_ids = [params["id"]] if "id" in params else sorted(self.running, reverse=True)
+            return httpx.Response(
+                200, json={"code": 0, "data": {"docs": [self.status(d) for d in doc_ids]}}
+            )
+        if request.method == "GET" and path.startswith(f"{base}/documents/"):
+            return self.chunk_page(request)
+        return httpx.Response(404, json={"code": 404})
+
+    def chunk_page(self, request: httpx.Request):
+        page = int(request.url.params.get("page", 1))
+        page_size = int(request.url.params.get("page_size", 30))
+        if self.max_page_size:
+            page_size = min(page_size, self.max_page_size)
+        self.chunk_pages.append(page)
+        data = {"chunks": self.chunks[(page - 1) * page_size : page * page_size]}
+        if self.report_total:
+            data["total"] = len(self.chunks)
+        response = httpx.Response(200, json={"code": 0, "data": data})
+        delay = self.page_delays.get(page)
+        if delay is None:
+            return response
+
+        async def delayed():
+            await asyncio.sleep(delay)
+            return response
+
+        return delayed()
+
+    def status(self, doc_id: str) -> dict:
+        """Report a document as running for ``pending_polls`` checks, then done."""
+        if self.running.get(doc_id):
+            self.running[doc_id] -= 1
+            return {"id": doc_id, "run": "RUNNING", "progress": 0.5}
+        return {"id": doc_id, "run": "DONE", "progress": 1.0}
+
+
+@pytest.fixture
+def ragflow(monkeypatch, tmp_path, tmp_path_factory):
+    fake = FakeRagflow()
+    fake.clients = []
+    monkeypatch.setattr(
+        adapter, "result_cache", adapter.ResultCache(tmp_path_factory.mktemp("cache"), 1_000_000)
+    )
+    monkeypatch.setattr(adapter, "RAGFLOW_API_KEY", "test-key")
+    monkeypatch.setattr(adapter, "RAGFLOW_DATASET_ID", DATASET)
+    monkeypatch.setattr(
+        adapter,
+        "poll_coordinator",
+        adapter.PollCoordinator(
+            adapter._fetch_document_statuses, min_interval=0, max_interval=0, timeout=5
+        ),
+    )
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    make_client = functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(fake))
+
+    def tracked_client(*args, **kwargs):
+        fake.clients.append(make_client(*args, **kwargs))
+        return fake.clients[-1]
+
+    monkeypatch.setattr(httpx, "AsyncClient", tracked_client)
+    return fake
+
+
+@pytest.fixture
+def client():
+    with TestClient(adapter.app) as test_client:
+        yield test_client
+
+
+def slow_polls(monkeypatch, interval):
+    monkeypatch.setattr(adapter.poll_coordinator, "min_interval", interval)
+    monkeypatch.setattr(adapter.poll_coordinator, "max_interval", interval)
+
+
+def wait_for_job(client, job_id, attempts=50):
+    data = {}
+    for _ in range(attempts):
+        data = client.get(f"/jobs/{job_id}", params={"wait": 1, "version": data.get("version", 0)})
+        data = data.json()
+        if data["status"] in ("done", "failed"):
+            return data
+    raise AssertionError(f"job {job_id} did not finish: {data}")
+
+
+def test_process_streams_upload_from_spooled_file(ragflow, client, tmp_path):
+    body = b"%PDF-1.7 " + b"x" * 200_000
+
+    resp = client.put("/process", content=iter([body[:70_000], body[70_000:]]), headers=HEADERS)
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["page_content"] == "first\n\nsecond"
+    assert data["metadata"]["ragflow_doc_id"] == "doc-1"
+    assert data["metadata"]["chunk_count"] == 2
+    assert len(ragflow.uploads) == 1
+    assert body in ragflow.uploads[0]
+    assert b'filename="report.pdf"' in ragflow.uploads[0]
+    headers = ragflow.upload_headers[0]
+    assert int(headers["content-length"]) == len(ragflow.uploads[0])
+    assert headers["content-type"].startswith("multipart/form-data; boundary=")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_multipart_upload_reads_the_file_in_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(adapter, "UPLOAD_READ_SIZE", 4)
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"0123456789")
+
+    stream, content_type, length = adapter._multipart_upload(str(path), 'a "b"\n.txt', "text/plain")
+
+    async def collect():
+        return [part async for part in stream]
+
+    parts = asyncio.run(collect())
+    body = b"".join(parts)
+    boundary = content_type.split("boundary=", 1)[1]
+    assert parts[1:4] == [b"0123", b"4567", b"89"]
+    assert len(body) == length
+    assert body.startswith(f"--{boundary}\r\n".encode())
+    assert b'filename="a %22b%22%0A.txt"' in body
+    assert b"\r\n\r\n0123456789\r\n" in body
+    assert body.endswith(f"--{boundary}--\r\n".encode())
+
+
+def test_process_enforces_size_limit_while_streaming(ragflow, client, monkeypatch, tmp_path):
+    monkeypatch.setattr(adapter, "MAX_FILE_SIZE", 1000)
+
+    # A generator body is sent chunked, so only the streaming check can catch it.
+    resp = client.put("/process", content=iter([b"x" * 600, b"x" * 600]), headers=HEADERS)
+
+    assert resp.status_code == 413
+    assert ragflow.uploads == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_process_rejects_empty_body(ragflow, client, tmp_path):
+    resp = client.put("/process", content=b"", headers=HEADERS)
+
+    assert resp.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_post_jobs_returns_immediately_and_get_returns_result(ragflow, client):
+    ragflow.pending_polls = 2
+
+    resp = client.post("/jobs", content=b"%PDF-1.7 body", headers=HEADERS)
+
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["status"] == "queued"
+    assert job["status_url"] == f"/jobs/{job['job_id']}"
+    data = wait_for_job(client, job["job_id"])
+    assert data["status"] == "done"
+    assert data["progress"] == 1.0
+    assert data["result"]["page_content"] == "first\n\nsecond"
+    assert data["result"]["metadata"]["chunk_count"] == 2
+
+
+def test_job_events_stream_progress_until_done(ragflow, client, monkeypatch):
+    slow_polls(monkeypatch, 0.05)
+    ragflow.pending_polls = 2
+    job_id = client.post("/jobs", content=b"body", headers=HEADERS).json()["job_id"]
+
+    events = []
+    with client.stream("GET", f"/jobs/{job_id}/events") as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        for line in resp.iter_lines():
+            if line.startswith("event: "):
+                events.append(line.removeprefix("event: "))
+
+    assert events[-1] == "done"
+    assert "parsing" in events
+
+
+def test_process_surfaces_job_failure(ragflow, client):
+    ragflow.upload_code = 102
+
+    resp = client.put("/process", content=b"body", headers=HEADERS)
+
+    assert resp.status_code == 502
+    assert resp.json()["detail"] == "RAGFlow upload error: quota"
+    job = client.get(f"/jobs/{resp.headers['X-Job-Id']}").json()
+    assert job["status"] == "failed"
+    assert job["status_code"] == 502
+
+
+def test_process_releases_job_after_sending_result(ragflow, client):
+    resp = client.put("/process", content=b"body", headers=HEADERS)
+
+    assert resp.status_code == 200
+    assert client.get(f"/jobs/{resp.headers['X-Job-Id']}").status_code == 404
+
+
+def test_finished_jobs_expire_without_new_submissions():
+    async def runner(job):
+        return {"page_content": "", "metadata": {}}
+
+    async def scenario():
+        manager = adapter.JobManager(runner, workers=1, retention=0, purge_interval=0.01)
+        await manager.start()
+        job = manager.submit(
+            adapter.Job(
+                id="job-1", filename="a.pdf", mime_type="application/pdf", path=None, size=0
+            )
+        )
+        await job.wait()
+        await asyncio.sleep(0.05)
+        try:
+            return manager.get("job-1")
+        finally:
+            await manager.stop()
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_process_timeout_leaves_job_running(ragflow, client, monkeypatch):
+    monkeypatch.setattr(adapter, "PROCESS_TIMEOUT", 0.05)
+    slow_polls(monkeypatch, 0.05)
+    ragflow.pending_polls = 3
+
+    resp = client.put("/process", content=b"body", headers=HEADERS)
+
+    assert resp.status_code == 504
+    data = wait_for_job(client, resp.headers["X-Job-Id"])
+    assert data["status"] == "done"
+    assert data["result"]["metadata"]["ragflow_doc_id"] == "doc-1"
+
+
+def test_unknown_job_returns_404(client):
+    assert client.get("/jobs/missing").status_code == 404
+
+
+def test_identical_upload_reuses_cached_ragflow_document(ragflow, client):
+    first = client.put("/process", content=b"same bytes", headers=HEADERS)
+    second = client.put(
+        "/process", content=b"same bytes", headers={**HEADERS, "X-Filename": "copy.pdf"}
+    )
+    other_type = client.put(
+        "/process", content=b"same bytes", headers={**HEADERS, "Content-Type": "text/plain"}
+    )
+
+    assert first.json()["metadata"]["cache"] == "miss"
+    assert second.status_code == 200
+    assert second.json()["page_content"] == first.json()["page_content"]
+    assert second.json()["metadata"]["cache"] == "hit"
+    assert second.json()["metadata"]["source"] == "copy.pdf"
+    assert second.json()["metadata"]["ragflow_doc_id"] == "doc-1"
+    assert other_type.json()["metadata"]["cache"] == "miss"
+    assert len(ragflow.uploads) == 2
+
+
+def test_concurrent_identical_jobs_coalesce(ragflow, client, monkeypatch):
+    slow_polls(monkeypatch, 0.05)
+    ragflow.pending_polls = 2
+
+    job_ids = [
+        client.post("/jobs", content=b"shared", headers=HEADERS).json()["job_id"] for _ in range(3)
+    ]
+    results = [wait_for_job(client, job_id) for job_id in job_ids]
+
+    assert len(ragflow.uploads) == 1
+    assert {r["result"]["metadata"]["cache"] for r in results} == {"miss", "coalesced"}
+    assert all(r["result"]["metadata"]["ragflow_doc_id"] == "doc-1" for r in results)
+
+
+def test_shared_client_is_reused_and_closed_on_shutdown(ragflow):
+    with TestClient(adapter.app) as client:
+        assert client.put("/process", content=b"one", headers=HEADERS).status_code == 200
+        assert client.put("/process", content=b"two", headers=HEADERS).status_code == 200
+        assert len(ragflow.clients) == 1
+        assert client.get("/health").json()["http_pool"]["in_flight"] == 0
+
+    assert ragflow.clients[0].is_closed
+    assert not adapter.ragflow_http.started
+
+
+def test_requests_use_per_operation_timeouts(ragflow, client):
+    client.put("/process", content=b"body", headers=HEADERS)
+
+    base = f"/api/v1/datasets/{DATASET}"
+    assert ragflow.read_timeouts[f"POST {base}/documents"] == adapter.RAGFLOW_UPLOAD_TIMEOUT
+    assert ragflow.read_timeouts[f"POST {base}/chunks"] == adapter.RAGFLOW_POLL_TIMEOUT
+    assert ragflow.read_timeouts[f"GET {base}/documents"] == adapter.RAGFLOW_POLL_TIMEOUT
+    assert (
+        ragflow.read_timeouts[f"GET {base}/documents/doc-1/chunks"]
+        == adapter.RAGFLOW_CHUNKS_TIMEOUT
+    )
+
+
+def test_pool_saturation_is_tracked(monkeypatch):
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return httpx.Response(200, json={})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        httpx,
+        "AsyncClient",
+        functools.partial(real_client, transport=httpx.MockTransport(slow)),
+    )
+    pool = adapter.RagflowHTTP(max_connections=2)
+
+    async def scenario():
+        await pool.start()
+        requests = [
+            asyncio.create_task(pool.request("poll", "GET", "http://ragflow/x")) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        during = pool.stats()
+        release.set()
+        await asyncio.gather(*requests)
+        await pool.aclose()
+        return during
+
+    during = asyncio.run(scenario())
+
+    assert during["in_flight"] == 3
+    assert during["saturation"] == 1.5
+    assert pool.stats()["in_flight"] == 0
+
+
+def test_metrics_endpoint_exposes_pool_saturation(ragflow, client):
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert "ragflow_adapter_http_pool_saturation" in resp.text
+    assert "ragflow_adapter_http_pool_max_connections" in resp.text
+
+
+def test_concurrent_parses_share_batched_status_checks(ragflow, client, monkeypatch):
+    slow_polls(monkeypatch, 0.05)
+    ragflow.pending_polls = 3
+
+    job_ids = [
+        client.post("/jobs", content=f"doc {i}".encode(), headers=HEADERS).json()["job_id"]
+        for i in range(5)
+    ]
+    results = [wait_for_job(client, job_id) for job_id in job_ids]
+
+    assert {r["result"]["metadata"]["ragflow_doc_id"] for r in results} == {
+        f"doc-{i}" for i in range(1, 6)
+    }
+    # Five documents each needing four checks take far fewer list requests
+    assert len(ragflow.status_queries) < 5 * 4
+    assert any("page_size" in query for query in ragflow.status_queries)
+    assert client.get("/health").json()["polling"]["pending"] == 0
+
+
+def test_parse_failure_reported_by_poller(ragflow, client, monkeypatch):
+    monkeypatch.setattr(
+        ragflow, "status", lambda doc_id: {"id": doc_id, "run": "FAIL", "progress_msg": "bad pdf"}
+    )
+
+    resp = client.put("/process", content=b"body", headers=HEADERS)
+
+    assert resp.status_code == 502
+    assert resp.json()["detail"] == "RAGFlow parsing failed: bad pdf"
+
+
+def many_chunks(count):
+    return [{"content": f"chunk {i}"} for i in range(count)]
+
+
+def test_chunks_are_fetched_across_pages_in_order(ragflow, client, monkeypatch):
+    monkeypatch.setattr(adapter, "CHUNK_PAGE_SIZE", 100)
+    ragflow.chunks = many_chunks(250)
+    ragflow.page_delays = {2: 0.05}  # page 3 arrives before page 2
+
+    data = client.put("/process", content=b"big", headers=HEADERS).json()
+
+    assert data["page_content"] == "\n\n".join(c["content"] for c in ragflow.chunks)
+    assert data["metadata"]["chunk_count"] == 250
+    assert data["metadata"]["chunk_total"] == 250
+    assert data["metadata"]["truncated"] is False
+    assert sorted(ragflow.chunk_pages) == [1, 2, 3]
+
+
+def test_chunks_follow_server_page_size_cap(ragflow, client, monkeypatch):
+    monkeypatch.setattr(adapter, "CHUNK_PAGE_SIZE", 100)
+    ragflow.max_page_size = 30
+    ragflow.chunks = many_chunks(95)
+
+    data = client.put("/process", content=b"capped", headers=HEADERS).json()
+
+    assert data["metadata"]["chunk_count"] == 95
+    assert sorted(ragflow.chunk_pages) == [1, 2, 3, 4]
+
+
+def test_chunks_without_total_are_walked_until_short_page(ragflow, client, monkeypatch):
+    monkeypatch.setattr(adapter, "CHUNK_PAGE_SIZE", 10)
+    ragflow.report_total = False
+    ragflow.chunks = many_chunks(25)
+
+    data = client.put("/process", content=b"legacy", headers=HEADERS).json()
+
+    assert data["metadata"]["chunk_count"] == 25
+    assert data["metadata"]["chunk_total"] == 25
+    assert ragflow.chunk_pages == [1, 2, 3]
+
+
+def test_chunk_assembly_stops_at_byte_cap(ragflow, client, monkeypatch):
+    monkeypatch.setattr(adapter, "CHUNK_PAGE_SIZE", 10)
+    monkeypatch.setattr(adapter, "CHUNK_FETCH_CONCURRENCY", 1)
+    monkeypatch.setattr(adapter, "CHUNK_MAX_BYTES", 100)
+    ragflow.chunks = many_chunks(100)
+
+    data = client.put("/process", content=b"capped", headers=HEADERS).json()
+
+    assert len(data["page_content"].encode()) <= 100
+    assert data["page_content"].endswith("chunk 10")
+    assert data["metadata"]["chunk_count"] == 11
+    assert data["metadata"]["chunk_total"] == 100
+    assert data["metadata"]["truncated"] is True
+    assert len(ragflow.chunk_pages) < 10
+
+
+def test_process_streams_page_content(ragflow, client, monkeypatch):
+    monkeypatch.setattr(adapter, "CHUNK_PAGE_SIZE", 10)
+    ragflow.chunks = [{"content": f'line "{i}" \u00e9'} for i in range(35)]
+
+    with client.stream(
+        "PUT", "/process", params={"stream": "true"}, content=b"doc", headers=HEADERS
+    ) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/json"
+        assert resp.headers["X-Job-Id"]
+        body = b"".join(resp.iter_bytes())
+
+    data = json.loads(body)
+    assert data["page_content"] == "\n\n".join(c["content"] for c in ragflow.chunks)
+    assert data["metadata"]["chunk_count"] == 35
+
+    # A cached result is streamed in one piece
+    cached = json.loads(
+        client.put("/process", params={"stream": "true"}, content=b"doc", headers=HEADERS).content
+    )
+    assert cached["page_content"] == data["page_content"]
+    assert cached["metadata"]["cache"] == "hit"
+
+
+def test_streamed_process_keeps_error_status_before_content(ragflow, client):
+    ragflow.upload_code = 102
+
+    resp = client.put("/process", params={"stream": "true"}, content=b"body", headers=HEADERS)
+
+    assert resp.status_code == 502
+    assert resp.json()["detail"] == "RAGFlow upload error: quota"
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Tests for services/ragflow-adapter/cache.py."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_cache():
+    module_path = ROOT / "services" / "ragflow-adapter" / "cache.py"
+    spec = importlib.util.spec_from_file_location("ragflow_adapter_cache", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load cache from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["ragflow_adapter_cache"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+cache = load_cache()
+
+
+def result(doc_id: str, content: str = "text") -> dict:
+    return {"page_content": content, "metadata": {"ragflow_doc_id": doc_id, "chunk_count": 1}}
+
+
+def encoded_size(value: dict) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def test_cache_key_separates_mime_and_namespace():
+    digest = "ab" * 32
+    keys = {
+        cache.cache_key(digest, "application/pdf", "ds-1"),
+        cache.cache_key(digest, "text/plain", "ds-1"),
+        cache.cache_key(digest, "application/pdf", "ds-2"),
+    }
+
+    assert len(keys) == 3
+    assert cache.cache_key(digest, "application/pdf", "ds-1") in keys
+
+
+def test_results_persist_across_instances(tmp_path):
+    store = cache.ResultCache(tmp_path, 1_000_000)
+
+    asyncio.run(store.put("k1", result("doc-1")))
+
+    reopened = cache.ResultCache(tmp_path, 1_000_000)
+    assert asyncio.run(reopened.get("k1")) == result("doc-1")
+    assert asyncio.run(reopened.get("missing")) is None
+    assert reopened.stats()["entries"] == 1
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    size = encoded_size(result("doc-1"))
+    store = cache.ResultCache(tmp_path, size * 2)
+
+    async def scenario():
+        await store.put("k1", result("doc-1"))
+        await store.put("k2", result("doc-2"))
+        assert await store.get("k1") is not None  # k1 becomes most recent
+        await store.put("k3", result("doc-3"))
+
+    asyncio.run(scenario())
+
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["k1", "k3"]
+    assert store.total_bytes <= size * 2
+
+
+def test_oversized_results_are_not_cached(tmp_path):
+    store = cache.ResultCache(tmp_path, 50)
+
+    asyncio.run(store.put("big", result("doc-1", "x" * 100)))
+
+    assert asyncio.run(store.get("big")) is None
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_concurrent_identical_requests_share_one_parse(tmp_path):
+    store = cache.ResultCache(tmp_path, 1_000_000)
+    calls = 0
+
+    async def produce():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return result("doc-1")
+
+    async def scenario():
+        first = await asyncio.gather(
+            store.get_or_process("k", produce), store.get_or_process("k", produce)
+        )
+        return first, await store.get_or_process("k", produce)
+
+    first, again = asyncio.run(scenario())
+
+    assert calls == 1
+    assert sorted(status for _, status in first) == [cache.CACHE_COALESCED, cache.CACHE_MISS]
+    assert again == (result("doc-1"), cache.CACHE_HIT)
+    assert store.stats()["inflight"] == 0
+
+
+def test_failed_parse_propagates_to_followers_and_is_not_cached(tmp_path):
+    store = cache.ResultCache(tmp_path, 1_000_000)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("ragflow down")
+
+    async def scenario():
+        outcomes = await asyncio.gather(
+            store.get_or_process("k", fail),
+            store.get_or_process("k", fail),
+            return_exceptions=True,
+        )
+        retry = await store.get_or_process("k", lambda: asyncio.sleep(0, result("doc-2")))
+        return outcomes, retry
+
+    outcomes, retry = asyncio.run(scenario())
+
+    assert [str(exc) for exc in outcomes] == ["ragflow down", "ragflow down"]
+    assert retry == (result("doc-2"), cache.CACHE_MISS)
+
+
+def test_follower_takes_over_when_leader_is_cancelled(tmp_path):
+    store = cache.ResultCache(tmp_path, 0)
+    calls = []
+
+    async def produce():
+        calls.append(1)
+        await asyncio.sleep(0.05 if len(calls) == 1 else 0)
+        return result(f"doc-{len(calls)}")
+
+    async def scenario():
+        leader = asyncio.create_task(store.get_or_process("k", produce))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(store.get_or_process("k", produce))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == (result("doc-2"), cache.CACHE_MISS)
+    assert len(calls) == 2
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Tests for services/ragflow-adapter/poller.py."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_poller():
+    module_path = ROOT / "services" / "ragflow-adapter" / "poller.py"
+    spec = importlib.util.spec_from_file_location("ragflow_adapter_poller", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load poller from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["ragflow_adapter_poller"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+poller = load_poller()
+
+
+class FakeStatuses:
+    """Status fetcher that finishes each document after ``checks`` lookups."""
+
+    def __init__(self, checks: int = 2, run_status: str = "DONE") -> None:
+        self.checks = checks
+        self.run_status = run_status
+        self.calls: list[tuple[str, list[str]]] = []
+        self.seen: dict[str, int] = {}
+
+    async def __call__(self, dataset_id: str, doc_ids: list[str]) -> dict[str, dict]:
+        self.calls.append((dataset_id, doc_ids))
+        docs = {}
+        for doc_id in doc_ids:
+            self.seen[doc_id] = self.seen.get(doc_id, 0) + 1
+            if self.seen[doc_id] < self.checks:
+                progress = self.seen[doc_id] / self.checks
+                docs[doc_id] = {"id": doc_id, "run": "RUNNING", "progress": progress}
+            else:
+                docs[doc_id] = {"id": doc_id, "run": self.run_status, "progress_msg": "broken"}
+        return docs
+
+
+def run_with(coordinator, scenario):
+    async def wrapper():
+        await coordinator.start()
+        try:
+            return await scenario()
+        finally:
+            await coordinator.stop()
+
+    return asyncio.run(wrapper())
+
+
+def test_interval_follows_progress_rate():
+    # 10% in 2s -> 16s left -> check again in 8s
+    assert poller.next_poll_interval(1.0, 0.2, 0.1, 2.0, 0.5, 30.0, 1.5) == pytest.approx(8.0)
+    # Nearly done: clamp to the minimum
+    assert poller.next_poll_interval(1.0, 0.99, 0.5, 1.0, 0.5, 30.0, 1.5) == 0.5
+
+
+def test_interval_backs_off_while_stalled():
+    intervals = [1.0]
+    for _ in range(10):
+        intervals.append(poller.next_poll_interval(intervals[-1], 0.3, 0.3, 5.0, 1.0, 8.0, 2.0))
+
+    assert intervals[:4] == [1.0, 2.0, 4.0, 8.0]
+    assert max(intervals) == 8.0
+
+
+def test_pending_documents_are_checked_in_one_batch():
+    fetch = FakeStatuses(checks=3)
+    coordinator = poller.PollCoordinator(fetch, min_interval=0.01, max_interval=0.01)
+    reported: list[float] = []
+
+    async def record(value):
+        reported.append(value)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(coordinator.wait("ds", f"doc-{i}", on_progress=record) for i in range(10))
+        )
+
+    docs = run_with(coordinator, scenario)
+
+    assert [doc["id"] for doc in docs] == [f"doc-{i}" for i in range(10)]
+    assert len(fetch.calls) == 3
+    assert fetch.calls[0] == ("ds", sorted(f"doc-{i}" for i in range(10)))
+    assert sorted(set(reported)) == pytest.approx([1 / 3, 2 / 3])
+    assert coordinator.stats() == {"pending": 0, "requests": 3, "document_checks": 30}
+
+
+def test_datasets_are_polled_separately():
+    fetch = FakeStatuses(checks=1)
+    coordinator = poller.PollCoordinator(fetch, min_interval=0.01)
+
+    async def scenario():
+        await asyncio.gather(coordinator.wait("ds-a", "doc-1"), coordinator.wait("ds-b", "doc-2"))
+
+    run_with(coordinator, scenario)
+
+    assert sorted(fetch.calls) == [("ds-a", ["doc-1"]), ("ds-b", ["doc-2"])]
+
+
+def test_failed_parse_raises_bad_gateway():
+    coordinator = poller.PollCoordinator(FakeStatuses(checks=1, run_status="FAIL"), min_interval=0)
+
+    with pytest.raises(HTTPException) as excinfo:
+        run_with(coordinator, lambda: coordinator.wait("ds", "doc-1"))
+
+    assert excinfo.value.status_code == 502
+    assert excinfo.value.detail == "RAGFlow parsing failed: broken"
+
+
+def test_fetch_errors_are_retried_until_the_deadline():
+    calls = 0
+
+    async def broken(dataset_id, doc_ids):
+        nonlocal calls
+        calls += 1
+        raise OSError("connection reset")
+
+    coordinator = poller.PollCoordinator(broken, min_interval=0.01, max_interval=0.01, timeout=0.1)
+
+    with pytest.raises(HTTPException) as excinfo:
+        run_with(coordinator, lambda: coordinator.wait("ds", "doc-1"))
+
+    assert excinfo.value.status_code == 504
+    assert calls > 1
+
+
+def test_progress_callback_error_fails_only_its_waiter():
+    fetch = FakeStatuses(checks=2)
+    coordinator = poller.PollCoordinator(fetch, min_interval=0.01, max_interval=0.01)
+
+    async def broken(progress):
+        raise RuntimeError("progress sink down")
+
+    async def scenario():
+        return await asyncio.gather(
+            coordinator.wait("ds", "doc-1", on_progress=broken),
+            coordinator.wait("ds", "doc-2"),
+            return_exceptions=True,
+        )
+
+    failed, done = run_with(coordinator, scenario)
+
+    assert isinstance(failed, RuntimeError)
+    assert done["id"] == "doc-2"
+
+
+def test_crashed_dataset_poll_settles_its_waiters_and_polling_continues(monkeypatch):
+    fetch = FakeStatuses(checks=1)
+    coordinator = poller.PollCoordinator(fetch, min_interval=0.01, max_interval=0.01)
+    real_poll = coordinator._poll_dataset
+
+    async def flaky_poll(dataset_id):
+        if dataset_id == "ds-bad":
+            raise KeyError("boom")
+        await real_poll(dataset_id)
+
+    monkeypatch.setattr(coordinator, "_poll_dataset", flaky_poll)
+
+    async def scenario():
+        results = await asyncio.gather(
+            coordinator.wait("ds-bad", "doc-1"),
+            coordinator.wait("ds-good", "doc-2"),
+            return_exceptions=True,
+        )
+        return results, await coordinator.wait("ds-good", "doc-3")
+
+    (bad, good), later = run_with(coordinator, scenario)
+
+    assert isinstance(bad, KeyError)
+    assert good["id"] == "doc-2"
+    assert later["id"] == "doc-3"
+
+
+def test_cancelled_waiter_stops_being_polled():
+    fetch = FakeStatuses(checks=1000)
+    coordinator = poller.PollCoordinator(fetch, min_interval=0.01, max_interval=0.01)
+
+    async def scenario():
+        waiter = asyncio.create_task(coordinator.wait("ds", "doc-1"))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        calls = len(fetch.calls)
+        await asyncio.sleep(0.05)
+        return calls
+
+    calls = run_with(coordinator, scenario)
+
+    assert calls > 0
+    assert len(fetch.calls) == calls
+    assert coordinator.stats()["pending"] == 0
+
+
+def test_wait_requires_running_coordinator():
+    coordinator = poller.PollCoordinator(FakeStatuses())
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(coordinator.wait("ds", "doc-1"))
+
+    assert excinfo.value.status_code == 503
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/alert_store.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_alert_store():
+    module_path = ROOT / "conf" / "webhook-receiver" / "alert_store.py"
+    spec = importlib.util.spec_from_file_location("alert_store_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load alert_store from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["alert_store_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+alert_store = load_alert_store()
+
+
+def _alert(name: str, service: str = "api", severity: str = "warning", status: str = "firing"):
+    return {
+        "labels": {"alertname": name, "service": service, "severity": severity},
+        "annotations": {"summary": name},
+        "status": status,
+        "startsAt": "2025-01-01T00:00:00Z",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    db = alert_store.AlertStore(tmp_path / "alerts.db")
+    yield db
+    db.close()
+
+
+def test_cursor_pagination_walks_all_rows_newest_first(store):
+    store.add([_alert(f"A{i}") for i in range(5)], "general")
+
+    names: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        page, cursor = store.query(limit=2, cursor=cursor)
+        names.extend(a["alertname"] for a in page)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert names == ["A4", "A3", "A2", "A1", "A0"]
+    assert pages == 3
+
+
+def test_filters_combine(store):
+    store.add(
+        [
+            _alert("Disk", service="db", severity="critical"),
+            _alert("Disk", service="db", severity="critical", status="resolved"),
+            _alert("CPU", service="api", severity="critical"),
+        ],
+        "critical",
+    )
+
+    page, _ = store.query(service="db", status="firing")
+    assert [(a["alertname"], a["status"]) for a in page] == [("Disk", "firing")]
+    page, _ = store.query(severity="critical")
+    assert len(page) == 3
+    assert page[0]["labels"]["service"] == "api"
+    assert page[0]["annotations"] == {"summary": "CPU"}
+
+
+def test_since_filter_and_unknown_filter(store):
+    store.add([_alert("Old")])
+    page, _ = store.query(since=time.time() + 60)
+    assert page == []
+    with pytest.raises(ValueError):
+        store.query(instance="x")
+
+
+def test_retention_prunes_old_rows_on_open(tmp_path):
+    path = tmp_path / "alerts.db"
+    db = alert_store.AlertStore(path, retention_days=0)
+    db.add([_alert("A")])
+    db._conn.execute("UPDATE alerts SET received_at = received_at - 10 * 86400")
+    db.close()
+
+    reopened = alert_store.AlertStore(path, retention_days=7)
+    assert reopened.query()[0] == []
+    reopened.close()
+
+
+def test_retention_prunes_old_rows_while_running(tmp_path):
+    db = alert_store.AlertStore(tmp_path / "alerts.db", retention_days=7, prune_interval=0)
+    db.add([_alert("Old")])
+    db._conn.execute("UPDATE alerts SET received_at = received_at - 10 * 86400")
+
+    db.add([_alert("New")])
+
+    alerts, _ = db.query()
+    assert [a["alertname"] for a in alerts] == ["New"]
+    db.close()
+
+
+def test_parse_since_accepts_epoch_and_iso():
+    assert alert_store.parse_since("1700000000") == 1700000000.0
+    assert alert_store.parse_since("2023-11-14T22:13:20Z") == 1700000000.0
+    with pytest.raises(ValueError):
+        alert_store.parse_since("yesterday")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/asgi.py."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import flask  # noqa: F401
+except ImportError:  # pragma: no cover
+    pytest.skip("flask not installed", allow_module_level=True)
+
+ROOT = Path(__file__).resolve().parents[2]
+SECRET = "asgi-test-secret-1234567890"  # noqa: S105  # pragma: allowlist secret
+
+
+def load_asgi():
+    module_path = ROOT / "conf" / "webhook-receiver" / "asgi.py"
+    spec = importlib.util.spec_from_file_location("webhook_asgi", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load asgi from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["webhook_asgi"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+asgi = load_asgi()
+
+
+@pytest.fixture(autouse=True)
+def _secret(monkeypatch):
+    monkeypatch.setattr(
+        asgi.receiver, "signature_verifier", asgi.receiver.SignatureVerifier(SECRET)
+    )
+    asgi.receiver.alert_deduplicator.clear()
+    yield
+
+
+def call(method, path, body=b"", headers=None, client="10.1.0.1"):
+    """Run one request through the ASGI app and return (status, json body)."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": (client, 5000),
+    }
+
+    async def run():
+        await asgi.app(scope, receive, send)
+        await asgi.drain()
+
+    asyncio.run(run())
+    status = sent[0]["status"]
+    return status, json.loads(sent[1]["body"])
+
+
+def _signed(payload: dict) -> tuple[bytes, dict]:
+    raw = json.dumps(payload).encode()
+    sig = hmac.new(SECRET.encode(), raw, hashlib.sha256).hexdigest()
+    return raw, {"X-Signature": sig, "Content-Type": "application/json"}
+
+
+def test_routes_mirror_flask_webhook_routes():
+    expected = {f"/webhook{suffix}" for suffix, _, _ in asgi.receiver.WEBHOOK_ROUTES}
+    assert set(asgi.ROUTES) == expected
+
+
+def test_accepted_payload_is_processed_in_background(monkeypatch):
+    saved, processed = [], []
+    monkeypatch.setattr(asgi.receiver, "save_alert_to_file", lambda d, t: saved.append((d, t)))
+    monkeypatch.setattr(asgi.receiver, "process_alert", lambda d, t: processed.append(t))
+    raw, headers = _signed(
+        {"alerts": [{"labels": {"alertname": "A", "severity": "CRITICAL"}, "status": "firing"}]}
+    )
+
+    status, body = call("POST", "/webhook/critical", raw, headers, client="10.1.0.2")
+
+    assert status == 202
+    assert body["status"] == "accepted"
+    assert processed == ["critical"]
+    assert saved[0][0]["alerts"][0]["labels"]["severity"] == "critical"
+
+
+def test_rejects_bad_auth_invalid_json_and_invalid_payload():
+    status, _ = call("POST", "/webhook", b"{}", client="10.1.0.3")
+    assert status == 401
+
+    raw, headers = _signed({})
+    bad_json = b"{not json"
+    headers["X-Signature"] = hmac.new(SECRET.encode(), bad_json, hashlib.sha256).hexdigest()
+    status, body = call("POST", "/webhook", bad_json, headers, client="10.1.0.3")
+    assert (status, body["error"]) == (400, "Invalid JSON payload")
+
+    raw, headers = _signed({"alerts": [{"labels": {}, "status": "firing"}]})
+    status, body = call("POST", "/webhook", raw, headers, client="10.1.0.3")
+    assert (status, body["error"]) == (400, "Invalid request payload")
+
+
+def test_bearer_token_and_duplicate_suppression(monkeypatch):
+    monkeypatch.setattr(asgi.receiver, "save_alert_to_file", lambda d, t: None)
+    monkeypatch.setattr(asgi.receiver, "process_alert", lambda d, t: None)
+    raw = json.dumps({"alerts": [{"labels": {"alertname": "B"}, "status": "firing"}]}).encode()
+    headers = {"Authorization": f"Bearer {SECRET}"}
+
+    assert call("POST", "/webhook/gpu", raw, headers, client="10.1.0.4")[0] == 202
+    status, body = call("POST", "/webhook/gpu", raw, headers, client="10.1.0.4")
+    assert status == 200
+    assert body["duplicates"] == 1
+
+
+def test_oversized_body_rate_limit_and_unknown_route(monkeypatch):
+    monkeypatch.setattr(asgi, "ASGI_MAX_BODY_BYTES", 10)
+    assert call("POST", "/webhook/ai", b"x" * 11, client="10.1.0.5")[0] == 413
+
+    statuses = [call("POST", "/webhook/ai", b"x" * 11, client="10.1.0.6")[0] for _ in range(11)]
+    assert statuses[-1] == 429
+    assert call("GET", "/nope")[0] == 404
+    assert call("GET", "/webhook")[0] == 405
+
+
+def test_health():
+    status, body = call("GET", "/health", client="10.1.0.7")
+    assert status == 200
+    assert body["status"] == "healthy"
+
+
+def _lifespan(*messages):
+    pending = [{"type": m} for m in messages]
+    sent = []
+
+    async def receive():
+        return pending.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.app({"type": "lifespan"}, receive, send))
+    return sent
+
+
+def test_lifespan_startup_fails_explicitly_on_bad_secret(monkeypatch):
+    def invalid(exit_on_error=False):
+        raise RuntimeError("Missing required ALERTMANAGER_WEBHOOK_SECRET")
+
+    monkeypatch.setattr(asgi.receiver, "_validate_secrets", invalid)
+
+    assert _lifespan("lifespan.startup") == [
+        {
+            "type": "lifespan.startup.failed",
+            "message": "Missing required ALERTMANAGER_WEBHOOK_SECRET",
+        }
+    ]
+
+
+def test_lifespan_startup_and_shutdown_complete(monkeypatch):
+    monkeypatch.setattr(asgi.receiver, "_validate_secrets", lambda exit_on_error=False: None)
+
+    assert [m["type"] for m in _lifespan("lifespan.startup", "lifespan.shutdown")] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
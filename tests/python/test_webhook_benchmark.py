@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Tests for the webhook benchmark harness in tests/load/webhook_benchmark.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import flask  # noqa: F401
+except ImportError:  # pragma: no cover
+    pytest.skip("flask not installed", allow_module_level=True)
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_benchmark():
+    module_path = ROOT / "tests" / "load" / "webhook_benchmark.py"
+    spec = importlib.util.spec_from_file_location("webhook_benchmark", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load benchmark from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["webhook_benchmark"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+bench = load_benchmark()
+
+
+def test_build_requests_uses_example_client_payloads():
+    config = bench.BenchmarkConfig(requests=3, endpoints=("critical",), alerts_per_payload=2)
+    prepared = bench.build_requests(config)
+
+    path, body, headers = prepared[0]
+    payload = json.loads(body)
+    assert path == "/webhook/critical"
+    assert len(payload["alerts"]) == 2
+    assert payload["alerts"][0]["labels"]["severity"] == "critical"
+    assert payload["version"] == "4"
+    assert len(headers["X-Signature"]) == 64
+
+
+def test_percentiles():
+    values = [i / 1000 for i in range(1, 101)]
+    summary = bench._distribution(values)
+    assert (summary["p50"], summary["p95"], summary["p99"]) == (50.0, 95.0, 99.0)
+    assert bench._distribution([]) == {"count": 0}
+
+
+@pytest.mark.parametrize(
+    ("target", "channels"),
+    [("receiver", 0), ("handler", 6)],
+)
+def test_in_process_run_reports_latency_stages_and_notifications(target, channels):
+    previous = sys.modules.get(f"webhook_{target}")
+    config = bench.BenchmarkConfig(target=target, requests=6, concurrency=3)
+
+    report = bench.run_benchmark(config)
+
+    assert report["status_codes"] == {"200": 6}
+    assert report["errors"] == 0
+    assert report["rps"] > 0
+    assert report["latency_ms"]["count"] == 6
+    assert {"signature", "validation", "dispatch"} <= report["stages_ms"].keys()
+    assert report["stages_ms"]["signature"]["count"] == 6
+    assert report["notifications"]["discord"] == channels
+    assert "secret" not in report["config"]
+    # The target module is unloaded again so other tests keep their instance
+    assert sys.modules.get(f"webhook_{target}") is previous
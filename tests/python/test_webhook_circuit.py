@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/circuit.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_circuit():
+    module_path = ROOT / "conf" / "webhook-receiver" / "circuit.py"
+    spec = importlib.util.spec_from_file_location("circuit_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load circuit from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["circuit_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+circuit = load_circuit()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_consecutive_failures_and_short_circuits():
+    breakers = circuit.ChannelBreakers(failure_threshold=3, reset_timeout=30, clock=FakeClock())
+
+    for ok in (False, False, True, False, False):
+        assert breakers.allow("slack") is True
+        breakers.record("slack", ok)
+    assert breakers.status()["slack"]["state"] == circuit.STATE_CLOSED
+
+    breakers.record("slack", False)
+
+    assert breakers.allow("slack") is False
+    assert breakers.allow("discord") is True
+    status = breakers.status()["slack"]
+    assert status["state"] == circuit.STATE_OPEN
+    assert status["short_circuited"] == 1
+    assert status["opened"] == 1
+    assert status["retry_after_seconds"] == 30
+
+
+def test_half_open_allows_one_probe_and_closes_on_success():
+    clock = FakeClock()
+    breakers = circuit.ChannelBreakers(failure_threshold=1, reset_timeout=30, clock=clock)
+    breakers.record("slack", False)
+
+    clock.now += 30
+
+    assert breakers.allow("slack") is True
+    assert breakers.allow("slack") is False
+    assert breakers.status()["slack"]["state"] == circuit.STATE_HALF_OPEN
+
+    breakers.record("slack", True)
+
+    assert breakers.allow("slack") is True
+    assert breakers.status()["slack"]["consecutive_failures"] == 0
+    assert breakers.retry_after("slack") == 0
+
+
+def test_failed_probe_reopens_for_another_timeout():
+    clock = FakeClock()
+    breakers = circuit.ChannelBreakers(failure_threshold=2, reset_timeout=10, clock=clock)
+    breakers.record("telegram", False)
+    breakers.record("telegram", False)
+    clock.now += 10
+    assert breakers.allow("telegram") is True
+
+    breakers.record("telegram", False)
+
+    assert breakers.allow("telegram") is False
+    assert breakers.retry_after("telegram") == 10
+    clock.now += 10
+    assert breakers.allow("telegram") is True
+
+
+def test_zero_threshold_disables_breaking():
+    breakers = circuit.ChannelBreakers(failure_threshold=0)
+    for _ in range(10):
+        breakers.record("slack", False)
+
+    assert breakers.allow("slack") is True
+    assert breakers.status() == {}
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/coalescer.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_coalescer():
+    module_path = ROOT / "conf" / "webhook-receiver" / "coalescer.py"
+    spec = importlib.util.spec_from_file_location("coalescer_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load coalescer from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["coalescer_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+coalescer = load_coalescer()
+
+
+def test_digest_key_groups_by_labels_service_severity_status():
+    base = {
+        "group_labels": {"alertname": "HighCPU", "cluster": "a"},
+        "service": "api",
+        "severity": "warning",
+        "status": "firing",
+    }
+    same = {**base, "group_labels": {"cluster": "a", "alertname": "HighCPU"}, "instance": "x"}
+
+    assert coalescer.digest_key(base) == coalescer.digest_key(same)
+    assert coalescer.digest_key(base) != coalescer.digest_key({**base, "severity": "critical"})
+    assert coalescer.digest_key(base) != coalescer.digest_key({**base, "status": "resolved"})
+
+
+def test_messages_within_window_are_flushed_once():
+    flushed: list[list[dict]] = []
+    done = threading.Event()
+
+    def flush(messages):
+        flushed.append(messages)
+        done.set()
+
+    digest = coalescer.DigestCoalescer(window=0.05, flush=flush)
+    digest.add("k", [{"alert_name": "A"}])
+    digest.add("k", [{"alert_name": "B"}, {"alert_name": "C"}])
+    assert digest.pending() == 3
+
+    assert done.wait(timeout=5)
+    assert [m["alert_name"] for m in flushed[0]] == ["A", "B", "C"]
+    assert len(flushed) == 1
+    assert digest.pending() == 0
+
+
+def test_flush_all_drains_open_groups_immediately():
+    flushed: list[list[dict]] = []
+    digest = coalescer.DigestCoalescer(window=60, flush=flushed.append)
+    digest.add("a", [{"alert_name": "A"}])
+    digest.add("b", [{"alert_name": "B"}])
+
+    digest.flush_all()
+
+    assert sorted(m[0]["alert_name"] for m in flushed) == ["A", "B"]
+    assert digest.pending() == 0
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/dedup.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_dedup():
+    module_path = ROOT / "conf" / "webhook-receiver" / "dedup.py"
+    spec = importlib.util.spec_from_file_location("dedup_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load dedup from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["dedup_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+dedup = load_dedup()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _alert(name: str, status: str = "firing", **labels) -> dict:
+    return {"labels": {"alertname": name, **labels}, "status": status}
+
+
+def test_fingerprint_is_stable_across_label_order_and_ignores_annotations():
+    a = {"labels": {"alertname": "X", "service": "api"}, "status": "firing"}
+    b = {
+        "labels": {"service": "api", "alertname": "X", "gpu_id": None},
+        "status": "resolved",
+        "annotations": {"summary": "changes every time"},
+    }
+    assert dedup.alert_fingerprint(a) == dedup.alert_fingerprint(b)
+    assert dedup.alert_fingerprint(a) != dedup.alert_fingerprint(
+        {"labels": {"alertname": "X", "service": "api", "instance": "b"}}
+    )
+
+
+def test_fingerprint_prefers_alertmanager_fingerprint():
+    assert dedup.alert_fingerprint({"fingerprint": "abc123", "labels": {"alertname": "X"}}) == (
+        "abc123"
+    )
+
+
+def test_same_alertname_on_other_instances_is_not_a_duplicate():
+    cache = dedup.AlertDeduplicator(ttl=60, clock=FakeClock())
+
+    assert cache.is_duplicate(_alert("Disk", instance="a", mountpoint="/x")) is False
+    assert cache.is_duplicate(_alert("Disk", instance="b", mountpoint="/x")) is False
+    assert cache.is_duplicate(_alert("Disk", instance="a", mountpoint="/y")) is False
+    assert cache.is_duplicate(_alert("Disk", instance="a", mountpoint="/x")) is True
+
+
+def test_refire_after_resolve_is_not_suppressed():
+    cache = dedup.AlertDeduplicator(ttl=14400, clock=FakeClock())
+
+    assert cache.is_duplicate(_alert("Disk", instance="a")) is False
+    assert cache.is_duplicate(_alert("Disk", "resolved", instance="a")) is False
+    assert cache.is_duplicate(_alert("Disk", "resolved", instance="a")) is True
+    assert cache.is_duplicate(_alert("Disk", instance="a")) is False
+
+
+def test_new_firing_episode_is_not_suppressed():
+    cache = dedup.AlertDeduplicator(ttl=14400, clock=FakeClock())
+    first = {**_alert("Disk"), "fingerprint": "f1", "startsAt": "2025-01-01T00:00:00Z"}
+    repeat = {**first, "annotations": {"value": "91%"}}
+    refired = {**first, "startsAt": "2025-01-01T02:00:00Z"}
+
+    assert cache.is_duplicate(first) is False
+    assert cache.is_duplicate(repeat) is True
+    assert cache.is_duplicate(refired) is False
+
+
+def test_duplicates_are_suppressed_until_ttl_expires():
+    clock = FakeClock()
+    cache = dedup.AlertDeduplicator(ttl=60, clock=clock)
+
+    assert cache.is_duplicate(_alert("Disk")) is False
+    assert cache.is_duplicate(_alert("Disk")) is True
+    clock.now += 61
+    assert cache.is_duplicate(_alert("Disk")) is False
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_bounds_size():
+    cache = dedup.AlertDeduplicator(ttl=60, max_size=2, clock=FakeClock())
+    cache.is_duplicate(_alert("A"))
+    cache.is_duplicate(_alert("B"))
+    # Touch A so B becomes least recently used
+    assert cache.is_duplicate(_alert("A")) is True
+    cache.is_duplicate(_alert("C"))
+
+    assert cache.stats()["size"] == 2
+    assert cache.is_duplicate(_alert("A")) is True
+    assert cache.is_duplicate(_alert("B")) is False
+
+
+def test_filter_new_and_forget():
+    cache = dedup.AlertDeduplicator(ttl=60, clock=FakeClock())
+    alerts = [_alert("A"), _alert("A"), _alert("B")]
+
+    fresh = cache.filter_new(alerts)
+    assert [a["labels"]["alertname"] for a in fresh] == ["A", "B"]
+
+    cache.forget([_alert("B")])
+    assert cache.filter_new([_alert("A"), _alert("B")]) == [_alert("B")]
+
+    # Forgetting a stale event leaves the newer one in place
+    cache.is_duplicate(_alert("A", "resolved"))
+    cache.forget([_alert("A")])
+    assert cache.is_duplicate(_alert("A", "resolved")) is True
+
+
+def test_zero_ttl_disables_deduplication():
+    cache = dedup.AlertDeduplicator(ttl=0)
+    assert cache.is_duplicate(_alert("A")) is False
+    assert cache.is_duplicate(_alert("A")) is False
+    assert cache.stats()["enabled"] is False
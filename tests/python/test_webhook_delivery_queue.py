@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/delivery_queue.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_delivery_queue():
+    module_path = ROOT / "conf" / "webhook-receiver" / "delivery_queue.py"
+    spec = importlib.util.spec_from_file_location("delivery_queue_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load delivery_queue from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["delivery_queue_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+dq = load_delivery_queue()
+
+
+class InlineDispatcher:
+    """Dispatcher stand-in that runs submitted work synchronously."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def test_enqueue_claim_ack_roundtrip(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db")
+    delivery_id = queue.enqueue("slack", {"alert_name": "Disk"})
+
+    claimed = queue.claim_due(limit=10)
+    assert [d.id for d in claimed] == [delivery_id]
+    assert claimed[0].payload == {"alert_name": "Disk"}
+    # Claimed rows are not handed out twice
+    assert queue.claim_due(limit=10) == []
+
+    queue.ack(delivery_id)
+    assert queue.stats()["depth"] == 0
+
+
+def test_retry_backoff_and_dead_letter(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db", max_attempts=2, base_delay=10, max_delay=60)
+    delivery_id = queue.enqueue("discord", {"alert_name": "X"}, claimed=True)
+
+    assert queue.retry(delivery_id, attempts=1, error="boom") is True
+    # Not due yet because of backoff
+    assert queue.claim_due(limit=10) == []
+    assert len(queue.claim_due(limit=10, now=10**12)) == 1
+
+    assert queue.retry(delivery_id, attempts=2, error="boom") is False
+    stats = queue.stats()
+    assert stats["depth"] == 0
+    assert stats["dead"] == 1
+
+
+def test_dead_letters_are_purged_after_retention(tmp_path):
+    path = tmp_path / "q.db"
+    queue = dq.DeliveryQueue(path, max_attempts=1, dead_retention=60)
+    old_id = queue.enqueue("slack", {"n": 1}, claimed=True)
+    assert queue.retry(old_id, attempts=1, error="boom") is False
+    queue._conn.execute("UPDATE deliveries SET next_attempt_at = next_attempt_at - 120")
+
+    # A newly dead delivery purges the expired one and is itself kept
+    new_id = queue.enqueue("slack", {"n": 2}, claimed=True)
+    assert queue.retry(new_id, attempts=1, error="boom") is False
+    assert queue.stats()["dead"] == 1
+    assert queue.purge_dead(before=time.time() + 1) == 1
+    assert queue.stats()["dead"] == 0
+    queue.close()
+
+    forever = dq.DeliveryQueue(path, max_attempts=1, dead_retention=0)
+    kept = forever.enqueue("slack", {"n": 3}, claimed=True)
+    forever.retry(kept, attempts=1)
+    forever._conn.execute("UPDATE deliveries SET next_attempt_at = 0")
+    forever.close()
+    assert dq.DeliveryQueue(path, dead_retention=0).stats()["dead"] == 1
+    # Opening with a retention purges what expired while the queue was closed
+    assert dq.DeliveryQueue(path, dead_retention=60).stats()["dead"] == 0
+
+
+def test_backoff_is_exponential_with_jitter_and_capped(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db", base_delay=2, max_delay=30)
+    assert 1 <= queue.backoff(1) <= 2
+    assert 4 <= queue.backoff(3) <= 8
+    assert 15 <= queue.backoff(10) <= 30
+
+
+def test_inflight_rows_survive_restart_once_the_lease_expires(tmp_path):
+    path = tmp_path / "q.db"
+    queue = dq.DeliveryQueue(path, lease=30)
+    queue.enqueue("telegram", {"alert_name": "Crash"}, claimed=True)
+    queue.close()
+
+    reopened = dq.DeliveryQueue(path, lease=30)
+    # Another live process may still own the row
+    assert reopened.claim_due(limit=10) == []
+    claimed = reopened.claim_due(limit=10, now=time.time() + 31)
+    assert [d.channel for d in claimed] == ["telegram"]
+    # The reclaim renews the lease
+    assert reopened.claim_due(limit=10, now=time.time() + 32) == []
+
+
+def test_concurrent_claimers_never_share_a_row(tmp_path):
+    path = tmp_path / "q.db"
+    queues = [dq.DeliveryQueue(path) for _ in range(2)]
+    for i in range(200):
+        queues[0].enqueue("slack", {"n": i})
+    claimed: list[list[int]] = [[], []]
+    start = threading.Barrier(2)
+
+    def drain(index):
+        start.wait()
+        while batch := queues[index].claim_due(limit=3):
+            claimed[index].extend(d.id for d in batch)
+
+    threads = [threading.Thread(target=drain, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not set(claimed[0]) & set(claimed[1])
+    assert len(claimed[0]) + len(claimed[1]) == 200
+
+
+def test_claim_can_be_limited_to_one_channel(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db")
+    queue.enqueue("slack", {})
+    queue.enqueue("discord", {})
+
+    assert [d.channel for d in queue.claim_due(limit=10, channel="discord")] == ["discord"]
+    assert [d.channel for d in queue.claim_due(limit=10)] == ["slack"]
+
+
+def test_stats_reports_depth_per_channel_and_age(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db")
+    queue.enqueue("slack", {})
+    queue.enqueue("slack", {})
+    queue.enqueue("discord", {})
+
+    stats = queue.stats()
+    assert stats["depth"] == 3
+    assert stats["channels"] == {"slack": 2, "discord": 1}
+    assert stats["oldest_age_seconds"] >= 0
+
+
+def test_worker_retries_failed_delivery_until_success(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db", base_delay=0, max_delay=0)
+    worker = dq.DeliveryWorker(queue, InlineDispatcher())
+    outcomes = iter([False, RuntimeError("down"), True])
+    seen = []
+
+    def sender(payload):
+        seen.append(payload)
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    worker.register("slack", sender)
+
+    assert worker.submit("slack", {"alert_name": "A"}).result() is False
+    assert worker.drain_once() == 1
+    assert worker.drain_once() == 1
+    assert worker.drain_once() == 0
+    assert len(seen) == 3
+    assert queue.stats()["depth"] == 0
+
+
+def test_deferred_delivery_keeps_its_attempts(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db", base_delay=0, max_delay=0)
+    worker = dq.DeliveryWorker(queue, InlineDispatcher())
+
+    def sender(payload):
+        raise dq.DeferDelivery(60, "slack circuit open")
+
+    worker.register("slack", sender)
+
+    assert worker.submit("slack", {"alert_name": "A"}).result() is False
+    assert worker.drain_once() == 0
+    assert queue.claim_due(limit=10, now=time.time() + 61)[0].attempts == 0
+
+
+def test_saturated_channel_does_not_block_other_channels(tmp_path):
+    queue = dq.DeliveryQueue(tmp_path / "q.db")
+    released = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=2)
+
+    class PoolDispatcher:
+        def submit(self, fn, *args):
+            return pool.submit(fn, *args)
+
+    worker = dq.DeliveryWorker(queue, PoolDispatcher(), channel_limit=1)
+    worker.register("slack", lambda payload: released.wait(5))
+    worker.register("discord", lambda payload: True)
+    try:
+        slow = worker.submit("slack", {"n": 1})
+        # The second slack delivery stays queued instead of holding a pool thread
+        assert worker.submit("slack", {"n": 2}).result(timeout=1) is False
+        assert worker.submit("discord", {"n": 3}).result(timeout=1) is True
+        assert worker.drain_once() == 0
+        assert queue.stats()["channels"] == {"slack": 2}
+
+        released.set()
+        assert slow.result(timeout=5) is True
+        deadline = time.time() + 5
+        while queue.stats()["depth"] and time.time() < deadline:
+            worker.drain_once()
+            time.sleep(0.01)
+        assert queue.stats()["depth"] == 0
+    finally:
+        released.set()
+        pool.shutdown(wait=True)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/dispatcher.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+try:
+    import requests  # noqa: F401
+except ImportError:  # pragma: no cover
+    pytest.skip("requests not installed", allow_module_level=True)
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_dispatcher():
+    module_path = ROOT / "conf" / "webhook-receiver" / "dispatcher.py"
+    spec = importlib.util.spec_from_file_location("dispatcher_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load dispatcher from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["dispatcher_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_session_is_reused_per_channel():
+    dispatcher = load_dispatcher().NotificationDispatcher(max_workers=2)
+    try:
+        assert dispatcher.session("discord") is dispatcher.session("discord")
+        assert dispatcher.session("discord") is not dispatcher.session("slack")
+    finally:
+        dispatcher.shutdown()
+
+
+def test_submit_runs_deliveries_concurrently():
+    """Three blocking deliveries must overlap instead of running back to back."""
+    dispatcher = load_dispatcher().NotificationDispatcher(max_workers=3)
+    barrier = threading.Barrier(3, timeout=5)
+
+    def deliver(channel: str) -> str:
+        barrier.wait()
+        return channel
+
+    try:
+        futures = [dispatcher.submit(deliver, ch) for ch in ("discord", "slack", "telegram")]
+        assert [f.result(timeout=5) for f in futures] == ["discord", "slack", "telegram"]
+    finally:
+        dispatcher.shutdown()
+
+
+def test_shutdown_closes_sessions_and_allows_reuse():
+    dispatcher = load_dispatcher().NotificationDispatcher(max_workers=1)
+    first = dispatcher.session("slack")
+    dispatcher.submit(lambda: None).result(timeout=5)
+    dispatcher.shutdown()
+
+    assert dispatcher.session("slack") is not first
+    assert dispatcher.submit(lambda: 42).result(timeout=5) == 42
+    dispatcher.shutdown()
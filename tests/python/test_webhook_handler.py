@@ -36,6 +36,8 @@ class WebhookModule(Protocol):
     TELEGRAM_CHAT_ID: str
     NOTIFICATION_TIMEOUT: int
     WEBHOOK_SECRET: str
+    SignatureVerifier: Any
+    signature_verifier: Any
     AlertLabels: Any
     AlertPayload: Any
     AlertProcessor: Any
@@ -44,6 +46,11 @@ class WebhookModule(Protocol):
     _validate_secrets: Any
     _validate_request: Any
     alert_processor: Any
+    load_channel_templates: Any
+    ChannelBreakers: Any
+    notification_breakers: Any
+    smtplib: Any
+    WebhookMetrics: Any
 
 
 def load_webhook_handler() -> WebhookModule:
@@ -80,7 +87,7 @@ class TestAlertProcessorCore(unittest.TestCase):
         self.assertEqual(result["processed"], 0)
         self.assertEqual(result["errors"], [])
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_process_alerts_sends_notifications(self, mock_post: MagicMock):
         # Configure fake endpoints
         webhook_handler.DISCORD_WEBHOOK_URL = "http://discord.example"
@@ -118,7 +125,7 @@ class TestAlertProcessorCore(unittest.TestCase):
         self.assertEqual(result["processed"], 1)
         self.assertEqual(mock_post.call_count, 3)
 
-    @patch("requests.post", side_effect=Exception("network error"))
+    @patch("requests.Session.post", side_effect=Exception("network error"))
     def test_process_alerts_handles_send_failures(self, mock_post: MagicMock):
         webhook_handler.DISCORD_WEBHOOK_URL = "http://discord.example"
         processor = AlertProcessor()
@@ -181,7 +188,7 @@ class TestAlertLabelValidation(unittest.TestCase):
 class TestDiscordNotification(unittest.TestCase):
     """Test suite for Discord notification."""
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_discord_notification_formatting(self, mock_post: MagicMock):
         """Test that Discord notification is formatted correctly."""
         webhook_handler.DISCORD_WEBHOOK_URL = "http://discord.example"
@@ -224,7 +231,7 @@ class TestDiscordNotification(unittest.TestCase):
         self.assertEqual(embed["color"], 0xFF0000)  # Critical = red
         self.assertIn("🚨", embed["title"])  # Critical emoji
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_discord_notification_with_warning_severity(self, mock_post: MagicMock):
         """Test Discord notification with warning severity."""
         webhook_handler.DISCORD_WEBHOOK_URL = "http://discord.example"
@@ -259,7 +266,7 @@ class TestDiscordNotification(unittest.TestCase):
 class TestSlackNotification(unittest.TestCase):
     """Test suite for Slack notification."""
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_slack_notification_formatting(self, mock_post: MagicMock):
         """Test that Slack notification is formatted correctly."""
         webhook_handler.DISCORD_WEBHOOK_URL = ""
@@ -295,7 +302,7 @@ class TestSlackNotification(unittest.TestCase):
 class TestTelegramNotification(unittest.TestCase):
     """Test suite for Telegram notification."""
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_telegram_notification_formatting(self, mock_post: MagicMock):
         """Test that Telegram notification is formatted correctly."""
         webhook_handler.DISCORD_WEBHOOK_URL = ""
@@ -330,7 +337,7 @@ class TestTelegramNotification(unittest.TestCase):
 class TestMultipleAlerts(unittest.TestCase):
     """Test suite for processing multiple alerts."""
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_process_multiple_alerts(self, mock_post: MagicMock):
         """Test processing multiple alerts in single payload."""
         webhook_handler.DISCORD_WEBHOOK_URL = "http://discord.example"
@@ -486,13 +493,10 @@ class TestSignatureVerification(unittest.TestCase):
 
         expected_signature = hmac.new(test_secret.encode(), test_body, hashlib.sha256).hexdigest()
 
-        original_secret = webhook_handler.WEBHOOK_SECRET
-        try:
-            webhook_handler.WEBHOOK_SECRET = test_secret
+        verifier = webhook_handler.SignatureVerifier(test_secret)
+        with patch.object(webhook_handler, "signature_verifier", verifier):
             result = verify_signature(test_body, expected_signature)
             self.assertTrue(result)
-        finally:
-            webhook_handler.WEBHOOK_SECRET = original_secret
 
     def test_verify_signature_with_invalid_signature(self):
         """Test that invalid signatures are rejected."""
@@ -500,29 +504,23 @@ class TestSignatureVerification(unittest.TestCase):
         test_body = b"test webhook payload"
         invalid_signature = "invalid_signature_that_doesnt_match"  # noqa: S105 - test stub
 
-        original_secret = webhook_handler.WEBHOOK_SECRET
-        try:
-            webhook_handler.WEBHOOK_SECRET = test_secret
+        verifier = webhook_handler.SignatureVerifier(test_secret)
+        with patch.object(webhook_handler, "signature_verifier", verifier):
             result = verify_signature(test_body, invalid_signature)
             self.assertFalse(result)
-        finally:
-            webhook_handler.WEBHOOK_SECRET = original_secret
 
     def test_verify_signature_with_missing_signature(self):
         """Test that missing signatures are rejected."""
-        original_secret = webhook_handler.WEBHOOK_SECRET
-        try:
-            webhook_handler.WEBHOOK_SECRET = "some_secret"  # noqa: S105  # pragma: allowlist secret
+        verifier = webhook_handler.SignatureVerifier("some_secret")  # noqa: S105  # pragma: allowlist secret
+        with patch.object(webhook_handler, "signature_verifier", verifier):
             result = verify_signature(b"test", None)
             self.assertFalse(result)
-        finally:
-            webhook_handler.WEBHOOK_SECRET = original_secret
 
 
 class TestNotificationChannelCombinations(unittest.TestCase):
     """Test suite for combinations of notification channels."""
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_all_channels_enabled(self, mock_post: MagicMock):
         """Test sending to all notification channels."""
         webhook_handler.DISCORD_WEBHOOK_URL = "http://discord.example"
@@ -550,7 +548,7 @@ class TestNotificationChannelCombinations(unittest.TestCase):
         # All three channels should be called
         self.assertEqual(mock_post.call_count, 3)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_only_discord_enabled(self, mock_post: MagicMock):
         """Test sending only to Discord when other channels disabled."""
         webhook_handler.DISCORD_WEBHOOK_URL = "http://discord.example"
@@ -691,7 +689,7 @@ def test_send_discord_notification_connection_error(monkeypatch, caplog):
     def mock_post(*args, **kwargs):
         raise requests.ConnectionError("Failed to connect")
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
     monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://discord.com/webhook/test")
 
     message_data = {
@@ -715,7 +713,7 @@ def test_send_slack_notification_timeout_error(monkeypatch, caplog):
     def mock_post(*args, **kwargs):
         raise requests.Timeout("Request timed out")
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
     monkeypatch.setenv("SLACK_WEBHOOK_URL", "https://hooks.slack.com/test")
 
     message_data = {
@@ -738,7 +736,7 @@ def test_send_telegram_notification_network_error(monkeypatch, caplog):
     def mock_post(*args, **kwargs):
         raise requests.RequestException("Network unreachable")
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
     monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test_token")
     monkeypatch.setenv("TELEGRAM_CHAT_ID", "123456")
 
@@ -769,7 +767,7 @@ def test_notification_timeout_applied_to_discord(monkeypatch):
         timeout_used = kwargs.get("timeout")
         return MagicMock(status_code=200, json=lambda: {})
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
     monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://discord.com/webhook/test")
     monkeypatch.setenv("NOTIFICATION_TIMEOUT", "15")
     monkeypatch.setenv("ALERTMANAGER_WEBHOOK_SECRET", "x" * 16)
@@ -950,6 +948,17 @@ def test_health_check_response_format(client):
     assert data["service"] == "erni-ki-webhook-receiver"
 
 
+def test_notification_queue_stats_endpoint(client):
+    """Queue stats endpoint reports depth and backlog age."""
+    response = client.get("/notifications/queue")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert "enabled" in data
+    if data["enabled"]:
+        assert {"depth", "dead", "oldest_age_seconds", "channels"} <= data.keys()
+
+
 def test_health_check_under_load(client):
     """Test health check reliability under load."""
     # Make many rapid health check requests
@@ -1016,6 +1025,154 @@ def test_process_alerts_multiple_same_alertname():
     assert result["processed"] == 2
 
 
+def test_process_alerts_coalesces_group_into_single_digest(monkeypatch):
+    """Alerts sharing group/service/severity produce one message per channel."""
+    posts = []
+
+    def fake_post(self, url, **kwargs):
+        posts.append((url, kwargs["json"]))
+        return MagicMock()
+
+    monkeypatch.setattr(requests.Session, "post", fake_post)
+    monkeypatch.setattr(webhook_handler, "DISCORD_WEBHOOK_URL", "http://discord.example")
+    monkeypatch.setattr(webhook_handler, "SLACK_WEBHOOK_URL", "http://slack.example")
+    monkeypatch.setattr(webhook_handler, "TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setattr(webhook_handler, "TELEGRAM_CHAT_ID", "chat")
+
+    alerts_data = {
+        "groupLabels": {"alertname": "NodeDown"},
+        "alerts": [
+            {
+                "labels": {"alertname": "NodeDown", "severity": "critical", "instance": f"n{i}"},
+                "annotations": {"summary": f"node {i} down"},
+                "status": "firing",
+            }
+            for i in range(12)
+        ],
+    }
+
+    result = AlertProcessor().process_alerts(alerts_data)
+
+    assert result["processed"] == 12
+    assert sorted(result["notifications_sent"]) == ["discord", "slack", "telegram"]
+    discord = [p for url, p in posts if "discord" in url]
+    slack = [p for url, p in posts if "slack" in url]
+    telegram = [p for url, p in posts if "telegram" in url]
+    # Discord caps embeds per message at 10, so 12 alerts need two posts
+    assert [len(p["embeds"]) for p in discord] == [10, 2]
+    assert len(slack) == 1
+    assert len(slack[0]["attachments"]) == 12
+    assert len(telegram) == 1
+    assert "12 alerts" in telegram[0]["text"]
+    assert "n11" in telegram[0]["text"]
+
+
+def test_process_alerts_digest_window_merges_payloads():
+    """A positive digest window merges alerts from separate deliveries."""
+    processor = AlertProcessor(digest_window=60)
+    dispatched = []
+    processor.coalescer._flush = dispatched.append
+
+    alert = {"labels": {"alertname": "Disk", "severity": "warning"}, "status": "firing"}
+    first = processor.process_alerts({"alerts": [alert]})
+    processor.process_alerts({"alerts": [alert, alert]})
+
+    assert first["notifications_coalesced"] == 1
+    assert dispatched == []
+    processor.coalescer.flush_all()
+    assert [len(batch) for batch in dispatched] == [3]
+
+
+def test_shutdown_sends_held_digests_before_stopping_delivery():
+    """Digests still inside their window are dispatched by the exit hook."""
+    processor = AlertProcessor(digest_window=60)
+    calls = []
+    processor.coalescer._flush = lambda batch: calls.append(("flush", len(batch)))
+    worker = MagicMock()
+    worker.stop.side_effect = lambda: calls.append(("stop",))
+    dispatcher = MagicMock()
+    dispatcher.shutdown.side_effect = lambda wait: calls.append(("shutdown", wait))
+    queue = MagicMock()
+
+    alert = {"labels": {"alertname": "Disk", "severity": "warning"}, "status": "firing"}
+    processor.process_alerts({"alerts": [alert, alert]})
+    webhook_handler.shutdown_notifications(worker, dispatcher, queue, processor.coalescer)
+
+    assert calls == [("flush", 2), ("stop",), ("shutdown", True)]
+    queue.close.assert_called_once()
+    assert processor.coalescer.pending() == 0
+
+
+def test_process_alerts_skips_duplicates_before_dispatch(monkeypatch):
+    """Re-sent alerts are counted as duplicates and not notified again."""
+    dedup_cls = type(webhook_handler.alert_deduplicator)
+    processor = AlertProcessor(deduplicator=dedup_cls(ttl=60))
+    dispatched = []
+    monkeypatch.setattr(processor, "_dispatch_messages", lambda m: dispatched.append(m) or [])
+
+    alerts_data = {"alerts": [{"labels": {"alertname": "Flap"}, "status": "firing"}]}
+    first = processor.process_alerts(alerts_data)
+    second = processor.process_alerts(alerts_data)
+
+    assert first["duplicates"] == 0
+    assert second["duplicates"] == 1
+    assert second["processed"] == 1
+    assert len(dispatched) == 1
+
+
+def test_process_alerts_deduplicates_per_instance_and_episode(monkeypatch):
+    """Validated payloads keep every label, so other hosts and re-fires are notified."""
+    dedup_cls = type(webhook_handler.alert_deduplicator)
+    processor = AlertProcessor(deduplicator=dedup_cls(ttl=14400))
+    monkeypatch.setattr(processor, "_dispatch_messages", lambda m: [])
+
+    def send(status, *instances):
+        payload = webhook_handler.AlertPayload(
+            alerts=[
+                {
+                    "labels": {"alertname": "Disk", "instance": i, "mountpoint": "/x"},
+                    "status": status,
+                }
+                for i in instances
+            ]
+        )
+        return processor.process_alerts(payload.model_dump())["duplicates"]
+
+    assert send("firing", "a", "b") == 0
+    assert send("firing", "a") == 1
+    assert send("resolved", "a") == 0
+    assert send("firing", "a") == 0
+
+
+def test_process_alerts_background_dispatch_returns_immediately(monkeypatch):
+    """wait=False schedules deliveries and returns before they complete."""
+    import threading
+
+    release = threading.Event()
+    delivered = []
+
+    def slow_post(self, url, **kwargs):
+        release.wait(timeout=5)
+        delivered.append(url)
+        return MagicMock()
+
+    monkeypatch.setattr(requests.Session, "post", slow_post)
+    monkeypatch.setattr(webhook_handler, "DISCORD_WEBHOOK_URL", "http://discord.example")
+    monkeypatch.setattr(webhook_handler, "SLACK_WEBHOOK_URL", "http://slack.example")
+    monkeypatch.setattr(webhook_handler, "TELEGRAM_BOT_TOKEN", "")
+
+    processor = AlertProcessor()
+    alerts_data = {"alerts": [{"labels": {"alertname": "Slow"}, "status": "firing"}]}
+
+    result = processor.process_alerts(alerts_data, wait=False)
+
+    assert result["notifications_queued"] == 2
+    assert delivered == []
+    release.set()
+    processor.dispatcher.shutdown(wait=True)
+    assert sorted(delivered) == ["http://discord.example", "http://slack.example"]
+
+
 # ============================================================================
 # Tests for notification retry logic (if implemented)
 # ============================================================================
@@ -1032,7 +1189,7 @@ def test_notification_failure_logged_but_not_retried(monkeypatch, caplog):
         call_count += 1
         raise requests.RequestException("Simulated failure")
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
     monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://discord.com/webhook/test")
 
     message_data = {
@@ -1050,4 +1207,117 @@ def test_notification_failure_logged_but_not_retried(monkeypatch, caplog):
     assert "Failed to send Discord notification" in caplog.text
 
 
+def test_notification_outcomes_recorded_per_channel(monkeypatch):
+    """Per-channel success and failure counters are recorded for each delivery."""
+    metrics = webhook_handler.WebhookMetrics()
+    processor = AlertProcessor(metrics=metrics)
+    monkeypatch.setattr(webhook_handler, "DISCORD_WEBHOOK_URL", "https://discord.example")
+    monkeypatch.setattr(webhook_handler, "SLACK_WEBHOOK_URL", "https://slack.example")
+    monkeypatch.setattr(webhook_handler, "TELEGRAM_BOT_TOKEN", "")
+    monkeypatch.setattr(processor, "_send_discord_notification", lambda data: True)
+
+    def failing_slack(data):
+        raise requests.RequestException("boom")
+
+    monkeypatch.setattr(processor, "_send_slack_notification", failing_slack)
+
+    processor.process_alerts(
+        {
+            "alerts": [
+                {"labels": {"alertname": "Metered", "severity": "warning"}, "status": "firing"}
+            ]
+        }
+    )
+
+    def sample(channel, result):
+        return metrics.registry.get_sample_value(
+            "erni_ki_webhook_notifications_total", {"channel": channel, "result": result}
+        )
+
+    assert sample("discord", "success") == 1
+    assert sample("slack", "failure") == 1
+    assert sample("slack", "success") is None
+
+
+def test_metrics_endpoint_exposes_request_series():
+    """The /metrics endpoint renders the handler's Prometheus registry."""
+    client = app.test_client()
+    client.post("/webhook", data="not json", headers={"X-Signature": "bad"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert b"erni_ki_webhook_auth_failures_total" in response.data
+    assert b'route="/webhook"' in response.data
+
+
+def test_declarative_channels_are_delivered(monkeypatch):
+    """Channels declared only in channels.json are sent over HTTP and SMTP."""
+    templates = webhook_handler.load_channel_templates(
+        env={"TEAMS_WEBHOOK_URL": "https://teams.example", "ALERT_EMAIL_TO": "ops@example.com"}
+    )
+    processor = AlertProcessor(templates=templates)
+    for name in ("DISCORD_WEBHOOK_URL", "SLACK_WEBHOOK_URL", "TELEGRAM_BOT_TOKEN"):
+        monkeypatch.setattr(webhook_handler, name, "")
+    posted = []
+    session = MagicMock()
+    session.post.side_effect = lambda url, json, timeout: posted.append((url, json)) or MagicMock()
+    monkeypatch.setattr(processor.dispatcher, "session", lambda channel: session)
+    sent = []
+    smtp = MagicMock()
+    smtp.return_value.__enter__.return_value.send_message.side_effect = sent.append
+    monkeypatch.setattr(webhook_handler.smtplib, "SMTP", smtp)
+
+    result = processor.process_alerts(
+        {"alerts": [{"labels": {"alertname": "Declared", "severity": "critical"}}]}
+    )
+
+    assert sorted(result["notifications_sent"]) == ["email", "teams"]
+    assert posted[0][0] == "https://teams.example"
+    assert posted[0][1]["themeColor"] == "FF0000"
+    smtp.assert_called_once_with("localhost", 25, timeout=webhook_handler.NOTIFICATION_TIMEOUT)
+    assert sent[0]["To"] == "ops@example.com"
+    assert "Declared" in sent[0]["Subject"]
+
+
+def test_open_circuit_short_circuits_failing_channel(monkeypatch):
+    """After consecutive failures a channel is skipped without calling its sender."""
+    metrics = webhook_handler.WebhookMetrics()
+    breakers = webhook_handler.ChannelBreakers(failure_threshold=2, reset_timeout=60)
+    processor = AlertProcessor(metrics=metrics, breakers=breakers)
+    monkeypatch.setattr(webhook_handler, "DISCORD_WEBHOOK_URL", "")
+    monkeypatch.setattr(webhook_handler, "SLACK_WEBHOOK_URL", "https://slack.example")
+    monkeypatch.setattr(webhook_handler, "TELEGRAM_BOT_TOKEN", "")
+    calls = []
+    monkeypatch.setattr(
+        processor, "_send_slack_notification", lambda data: calls.append(data) and False
+    )
+    payload = {"alerts": [{"labels": {"alertname": "Down", "severity": "critical"}}]}
+
+    for _ in range(4):
+        processor.process_alerts(payload)
+
+    assert len(calls) == 2
+    assert breakers.status()["slack"]["state"] == "open"
+    assert (
+        metrics.registry.get_sample_value(
+            "erni_ki_webhook_notifications_short_circuited_total",
+            {"channel": "slack", "action": "dropped"},
+        )
+        == 2
+    )
+
+
+def test_health_reports_notification_channel_state(client, monkeypatch):
+    """The /health payload includes per-channel circuit state."""
+    breakers = webhook_handler.ChannelBreakers(failure_threshold=1)
+    breakers.record("discord", False)
+    # The client fixture loads its own module instance
+    monkeypatch.setattr(sys.modules["webhook_handler"], "notification_breakers", breakers)
+
+    data = client.get("/health").get_json()
+
+    assert data["notification_channels"]["discord"]["state"] == "open"
+
+
 # End of additional tests for webhook_handler.py
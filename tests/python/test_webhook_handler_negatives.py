@@ -38,7 +38,7 @@ def test_verify_signature_valid():
     body = b"{}"
     secret = "test-secret"  # noqa: S105  # pragma: allowlist secret
     os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = secret
-    wh.WEBHOOK_SECRET = secret
+    wh.signature_verifier.load(secret)
     sig = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
     assert wh.verify_signature(body, sig) is True
 
@@ -48,7 +48,7 @@ def test_verify_signature_invalid():
     body = b"{}"
     secret = "another-secret"  # noqa: S105  # pragma: allowlist secret
     os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = secret
-    wh.WEBHOOK_SECRET = secret
+    wh.signature_verifier.load(secret)
     assert wh.verify_signature(body, "bad") is False
 
 
@@ -67,7 +67,7 @@ def test_validate_request_missing_signature(monkeypatch):
             return {"alerts": []}
 
     monkeypatch.setattr(wh, "request", DummyReq())
-    wh.WEBHOOK_SECRET = "secret"  # noqa: S105  # pragma: allowlist secret
+    wh.signature_verifier.load("secret")  # noqa: S105  # pragma: allowlist secret
     try:
         wh._validate_request()
         raised = False
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/journal.py."""
+
+from __future__ import annotations
+
+import gzip
+import importlib.util
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_journal():
+    module_path = ROOT / "conf" / "webhook-receiver" / "journal.py"
+    spec = importlib.util.spec_from_file_location("journal_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load journal from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["journal_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+journal_mod = load_journal()
+
+
+def _payload(i: int) -> dict:
+    return {"alerts": [{"labels": {"alertname": f"A{i}"}, "status": "firing"}]}
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_records_are_written_as_json_lines(tmp_path):
+    journal = journal_mod.AlertJournal(tmp_path, flush_interval=0.01, compression="none")
+    for i in range(3):
+        journal.append(_payload(i), "critical")
+    assert journal.flush(timeout=5)
+
+    (segment,) = tmp_path.glob("journal-*.jsonl")
+    records = [json.loads(line) for line in segment.read_bytes().splitlines()]
+    assert [r["alert_type"] for r in records] == ["critical"] * 3
+    assert records[-1]["data"] == _payload(2)
+    journal.close()
+
+
+def test_segments_rotate_by_size_and_sealed_ones_are_gzipped(tmp_path):
+    journal = journal_mod.AlertJournal(
+        tmp_path, max_segment_bytes=1, flush_interval=0.01, compression="gzip"
+    )
+    journal.append(_payload(0))
+    journal.flush(timeout=5)
+    journal.append(_payload(1))
+    journal.flush(timeout=5)
+    journal.close()
+
+    assert _wait_for(
+        lambda: len(list(tmp_path.glob("*.jsonl.gz"))) == 2 and not list(tmp_path.glob("*.jsonl"))
+    )
+    lines = [
+        json.loads(gzip.decompress(p.read_bytes())) for p in sorted(tmp_path.glob("*.jsonl.gz"))
+    ]
+    assert sorted(line["data"]["alerts"][0]["labels"]["alertname"] for line in lines) == [
+        "A0",
+        "A1",
+    ]
+
+
+def test_segments_left_by_a_dead_process_are_compressed_on_open(tmp_path):
+    # After a container restart the old writer's pid belongs to a live process
+    orphan = tmp_path / f"journal-20250101T000000000000-{os.getpid()}.jsonl"
+    orphan.write_bytes(b'{"data":{}}\n')
+    (tmp_path / f"{orphan.name}.gz.tmp").write_bytes(b"x")
+    (tmp_path / "journal-20240101T000000000000-1.jsonl.gz.1.tmp").write_bytes(b"x")
+
+    journal = journal_mod.AlertJournal(tmp_path, flush_interval=0.01, compression="gzip")
+
+    assert _wait_for(lambda: not orphan.exists())
+    (archive,) = tmp_path.glob("*.jsonl.gz")
+    assert gzip.decompress(archive.read_bytes()) == b'{"data":{}}\n'
+    assert not list(tmp_path.glob("*.tmp"))
+    journal.close()
+
+
+def test_segment_held_by_a_live_writer_is_not_compressed(tmp_path):
+    writer = journal_mod.AlertJournal(tmp_path, flush_interval=0.01, compression="gzip")
+    writer.append(_payload(0))
+    assert writer.flush(timeout=5)
+    (live,) = tmp_path.glob("*.jsonl")
+
+    other = journal_mod.AlertJournal(tmp_path, flush_interval=0.01, compression="gzip")
+    time.sleep(0.1)
+
+    assert live.exists()
+    assert not list(tmp_path.glob("*.jsonl.gz"))
+    other.close()
+    writer.close()
+    assert not live.exists()
+
+
+def test_close_seals_the_active_segment(tmp_path):
+    journal = journal_mod.AlertJournal(tmp_path, flush_interval=0.01, compression="gzip")
+    journal.append(_payload(0))
+    journal.close()
+
+    assert not list(tmp_path.glob("*.jsonl"))
+    assert len(list(tmp_path.glob("*.jsonl.gz"))) == 1
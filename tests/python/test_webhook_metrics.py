@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/metrics.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    from flask import Flask, abort, jsonify
+except ImportError:
+    pytest.skip("flask not installed", allow_module_level=True)
+
+pytest.importorskip("prometheus_client")
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_metrics():
+    module_path = ROOT / "conf" / "webhook-receiver" / "metrics.py"
+    spec = importlib.util.spec_from_file_location("metrics_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load metrics from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["metrics_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+metrics_mod = load_metrics()
+
+
+def _sample(metrics, name: str, labels: dict[str, str] | None = None) -> float | None:
+    return metrics.registry.get_sample_value(name, labels or {})
+
+
+@pytest.fixture
+def app_and_metrics():
+    metrics = metrics_mod.WebhookMetrics()
+    app = Flask("metrics-test")
+    metrics.instrument(app)
+
+    @app.route("/hook/<kind>", methods=["POST"])
+    def hook(kind):
+        with metrics.stage("validation"):
+            pass
+        status = {"auth": 401, "bad": 400, "busy": 429}.get(kind, 200)
+        return jsonify({"kind": kind}), status
+
+    @app.route("/metrics")
+    def export():
+        return metrics.response()
+
+    return app, metrics
+
+
+def test_request_latency_is_labeled_by_route_template(app_and_metrics):
+    app, metrics = app_and_metrics
+    client = app.test_client()
+    client.post("/hook/one")
+    client.post("/hook/two")
+
+    labels = {"route": "/hook/<kind>", "method": "POST", "status": "200"}
+    assert _sample(metrics, "erni_ki_webhook_request_duration_seconds_count", labels) == 2
+    assert (
+        _sample(
+            metrics,
+            "erni_ki_webhook_stage_duration_seconds_count",
+            {"route": "/hook/<kind>", "stage": "validation"},
+        )
+        == 2
+    )
+    assert _sample(metrics, "erni_ki_webhook_requests_in_flight") == 0
+
+
+def test_rejections_are_counted_from_status_codes(app_and_metrics):
+    app, metrics = app_and_metrics
+    client = app.test_client()
+    client.post("/hook/auth")
+    client.post("/hook/bad")
+    client.post("/hook/busy")
+    client.post("/hook/busy")
+
+    route = {"route": "/hook/<kind>"}
+    assert _sample(metrics, "erni_ki_webhook_auth_failures_total", route) == 1
+    assert _sample(metrics, "erni_ki_webhook_validation_failures_total", route) == 1
+    assert _sample(metrics, "erni_ki_webhook_rate_limited_total", route) == 2
+
+
+def _rejecting_app(metrics, reject):
+    app = Flask("limited-test")
+
+    # Registered before instrument(), like flask-limiter's own check
+    @app.before_request
+    def limit():
+        reject()
+
+    metrics.instrument(app)
+
+    @app.route("/hook", methods=["POST"])
+    def hook():
+        return jsonify({}), 200
+
+    return app
+
+
+def test_rejection_before_the_timer_is_counted_and_keeps_in_flight_balanced():
+    metrics = metrics_mod.WebhookMetrics()
+    app = _rejecting_app(metrics, lambda: abort(429))
+    client = app.test_client()
+
+    assert client.post("/hook").status_code == 429
+    assert client.post("/hook").status_code == 429
+
+    assert _sample(metrics, "erni_ki_webhook_rate_limited_total", {"route": "/hook"}) == 2
+    assert _sample(metrics, "erni_ki_webhook_requests_in_flight") == 0
+
+
+def test_flask_limiter_rejections_are_counted():
+    flask_limiter = pytest.importorskip("flask_limiter")
+    from flask_limiter.util import get_remote_address
+
+    metrics = metrics_mod.WebhookMetrics()
+    app = Flask("flask-limiter-test")
+    flask_limiter.Limiter(app=app, key_func=get_remote_address, default_limits=["1 per minute"])
+    metrics.instrument(app)
+
+    @app.route("/hook", methods=["POST"])
+    def hook():
+        return jsonify({}), 200
+
+    client = app.test_client()
+    assert client.post("/hook").status_code == 200
+    assert client.post("/hook").status_code == 429
+
+    assert _sample(metrics, "erni_ki_webhook_rate_limited_total", {"route": "/hook"}) == 1
+    assert _sample(metrics, "erni_ki_webhook_requests_in_flight") == 0
+
+
+def test_unmatched_paths_share_one_label(app_and_metrics):
+    app, metrics = app_and_metrics
+    client = app.test_client()
+    client.get("/nope/1")
+    client.get("/nope/2")
+
+    labels = {"route": "unmatched", "method": "GET", "status": "404"}
+    assert _sample(metrics, "erni_ki_webhook_request_duration_seconds_count", labels) == 2
+
+
+def test_notification_and_recovery_observations():
+    metrics = metrics_mod.WebhookMetrics()
+    metrics.observe_notification("slack", True, 0.1)
+    metrics.observe_notification("slack", False, 0.2)
+    metrics.observe_notification("slack", False, 0.3)
+    metrics.observe_recovery("ollama", 0, 1.0)
+    metrics.observe_recovery("ollama", None, 0.0)
+
+    assert (
+        _sample(
+            metrics,
+            "erni_ki_webhook_notifications_total",
+            {"channel": "slack", "result": "success"},
+        )
+        == 1
+    )
+    assert (
+        _sample(
+            metrics,
+            "erni_ki_webhook_notifications_total",
+            {"channel": "slack", "result": "failure"},
+        )
+        == 2
+    )
+    assert (
+        _sample(
+            metrics, "erni_ki_webhook_notification_duration_seconds_count", {"channel": "slack"}
+        )
+        == 3
+    )
+    for result in ("success", "not_run"):
+        assert (
+            _sample(
+                metrics,
+                "erni_ki_webhook_recovery_duration_seconds_count",
+                {"service": "ollama", "result": result},
+            )
+            == 1
+        )
+
+
+def test_metrics_endpoint_renders_prometheus_text(app_and_metrics):
+    app, _ = app_and_metrics
+    client = app.test_client()
+    client.post("/hook/one")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert b"erni_ki_webhook_request_duration_seconds_bucket" in response.data
+
+
+def test_instances_use_separate_registries():
+    first = metrics_mod.WebhookMetrics()
+    second = metrics_mod.WebhookMetrics()
+    first.observe_notification("discord", True, 0.1)
+
+    assert (
+        _sample(
+            second,
+            "erni_ki_webhook_notifications_total",
+            {"channel": "discord", "result": "success"},
+        )
+        is None
+    )
+
+
+def test_queue_gauges_are_refreshed_on_scrape():
+    metrics = metrics_mod.WebhookMetrics()
+    stats = {"depth": 3, "dead": 1, "oldest_age_seconds": 12.5, "channels": {"slack": 3}}
+    metrics.track_queue(lambda: stats)
+
+    metrics.response()
+    assert _sample(metrics, "erni_ki_webhook_delivery_queue_depth", {"channel": "slack"}) == 3
+    assert _sample(metrics, "erni_ki_webhook_delivery_queue_dead") == 1
+    assert _sample(metrics, "erni_ki_webhook_delivery_queue_oldest_age_seconds") == 12.5
+
+    stats = {"depth": 0, "dead": 1, "oldest_age_seconds": 0.0, "channels": {}}
+    metrics.response()
+    assert _sample(metrics, "erni_ki_webhook_delivery_queue_depth", {"channel": "slack"}) is None
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/ratelimit.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import multiprocessing
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    from flask import Flask
+except ImportError:
+    pytest.skip("flask not installed", allow_module_level=True)
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_ratelimit():
+    module_path = ROOT / "conf" / "webhook-receiver" / "ratelimit.py"
+    spec = importlib.util.spec_from_file_location("ratelimit_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load ratelimit from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["ratelimit_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+ratelimit = load_ratelimit()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """Minimal stand-in for a redis-py client (pipeline with incr/expire/get)."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, int] = {}
+        self.ttls: dict[str, int] = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, server: FakeRedis) -> None:
+        self.server = server
+        self.ops: list[tuple[str, tuple]] = []
+
+    def incr(self, key):
+        self.ops.append(("incr", (key,)))
+
+    def expire(self, key, ttl):
+        self.ops.append(("expire", (key, ttl)))
+
+    def get(self, key):
+        self.ops.append(("get", (key,)))
+
+    def execute(self):
+        results = []
+        for op, args in self.ops:
+            if op == "incr":
+                self.server.data[args[0]] = self.server.data.get(args[0], 0) + 1
+                results.append(self.server.data[args[0]])
+            elif op == "expire":
+                self.server.ttls[args[0]] = args[1]
+                results.append(True)
+            else:
+                value = self.server.data.get(args[0])
+                results.append(None if value is None else str(value).encode())
+        return results
+
+
+def test_parse_rule_variants():
+    assert ratelimit.parse_rule("10 per minute") == (10, 60.0)
+    assert ratelimit.parse_rule("30/hour") == (30, 3600.0)
+    assert ratelimit.parse_rule("5 per 10 seconds") == (5, 10.0)
+    with pytest.raises(ValueError):
+        ratelimit.parse_rule("lots")
+
+
+def test_memory_token_bucket_refills_and_bounds_keys():
+    clock = FakeClock()
+    backend = ratelimit.MemoryBackend(max_keys=2, clock=clock)
+
+    assert [backend.hit("a", 2, 60) for _ in range(3)] == [True, True, False]
+    clock.now += 30  # one token refilled
+    assert backend.hit("a", 2, 60) is True
+    assert backend.hit("a", 2, 60) is False
+
+    backend.hit("b", 2, 60)
+    backend.hit("c", 2, 60)
+    assert len(backend._buckets) == 2
+
+
+def test_mmap_backend_state_is_shared_between_instances(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "ratelimit.bin"
+    first = ratelimit.MmapBackend(path, slots=64, clock=clock)
+    second = ratelimit.MmapBackend(path, slots=64, clock=clock)
+
+    assert first.hit("1.2.3.4:webhook", 2, 60) is True
+    assert second.hit("1.2.3.4:webhook", 2, 60) is True
+    assert first.hit("1.2.3.4:webhook", 2, 60) is False
+    assert second.hit("5.6.7.8:webhook", 2, 60) is True
+    assert path.stat().st_size == 64 * 32
+
+    first.close()
+    second.close()
+
+
+def _hammer(path: str, results) -> None:
+    backend = ratelimit.MmapBackend(Path(path), slots=64)
+    results.put(sum(backend.hit("shared", 20, 3600) for _ in range(10)))
+    backend.close()
+
+
+def test_mmap_backend_enforces_one_limit_across_processes(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_hammer, args=(str(tmp_path / "rl.bin"), results)) for _ in range(4)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=10)
+
+    assert sum(results.get(timeout=5) for _ in procs) == 20
+
+
+def test_redis_sliding_window_with_stand_in():
+    clock = FakeClock()
+    clock.now = 600.0  # start of a 60 s window
+    backend = ratelimit.RedisBackend(FakeRedis(), clock=clock)
+
+    assert [backend.hit("k", 3, 60) for _ in range(4)] == [True, True, True, False]
+    # Halfway through the next window half of the previous count still applies
+    clock.now = 690.0
+    assert backend.hit("k", 3, 60) is True
+    assert backend.hit("k", 3, 60) is False
+
+
+def test_redis_backend_fails_open():
+    class Broken:
+        def pipeline(self):
+            raise ConnectionError("down")
+
+    assert ratelimit.RedisBackend(Broken()).hit("k", 1, 60) is True
+
+
+def test_limiter_keys_by_remote_address_and_route(tmp_path):
+    app = Flask("ratelimit_test")
+    limiter = ratelimit.RateLimiter(ratelimit.create_backend(f"file://{tmp_path}/rl.bin"))
+
+    @app.route("/a")
+    @limiter.limit("1 per minute")
+    def route_a():
+        return "a"
+
+    @app.route("/b")
+    @limiter.limit("1 per minute")
+    def route_b():
+        return "b"
+
+    client = app.test_client()
+    assert client.get("/a").status_code == 200
+    assert client.get("/a").status_code == 429
+    assert client.get("/b").status_code == 200
+    other = client.get("/a", environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert other.status_code == 200
+
+
+def test_default_limits_skip_decorated_and_exempt_routes():
+    app = Flask("ratelimit_defaults_test")
+    limiter = ratelimit.RateLimiter(
+        ratelimit.create_backend("memory://"), app=app, default_limits=["2 per hour"]
+    )
+
+    @app.route("/plain")
+    def plain():
+        return "plain"
+
+    @app.route("/other")
+    def other():
+        return "other"
+
+    @app.route("/limited")
+    @limiter.limit("5 per hour")
+    def limited():
+        return "limited"
+
+    @app.route("/metrics")
+    @limiter.exempt
+    def metrics():
+        return "metrics"
+
+    client = app.test_client()
+    assert [client.get("/plain").status_code for _ in range(3)] == [200, 200, 429]
+    # Default limits are counted per route
+    assert client.get("/other").status_code == 200
+    assert [client.get("/limited").status_code for _ in range(5)] == [200] * 5
+    assert all(client.get("/metrics").status_code == 200 for _ in range(10))
+
+
+def test_create_backend_rejects_unknown_scheme():
+    with pytest.raises(ValueError):
+        ratelimit.create_backend("ftp://nowhere")
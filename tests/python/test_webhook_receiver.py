@@ -8,13 +8,12 @@ import hashlib
 import hmac
 import importlib.util
 import json
-import os
 import sys
 import tempfile
 import unittest
 from pathlib import Path
 from typing import Any, Protocol, cast
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 from pydantic import ValidationError
@@ -30,6 +29,8 @@ class WebhookModule(Protocol):
 
     app: Any
     WEBHOOK_SECRET: str
+    SignatureVerifier: Any
+    signature_verifier: Any
     RECOVERY_DIR: Path
     ALLOWED_SERVICES: set[str]
     AlertLabels: type
@@ -76,49 +77,61 @@ WEBHOOK_SECRET = webhook.WEBHOOK_SECRET
 RECOVERY_DIR = webhook.RECOVERY_DIR
 
 
+@pytest.fixture(autouse=True)
+def _reset_deduplicator():
+    """Tests reuse identical payloads; start each one with an empty dedup cache."""
+    webhook.alert_deduplicator.clear()
+    yield
+
+
 class TestSaveAlertToFile(unittest.TestCase):
     """Test suite for save_alert_to_file function."""
 
-    @patch("webhook_receiver.LOG_DIR")
-    def test_save_alert_creates_file_with_correct_format(self, mock_log_dir):
-        """Test that alert is saved with correct filename format."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            mock_log_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
-
-            alert_data = {"alerts": [{"labels": {"alertname": "Test"}}]}
+    def _journal(self, tmpdir):
+        return webhook.AlertJournal(Path(tmpdir), flush_interval=0.01, compression="none")
 
-            with patch("builtins.open", mock_open()) as mock_file:
+    def test_save_alert_appends_journal_record(self):
+        """Test that alert is appended to the journal as one JSON line."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal = self._journal(tmpdir)
+            with patch.object(webhook, "alert_journal", journal):
+                alert_data = {"alerts": [{"labels": {"alertname": "Test"}}]}
                 save_alert_to_file(alert_data, "critical")
-                mock_file.assert_called_once()
+                self.assertTrue(journal.flush(timeout=5))
+            journal.close()
+
+            segments = list(Path(tmpdir).glob("journal-*.jsonl"))
+            self.assertEqual(len(segments), 1)
+            record = json.loads(segments[0].read_text(encoding="utf-8"))
+            self.assertEqual(record["alert_type"], "critical")
+            self.assertEqual(record["data"], alert_data)
 
-    @patch("webhook_receiver.LOG_DIR")
-    def test_save_alert_handles_encoding(self, mock_log_dir):
+    def test_save_alert_handles_encoding(self):
         """Test that alert data with non-ASCII characters is saved correctly."""
         with tempfile.TemporaryDirectory() as tmpdir:
-            mock_log_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
-
-            alert_data = {
-                "alerts": [{"labels": {"alertname": "Test", "description": "Test Unicode"}}]
-            }
-
-            with patch("builtins.open", mock_open()) as mock_file:
+            journal = self._journal(tmpdir)
+            with patch.object(webhook, "alert_journal", journal):
+                alert_data = {
+                    "alerts": [{"labels": {"alertname": "Test", "description": "Тест Ünicode"}}]
+                }
                 save_alert_to_file(alert_data, "general")
+                journal.flush(timeout=5)
+            journal.close()
 
-                # Verify encoding parameter
-                call_args = mock_file.call_args
-                self.assertIn("encoding", call_args[1])
-                self.assertEqual(call_args[1]["encoding"], "utf-8")
-
-    @patch("webhook_receiver.LOG_DIR")
-    @patch("builtins.open", side_effect=PermissionError("Permission denied"))
-    def test_save_alert_handles_permission_error(self, mock_open_func, mock_log_dir):
-        """Test that permission errors are handled gracefully."""
-        mock_log_dir.__truediv__ = lambda self, other: Path("/nonexistent") / other
-
-        alert_data = {"alerts": []}
+            segment = next(Path(tmpdir).glob("journal-*.jsonl"))
+            record = json.loads(segment.read_bytes().decode("utf-8"))
+            self.assertEqual(record["data"], alert_data)
 
-        # Should not raise exception
-        save_alert_to_file(alert_data, "test")
+    def test_save_alert_handles_unserializable_payload(self):
+        """Test that serialization errors are logged instead of raised."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal = self._journal(tmpdir)
+            with (
+                patch.object(webhook, "alert_journal", journal),
+                self.assertLogs("webhook-receiver", level="ERROR"),
+            ):
+                save_alert_to_file({"alerts": [object()]}, "test")
+            journal.close()
 
 
 class TestProcessAlert(unittest.TestCase):
@@ -213,9 +226,9 @@ class TestHandleCriticalAlert(unittest.TestCase):
             }
         }
 
-        with patch("webhook_receiver.run_recovery_script") as mock_recovery:
+        with patch.object(webhook, "recovery_executor") as mock_executor:
             handle_critical_alert(alert)
-            mock_recovery.assert_called_once_with("ollama")
+            mock_executor.trigger.assert_called_once_with("ollama")
 
     def test_handle_critical_alert_calls_recovery_for_known_services(self):
         """Test that recovery scripts are called for known services."""
@@ -224,18 +237,18 @@ class TestHandleCriticalAlert(unittest.TestCase):
         for service in known_services:
             alert = {"labels": {"service": service}}
 
-            with patch("webhook_receiver.run_recovery_script") as mock_recovery:
+            with patch.object(webhook, "recovery_executor") as mock_executor:
                 handle_critical_alert(alert)
-                mock_recovery.assert_called_once_with(service)
+                mock_executor.trigger.assert_called_once_with(service)
 
     def test_handle_critical_alert_logs_unknown_services(self):
         """Test that unknown services log a message instead of running recovery."""
         alert = {"labels": {"service": "unknown-service"}}
 
-        with patch("webhook_receiver.run_recovery_script") as mock_recovery:
+        with patch.object(webhook, "recovery_executor") as mock_executor:
             handle_critical_alert(alert)
-            # Recovery should not be called for unknown services
-            mock_recovery.assert_not_called()
+            # Recovery should not be triggered for unknown services
+            mock_executor.trigger.assert_not_called()
 
 
 class TestHandleGPUAlert(unittest.TestCase):
@@ -370,6 +383,42 @@ class TestWebhookEndpoints(unittest.TestCase):
         self.assertEqual(data["service"], "webhook-receiver")
         self.assertIn("timestamp", data)
 
+    @patch("webhook_receiver.save_alert_to_file")
+    @patch("webhook_receiver.process_alert")
+    def test_webhook_accepts_previous_secret_during_rotation(self, mock_process, mock_save):
+        """Both the current and the previous secret authenticate until reloaded."""
+        current, previous = "rotated-secret-0123456789", "retired-secret-0123456789"
+        raw = json.dumps(
+            {"alerts": [{"labels": {"alertname": "Rotated"}, "status": "firing"}]}
+        ).encode()
+        signature = hmac.new(previous.encode(), raw, hashlib.sha256).hexdigest()
+        verifier = webhook.SignatureVerifier(current, previous)
+
+        with patch.object(webhook, "signature_verifier", verifier):
+            accepted = self.client.post("/webhook/ai", data=raw, headers={"X-Signature": signature})
+            verifier.load(current)
+            rejected = self.client.post("/webhook/ai", data=raw, headers={"X-Signature": signature})
+
+        self.assertEqual(accepted.status_code, 200)
+        self.assertEqual(rejected.status_code, 401)
+
+    @patch("webhook_receiver.verify_signature", return_value=True)
+    def test_webhook_rejects_non_object_json(self, mock_verify):
+        """A JSON body that is not an object is a payload error, not a server error."""
+        response = self.client.post("/webhook/database", data=b"[]")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data)["error"], "Invalid request payload")
+
+    def test_metrics_endpoint_counts_auth_failures(self):
+        """Rejected requests show up in the Prometheus auth failure counter."""
+        self.client.post("/webhook/gpu", data="{}", headers={"X-Signature": "bad"})
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'erni_ki_webhook_auth_failures_total{route="/webhook/gpu"}', response.data)
+
     @patch("webhook_receiver.save_alert_to_file")
     @patch("webhook_receiver.process_alert")
     @patch("webhook_receiver.verify_signature", return_value=True)
@@ -431,6 +480,9 @@ class TestWebhookEndpoints(unittest.TestCase):
                     },
                     "annotations": {},
                     "status": "firing",
+                    "startsAt": None,
+                    "endsAt": None,
+                    "fingerprint": None,
                 }
             ],
             "groupLabels": {},
@@ -467,29 +519,68 @@ class TestWebhookEndpoints(unittest.TestCase):
                     },
                     "annotations": {},
                     "status": "firing",
+                    "startsAt": None,
+                    "endsAt": None,
+                    "fingerprint": None,
                 }
             ],
             "groupLabels": {},
         }
         mock_save.assert_called_once_with(expected_payload, "gpu")
 
-    @patch("webhook_receiver.LOG_DIR")
-    def test_list_alerts_endpoint(self, mock_log_dir):
-        """Test alerts listing endpoint."""
+    def test_list_alerts_endpoint(self):
+        """Test alerts listing endpoint pages through the indexed store."""
         with tempfile.TemporaryDirectory() as tmpdir:
-            log_dir = Path(tmpdir)
-            mock_log_dir.glob = lambda pattern: log_dir.glob(pattern)
-
-            # Create some test alert files
-            for i in range(3):
-                alert_file = log_dir / f"alert_test_{i}.json"
-                alert_file.write_text(json.dumps({"alerts": [{"test": i}]}))
-
-            response = self.client.get("/alerts")
+            store = webhook.AlertStore(Path(tmpdir) / "alerts.db")
+            with patch.object(webhook, "alert_store", store):
+                for i in range(3):
+                    alert = {"labels": {"alertname": f"Test{i}", "service": "ollama"}}
+                    store.add([{**alert, "status": "firing"}], "test")
+
+                response = self.client.get("/alerts?service=ollama&limit=2")
+                data = json.loads(response.data)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([a["alertname"] for a in data["alerts"]], ["Test2", "Test1"])
+
+                response = self.client.get(f"/alerts?limit=2&cursor={data['next_cursor']}")
+                data = json.loads(response.data)
+                self.assertEqual([a["alertname"] for a in data["alerts"]], ["Test0"])
+                self.assertIsNone(data["next_cursor"])
+
+                response = self.client.get("/alerts?since=yesterday")
+                self.assertEqual(response.status_code, 400)
+            store.close()
 
-            self.assertEqual(response.status_code, 200)
-            data = json.loads(response.data)
-            self.assertIn("alerts", data)
+    @patch("webhook_receiver.process_alert")
+    @patch("webhook_receiver.verify_signature", return_value=True)
+    def test_received_alerts_keep_starts_at(self, mock_verify, mock_process):
+        """startsAt from Alertmanager survives validation into the /alerts index."""
+        payload = {
+            "alerts": [
+                {
+                    "labels": {"alertname": "Disk"},
+                    "status": "firing",
+                    "startsAt": "2025-03-01T10:00:00Z",
+                    "endsAt": "0001-01-01T00:00:00Z",
+                }
+            ]
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = webhook.AlertStore(Path(tmpdir) / "alerts.db")
+            journal = webhook.AlertJournal(Path(tmpdir), flush_interval=0.01, compression="none")
+            with (
+                patch.object(webhook, "alert_store", store),
+                patch.object(webhook, "alert_journal", journal),
+            ):
+                response = self.client.post(
+                    "/webhook", data=json.dumps(payload), content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 200)
+                data = json.loads(self.client.get("/alerts").data)
+            journal.close()
+            store.close()
+
+        self.assertEqual(data["alerts"][0]["starts_at"], "2025-03-01T10:00:00Z")
 
     @patch("webhook_receiver.process_alert", side_effect=Exception("Test error"))
     @patch("webhook_receiver.verify_signature", return_value=True)
@@ -521,20 +612,10 @@ class TestSignatureVerification(unittest.TestCase):
 
         expected_signature = hmac.new(test_secret.encode(), test_body, hashlib.sha256).hexdigest()
 
-        # Temporarily override WEBHOOK_SECRET
-        original_secret = webhook.WEBHOOK_SECRET
-        original_env = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
-        try:
-            webhook.WEBHOOK_SECRET = test_secret
-            os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = test_secret
+        verifier = webhook.SignatureVerifier(test_secret)
+        with patch.object(webhook, "signature_verifier", verifier):
             result = verify_signature(test_body, expected_signature)
             self.assertTrue(result)
-        finally:
-            webhook.WEBHOOK_SECRET = original_secret
-            if original_env is None:
-                os.environ.pop("ALERTMANAGER_WEBHOOK_SECRET", None)
-            else:
-                os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = original_env
 
     def test_verify_signature_with_invalid_signature(self):
         """Test that invalid signatures are rejected."""
@@ -542,51 +623,26 @@ class TestSignatureVerification(unittest.TestCase):
         test_body = b"test alert payload"
         invalid_signature = "invalid_signature_that_does_not_match"  # noqa: S105 - test stub
 
-        original_secret = webhook.WEBHOOK_SECRET
-        original_env = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
-        try:
-            webhook.WEBHOOK_SECRET = test_secret
-            os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = test_secret
+        verifier = webhook.SignatureVerifier(test_secret)
+        with patch.object(webhook, "signature_verifier", verifier):
             result = verify_signature(test_body, invalid_signature)
             self.assertFalse(result)
-        finally:
-            webhook.WEBHOOK_SECRET = original_secret
-            if original_env is None:
-                os.environ.pop("ALERTMANAGER_WEBHOOK_SECRET", None)
-            else:
-                os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = original_env
 
     def test_verify_signature_with_missing_signature(self):
         """Test that missing signatures are rejected."""
         test_body = b"test alert payload"
 
-        original_secret = webhook.WEBHOOK_SECRET
-        original_env = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
-        try:
-            webhook.WEBHOOK_SECRET = "some_secret"  # noqa: S105  # pragma: allowlist secret
-            os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = "some_secret"  # noqa: S105  # pragma: allowlist secret
+        verifier = webhook.SignatureVerifier("some_secret")  # noqa: S105  # pragma: allowlist secret
+        with patch.object(webhook, "signature_verifier", verifier):
             result = verify_signature(test_body, None)
             self.assertFalse(result)
-        finally:
-            webhook.WEBHOOK_SECRET = original_secret
-            if original_env is None:
-                os.environ.pop("ALERTMANAGER_WEBHOOK_SECRET", None)
-            else:
-                os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = original_env
 
     def test_verify_signature_with_no_secret_configured(self):
         """Test that verification fails when secret is not configured."""
-        original_secret = webhook.WEBHOOK_SECRET
-        original_env = os.getenv("ALERTMANAGER_WEBHOOK_SECRET")
-        try:
-            webhook.WEBHOOK_SECRET = ""
-            os.environ.pop("ALERTMANAGER_WEBHOOK_SECRET", None)
+        verifier = webhook.SignatureVerifier()
+        with patch.object(webhook, "signature_verifier", verifier):
             result = verify_signature(b"test", "fake_signature")
             self.assertFalse(result)
-        finally:
-            webhook.WEBHOOK_SECRET = original_secret
-            if original_env is not None:
-                os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = original_env
 
 
 class TestAlertLabelValidation(unittest.TestCase):
@@ -1101,7 +1157,8 @@ def test_process_alert_network_error_handling(monkeypatch, tmp_path, caplog):
     import requests
 
     monkeypatch.setenv("ALERTMANAGER_WEBHOOK_SECRET", "test-secret-123456")
-    monkeypatch.setattr(webhook, "ALERTS_DIR", tmp_path)
+    journal = webhook.AlertJournal(tmp_path, flush_interval=0.01, compression="none")
+    monkeypatch.setattr(webhook, "alert_journal", journal)
 
     # Mock requests to raise network error
     def mock_post(*args, **kwargs):
@@ -1115,12 +1172,14 @@ def test_process_alert_network_error_handling(monkeypatch, tmp_path, caplog):
         ]
     }
 
-    # Should not raise, alert should still be processed
+    # Should not raise, alert should still be processed and journaled
+    webhook.save_alert_to_file(payload, "test")
     webhook.process_alert(payload, "test")
+    assert journal.flush(timeout=5)
+    journal.close()
 
-    # Check that alert was saved despite notification failure
-    alert_files = list(tmp_path.glob("test_*.json"))
-    assert len(alert_files) > 0
+    records = [json.loads(p.read_text()) for p in tmp_path.glob("journal-*.jsonl")]
+    assert [record["alert_type"] for record in records] == ["test"]
 
 
 # ============================================================================
@@ -1215,6 +1274,8 @@ def test_concurrent_webhook_requests(client, monkeypatch):
     import threading
 
     monkeypatch.setenv("ALERTMANAGER_WEBHOOK_SECRET", "test-secret-123456")
+    # `client` serves webhook_handler, which reads secrets only on reload
+    sys.modules["webhook_handler"].reload_secrets()
 
     results = []
 
@@ -1256,13 +1317,15 @@ def test_concurrent_webhook_requests(client, monkeypatch):
 def test_save_alert_disk_full_simulation(monkeypatch, tmp_path, caplog):
     """Test handling of disk full scenarios when saving alerts."""
     monkeypatch.setenv("ALERTMANAGER_WEBHOOK_SECRET", "test-secret-123456")
-    monkeypatch.setattr(webhook, "ALERTS_DIR", tmp_path)
+    journal = webhook.AlertJournal(tmp_path, flush_interval=0.01, compression="none")
+    monkeypatch.setattr(webhook, "alert_journal", journal)
 
-    # Mock open to raise OSError (disk full)
+    # Mock open to raise OSError (disk full) for writes
     original_open = open
 
     def mock_open(*args, **kwargs):
-        if "w" in str(kwargs.get("mode", args[1] if len(args) > 1 else "")):
+        mode = str(kwargs.get("mode", args[1] if len(args) > 1 else ""))
+        if "w" in mode or "a" in mode:
             raise OSError("No space left on device")
         return original_open(*args, **kwargs)
 
@@ -1270,19 +1333,23 @@ def test_save_alert_disk_full_simulation(monkeypatch, tmp_path, caplog):
 
     payload = {"test": "data"}
 
-    # Should handle gracefully and log error
+    # Should handle gracefully and log error from the writer thread
     webhook.save_alert_to_file(payload, "test")
+    assert journal.flush(timeout=5)
+    journal.close()
 
-    assert "error" in caplog.text.lower() or "failed" in caplog.text.lower()
+    assert "failed" in caplog.text.lower()
+    assert not list(tmp_path.glob("journal-*"))
 
 
 def test_save_alert_concurrent_writes(monkeypatch, tmp_path):
-    """Test concurrent alert file writes don't corrupt data."""
+    """Test concurrent alert journal writes don't corrupt data."""
     import json
     import threading
 
     monkeypatch.setenv("ALERTMANAGER_WEBHOOK_SECRET", "test-secret-123456")
-    monkeypatch.setattr(webhook, "ALERTS_DIR", tmp_path)
+    journal = webhook.AlertJournal(tmp_path, flush_interval=0.01, compression="none")
+    monkeypatch.setattr(webhook, "alert_journal", journal)
 
     def write_alert(alert_id):
         payload = {"alert_id": alert_id, "data": "test"}
@@ -1297,13 +1364,102 @@ def test_save_alert_concurrent_writes(monkeypatch, tmp_path):
     for thread in threads:
         thread.join()
 
-    # Verify all files were created and contain valid JSON
-    alert_files = list(tmp_path.glob("test_*.json"))
-    assert len(alert_files) == 10
+    assert journal.flush(timeout=5)
+    journal.close()
+
+    # Verify every record landed on its own valid JSON line
+    lines = [
+        line
+        for segment in tmp_path.glob("journal-*.jsonl")
+        for line in segment.read_text().splitlines()
+    ]
+    assert len(lines) == 10
+    assert sorted(json.loads(line)["data"]["alert_id"] for line in lines) == list(range(10))
+
+
+# ============================================================================
+# Tests for duplicate suppression
+# ============================================================================
+
+
+def test_duplicate_delivery_skips_persistence_and_processing(monkeypatch):
+    """A re-sent alert within the TTL is not saved or processed again."""
+    saved = []
+    processed = []
+    monkeypatch.setattr(webhook, "verify_signature", lambda *_: True)
+    monkeypatch.setattr(webhook, "save_alert_to_file", lambda data, t: saved.append(data))
+    monkeypatch.setattr(webhook, "process_alert", lambda data, t: processed.append(data))
+    client = app.test_client()
+    payload = {"alerts": [{"labels": {"alertname": "Repeat"}, "status": "firing"}]}
+
+    first = client.post("/webhook/warning", json=payload)
+    second = client.post("/webhook/warning", json=payload)
+    resolved = client.post(
+        "/webhook/warning",
+        json={"alerts": [{"labels": {"alertname": "Repeat"}, "status": "resolved"}]},
+    )
+
+    assert first.status_code == second.status_code == resolved.status_code == 200
+    assert second.get_json()["duplicates"] == 1
+    assert len(saved) == len(processed) == 2
+    stats = webhook.alert_deduplicator.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_failed_processing_does_not_poison_dedup_cache(monkeypatch):
+    """Alertmanager's retry after a 500 must be processed, not deduplicated."""
+    monkeypatch.setattr(webhook, "verify_signature", lambda *_: True)
+    monkeypatch.setattr(webhook, "save_alert_to_file", lambda *_: None)
+    calls = []
+
+    def flaky_process(data, alert_type):
+        calls.append(data)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(webhook, "process_alert", flaky_process)
+    client = app.test_client()
+    payload = {"alerts": [{"labels": {"alertname": "Retry"}, "status": "firing"}]}
+
+    assert client.post("/webhook", json=payload).status_code == 500
+    assert client.post("/webhook", json=payload).status_code == 200
+    assert len(calls) == 2
+
+
+# ============================================================================
+# Tests for background recovery execution
+# ============================================================================
+
+
+def test_critical_burst_runs_recovery_once_and_reports_status(monkeypatch):
+    """Concurrent critical alerts for one service coalesce into a single background run."""
+    import threading
 
-    for alert_file in alert_files:
-        data = json.loads(alert_file.read_text())
-        assert "alert_id" in data
+    release = threading.Event()
+    calls = []
+
+    def slow_recovery(service):
+        calls.append(service)
+        release.wait(timeout=5)
+        return 0
+
+    executor = webhook.RecoveryExecutor(lambda s: slow_recovery(s), max_workers=1, cooldown=60)
+    monkeypatch.setattr(webhook, "recovery_executor", executor)
+
+    for _ in range(5):
+        handle_critical_alert({"labels": {"service": "ollama"}})
+    release.set()
+    executor.shutdown(wait=True)
+    handle_critical_alert({"labels": {"service": "ollama"}})
+
+    assert calls == ["ollama"]
+    status = app.test_client().get("/recovery").get_json()["services"]["ollama"]
+    assert status["runs"] == 1
+    assert status["coalesced"] == 4
+    assert status["skipped_cooldown"] == 1
+    assert status["last_exit_code"] == 0
+    assert status["running"] is False
 
 
 # End of additional tests for webhook_receiver.py
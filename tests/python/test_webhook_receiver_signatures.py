@@ -6,6 +6,7 @@ from __future__ import annotations
 import hashlib
 import hmac
 import importlib.util
+import json
 import os
 import sys
 from pathlib import Path
@@ -38,7 +39,7 @@ def test_verify_signature_valid():
     body = b"{}"
     secret = "secret"  # noqa: S105  # pragma: allowlist secret
     os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = secret
-    wh.WEBHOOK_SECRET = secret
+    wh.signature_verifier.load(secret)
     sig = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
     assert wh.verify_signature(body, sig) is True
 
@@ -47,7 +48,7 @@ def test_verify_signature_invalid():
     wh = load_webhook_receiver()
     body = b"{}"
     os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = "secret"  # noqa: S105  # pragma: allowlist secret
-    wh.WEBHOOK_SECRET = "secret"  # noqa: S105  # pragma: allowlist secret
+    wh.signature_verifier.load("secret")  # noqa: S105  # pragma: allowlist secret
     assert wh.verify_signature(body, "bad") is False
 
 
@@ -71,10 +72,10 @@ def test_webhook_critical_with_valid_signature():
     wh = load_webhook_receiver()
     client = wh.app.test_client()
     body = {"alerts": [{"labels": {"alertname": "X"}, "status": "firing"}]}
-    raw = wh.json.dumps(body).encode()
+    raw = json.dumps(body).encode()
     secret = "secret"  # noqa: S105  # pragma: allowlist secret
     os.environ["ALERTMANAGER_WEBHOOK_SECRET"] = secret
-    wh.WEBHOOK_SECRET = secret
+    wh.signature_verifier.load(secret)
     sig = hmac.new(secret.encode(), raw, hashlib.sha256).hexdigest()
     with (
         patch.object(wh, "save_alert_to_file") as mock_save,
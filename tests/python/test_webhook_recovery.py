@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/recovery.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_recovery():
+    module_path = ROOT / "conf" / "webhook-receiver" / "recovery.py"
+    spec = importlib.util.spec_from_file_location("recovery_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load recovery from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["recovery_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+recovery = load_recovery()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_concurrent_triggers_are_coalesced_into_one_run():
+    release = threading.Event()
+    calls: list[str] = []
+
+    def runner(service: str) -> int:
+        calls.append(service)
+        release.wait(timeout=5)
+        return 0
+
+    executor = recovery.RecoveryExecutor(runner, max_workers=2, cooldown=0)
+    assert executor.trigger("ollama") == recovery.TRIGGER_STARTED
+    assert executor.trigger("ollama") == recovery.TRIGGER_COALESCED
+    assert executor.status()["ollama"]["running"] is True
+    release.set()
+    executor.shutdown(wait=True)
+
+    assert calls == ["ollama"]
+    status = executor.status()["ollama"]
+    assert status["runs"] == 1
+    assert status["coalesced"] == 1
+    assert status["last_exit_code"] == 0
+    assert status["last_duration_seconds"] is not None
+
+
+def test_cooldown_skips_triggers_until_window_passes():
+    clock = FakeClock()
+    calls: list[str] = []
+    executor = recovery.RecoveryExecutor(lambda s: calls.append(s) or 1, cooldown=300, clock=clock)
+
+    executor.trigger("searxng")
+    executor.shutdown(wait=True)
+    assert executor.trigger("searxng") == recovery.TRIGGER_COOLDOWN
+    assert executor.status()["searxng"]["cooldown_remaining_seconds"] == 300.0
+
+    clock.now += 301
+    assert executor.trigger("searxng") == recovery.TRIGGER_STARTED
+    executor.shutdown(wait=True)
+
+    assert calls == ["searxng", "searxng"]
+    assert executor.status()["searxng"]["last_exit_code"] == 1
+    assert executor.status()["searxng"]["skipped_cooldown"] == 1
+
+
+def test_services_run_independently_on_bounded_pool():
+    started = threading.Barrier(2, timeout=5)
+
+    def runner(service: str) -> int:
+        started.wait()
+        return 0
+
+    executor = recovery.RecoveryExecutor(runner, max_workers=2, cooldown=0)
+    executor.trigger("ollama")
+    executor.trigger("openwebui")
+    executor.shutdown(wait=True)
+
+    assert {s: v["runs"] for s, v in executor.status().items()} == {"ollama": 1, "openwebui": 1}
+
+
+def test_runner_exception_is_recorded():
+    def runner(service: str) -> int:
+        raise RuntimeError("boom")
+
+    executor = recovery.RecoveryExecutor(runner, cooldown=0)
+    executor.trigger("ollama")
+    executor.shutdown(wait=True)
+
+    status = executor.status()["ollama"]
+    assert status["last_error"] == "boom"
+    assert status["last_exit_code"] is None
+    assert status["running"] is False
+
+
+def test_lock_dir_enforces_single_flight_and_cooldown_across_executors(tmp_path):
+    release = threading.Event()
+    calls: list[str] = []
+
+    def runner(service: str) -> int:
+        calls.append(service)
+        release.wait(timeout=5)
+        return 0
+
+    # Two executors stand in for two gunicorn worker processes
+    first = recovery.RecoveryExecutor(runner, cooldown=300, lock_dir=tmp_path)
+    second = recovery.RecoveryExecutor(runner, cooldown=300, lock_dir=tmp_path)
+
+    assert first.trigger("ollama") == recovery.TRIGGER_STARTED
+    assert second.trigger("ollama") == recovery.TRIGGER_COALESCED
+    release.set()
+    first.shutdown(wait=True)
+
+    assert second.trigger("ollama") == recovery.TRIGGER_COOLDOWN
+    # A restarted process still sees the cooldown stamp
+    restarted = recovery.RecoveryExecutor(runner, cooldown=300, lock_dir=tmp_path)
+    assert restarted.trigger("ollama") == recovery.TRIGGER_COOLDOWN
+    assert calls == ["ollama"]
+    assert second.status()["ollama"]["coalesced"] == 1
+
+
+def test_lock_dir_allows_runs_after_cooldown(tmp_path):
+    calls: list[str] = []
+    executor = recovery.RecoveryExecutor(
+        lambda s: calls.append(s) or 0, cooldown=0, lock_dir=tmp_path
+    )
+
+    assert executor.trigger("searxng") == recovery.TRIGGER_STARTED
+    executor.shutdown(wait=True)
+    assert executor.trigger("searxng") == recovery.TRIGGER_STARTED
+    executor.shutdown(wait=True)
+
+    assert calls == ["searxng", "searxng"]
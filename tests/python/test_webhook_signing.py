@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/signing.py."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import importlib.util
+import os
+import signal
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+CURRENT = "current-secret-0123456789"  # noqa: S105  # pragma: allowlist secret
+PREVIOUS = "previous-secret-0123456789"  # noqa: S105  # pragma: allowlist secret
+
+
+def load_signing():
+    module_path = ROOT / "conf" / "webhook-receiver" / "signing.py"
+    spec = importlib.util.spec_from_file_location("signing_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load signing from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["signing_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+signing = load_signing()
+
+
+def _sign(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_signature_matches_plain_hmac_across_repeated_calls():
+    verifier = signing.SignatureVerifier(CURRENT)
+    for body in (b"{}", b'{"alerts": []}', b""):
+        assert verifier.verify_signature(body, _sign(CURRENT, body)) is True
+        assert verifier.verify_signature(body, _sign("other-secret-0123456789", body)) is False
+    assert verifier.verify_signature(b"{}", None) is False
+
+
+def test_previous_secret_is_accepted_until_rotation_completes():
+    verifier = signing.SignatureVerifier(CURRENT, PREVIOUS)
+    body = b'{"alerts": []}'
+
+    assert verifier.verify_signature(body, _sign(PREVIOUS, body)) is True
+    assert verifier.verify_token(f"Bearer {PREVIOUS}") is True
+
+    verifier.load(CURRENT)
+
+    assert verifier.verify_signature(body, _sign(PREVIOUS, body)) is False
+    assert verifier.verify_token(f"Bearer {PREVIOUS}") is False
+    assert verifier.verify_signature(body, _sign(CURRENT, body)) is True
+
+
+def test_bearer_token_requires_scheme_and_exact_secret():
+    verifier = signing.SignatureVerifier(CURRENT)
+
+    assert verifier.verify_token(f"Bearer {CURRENT}") is True
+    assert verifier.verify_token(CURRENT) is False
+    assert verifier.verify_token(f"Bearer {CURRENT}x") is False
+    assert verifier.verify_token(None) is False
+
+
+def test_unconfigured_verifier_rejects_everything():
+    verifier = signing.SignatureVerifier()
+
+    assert verifier.configured is False
+    assert verifier.verify_signature(b"{}", _sign("", b"{}")) is False
+    assert verifier.verify_token("Bearer ") is False
+
+
+def test_read_secrets_prefers_file_variables(tmp_path):
+    secret_file = tmp_path / "secret"
+    secret_file.write_text(f"{CURRENT}\n", encoding="utf-8")
+    env = {
+        "ALERTMANAGER_WEBHOOK_SECRET": "ignored-secret-0123456789",  # pragma: allowlist secret
+        "ALERTMANAGER_WEBHOOK_SECRET_FILE": str(secret_file),
+        "ALERTMANAGER_WEBHOOK_SECRET_PREVIOUS": PREVIOUS,
+    }
+
+    assert signing.read_secrets(env) == (CURRENT, PREVIOUS)
+    assert signing.read_secrets({"ALERTMANAGER_WEBHOOK_SECRET_FILE": str(tmp_path / "nope")}) == (
+        None,
+        None,
+    )
+
+
+def test_reload_signal_invokes_callback():
+    calls = []
+    original = signal.getsignal(signal.SIGUSR1)
+    try:
+        assert signing.install_reload_signal(lambda: calls.append(1), signal.SIGUSR1) is True
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert calls == [1]
+    finally:
+        signal.signal(signal.SIGUSR1, original)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Tests for conf/webhook-receiver/templates.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_templates():
+    module_path = ROOT / "conf" / "webhook-receiver" / "templates.py"
+    spec = importlib.util.spec_from_file_location("templates_module", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load templates from {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["templates_module"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+templates = load_templates()
+
+ALERT = {
+    "alert_name": "HighLoad",
+    "severity": "warning",
+    "service": "ollama",
+    "summary": "Load is high",
+    "instance": "gpu-1",
+    "timestamp": "2024-01-01T00:00:00",
+}
+
+
+def test_static_subtrees_are_built_once_and_single_fields_keep_their_type():
+    render = templates.compile_template(
+        {"static": {"a": [1, "b"]}, "count": "{n}", "label": "{name}: {n:03d}", "esc": "{{x}}"}
+    )
+
+    first = render({"n": 7, "name": "x"})
+    second = render({"n": 8, "name": "y"})
+
+    assert first["count"] == 7
+    assert first["label"] == "x: 007"
+    assert first["esc"] == "{x}"
+    assert first["static"] is second["static"]
+
+
+def test_placeholders_in_values_are_not_reformatted():
+    render = templates.compile_template("{summary}")
+
+    assert render({"summary": "{oops} {0}"}) == "{oops} {0}"
+
+
+def test_default_config_renders_built_in_channels():
+    compiled = templates.load_channel_templates(env={})
+
+    (discord,) = compiled["discord"].payloads(ALERT)
+    (telegram,) = compiled["telegram"].payloads(ALERT, chat_id="42")
+
+    embed = discord["embeds"][0]
+    assert embed["title"] == "⚠️ HighLoad"
+    assert embed["color"] == 0xFFA500
+    assert embed["fields"][1]["value"] == "general"
+    assert telegram["chat_id"] == "42"
+    assert telegram["text"].startswith("⚠️ *HighLoad*")
+    assert compiled.lookups["emoji"]({"severity": "bogus"}) == "ℹ️"
+
+
+def test_json_items_are_batched_and_text_is_split():
+    config = {
+        "channels": {
+            "json": {"item": "{alert_name}", "batch": 2, "envelope": {"items": "{items}"}},
+            "text": {
+                "format": "text",
+                "limit": 5,
+                "text": "{summary}",
+                "digest": "{alert_name}: {lines}",
+                "line": "{instance}",
+                "envelope": {"text": "{text}"},
+            },
+        }
+    }
+    compiled = templates.ChannelTemplates(config, env={})
+    digest = {"alert_name": "3 alerts", "digest": [{"alert_name": n} for n in "abc"]}
+
+    assert compiled["json"].payloads(digest) == [{"items": ["a", "b"]}, {"items": ["c"]}]
+    assert compiled["text"].payloads({"summary": "123456789"}) == [
+        {"text": "12345"},
+        {"text": "6789"},
+    ]
+    assert compiled["text"].payloads(dict(digest, digest=[{"instance": "i"}])) == [
+        {"text": "3 ale"},
+        {"text": "rts: "},
+        {"text": "i"},
+    ]
+
+
+def test_text_is_split_on_line_boundaries():
+    assert templates.split_lines("*a1*\n*b2*\n*c3*", 10) == ["*a1*\n*b2*", "*c3*"]
+    # Only a line longer than the limit is cut
+    assert templates.split_lines("ab\ncdefgh\ni", 4) == ["ab", "cdef", "gh\ni"]
+    assert templates.split_lines("", 4) == []
+
+    lines = [f"*alert-{i}* on `host-{i}`" for i in range(300)]
+    chunks = templates.split_lines("\n".join(lines), 4096)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+    assert [line for chunk in chunks for line in chunk.split("\n")] == lines
+
+
+def test_declarative_channels_are_enabled_by_their_settings():
+    disabled = templates.load_channel_templates(env={})
+    enabled = templates.load_channel_templates(env={"GENERIC_WEBHOOK_URL": "https://hook.example"})
+
+    assert [c.name for c in disabled.declarative()] == ["teams", "webhook", "email"]
+    assert not any(c.enabled for c in disabled.declarative())
+    assert enabled["webhook"].enabled
+    assert enabled["webhook"].payloads(ALERT)[0]["alerts"][0]["service"] == "ollama"
+    assert enabled["email"].settings["host"] == "localhost"
+
+
+def test_invalid_channel_definitions_are_rejected():
+    with pytest.raises(ValueError, match="missing item"):
+        templates.ChannelTemplates({"channels": {"x": {"envelope": {}}}})
+    with pytest.raises(ValueError, match="unknown transport"):
+        templates.ChannelTemplates(
+            {"channels": {"x": {"item": "", "envelope": {}, "transport": "carrier-pigeon"}}}
+        )